@@ -2,14 +2,19 @@
 # Bu kod, sunucuya 'Authorize' isteği ile SQL payload'u göndererek zafiyet testi yapar.
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -20,14 +25,12 @@ except Exception:
     # Hata vermemesi için pass geçiyoruz, donanım yoksa simülasyon devam eder
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 class SablonChargePoint(cp):
 
@@ -49,7 +52,7 @@ class SablonChargePoint(cp):
         while True:
             sayac += 10 # Normal artış
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # Göndermek için alttaki satırı aktif edebilirsiniz
@@ -1,21 +1,30 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result 
-from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
+from ocpp.v16.enums import AuthorizationStatus, RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.screening import IdTagScreener, supheli_logla
+from secvolt.simclock import simdi
+
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+
+# SQL / komut enjeksiyonu, boyut ve karakter seti imzaları tek birleşik regex'te
+TARAYICI = IdTagScreener()
 
 class SablonChargePoint(cp):
     
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"BAĞLANTI İSTEĞİ: {charge_point_model} ({charge_point_vendor})")
+        logging.info("BAĞLANTI İSTEĞİ: %s (%s)", charge_point_model, charge_point_vendor)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
@@ -24,51 +33,48 @@ class SablonChargePoint(cp):
     async def on_heartbeat(self, **kwargs):
         logging.info("Heartbeat (Yaşam Sinyali) alındı.")
         return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
     # --- ANOMALİ İÇİN EKLENEN KISIM BAŞLANGIÇ ---
     @on('Authorize')
     async def on_authorize(self, id_tag, **kwargs):
-        logging.info(f"YETKİLENDİRME İSTEĞİ GELDİ: Kart ID = {id_tag}")
+        logging.info("YETKİLENDİRME İSTEĞİ GELDİ: Kart ID = %s", id_tag)
 
-        # ZAFİYET SİMÜLASYONU:
-        # Eğer gelen ID, bizim SQL Injection payload'umuzu içeriyorsa, 
-        # sunucu veritabanı kandırılmış gibi davranıp KABUL EDECEK.
-        
-        if "' OR '1'='1'" in id_tag:
-            logging.warning(f"⚠️  KRİTİK GÜVENLİK UYARISI: SQL Injection Payload'u Tespit Edildi! -> {id_tag}")
-            logging.warning("-> SİSTEM ZAFİYETİ TETİKLENDİ: Veritabanı manipüle edildi, Admin girişi ONAYLANDI.")
-            
-            # Normalde reddetmesi gerekirken, zafiyet yüzünden kabul ediyor:
-            return call_result.Authorize(
-                id_tag_info={'status': RegistrationStatus.accepted}
-            )
-        else:
-            # Normal (saldırı olmayan) geçersiz kartlar reddedilir
-            logging.info("Bilinmeyen kart, reddediliyor.")
+        # TARAMA: Yetki sorgusundan önce id_tag imza kümesiyle tek geçişte taranır.
+        # Eskiden yalnızca "' OR '1'='1'" alt dizesi aranıyordu; büyük/küçük harf ya da
+        # farklı bir totoloji ile atlatılabiliyordu.
+        eslesme = TARAYICI.tara(id_tag)
+        if eslesme is not None:
+            supheli_logla(self.id, "Authorize", id_tag, eslesme)
             return call_result.Authorize(
-                id_tag_info={'status': RegistrationStatus.invalid}
+                id_tag_info={'status': AuthorizationStatus.invalid}
             )
+
+        # Normal (saldırı olmayan) geçersiz kartlar reddedilir
+        logging.info("Bilinmeyen kart, reddediliyor.")
+        return call_result.Authorize(
+            id_tag_info={'status': AuthorizationStatus.invalid}
+        )
     # --- ANOMALİ İÇİN EKLENEN KISIM BİTİŞ ---
 
     @on('MeterValues')
     async def on_meter_values(self, connector_id, meter_value, **kwargs):
         try:
             value = meter_value[0]['sampled_value'][0]['value']
-            logging.info(f"ENERJİ RAPORU: {value} Wh (Konnektör: {connector_id})")
+            logging.info("ENERJİ RAPORU: %s Wh (Konnektör: %s)", value, connector_id)
         except Exception as e:
-            logging.error(f"Veri okuma hatası: {e}")
+            logging.error("Veri okuma hatası: %s", e)
         return call_result.MeterValues()
 
 async def on_connect(websocket, path):
     try:
         charge_point_id = path.strip('/')
-        logging.info(f"Cihaz Bağlandı: {charge_point_id}")
+        logging.info("Cihaz Bağlandı: %s", charge_point_id)
         cp_instance = SablonChargePoint(charge_point_id, websocket)
         await cp_instance.start()
     except Exception as e:
-        logging.error(f"Bağlantı hatası: {e}")
+        logging.error("Bağlantı hatası: %s", e)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
@@ -1,14 +1,19 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
 import random
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -19,27 +24,37 @@ except Exception:
     # Hata vermemesi için pass geçiyoruz, donanım yoksa simülasyon devam eder
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
     else:
         # Donanım yoksa da loglayoruz (simülasyon için)
         logging.info(f"[SIM] Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
 
 class SablonChargePoint(cp):
 
+    async def send_boot_notification(self):
+        """ Şarj istasyonu açılış bildirimi (Standart Prosedür) """
+        request = call.BootNotification(
+            charge_point_model="SecVolt-Sim",
+            charge_point_vendor="GroupProject"
+        )
+        response = await self.call(request)
+        if response.status == RegistrationStatus.accepted:
+            logging.info("BootNotification KABUL EDİLDİ.")
+        else:
+            logging.info("BootNotification REDDEDİLDİ.")
+
     async def send_meter_values(self):
         """ Düzenli enerji raporu gönderir (NORMAL DAVRANIŞ) """
         sayac = 0
         while True:
             sayac += 10 # Normal artış
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # Normal davranışta gerçek MeterValues gönderimi (yorumda, isteğe bağlı)
@@ -79,7 +94,7 @@ class SablonChargePoint(cp):
                 # Simüle edilmiş anomali verileri
                 anomaly_info = {
                     "type": "EvilTwin_SSID_Spoofing",
-                    "detected_at": datetime.now(timezone.utc).isoformat(),
+                    "detected_at": simdi().isoformat(),
                     "details": {
                         "spoofed_ssid": "FreeWiFi-CHARGER-001",
                         "signal_strength_dbm": -30 + random.randint(-10, 10),
@@ -106,7 +121,7 @@ class SablonChargePoint(cp):
         - İsterseniz burayı merkezi sunucunuza uygun başka bir OCPP çağrısına (vendor-specific)
           çevirebilirsiniz.
         """
-        timestamp = datetime.now(timezone.utc).isoformat()
+        timestamp = simdi().isoformat()
         # Birincil ölçüm: anomali id / kodunu veya 1/0 değeri gönderiyoruz.
         # Not: OCPP spesifikasyonu numerik string bekleyebilir, ama server tarafı
         # bu context'li kaydı "anomaly" olarak yorumlayabilir.
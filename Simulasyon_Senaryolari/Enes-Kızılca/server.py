@@ -1,81 +1,104 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result 
 from ocpp.v16.enums import RegistrationStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [MERKEZİ SİSTEM] - %(message)s')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.allocation import ChargingAllocator
+from secvolt.simclock import simdi
+from secvolt.siteload import SiteLoadAggregator
+from secvolt.tsdb import TimeSeriesStore
+
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [MERKEZİ SİSTEM] - %(message)s')
 
 # SİMÜLASYON PARAMETRELERİ
 SITE_KAPASITESI = 50000  # Bu lokasyonun trafosu max 50kW kaldırır (50 Amper senaryosu)
 DIGER_ARACLAR_YUKU = 30000 # Otoparktaki diğer araçlar halihazırda 30kW çekiyor
 
+# Tüm MeterValues örnekleri (cp, konnektör, measurand) anahtarıyla burada tutulur
+METER_DEPOSU = TimeSeriesStore()
+
+# Site -> trafo -> konnektör yük ağacı. Diğer araçların yükü artık sabit bir toplama değil,
+# trafo altındaki bir taban yük düğümü; bağlanan her şarj noktası kendi konnektör düğümünü alır.
+YUK_AGACI = SiteLoadAggregator(varsayilan_max_guc_w=22000)
+SITE = YUK_AGACI.site_ekle("SITE-1", SITE_KAPASITESI)
+TRAFO = YUK_AGACI.trafo_ekle("TRAFO-1", SITE, SITE_KAPASITESI)
+YUK_AGACI.taban_yuk_ekle("DIGER_ARACLAR", TRAFO, DIGER_ARACLAR_YUKU)
+YUK_AGACI.varsayilan_ust = TRAFO
+
+# Site kapasitesi aktif işlemlere su doldurma ile paylaştırılır; rapor gelen site
+# bir sonraki turda yeniden çözülür, değişen limitler SetChargingProfile ile gider.
+ATAMA = ChargingAllocator(YUK_AGACI, aralik_ms=1000)
+
 class SmartChargingCSMS(cp):
     
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"Cihaz Bağlandı: {charge_point_model}")
+        logging.info("Cihaz Bağlandı: %s", charge_point_model)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
 
     @on('Heartbeat')
     async def on_heartbeat(self, **kwargs):
-        return call_result.Heartbeat(current_time=datetime.now(timezone.utc).isoformat())
+        return call_result.Heartbeat(current_time=simdi().isoformat())
 
     @on('MeterValues')
     async def on_meter_values(self, connector_id, meter_value, **kwargs):
         try:
+            METER_DEPOSU.meter_values_ekle(self.id, connector_id, meter_value)
             # 1. Gelen Veriyi Oku (Manipüle Edilmiş Veri)
             raw_value = meter_value[0]['sampled_value'][0]['value']
-            bildirilen_tuketim = int(raw_value)
+            bildirilen_tuketim = float(raw_value)
             
-            logging.info(f"Rapor Alındı: İstasyon {bildirilen_tuketim}W tükettiğini iddia ediyor.")
+            logging.info("Rapor Alındı: İstasyon %s, sayaç %s Wh bildiriyor.", self.id, bildirilen_tuketim)
 
             # 2. YÜK DENGELEME ALGORİTMASI (Smart Charging Logic)
-            # Algoritma: (Toplam Kapasite) - (Bildirilen Tüketim) - (Diğer Araçlar) = Boş Kapasite
-            # HATA BURADA: Algoritma "Bildirilen Tüketim"e güveniyor[cite: 2].
+            # Yük ağacı raporu konnektör düğümüne işler: sayaç farkından türetilen güç
+            # fiziksel sınırla karşılaştırılır, şüpheli / ölçülmemiş konnektör en kötü
+            # durum (konnektör gücü) olarak sayılır. Site toplamı tüm bağlı şarj
+            # noktalarını ve taban yükü içerir.
+            YUK_AGACI.meter_values_ekle(self.id, connector_id, meter_value)
+            tahmini_toplam_yuk = YUK_AGACI.yuk[SITE]
+            bos_kapasite = YUK_AGACI.bos_kapasite(SITE)
             
-            tahmini_toplam_yuk = DIGER_ARACLAR_YUKU + bildirilen_tuketim
-            bos_kapasite = SITE_KAPASITESI - tahmini_toplam_yuk
-            
-            logging.info(f"--- ALGORİTMA KARARI ---")
-            logging.info(f"Algılanan Toplam Yük: {tahmini_toplam_yuk}W")
-            logging.info(f"Hesaplanan Boş Kapasite: {bos_kapasite}W")
-
-            if bos_kapasite > 10000:
-                # CSMS kandırıldı! Boş yer var sanıyor.
-                logging.info(f"✅ KARAR: Şebeke rahat. Diğer istasyonlara ek güç veriliyor (+10kW).")
-                
-                # --- FİZİKSEL GERÇEKLİK (SİMÜLASYON) ---
-                # Gerçekte saldırgan 22000W çekiyor. Diğerleri 30000W çekiyor.
-                # Ek güç verilirse diğerleri 40000W çekecek.
-                # GERÇEK YÜK = 22000 (Saldırgan) + 40000 (Diğerleri) = 62000W
-                # KAPASİTE = 50000W
-                
-                logging.error(f"🚨 SİBER-FİZİKSEL ÇÖKÜŞ: Gerçek Yük (62kW) > Kapasite (50kW)")
-                logging.error(f"🔥🔥 SİGORTA ATTI! BÖLGESEL KESİNTİ (DoS) BAŞLADI 🔥🔥")
-                
-            else:
-                logging.warning("Şebeke sınırda. Güç artırımı reddedildi.")
+            logging.info("--- ALGORİTMA KARARI ---")
+            logging.info("Algılanan Toplam Yük: %sW", tahmini_toplam_yuk)
+            logging.info("Hesaplanan Boş Kapasite: %sW", bos_kapasite)
+
+            # 3. PAYLAŞTIRMA: Sabit eşikli "ek güç ver" kararı yerine site kapasitesi
+            # (taban yük ve şüpheli konnektörlerin en kötü durumu düşülerek) aktif
+            # işlemlere adil paylaştırılır. Şüpheli konnektör yönetilmez, kapasiteden
+            # konnektör gücüyle düşülür; sahte düşük rapor başkalarına pay açamaz.
+            ATAMA.rapor(self.id, connector_id)
+            onceki_limit = ATAMA.limit(self.id, connector_id)
+            if onceki_limit is not None:
+                logging.info("Bu konnektörün geçerli limiti: %.0fW", onceki_limit)
 
         except Exception as e:
-            logging.error(f"Veri hatası: {e}")
+            logging.error("Veri hatası: %s", e)
 
         return call_result.MeterValues()
 
 async def on_connect(websocket, path):
     cp = SmartChargingCSMS(path.strip('/'), websocket)
-    await cp.start()
+    ATAMA.baglan(cp)
+    try:
+        await cp.start()
+    finally:
+        ATAMA.ayril(cp.id)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
-        logging.info(f"--- AKILLI ŞEBEKE YÖNETİMİ (Kapasite: {SITE_KAPASITESI}W) ---")
+        logging.info("--- AKILLI ŞEBEKE YÖNETİMİ (Kapasite: %sW) ---", SITE_KAPASITESI)
         await asyncio.Future()
 
 if __name__ == '__main__':
@@ -1,15 +1,23 @@
 
 import asyncio
+import json
 import logging
+import os
+import sys
 import can
 import websockets
-from datetime import datetime, timezone
 import random
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus, ReadingContext
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.cansched import OncelikliCanGonderici, iletildi_mi
+from secvolt.dispatch import ConcurrentDispatchMixin
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -20,22 +28,27 @@ except Exception:
     # Hata vermemesi için pass geçiyoruz, donanım yoksa simülasyon devam eder
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+# Şarj başlatma komutu (0x100) kritik sınıfta: kuyruğun önüne geçer, 100 ms son tarihle gönderilir
+CAN_GONDERICI = OncelikliCanGonderici(CAN_HATTI) if CAN_HATTI else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_GONDERICI:
+        return komut_yolla(CAN_GONDERICI, can_id, data)
+    return None
 
 # --- ANOMALİ SENARYOSU EKLEME ---
 
-class AnomaliChargePoint(cp):
+class AnomaliChargePoint(ConcurrentDispatchMixin, cp):
     """
     Bu sınıf, normal OCPP 1.6 işlevselliğine ek olarak
     Kimlik Sahtekarlığı ve Yanlış Veri Enjeksiyonu
     saldırılarını simüle eden metodlar içerir.
+
+    Gelen çağrılar eşzamanlı dağıtılır (ConcurrentDispatchMixin); böylece
+    on_remote_start_transaction içindeki StartTransaction cevabı, handler
+    beklerken de okunabilir.
     """
     
     def __init__(self, charge_point_id, websocket):
@@ -43,6 +56,12 @@ class AnomaliChargePoint(cp):
         self.transaction_id = 0
         self.anomali_tetiklendi = False
 
+    async def can_son_tarih_kacti(self, olay):
+        """ Kritik CAN çerçevesi son tarihinde hatta çıkamadı; CSMS'e DataTransfer ile bildirilir. """
+        ayrinti = dict(olay, can_id=hex(olay["can_id"]), son_tarih_ms=round(olay["son_tarih_ms"], 1))
+        await self.call(call.DataTransfer(vendor_id="AnomalyTech", message_id="CanDeadlineMiss",
+                                          data=json.dumps(ayrinti)))
+
     async def send_call(self, call):
         """
         OCPP mesaj gönderimini MitM (Ortadaki Adam) saldırısını simüle etmek için geçersiz kılıyoruz.
@@ -76,7 +95,7 @@ class AnomaliChargePoint(cp):
             connector_id=connector_id,
             id_tag=unauthorized_id_tag,
             meter_start=150000, # Normalde yetkisiz bir başlangıç değeri
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=simdi().isoformat(),
             reservation_id=None
         )
 
@@ -89,7 +108,7 @@ class AnomaliChargePoint(cp):
             await self.call(call.StopTransaction(
                 transaction_id=response.transaction_id,
                 meter_stop=150010,
-                timestamp=datetime.now(timezone.utc).isoformat(),
+                timestamp=simdi().isoformat(),
                 id_tag=unauthorized_id_tag
             ))
             logging.warning("Anormal İşlem Başlatıldı ve Durduruldu.")
@@ -113,7 +132,7 @@ class AnomaliChargePoint(cp):
             transaction_id=transaction_id,
             meter_value=[
                 {
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": simdi().isoformat(),
                     "sampledValue": [
                         {
                             "value": yanlis_deger,
@@ -136,7 +155,7 @@ class AnomaliChargePoint(cp):
         return call_result.BootNotification(
             status=RegistrationStatus.Accepted,
             interval=300,
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
     @on('RemoteStartTransaction')
@@ -144,8 +163,13 @@ class AnomaliChargePoint(cp):
         logging.info(f"CSMS'den Uzaktan Başlatma Komutu alındı. ID: {id_tag}")
         
         # Gerçek bir şarj noktasında, burası bir CAN mesajı göndererek
-        # donanımı (şarjı) başlatırdı.
-        donanima_komut_yolla(0x100, [0x01, 0x01])
+        # donanımı (şarjı) başlatırdı. Komut son tarihinde hatta çıkmazsa
+        # şarj başlamamıştır: işlem açılmaz, komut reddedilir.
+        fut = donanima_komut_yolla(0x100, [0x01, 0x01])
+        if CAN_GONDERICI and not await iletildi_mi(fut):
+            return call_result.RemoteStartTransaction(
+                status=RemoteStartStopStatus.rejected
+            )
         
         # İşlemi başlattıktan sonra StartTransaction göndermeyi simüle ediyoruz
         # (Normalde donanım cevabına bağlıdır)
@@ -153,7 +177,7 @@ class AnomaliChargePoint(cp):
             connector_id=connector_id,
             id_tag=id_tag,
             meter_start=150000,
-            timestamp=datetime.now(timezone.utc).isoformat(),
+            timestamp=simdi().isoformat(),
         ))
         
         return call_result.RemoteStartTransaction(
@@ -173,25 +197,29 @@ async def main():
         async with websockets.connect(csms_url, subprotocols=['ocpp1.6']) as websocket:
             
             charge_point = AnomaliChargePoint(charge_point_id, websocket)
+            if CAN_GONDERICI:
+                CAN_GONDERICI.kacirma_fn = charge_point.can_son_tarih_kacti
             logging.info(f"CSMS'ye bağlanıldı: {csms_url}. ID: {charge_point_id}")
             
-            # BootNotification'ı gönder
-            await charge_point.call(call.BootNotification(
-                charge_point_model='AnomaliSim',
-                charge_point_vendor='AnomalyTech'
-            ))
-            
-            # --- ANOMALİ VURGUSU ---
-            # Birkaç saniye sonra Kimlik Sahtekarlığı saldırısını tetikle
-            await asyncio.sleep(5)
-            # Yetkisiz bir ID kullanarak şarj işlemi başlatmaya çalış
-            await charge_point.anomali_baslat_yetkisiz_islem(
-                connector_id=1, 
-                unauthorized_id_tag="ANOMALY-TAG-999"
-            )
-            
-            # CSMS'den gelen komutları dinle
-            await charge_point.start()
+            async def senaryo():
+                # BootNotification'ı gönder
+                await charge_point.call(call.BootNotification(
+                    charge_point_model='AnomaliSim',
+                    charge_point_vendor='AnomalyTech'
+                ))
+
+                # --- ANOMALİ VURGUSU ---
+                # Birkaç saniye sonra Kimlik Sahtekarlığı saldırısını tetikle
+                await asyncio.sleep(5)
+                # Yetkisiz bir ID kullanarak şarj işlemi başlatmaya çalış
+                await charge_point.anomali_baslat_yetkisiz_islem(
+                    connector_id=1,
+                    unauthorized_id_tag="ANOMALY-TAG-999"
+                )
+
+            # Alma döngüsü senaryoyla birlikte çalışır (cevaplar okunabilsin diye);
+            # senaryo bittikten sonra CSMS'den gelen komutlar dinlenmeye devam eder
+            await charge_point.run_with(senaryo())
 
     except ConnectionRefusedError:
         logging.error(f"Bağlantı Reddedildi: CSMS ({csms_url}) çalışmıyor veya erişilebilir değil.")
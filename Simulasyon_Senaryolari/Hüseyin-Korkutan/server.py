@@ -1,77 +1,165 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 from decimal import Decimal
 
-from ocpp.v16 import ChargePoint as cp, call, call_result 
-from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
+from ocpp.v16 import ChargePoint as cp, call, call_result 
+from ocpp.v16.enums import DataTransferStatus, RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s', handlers=[logging.StreamHandler()])
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.auth import GECERSIZ, KABUL, AuthorizationService
+from secvolt.detection import DetectionEngine
+from secvolt.screening import IdTagScreener, supheli_logla
+from secvolt.simclock import simdi
+from secvolt.tsdb import ENERJI, TimeSeriesStore
+
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
 
 # --- Gözlemsel Savunma Parametreleri ---
 # Finansal manipülasyonu hedefleyen Yanlış Veri Enjeksiyonu (YVE) tespiti için bir eşik belirleyelim.
 # Normal bir şarj cihazının 10 saniye aralığında bu kadar enerji raporlaması mümkün değildir.
 ANOMAL_SAYAC_ESIGI_WH = 2000000 # 2 MWh (2,000,000 Wh). Bu değer, anormal bir veri enjeksiyonunu işaret eder.
 
+# Süreç genelinde tek yetki listesi (Basit yetkili ID listesi simülasyonu); tüm bağlantılar paylaşır
+YETKI = AuthorizationService({"USER-A123", "CPT-2024-001"})
+
+# Yetki sorgusundan önce id_tag enjeksiyon / boyut / karakter seti taraması
+TARAYICI = IdTagScreener()
+
+# Tüm MeterValues örnekleri (cp, konnektör, measurand) anahtarıyla burada tutulur
+METER_DEPOSU = TimeSeriesStore()
+
+# Eşik alarmı metninde measurand'ın kendi birimi kullanılır (Power / Current / SoC da eşik kuralına girer)
+BIRIMLER = {
+    ENERJI: "Wh",
+    "Power.Active.Import": "W",
+    "Current.Import": "A",
+    "Voltage": "V",
+    "SoC": "%",
+}
+
+def yve_alarmi(alarm):
+    if alarm.kural == "esik":
+        temel = alarm.measurand.split("/", 1)[0]
+        birim = BIRIMLER.get(temel, "")
+        alt, ust = TESPIT.esikler[temel]
+        logging.critical("[%s] ‼️ KRİTİK ANOMALİ TESPİTİ (YVE): Anormal %s değeri alındı: %s %s! Eşik: %s-%s %s.",
+                         alarm.cp_id, alarm.measurand, alarm.deger, birim, alt, ust, birim)
+        # Bu noktada, şarj noktasını karantinaya almak veya işlemi durdurmak gibi savunma eylemleri başlatılmalıdır.
+    else:
+        logging.warning("[%s] 🚨 ANOMALİ TESPİTİ (%s): %s = %s (Önceki: %s)", alarm.cp_id, alarm.kural, alarm.measurand, alarm.deger, alarm.onceki)
+
+# YVE eşiği ve sayaç kuralları tüm şarj noktaları için toplu (mikro-batch) değerlendirilir
+TESPIT = DetectionEngine(esikler={ENERJI: (0, ANOMAL_SAYAC_ESIGI_WH)}, alarm_fn=yve_alarmi)
+
 class SablonChargePoint(cp):
-    
-    def __init__(self, charge_point_id, websocket):
-        super().__init__(charge_point_id, websocket)
-        self.authorized_tags = {"USER-A123", "CPT-2024-001"} # Basit yetkili ID listesi simülasyonu
-        logging.info(f"[{charge_point_id}] Yetkili ID'ler: {self.authorized_tags}")
-
-
-    @on('BootNotification')
-    async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"[{self.id}] BAĞLANTI İSTEĞİ: {charge_point_model} ({charge_point_vendor})")
-        return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
-            interval=10,
-            status=RegistrationStatus.accepted
-        )
-
-    @on('Authorize')
-    async def on_authorize(self, id_tag, **kwargs):
-        if id_tag in self.authorized_tags:
-            logging.info(f"[{self.id}] YETKİLENDİRME: ID Tag '{id_tag}' KABUL EDİLDİ.")
-            status = 'Accepted'
-        else:
-            # ANOMALİ TESPİTİ (Kaba Kuvvet/Kimlik Sahtekarlığı Denemesi)
-            logging.warning(f"[{self.id}] 🚨 ANOMALİ DENEMESİ (ID Sahtekarlığı): Yetkisiz ID '{id_tag}' REDDEDİLDİ.")
-            status = 'Invalid'
-            
-        return call_result.Authorize(id_tag_info={'status': status})
-
-
-    @on('Heartbeat')
-    async def on_heartbeat(self, **kwargs):
-        logging.info(f"[{self.id}] Heartbeat (Yaşam Sinyali) alındı.")
-        return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
-        )
-
-    @on('MeterValues')
-    async def on_meter_values(self, connector_id, meter_value, **kwargs):
-        try:
-            # Sadece ilk değeri alıp enerji okumasını kontrol et
-            value_str = meter_value[0]['sampled_value'][0]['value']
-            value = Decimal(value_str)
-            
-            # ANOMALİ TESPİTİ (Yanlış Veri Enjeksiyonu - YVE)
-            if value > ANOMAL_SAYAC_ESIGI_WH:
-                logging.critical(f"[{self.id}] ‼️ KRİTİK ANOMALİ TESPİTİ (YVE): Anormal sayaç değeri alındı: {value} Wh! Eşik: {ANOMAL_SAYAC_ESIGI_WH} Wh.")
-                # Bu noktada, şarj noktasını karantinaya almak veya işlemi durdurmak gibi savunma eylemleri başlatılmalıdır.
-            else:
-                logging.info(f"[{self.id}] ENERJİ RAPORU: {value} Wh (Konnektör: {connector_id})")
-                
-        except Exception as e:
-            logging.error(f"[{self.id}] MeterValues veri okuma hatası: {e}")
-        return call_result.MeterValues()
+    
+    def __init__(self, charge_point_id, websocket):
+        super().__init__(charge_point_id, websocket)
+        self.transaction_id = 0
+        self._liste_gorevi = None
+        logging.info("[%s] Yetkili ID sayısı: %s (liste sürümü %s)", charge_point_id, len(YETKI), YETKI.surum)
+
+
+    @on('BootNotification')
+    async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
+        logging.info("[%s] BAĞLANTI İSTEĞİ: %s (%s)", self.id, charge_point_model, charge_point_vendor)
+        # Cevaptan sonra yerel yetki listesini (SendLocalList) güncel sürüme getir
+        self._liste_gorevi = asyncio.create_task(YETKI.yerel_liste_gonder(self))
+        return call_result.BootNotification(
+            current_time=simdi().isoformat(),
+            interval=10,
+            status=RegistrationStatus.accepted
+        )
+
+    @on('Authorize')
+    async def on_authorize(self, id_tag, **kwargs):
+        eslesme = TARAYICI.tara(id_tag)
+        if eslesme is not None:
+            supheli_logla(self.id, "Authorize", id_tag, eslesme)
+            return call_result.Authorize(id_tag_info={'status': GECERSIZ})
+        id_tag_info = YETKI.dogrula(id_tag)
+        if id_tag_info['status'] == KABUL:
+            logging.info("[%s] YETKİLENDİRME: ID Tag '%s' KABUL EDİLDİ.", self.id, id_tag)
+        else:
+            # ANOMALİ TESPİTİ (Kaba Kuvvet/Kimlik Sahtekarlığı Denemesi)
+            logging.warning("[%s] 🚨 ANOMALİ DENEMESİ (ID Sahtekarlığı): Yetkisiz ID '%s' REDDEDİLDİ (%s).", self.id, id_tag, id_tag_info['status'])
+            
+        return call_result.Authorize(id_tag_info=id_tag_info)
+
+
+    @on('Heartbeat')
+    async def on_heartbeat(self, **kwargs):
+        logging.info("[%s] Heartbeat (Yaşam Sinyali) alındı.", self.id)
+        return call_result.Heartbeat(
+            current_time=simdi().isoformat()
+        )
+
+    @on('MeterValues')
+    async def on_meter_values(self, connector_id, meter_value, **kwargs):
+        try:
+            METER_DEPOSU.meter_values_ekle(self.id, connector_id, meter_value)
+            # ANOMALİ TESPİTİ (Yanlış Veri Enjeksiyonu - YVE): tespit motoruna aktarılır
+            TESPIT.meter_values_ekle(self.id, connector_id, meter_value)
+
+            value = Decimal(meter_value[0]['sampled_value'][0]['value'])
+            logging.info("[%s] ENERJİ RAPORU: %s Wh (Konnektör: %s)", self.id, value, connector_id)
+                
+        except Exception as e:
+            logging.error("[%s] MeterValues veri okuma hatası: %s", self.id, e)
+        return call_result.MeterValues()
     
     @on('StartTransaction')
     async def on_start_transaction(self, connector_id, id_tag, meter_start, timestamp, **kwargs):
-        if id_tag not in self.authorized_tags:
+        eslesme = TARAYICI.tara(id_tag)
+        if eslesme is not None:
+            supheli_logla(self.id, "StartTransaction", id_tag, eslesme)
+            return call_result.StartTransaction(transaction_id=0, id_tag_info={'status': GECERSIZ})
+        id_tag_info = YETKI.dogrula(id_tag)
+        if id_tag_info['status'] != KABUL:
             # ANOMALİ TESPİTİ: StartTransaction yetkilendirme kontrolü (Kimlik Sahtekarlığı)
-            logging.critical(f"[{self.id}] ⚠️ KRİTİK ANOMALİ TESPİTİ (Kimlik Sahtekarlığı): Yetkisiz ID ({id_tag}) ile İşlem Başlatma İsteği Alındı! StartTransaction RED
+            logging.critical("[%s] ⚠️ KRİTİK ANOMALİ TESPİTİ (Kimlik Sahtekarlığı): Yetkisiz ID (%s) ile İşlem Başlatma İsteği Alındı! StartTransaction REDDEDİLDİ.", self.id, id_tag)
+            return call_result.StartTransaction(
+                transaction_id=0,
+                id_tag_info=id_tag_info
+            )
+
+        self.transaction_id += 1
+        logging.info("[%s] İŞLEM BAŞLATILDI: TxID %s (Kart: %s, Başlangıç Sayacı: %s Wh)", self.id, self.transaction_id, id_tag, meter_start)
+        return call_result.StartTransaction(
+            transaction_id=self.transaction_id,
+            id_tag_info=id_tag_info
+        )
+
+    @on('DataTransfer')
+    async def on_data_transfer(self, vendor_id, message_id=None, data=None, **kwargs):
+        if message_id == "CanDeadlineMiss":
+            # İstasyonun kritik CAN komutu (şarj başlatma) son tarihinde iletilemedi
+            logging.error("[%s] CAN SON TARİH AŞIMI: %s", self.id, data)
+        else:
+            logging.info("[%s] DataTransfer: %s / %s", self.id, vendor_id, message_id)
+        return call_result.DataTransfer(status=DataTransferStatus.accepted)
+
+async def on_connect(websocket, path):
+    try:
+        charge_point_id = path.strip('/')
+        logging.info("Cihaz Bağlandı: %s", charge_point_id)
+        cp_instance = SablonChargePoint(charge_point_id, websocket)
+        await cp_instance.start()
+    except Exception as e:
+        logging.error("Bağlantı hatası: %s", e)
+
+async def main():
+    async with serve(on_connect, '0.0.0.0', 9000):
+        logging.info("--- CSMS SUNUCUSU BAŞLATILDI (Port: 9000) ---")
+        await asyncio.Future()
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
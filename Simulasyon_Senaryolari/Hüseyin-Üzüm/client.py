@@ -1,42 +1,66 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus, ChargePointStatus, ChargePointErrorCode
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.cantrace import yakala
+from secvolt.canwatch import CanIzleyici, kural
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 # Log formatı
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SECVOLT-CLIENT] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
 try:
-    # timeout=0.01 ekledik ki okuma işlemi sistemi bloklamasın
     can_bus = can.interface.Bus(channel='vcan0', interface='socketcan', receive_own_messages=True)
     logging.info("Donanım (vcan0) bağlantısı BAŞARILI. Fidye saldırısı için dinleniyor...")
 except Exception:
     logging.warning("vcan0 bulunamadı! Simülasyon donanım olmadan çalışacak (Saldırı simüle edilemez).")
     can_bus = None
 
+# Gönderimler kuyruğa alınır, alım olay güdümlüdür; OCPP döngüsü hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
+# --- CAN İZ KAYDI ---
+# SECVOLT_CAN_IZ=yol verilirse hattın tamamı (filtresiz, ayrı soket) .svct dosyasına kaydedilir;
+# olay sonrası `python -m secvolt.cantrace oynat` ile yeniden üretilebilir.
+CAN_IZ_YOLU = os.environ.get("SECVOLT_CAN_IZ")
+can_iz = None
+if can_bus and CAN_IZ_YOLU:
+    try:
+        iz_bus = can.interface.Bus(channel='vcan0', interface='socketcan', receive_own_messages=True)
+        can_iz = (iz_bus, *yakala(iz_bus, CAN_IZ_YOLU))
+        logging.info("CAN iz kaydı başladı: %s", CAN_IZ_YOLU)
+    except Exception as e:
+        logging.error("CAN iz kaydı başlatılamadı: %s", e)
+
 # --- SALDIRI PARAMETRELERİ ---
 SALDIRI_CAN_ID = 0x1A0  # Senaryoda belirlediğimiz saldırganın kullandığı ID
 FIDYE_NOTU = "SYSTEM HACKED. PAY 1 BTC TO UNLOCK."
+# UDS tanı istekleri (fonksiyonel 0x7DF ve fiziksel 0x7E0-0x7E7)
+UDS_ISTEK_ID = 0x7E0
+UDS_ISTEK_MASKE = 0x7F8
+UDS_FONKSIYONEL_ID = 0x7DF
+# Tek çerçeve (ISO-TP) RequestDownload (0x34): firmware yükleme girişimi
+UDS_REQUEST_DOWNLOAD = rb"\A[\x02-\x07]\x34"
 
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 class SablonChargePoint(cp):
     def __init__(self, id, connection):
         super().__init__(id, connection)
         self.is_hacked = False  # Sistemin hacklenip hacklenmediğini tutan bayrak
+        self.can_izleyici = None
 
     async def send_boot_notification(self):
         req = call.BootNotification(
@@ -59,24 +83,37 @@ class SablonChargePoint(cp):
         )
         await self.call(req)
 
+    def can_kurallari(self):
+        """ CAN kimliği / yük deseni -> eylem tablosu; yalnızca bu kimlikler çekirdek filtresinden geçer. """
+        return [
+            kural("yetkisiz_firmware", SALDIRI_CAN_ID, self.firmware_girisimi, bekleme_s=1.0),
+            kural("uds_request_download", UDS_ISTEK_ID, self.firmware_girisimi, maske=UDS_ISTEK_MASKE,
+                  veri_deseni=UDS_REQUEST_DOWNLOAD, bekleme_s=1.0),
+            kural("uds_fonksiyonel_download", UDS_FONKSIYONEL_ID, self.firmware_girisimi,
+                  veri_deseni=UDS_REQUEST_DOWNLOAD, bekleme_s=1.0),
+        ]
+
+    async def firmware_girisimi(self, msg):
+        # SALDIRI TESPİT EDİLDİ!
+        logging.critical("⚠️ KRİTİK UYARI: Yetkisiz Firmware Yükleme Girişimi Tespit Edildi! (ID: %s, veri: %s)",
+                         hex(msg.arbitration_id), bytes(msg.data).hex())
+        await self.trigger_ransomware_mode()
+
     async def monitor_can_traffic(self):
         """ 
         ANOMALİ TESPİT MODÜLÜ:
-        Sürekli olarak CAN hattını dinler. Eğer saldırganın firmware güncelleme
-        komutu (0x1A0) yakalanırsa, fidye senaryosunu başlatır.
+        CAN hattını olay güdümlü dinler. Çekirdek filtresi yalnızca kural
+        tablosundaki kimlikleri (0x1A0 ve UDS tanı istekleri) geçirir; çerçeve
+        geldiğinde uyanılır, yoklama ve uyku yoktur. Saldırganın firmware
+        güncelleme komutu yakalanırsa fidye senaryosu başlar.
         """
-        logging.info("CAN Bus Dinleyici Aktif - Saldırı bekleniyor...")
-        while True:
-            if can_bus:
-                # Bloklamadan mesaj oku
-                msg = can_bus.recv(timeout=0.01)
-                
-                if msg and msg.arbitration_id == SALDIRI_CAN_ID:
-                    # SALDIRI TESPİT EDİLDİ!
-                    logging.critical(f"⚠️ KRİTİK UYARI: Yetkisiz Firmware Yükleme Girişimi Tespit Edildi! (ID: {hex(msg.arbitration_id)})")
-                    await self.trigger_ransomware_mode()
-            
-            await asyncio.sleep(0.01) # CPU'yu yormamak için kısa bekleme
+        if CAN_HATTI is None:
+            logging.warning("CAN Bus arayüzü aktif değil, dinleyici başlatılmadı.")
+            return
+        self.can_izleyici = CanIzleyici(CAN_HATTI, self.can_kurallari())
+        logging.info("CAN Bus Dinleyici Aktif - Saldırı bekleniyor... (filtreler: %s)",
+                     ", ".join(f"{f['can_id']:#x}/{f['can_mask']:#x}" for f in self.can_izleyici.filtreler()))
+        await self.can_izleyici.calistir()
 
     async def trigger_ransomware_mode(self):
         """ Saldırı anında çalışacak fonksiyon """
@@ -104,7 +141,7 @@ class SablonChargePoint(cp):
 
             sayac += 10
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # Simülasyon için log basalım
@@ -140,4 +177,16 @@ async def main():
             client.monitor_can_traffic()
         )
 
-if __
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        if can_bus: can_bus.shutdown()
+    finally:
+        # Bağlantı koparsa da iz kapanış/indeksle düzgün bitsin
+        if can_iz:
+            iz_bus, notifier, yazici = can_iz
+            notifier.stop()
+            yazici.kapat()
+            iz_bus.shutdown()
+            logging.info("CAN iz kaydı kapandı: %s çerçeve -> %s", yazici.cerceve, CAN_IZ_YOLU)
@@ -1,14 +1,19 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
 import random
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -18,25 +23,35 @@ try:
 except Exception:
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 
 class SablonChargePoint(cp):
 
+    async def send_boot_notification(self):
+        """ Şarj istasyonu açılış bildirimi (Standart Prosedür) """
+        request = call.BootNotification(
+            charge_point_model="SecVolt-Sim",
+            charge_point_vendor="GroupProject"
+        )
+        response = await self.call(request)
+        if response.status == RegistrationStatus.accepted:
+            logging.info("BootNotification KABUL EDİLDİ.")
+        else:
+            logging.info("BootNotification REDDEDİLDİ.")
+
     async def send_meter_values(self):
         """ NORMAL MeterValues Davranışı (değiştirmiyoruz) """
         sayac = 0
         while True:
             sayac += 10
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # NORMAL davranış istersen burayı aç
@@ -70,7 +85,7 @@ class SablonChargePoint(cp):
 
             # 🔥 Manipüle edilmiş veri paketi
             anomalous_payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{
                     "value": str(sayac),
                     "unit": "Wh",
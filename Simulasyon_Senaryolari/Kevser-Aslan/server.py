@@ -1,21 +1,30 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result 
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.detection import DetectionEngine
+from secvolt.simclock import simdi
+
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+
+# Geri giden / sıçrayan sayaçlar (MeterValues yeniden ataması) mikro-batch halinde tespit edilir
+TESPIT = DetectionEngine()
 
 class SablonChargePoint(cp):
     
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"BAĞLANTI İSTEĞİ: {charge_point_model} ({charge_point_vendor})")
+        logging.info("BAĞLANTI İSTEĞİ: %s (%s)", charge_point_model, charge_point_vendor)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
@@ -24,26 +33,27 @@ class SablonChargePoint(cp):
     async def on_heartbeat(self, **kwargs):
         logging.info("Heartbeat (Yaşam Sinyali) alındı.")
         return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
     @on('MeterValues')
     async def on_meter_values(self, connector_id, meter_value, **kwargs):
         try:
+            TESPIT.meter_values_ekle(self.id, connector_id, meter_value)
             value = meter_value[0]['sampled_value'][0]['value']
-            logging.info(f"ENERJİ RAPORU: {value} Wh (Konnektör: {connector_id})")
+            logging.info("ENERJİ RAPORU: %s Wh (Konnektör: %s)", value, connector_id)
         except Exception as e:
-            logging.error(f"Veri okuma hatası: {e}")
+            logging.error("Veri okuma hatası: %s", e)
         return call_result.MeterValues()
 
 async def on_connect(websocket, path):
     try:
         charge_point_id = path.strip('/')
-        logging.info(f"Cihaz Bağlandı: {charge_point_id}")
+        logging.info("Cihaz Bağlandı: %s", charge_point_id)
         cp_instance = SablonChargePoint(charge_point_id, websocket)
         await cp_instance.start()
     except Exception as e:
-        logging.error(f"Bağlantı hatası: {e}")
+        logging.error("Bağlantı hatası: %s", e)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
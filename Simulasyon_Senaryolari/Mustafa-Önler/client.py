@@ -1,5 +1,7 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
 from datetime import datetime, timezone
@@ -8,6 +10,9 @@ from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.donanim import AsyncCanBus, komut_yolla
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [MITM-ISTEMCI] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -17,14 +22,12 @@ try:
 except Exception:
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 class MitmSaldiriChargePoint(cp):
 
@@ -1,21 +1,27 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [MITM-SUNUCU] - %(message)s')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.dispatch import ConcurrentDispatchMixin
+from secvolt.simclock import simdi
 
-class ServerChargePoint(cp):
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [MITM-SUNUCU] - %(message)s')
+
+class ServerChargePoint(ConcurrentDispatchMixin, cp):
     
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"BAĞLANTI İSTEĞİ: {charge_point_model} ({charge_point_vendor})")
+        logging.info("BAĞLANTI İSTEĞİ: %s (%s)", charge_point_model, charge_point_vendor)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
@@ -24,39 +30,37 @@ class ServerChargePoint(cp):
     async def on_heartbeat(self, **kwargs):
         logging.info("Heartbeat alındı.")
         return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
-async def on_connect(websocket, path):
-    try:
-        charge_point_id = path.strip('/')
-        logging.info(f"Cihaz Bağlandı: {charge_point_id}")
-        
-        cp_instance = ServerChargePoint(charge_point_id, websocket)
-        
-        # İstemci ile iletişimi arka planda başlat
-        cp_task = asyncio.create_task(cp_instance.start())
-        
+    async def senaryo_remote_start(self):
         # 1. Bekle (Bağlantı otursun)
         await asyncio.sleep(5)
-        
+
         # 2. SENARYOYU TETİKLE: Şarj Başlatma Komutu Gönder
         logging.info("--- SENARYO ADIMI: Sunucu 'RemoteStartTransaction' gönderiyor ---")
         logging.info("BEKLENTİ: İstemci şarjı başlatmalı (0x200 yollamalı).")
-        
+
         try:
             # Rastgele bir kart ID ile başlatma isteği
-            await cp_instance.call(call.RemoteStartTransaction(id_tag="MITM-TEST-USER"))
+            await self.call(call.RemoteStartTransaction(id_tag="MITM-TEST-USER"))
             logging.info("✅ SUNUCU: Komut gönderildi ve istemci 'KABUL' etti.")
             logging.info("⚠️  ANALİZ: Eğer istemci loglarında 'MANİPÜLASYON' görüyorsanız saldırı başarılıdır.")
         except Exception as e:
-            logging.error(f"Komut gönderim hatası: {e}")
+            logging.error("Komut gönderim hatası: %s", e)
 
-        # Bağlantıyı açık tut
-        await cp_task
+async def on_connect(websocket, path):
+    try:
+        charge_point_id = path.strip('/')
+        logging.info("Cihaz Bağlandı: %s", charge_point_id)
+        
+        cp_instance = ServerChargePoint(charge_point_id, websocket)
+        
+        # İletişim döngüsü senaryoyla birlikte çalışır; bağlantı kapanana kadar açık kalır
+        await cp_instance.run_with(cp_instance.senaryo_remote_start())
         
     except Exception as e:
-        logging.error(f"Bağlantı hatası: {e}")
+        logging.error("Bağlantı hatası: %s", e)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
@@ -1,13 +1,22 @@
 import asyncio
+import json
 import logging
+import os
+import sys
 import can
 import websockets
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
-from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
+from ocpp.v16.enums import ChargePointErrorCode, ChargePointStatus, RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.busmon import HatIzleyici
+from secvolt.cangen import TrafikUreteci, akis
+from secvolt.cansched import OncelikliCanGonderici, iletildi_mi
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 # --- LOG AYARI ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
@@ -21,25 +30,29 @@ except Exception as e:
     logging.warning(f"Donanım bağlantısı BAŞARISIZ (vcan0 bulunamadı). Devam ediliyor: {e}")
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+# Röle komutları (0x200/0x201) kritik sınıfta: kuyruğun önüne geçer, 100 ms son tarihle gönderilir
+CAN_GONDERICI = OncelikliCanGonderici(CAN_HATTI) if CAN_HATTI else None
+
 # --- Yardımcı Fonksiyon: CAN Mesajı Gönderme ---
 def donanima_komut_yolla(can_id, data):
     """
-    Belirtilen CAN ID ve veri ile mesajı CAN Bus'a gönderir.
-    (Normal kontrol mesajlarını temsil eder)
+    Belirtilen CAN ID ve veri ile mesajı CAN Bus gönderim kuyruğuna alır (bloklamaz).
+    (Normal kontrol mesajlarını temsil eder). İletim Future'ını döner.
     """
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi (Kontrol) -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_GONDERICI:
+        return komut_yolla(CAN_GONDERICI, can_id, data)
+    return None
 
 # --- ANOMALİ SİMÜLASYONU: ARBITRATION DOS (LOW-ID FLOODING) ---
 async def start_arbitration_flood():
     """
     CAN Arbitration DoS (Low-ID Flooding) saldırısını simüle eder.
     Çok düşük ID (yüksek öncelikli) mesajları sürekli ve yüksek hızda gönderir.
+    Gönderimi ``TrafikUreteci`` ayrı iş parçacığında, mutlak zamanlamayla
+    yapar (asyncio.sleep(1/500) hedefin altında ve oynak kalıyordu); gerçekleşen
+    hız ve sapma periyodik olarak loglanır.
     """
     if can_bus is None:
         logging.warning("CAN Bus arayüzü aktif değil. Arbitration DoS simülasyonu başlatılamadı.")
@@ -48,7 +61,7 @@ async def start_arbitration_flood():
     # Saldırı parametreleri
     LOW_ID = 0x001 # Çok düşük ID (yüksek öncelikli). Genellikle 0x000 / 0x001 kullanılır [cite: 25, 39]
     FLOOD_RATE_MSGS_PER_SEC = 500 # Saniyede 500 mesaj hedefi. (500-1000 msg/s saldırı hızı örneklenmiştir [cite: 32, 40])
-    DELAY = 1.0 / FLOOD_RATE_MSGS_PER_SEC
+    RAPOR_ARALIGI = 10
 
     logging.critical(f"🚨 ANOMALİ BAŞLATILIYOR: Arbitration DoS (Low-ID Flood, ID: {hex(LOW_ID)}, Hız: {FLOOD_RATE_MSGS_PER_SEC} msg/s)")
 
@@ -56,27 +69,69 @@ async def start_arbitration_flood():
     # Bu verinin içeriği önemli değil, sadece meşguliyet yaratması amaçlanır [cite: 26]
     flood_data = [0xAA] * 8 
 
-    while True:
-        try:
-            # Arbitration kuralları nedeniyle bu düşük ID, bus'ta sürekli dominant kalır [cite: 42, 49]
-            msg = can.Message(arbitration_id=LOW_ID, data=flood_data, is_extended_id=False)
-            can_bus.send(msg)
-            # Yüksek frekansta göndermek için küçük bir gecikme
-            await asyncio.sleep(DELAY) 
-        except Exception as e:
-            logging.error(f"Flood Sırasında Kritik Donanım Hatası: {e}")
-            await asyncio.sleep(1) # Hata durumunda fazla yüklenmemek için bekle
-            
+    # Saldırgan ayrı bir düğümdür: kendi soketi olur, istasyonun izleyicisi seli hattan görür
+    try:
+        saldirgan_bus = can.interface.Bus(channel='vcan0', interface='socketcan')
+    except Exception as e:
+        logging.error(f"Flood Sırasında Kritik Donanım Hatası: {e}")
+        return
+    # Arbitration kuralları nedeniyle bu düşük ID, bus'ta sürekli dominant kalır [cite: 42, 49]
+    uretec = TrafikUreteci([akis("arbitration_dos", LOW_ID, FLOOD_RATE_MSGS_PER_SEC, veri=flood_data)])
+    uretec.baslat(saldirgan_bus)
+    try:
+        while uretec.calisiyor:
+            await asyncio.sleep(RAPOR_ARALIGI)
+            r = uretec.rapor(sifirla=True)[0]
+            logging.info("Flood hızı: istenen %.1f msg/s, gerçekleşen %.1f msg/s, sapma p99 %.0f µs, hata %d",
+                         r["istenen_hiz"], r["gerceklesen_hiz"], r["sapma_p99_us"], r["hata"])
+    finally:
+        uretec.durdur()
+        await asyncio.to_thread(uretec.bekle)
+        saldirgan_bus.shutdown()
+
 # --- OCPP İstemci Sınıfı ---
 class SablonChargePoint(cp):
 
+    async def izle_can_hatti(self):
+        """
+        Hat yükü ve düşük ID baskınlığını izler (``HatIzleyici``); alarm
+        durumları CSMS'e StatusNotification + DataTransfer ile bildirilir.
+        """
+        if CAN_HATTI is None:
+            logging.warning("CAN Bus arayüzü aktif değil, hat izleyici başlatılmadı.")
+            return
+        # vcan'in bit hızı yoktur; kullanım, istasyonun gerçek hattı (500 kbit/s) varsayılarak hesaplanır
+        self.hat_izleyici = HatIzleyici(bitrate=500000, alarm_fn=self.can_hat_alarmi)
+        await self.hat_izleyici.calistir(CAN_HATTI)
+
+    async def can_hat_alarmi(self, olay):
+        ayrinti = {k: (hex(v) if k == "can_id" else round(v, 4) if isinstance(v, float) else v)
+                   for k, v in olay.items() if k != "zaman"}
+        await self.call(call.DataTransfer(vendor_id="SecVolt", message_id="CanBusAlarm",
+                                          data=json.dumps(ayrinti)))
+        # Başka bir alarm sürüyorsa istasyon hatalı kalır
+        aktif = bool(self.hat_izleyici.aktif)
+        await self.call(call.StatusNotification(
+            connector_id=0,
+            error_code=ChargePointErrorCode.other_error if aktif else ChargePointErrorCode.no_error,
+            status=ChargePointStatus.faulted if aktif else ChargePointStatus.available,
+            info=f"CAN {olay['tur']} {ayrinti.get('can_id', '')}".strip()[:50],
+            vendor_error_code="CAN_DOS" if aktif else None
+        ))
+
+    async def can_son_tarih_kacti(self, olay):
+        """ Kritik çerçeve son tarihinde hatta çıkamadı; CSMS'e bildirilir. """
+        ayrinti = dict(olay, can_id=hex(olay["can_id"]), son_tarih_ms=round(olay["son_tarih_ms"], 1))
+        await self.call(call.DataTransfer(vendor_id="SecVolt", message_id="CanDeadlineMiss",
+                                          data=json.dumps(ayrinti)))
+
     async def send_meter_values(self):
         """ Düzenli enerji raporu gönderir (NORMAL DAVRANIŞ) """
         sayac = 0
         while True:
             sayac += 10 
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # MeterValues'ın gecikmeye uğradığını görmek için bu metodu aktif edebilirsiniz
@@ -88,14 +143,19 @@ class SablonChargePoint(cp):
         logging.info(f"KOMUT ALINDI: Şarj Başlat (Kart: {id_tag})")
         # Kritik kontrol mesajı (örneğin röleyi açma)
         # Bu mesaj, arka plandaki flood nedeniyle gecikebilir veya drop olabilir [cite: 26, 44]
-        donanima_komut_yolla(0x200, [0x01, 0x01]) 
+        # Son tarih içinde hatta çıkmazsa komut reddedilir (en çok 100 ms beklenir)
+        fut = donanima_komut_yolla(0x200, [0x01, 0x01]) 
+        if CAN_GONDERICI and not await iletildi_mi(fut):
+            return call_result.RemoteStartTransaction(status=RemoteStartStopStatus.rejected)
         return call_result.RemoteStartTransaction(status=RemoteStartStopStatus.accepted)
 
     @on('RemoteStopTransaction')
     async def on_remote_stop(self, transaction_id, **kwargs):
         logging.info(f"KOMUT ALINDI: Şarj Durdur (TxID: {transaction_id})")
         # Kritik kontrol mesajı (örneğin röleyi kapatma)
-        donanima_komut_yolla(0x201, [0x00, 0x00]) 
+        fut = donanima_komut_yolla(0x201, [0x00, 0x00]) 
+        if CAN_GONDERICI and not await iletildi_mi(fut):
+            return call_result.RemoteStopTransaction(status=RemoteStartStopStatus.rejected)
         return call_result.RemoteStopTransaction(status=RemoteStartStopStatus.accepted)
 
     async def send_boot_notification(self):
@@ -119,12 +179,15 @@ async def main():
         async with websockets.connect(uri, subprotocols=['ocpp1.6']) as ws:
             logging.info("Sunucuya bağlantı kuruldu.")
             client = SablonChargePoint('CHARGER-001', ws)
+            if CAN_GONDERICI:
+                CAN_GONDERICI.kacirma_fn = client.can_son_tarih_kacti
             
             # Tüm görevleri paralel olarak çalıştır
             await asyncio.gather(
                 client.start(),               # OCPP mesaj dinleme ve işleme
                 client.send_boot_notification(), # Kayıt bildirimi
                 client.send_meter_values(),   # Normal operasyon (Sayaç)
+                client.izle_can_hatti(),      # Hat yükü / DoS tespiti
                 start_arbitration_flood()     # 🚨 ANOMALİ SİMÜLASYONU 
             )
     except ConnectionRefusedError:
@@ -1,14 +1,19 @@
 import asyncio
 import logging
+import os
+import sys
 import can
 import websockets
 import random
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus, Measurand, UnitOfMeasure
 from ocpp.routing import on
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 # Log formatını biraz detaylandırdım
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SECVOLT-CLIENT] - %(message)s')
 
@@ -20,14 +25,12 @@ except Exception:
     logging.warning("Donanım bulunamadı, simülasyon modunda devam ediliyor.")
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 class SablonChargePoint(cp):
     
@@ -88,7 +91,7 @@ class SablonChargePoint(cp):
             # Hem toplam enerjiyi (Wh) hem de anomali içeren voltajı (V) gönderiyoruz
             payload = [
                 {
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "timestamp": simdi().isoformat(),
                     "sampled_value": [
                         # Normal Sayaç Verisi
                         {"value": str(sayac_wh), "context": "Sample.Periodic", "format": "Raw", "measurand": "Energy.Active.Import.Register", "location": "Outlet", "unit": "Wh"},
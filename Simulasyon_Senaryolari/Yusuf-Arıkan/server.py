@@ -1,26 +1,45 @@
 import asyncio
 import logging
+import os
+import sys
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [CSMS-SUNUCU] - %(message)s')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from secvolt import logpipe
+from secvolt.covert import CovertDecoder
+from secvolt.covertstat import CovertStatDetector
+from secvolt.simclock import simdi
+from secvolt.tsdb import TimeSeriesStore
+
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [CSMS-SUNUCU] - %(message)s')
+
+# Tüm MeterValues örnekleri (cp, konnektör, measurand) anahtarıyla burada tutulur
+METER_DEPOSU = TimeSeriesStore()
+
+# Gizli kanal çözücü: eşik, delta ve Manchester kodlamaları her şarj noktası için yan yana çalışır;
+# kullanılmayan kodlamanın gürültüden ürettiği baytlar güven kontrolünde elenir.
+# İstemci: 0 = 220.0V, 1 = 220.5V gönderiyor; eşik tam ortası olan 220.25V.
+GIZLI_KANAL = CovertDecoder(esik=220.25, delta_adim=0.25)
+
+# Kodlamayı bilmeden: bimodalite, entropi ve otokorelasyonla filo genelinde puanlama
+KANAL_ANALIZI = CovertStatDetector()
 
 class SablonChargePoint(cp):
     
-    def __init__(self, id, connection):
-        super().__init__(id, connection)
-        self.covert_bits = "" # Gizli bitleri biriktireceğimiz havuz
-        self.decoded_message = "" # Çözülen mesaj
+    @property
+    def decoded_message(self):
+        """Eşik kodlamasıyla çözülen mesajın son kısmı."""
+        return GIZLI_KANAL.metin(self.id, "esik")
 
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"YENİ CİHAZ BAĞLANDI: {charge_point_model} ({charge_point_vendor})")
+        logging.info("YENİ CİHAZ BAĞLANDI: %s (%s)", charge_point_model, charge_point_vendor)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
@@ -29,26 +48,14 @@ class SablonChargePoint(cp):
     async def on_heartbeat(self, **kwargs):
         logging.info("Heartbeat alındı (Cihaz aktif).")
         return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
-    def bits_to_string(self, binary_string):
-        """Toplanan 8 bitlik grupları ASCII karaktere çevirir."""
-        message = ""
-        # 8'erli gruplara böl
-        for i in range(0, len(binary_string), 8):
-            byte = binary_string[i:i+8]
-            if len(byte) == 8:
-                try:
-                    char_code = int(byte, 2)
-                    message += chr(char_code)
-                except ValueError:
-                    pass
-        return message
-
     @on('MeterValues')
     async def on_meter_values(self, connector_id, meter_value, **kwargs):
         try:
+            METER_DEPOSU.meter_values_ekle(self.id, connector_id, meter_value)
+            KANAL_ANALIZI.meter_values_ekle(self.id, connector_id, meter_value)
             # Gelen verilerin listesi (Energy ve Voltage)
             samples = meter_value[0]['sampled_value']
             
@@ -65,48 +72,36 @@ class SablonChargePoint(cp):
 
             # 1. Normal Operatör Ekranı (Sadece enerjiyi görür)
             if energy_val:
-                logging.info(f"[NORMAL LOG] Enerji Tüketimi: {energy_val} Wh")
+                logging.info("[NORMAL LOG] Enerji Tüketimi: %s Wh", energy_val)
 
             # 2. SECVOLT ANOMALİ TESPİT SİSTEMİ (Arka planda çalışır)
             if voltage_val:
                 voltage = float(voltage_val)
                 
-                # EŞİK DEĞER ANALİZİ (Threshold Analysis)
-                # İstemci: 0 = 220.0V, 1 = 220.5V gönderiyor.
-                # Biz eşik değerini tam ortası olan 220.25V belirleyelim.
-                
-                detected_bit = '?'
-                if voltage > 220.25:
-                    detected_bit = '1'
+                # EŞİK DEĞER ANALİZİ (Threshold Analysis) + delta / Manchester
+                # Bitler baytlara artımlı paketlenir; yalnız en az 8 ardışık metin baytı çıkan kodlama loglanır.
+                bitler = GIZLI_KANAL.besle(self.id, voltage)
+                if bitler["esik"]:
                     status = "YÜKSEK (Anomali)"
                 else:
-                    detected_bit = '0'
                     status = "NORMAL"
 
-                self.covert_bits += detected_bit
-                
                 # Anlık Anomali Logu
-                logging.warning(f"!!! ANOMALİ ANALİZİ !!! Voltaj: {voltage}V -> Tespit Edilen Bit: {detected_bit} ({status})")
-
-                # Mesaj Çözme (Her 8 bit toplandığında bir harf oluşur)
-                current_decoded = self.bits_to_string(self.covert_bits)
-                if current_decoded != self.decoded_message:
-                    self.decoded_message = current_decoded
-                    logging.critical(f" >>> GİZLİ MESAJ ÇÖZÜLDÜ: {self.decoded_message} <<<")
+                logging.warning("!!! ANOMALİ ANALİZİ !!! Voltaj: %sV -> Tespit Edilen Bit: %s (%s)", voltage, bitler["esik"], status)
 
         except Exception as e:
-            logging.error(f"Veri işleme hatası: {e}")
+            logging.error("Veri işleme hatası: %s", e)
         
         return call_result.MeterValues()
 
 async def on_connect(websocket, path):
     try:
         charge_point_id = path.strip('/')
-        logging.info(f"--- Bağlantı Kabul Edildi: {charge_point_id} ---")
+        logging.info("--- Bağlantı Kabul Edildi: %s ---", charge_point_id)
         cp_instance = SablonChargePoint(charge_point_id, websocket)
         await cp_instance.start()
     except Exception as e:
-        logging.error(f"Bağlantı hatası: {e}")
+        logging.error("Bağlantı hatası: %s", e)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
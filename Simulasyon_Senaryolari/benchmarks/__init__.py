@@ -0,0 +1,7 @@
+"""
+SecVolt performans ölçümleri.
+
+Betikler Simulasyon_Senaryolari klasöründen modül olarak çalıştırılır:
+
+    python -m benchmarks.bench_workers
+"""
@@ -0,0 +1,112 @@
+"""
+Akıllı şarj paylaştırması: tek sitenin yeniden çözüm süresi.
+
+``--cp`` konnektörlü tek bir site ``--trafo`` trafoya bölünür (her trafoda bir
+taban yük); konnektörlerin ``--aktif`` oranı işlemde, ``--supheli`` oranı
+şüpheli sayılır. Site kapasitesi toplam talebin ``--doluluk`` katıdır. Her
+turda rastgele ``--rapor`` konnektörün yükü değişir ve site yeniden çözülür
+(``ChargingAllocator.isle``: çözüm + gönderim kuyruğu). Ayrıca yalın
+``su_doldur`` / ``hiyerarsik_doldur`` süreleri ve kapasite / trafo sınırı
+ihlali denetlenir.
+
+    python -m benchmarks.bench_allocation --cp 10000 --trafo 40 --tur 200
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from secvolt.allocation import ChargingAllocator, hiyerarsik_doldur, su_doldur
+from secvolt.siteload import SiteLoadAggregator
+
+
+def yuzdelik(sureler, p):
+    return sorted(sureler)[min(len(sureler) - 1, int(len(sureler) * p))]
+
+
+def dogrulanmis_yuk(agac, cp_id, guc_w):
+    """ Enerji farkı denetimini geçen iki örnek (10 sn arayla); konnektör şüpheden çıkar. """
+    agac.konnektor_yuku(cp_id, 1, None, 0.0, 0)
+    agac.konnektor_yuku(cp_id, 1, guc_w, guc_w * 10 / 3600, 10_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Akıllı şarj paylaştırma ölçümü")
+    parser.add_argument('--cp', type=int, default=10000)
+    parser.add_argument('--trafo', type=int, default=40)
+    parser.add_argument('--aktif', type=float, default=0.8)
+    parser.add_argument('--supheli', type=float, default=0.01)
+    parser.add_argument('--doluluk', type=float, default=0.5)
+    parser.add_argument('--rapor', type=int, default=50, help="Tur başına değişen konnektör")
+    parser.add_argument('--tur', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+    agac = SiteLoadAggregator(alarm_fn=None)
+    guc = [rng.choice((7400, 11000, 22000)) for _ in range(args.cp)]
+    talep = sum(guc) * args.aktif
+    site = agac.site_ekle("SITE", talep * args.doluluk)
+    trafolar = []
+    for t in range(args.trafo):
+        trafo = agac.trafo_ekle(f"TR-{t}", site, talep * args.doluluk / args.trafo * rng.uniform(0.8, 1.6))
+        agac.taban_yuk_ekle(f"TR-{t}/TABAN", trafo, rng.uniform(5000, 30000))
+        trafolar.append(trafo)
+
+    atama = ChargingAllocator(agac, karar_fn=None)
+    konnektorler = []
+    for c in range(args.cp):
+        cp_id = f"CP-{c}"
+        agac.konnektor_ekle(cp_id, 1, trafolar[c % args.trafo], max_guc_w=guc[c])
+        if rng.random() >= args.supheli:
+            dogrulanmis_yuk(agac, cp_id, guc[c] * rng.random())
+        if rng.random() < args.aktif:
+            atama.islem_baslat(cp_id, 1)
+        atama.baglantilar[cp_id] = None
+        konnektorler.append(cp_id)
+
+    # Soğuk çözüm: site yapısı kurulur
+    t0 = time.perf_counter()
+    atama.isle()
+    print(f"İlk çözüm (yapı kurulumu dahil): {(time.perf_counter() - t0) * 1e3:.1f} ms, "
+          f"{atama.aktif_sayisi:,} aktif işlem")
+
+    sureler, cozum = [], []
+    for _ in range(args.tur):
+        for _ in range(args.rapor):
+            c = rng.randrange(args.cp)
+            agac.konnektor_yuku(konnektorler[c], 1, guc[c] * rng.random())
+        atama._kirli.add(site)
+        t0 = time.perf_counter()
+        atama.isle()
+        sureler.append((time.perf_counter() - t0) * 1e3)
+        cozum.append(atama.son_cozum_us / 1e3)
+        atama._bekleyen.clear()
+    print(f"Yeniden çözüm (isle): p50 {yuzdelik(sureler, 0.5):.2f} ms, p99 {yuzdelik(sureler, 0.99):.2f} ms; "
+          f"yalnız coz() p50 {yuzdelik(cozum, 0.5):.2f} ms")
+
+    # Kısıt denetimi
+    dugumler, x = atama.coz(site)
+    site_kalan = agac.kapasite[site] - (agac.yuk[site] - sum(agac.yuk[d] for d in dugumler.tolist()))
+    print(f"Dağıtılan {x.sum():,.0f} W / site boşluğu {site_kalan:,.0f} W, bekletilen {(x == 0).sum()}, "
+          f"min {x[x > 0].min() if (x > 0).any() else 0:.0f} W")
+    trafo_toplam = {}
+    for d, v in zip(dugumler.tolist(), x.tolist()):
+        trafo_toplam[agac.ust[d]] = trafo_toplam.get(agac.ust[d], 0.0) + v - agac.yuk[d]
+    ihlal = sum(1 for t, fark in trafo_toplam.items() if agac.yuk[t] + fark > agac.kapasite[t] + 1e-6)
+    print(f"Trafo sınırı ihlali: {ihlal} / {len(trafo_toplam)}")
+
+    r = np.random.default_rng(15)
+    ust = r.choice([7400.0, 11000.0, 22000.0], args.cp)
+    grup = r.integers(0, args.trafo, args.cp)
+    grup_kap = np.full(args.trafo, ust.sum() / args.trafo * 0.5)
+    for ad, fn in (("su_doldur", lambda: su_doldur(ust.sum() * 0.5, ust)),
+                   ("hiyerarsik_doldur", lambda: hiyerarsik_doldur(ust.sum() * 0.6, grup, grup_kap, ust))):
+        t0 = time.perf_counter()
+        for _ in range(100):
+            fn()
+        print(f"{ad} ({args.cp:,} eleman): {(time.perf_counter() - t0) * 10:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Yetkilendirme servisi: milyonlarca etikette bellek, arama süresi ve güncelleme maliyeti.
+
+- Bellek: ``--etiket`` adet ``RFID-%012d`` etiketiyle kurulan servisin
+  tracemalloc ile ölçülen etiket başına baytı (str + sözlük + Bloom).
+- Arama: LRU isabeti, sözlükten karar (önbellek ıskası), Bloom ile reddedilen
+  bilinmeyen etiket; her biri için ns/arama. Liste boyutu değiştikçe sabit
+  kalmalıdır (O(1)).
+- Güncelleme: ``--fark`` etiketlik farkın yayınlanma süresi (katman + paylaşılan
+  Bloom'a ekleme) ve katman tabanla birleştiğinde sıkıştırma süresi; şarj noktası
+  için Differential ``SendLocalList`` üretimi.
+- Yerel liste doğrulaması: ``--yerel`` etiketlik liste, Differential'ı ancak
+  sürümü artıyorsa kabul eden (aksi halde VersionMismatch) bir şarj noktasına
+  ``yerel_liste_gonder`` ile Full ve ardından Differential olarak aktarılır;
+  şarj noktasındaki liste servisle aynı olmazsa çıkış kodu 1.
+
+    python -m benchmarks.bench_auth --etiket 100000 1000000 3000000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+
+from ocpp.v16 import call_result
+from ocpp.v16.enums import UpdateStatus, UpdateType
+
+from secvolt.auth import AuthorizationService
+
+
+def olc(fn, anahtarlar):
+    t0 = time.perf_counter()
+    for a in anahtarlar:
+        fn(a)
+    return (time.perf_counter() - t0) / len(anahtarlar) * 1e9
+
+
+class _SurumDenetleyenCp:
+    """ Yerel listeyi tutan, Differential sürümü artmıyorsa reddeden şarj noktası. """
+
+    id = "YEREL-LISTE"
+
+    def __init__(self):
+        self.surum = 0
+        self.liste = {}
+
+    async def call(self, istek):
+        if not hasattr(istek, "update_type"):
+            return call_result.GetLocalListVersion(list_version=self.surum)
+        if istek.update_type == UpdateType.full:
+            self.liste = {}
+        elif istek.list_version <= self.surum:
+            return call_result.SendLocalList(status=UpdateStatus.version_mismatch)
+        for girdi in istek.local_authorization_list:
+            if 'id_tag_info' in girdi:
+                self.liste[girdi['id_tag']] = girdi['id_tag_info']['status']
+            else:
+                self.liste.pop(girdi['id_tag'], None)
+        self.surum = istek.list_version
+        return call_result.SendLocalList(status=UpdateStatus.accepted)
+
+
+def yerel_liste_dogrula(adet):
+    """ ``adet`` etiketlik liste + aynı büyüklükte fark şarj noktasına ulaşıyor mu. """
+    servis = AuthorizationService({f"RFID-{i:012d}" for i in range(adet)})
+    cp = _SurumDenetleyenCp()
+
+    async def aktar():
+        ilk = await servis.yerel_liste_gonder(cp)
+        servis.guncelle({f"YENI-{i:08d}": "Blocked" for i in range(adet)}, sil=[f"RFID-{i:012d}" for i in range(10)])
+        return ilk, await servis.yerel_liste_gonder(cp)
+
+    surumler = asyncio.run(aktar())
+    beklenen = {t: d if isinstance(d, str) else d['status'] for t, d in servis._anlik}
+    tamam = surumler == (1, 2) and cp.surum == servis.surum and cp.liste == beklenen
+    print(f"Yerel liste ({adet:,} etiket, Full + Differential): şarj noktası sürüm {cp.surum}, "
+          f"{len(cp.liste):,} etiket -> {'tamam' if tamam else 'BAŞARISIZ'}")
+    return tamam
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yetkilendirme servisi ölçümü")
+    parser.add_argument('--etiket', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--arama', type=int, default=200000)
+    parser.add_argument('--fark', type=int, default=1000)
+    parser.add_argument('--yerel', type=int, default=2500, help="Yerel liste doğrulamasındaki etiket")
+    args = parser.parse_args()
+
+    if not yerel_liste_dogrula(args.yerel):
+        sys.exit(1)
+
+    rng = random.Random(5)
+    print(f"{'etiket':>9} {'B/etiket':>9} {'kurulum sn*':>10} {'LRU ns':>7} {'sözlük ns':>9} {'bloom red ns':>12} "
+          f"{'yanlış poz.':>11} {'fark ms':>8} {'sıkıştırma ms':>13} {'SLL ms':>7}")
+    for adet in args.etiket:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        etiketler = [f"RFID-{i:012d}" for i in range(adet)]
+        servis = AuthorizationService(etiketler, onbellek_boyutu=4096)
+        kurulum = time.perf_counter() - t0
+        # Etiket listesinin kendisi (işaretçi dizisi) servisin belleği değildir
+        bellek = tracemalloc.get_traced_memory()[0] - sys.getsizeof(etiketler)
+        tracemalloc.stop()
+
+        sicak = [etiketler[rng.randrange(1024)] for _ in range(args.arama)]
+        servis.dogrula(sicak[0])
+        lru = olc(servis.dogrula, sicak)
+        soguk = [etiketler[rng.randrange(adet)] for _ in range(args.arama)]
+        sozluk = olc(servis.dogrula, soguk)
+        bilinmeyen = [f"SAHTE-{rng.getrandbits(48):012x}" for _ in range(args.arama)]
+        onceki = servis.istatistik["bloom_red"]
+        bloom = olc(servis.dogrula, bilinmeyen)
+        yanlis = 1 - (servis.istatistik["bloom_red"] - onceki) / len(bilinmeyen)
+
+        surum = servis.surum
+        t0 = time.perf_counter()
+        servis.guncelle({f"YENI-{i:08d}": "Accepted" for i in range(args.fark)},
+                        sil=etiketler[:args.fark // 2])
+        fark_ms = (time.perf_counter() - t0) * 1e3
+        t0 = time.perf_counter()
+        istekler = servis.send_local_list_istekleri(surum)
+        sll_ms = (time.perf_counter() - t0) * 1e3
+        assert istekler and istekler[0].update_type == "Differential"
+
+        # Katman tabanın 1/8'ini aşana kadar farkları yayınla; sonuncusu sıkıştırır
+        sikistirma = 0.0
+        i = 0
+        while servis._anlik.katman:
+            i += 1
+            t0 = time.perf_counter()
+            servis.guncelle({f"EK-{i}-{j}": "Accepted" for j in range(max(args.fark, adet // 64))})
+            sikistirma = (time.perf_counter() - t0) * 1e3
+        print(f"{adet:>9} {bellek / adet:>9.0f} {kurulum:>10.2f} {lru:>7.0f} {sozluk:>9.0f} {bloom:>12.0f} "
+              f"{yanlis:>11.4f} {fark_ms:>8.2f} {sikistirma:>13.1f} {sll_ms:>7.2f}")
+        del servis, etiketler
+    print("* kurulum süresi tracemalloc açıkken ölçülür")
+
+
+if __name__ == '__main__':
+    main()
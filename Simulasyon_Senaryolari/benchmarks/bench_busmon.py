@@ -0,0 +1,105 @@
+"""
+CAN hat izleyici: çerçeve işleme verimi ve doymuş sanal hatta tespit.
+
+1. Ham verim: ``--adet`` çerçeve (zaman damgaları 500 kbit/s dolu hat
+   aralığında, %70 0x001 seli + 40 farklı arka plan kimliği) doğrudan
+   ``HatIzleyici.cerceve``'ye verilir; çerçeve/sn ve dolu hatta kapasite katı.
+2. Uçtan uca: ``VirtualCanBus(bitrate)`` üzerinde arka plan trafiği
+   (``TrafikUreteci``) çalışırken ``--sure`` saniye boyunca 0x001 seli hattı
+   doyurur. İzleyicinin gördüğü çerçeve sayısı hattın ilettiğiyle, ölçülen
+   kullanım hattın kendi meşguliyet oranıyla karşılaştırılır; alarm tespit
+   süresi selin başlangıcından itibaren hat zamanıyla verilir.
+
+    python -m benchmarks.bench_busmon --adet 500000 --sure 5
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import can
+
+from secvolt.busmon import HatIzleyici
+from secvolt.cangen import TrafikUreteci, akis
+from secvolt.donanim import VirtualCanBus, cerceve_bit
+
+SEL_ID = 0x001
+SEL_VERI = [0xAA] * 8
+
+
+def ham_verim(adet, bitrate):
+    rng = random.Random(3)
+    arka_plan = [0x100 + 0x10 * i for i in range(40)]
+    aralik = cerceve_bit(can.Message(arbitration_id=SEL_ID, data=SEL_VERI, is_extended_id=False)) / bitrate
+    mesajlar = []
+    for i in range(adet):
+        can_id = SEL_ID if rng.random() < 0.7 else rng.choice(arka_plan)
+        mesajlar.append(can.Message(timestamp=i * aralik, arbitration_id=can_id, data=SEL_VERI,
+                                    is_extended_id=False))
+    izleyici = HatIzleyici(bitrate=bitrate)
+    cerceve = izleyici.cerceve
+    t0 = time.perf_counter()
+    for m in mesajlar:
+        cerceve(m)
+    gecen = time.perf_counter() - t0
+    dolu_hat = 1 / aralik
+    print(f"Ham verim: {adet / gecen:,.0f} çerçeve/sn ({gecen / adet * 1e6:.2f} µs/çerçeve); "
+          f"{bitrate // 1000} kbit/s dolu hat {dolu_hat:,.0f} çerçeve/sn -> {adet / gecen / dolu_hat:.1f}x pay")
+    print(f"  kapanan kova {izleyici.kapanan_kova}, alarmlar {sorted(izleyici.aktif)}, "
+          f"kullanım %{izleyici.kullanim() * 100:.1f}")
+
+
+async def uctan_uca(bitrate, sure):
+    hat = VirtualCanBus(bitrate=bitrate)
+    saldirgan = hat.baglan(tx_kuyrugu=1 << 20)
+    istasyon = hat.baglan(tx_kuyrugu=1 << 16)
+    izleme = hat.baglan(rx_kuyrugu=1 << 16)
+    olaylar = []
+    izleyici = HatIzleyici(bitrate=bitrate, alarm_fn=olaylar.append)
+    izleyici.bagla(izleme)
+
+    # Normal istasyon trafiği: BMS, sayaç, röle durumu
+    arka_plan = TrafikUreteci([akis("bms", 0x180, 100), akis("sayac", 0x300, 50), akis("role", 0x200, 10)],
+                              sure_s=sure + 3)
+    arka_plan_gorevi = asyncio.create_task(arka_plan.calistir(istasyon))
+    await asyncio.sleep(1.0)
+    sel_baslangic = hat.hat_zamani
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    # Hat kapasitesinin üstünde sel: kuyruk hep dolu, 0x001 her arabulucuyu kazanır
+    sel = TrafikUreteci([akis("sel", SEL_ID, 1.5 * bitrate / cerceve_bit(
+        can.Message(arbitration_id=SEL_ID, data=SEL_VERI, is_extended_id=False)), SEL_VERI)], sure_s=sure)
+    await sel.calistir(saldirgan)
+    yuk = hat.hat_yuku()
+    ozet = izleyici.ozet()
+    cpu, gecen = time.process_time() - cpu0, time.perf_counter() - t0
+    await arka_plan_gorevi
+    await asyncio.sleep(0.2)
+
+    print(f"Uçtan uca ({bitrate // 1000} kbit/s sanal hat, {sure:.0f} sn sel):")
+    print(f"  hat: {hat.cerceve:,} çerçeve, başlangıçtan beri meşgul %{yuk * 100:.1f}; "
+          f"izleyici: {izleyici.alinan:,} çerçeve, alım kuyruğu düşen {izleme.rx_dusen}")
+    print(f"  son 1 sn: {ozet['cerceve_hizi']:,.0f} çerçeve/sn, kullanım %{ozet['kullanim'] * 100:.1f}, "
+          f"baskın {ozet['baskin_id']:#x} (%{ozet['baskin_pay'] * 100:.1f})")
+    for o in olaylar:
+        if o["durum"] == "basladi":
+            print(f"  alarm {o['tur']:>14}: selden {(o['zaman'] - sel_baslangic) * 1e3:,.0f} ms sonra")
+    print(f"  süreç CPU (hat + üreteç + izleyici): %{cpu / gecen * 100:.0f}")
+    await hat.kapat()
+
+
+async def ana(args):
+    ham_verim(args.adet, args.bitrate)
+    await uctan_uca(args.bitrate, args.sure)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN hat izleyici ölçümü")
+    parser.add_argument('--adet', type=int, default=500000)
+    parser.add_argument('--bitrate', type=int, default=500000)
+    parser.add_argument('--sure', type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
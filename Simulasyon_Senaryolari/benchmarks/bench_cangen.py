@@ -0,0 +1,106 @@
+"""
+CAN trafik üreteci: istenen ve gerçekleşen hız, planlı ana göre sapma.
+
+Her ``--hizlar`` değeri için ``--sure`` saniyelik üç koşu:
+
+- ``eski``: ``start_arbitration_flood`` döngüsü (``send`` + ``asyncio.sleep(1/hız)``),
+- ``is_parcacigi``: ``TrafikUreteci.baslat`` (mutlak zamanlama + meşgul bekleme),
+- ``olay``: ``TrafikUreteci.calistir`` ile ``VirtualCanBus`` düğümü (vadesi
+  gelenleri toplu kuyruğa alır).
+
+Sapma, k. çerçevenin planlı anına (k/hız) göre gecikmedir; eski döngüde
+sürüklenme biriktiği için koşu boyunca büyür. Ardından desenler (patlama,
+rampa, poisson) ve çok akışlı karışım iş parçacığı yoluyla ölçülür. Hedef
+python-can ``virtual`` arayüzüdür (alıcısız, ``send`` ~0.5 µs).
+
+    python -m benchmarks.bench_cangen --hizlar 10,100,1000,5000,10000 --sure 2
+"""
+import argparse
+import asyncio
+import time
+
+import can
+
+from secvolt.cangen import TrafikUreteci, akis
+from secvolt.donanim import VirtualCanBus
+
+SEL_ID = 0x001
+SEL_VERI = [0xAA] * 8
+
+
+def _yuzdelik(s, p):
+    return s[min(len(s) - 1, int(len(s) * p))] if s else 0.0
+
+
+async def eski_dongu(bus, hiz, sure):
+    """ Umut-Mihyaz'daki eski döngü; sapma k/hız'a göre. """
+    msg = can.Message(arbitration_id=SEL_ID, data=SEL_VERI, is_extended_id=False)
+    anlar = []
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < sure:
+        bus.send(msg)
+        anlar.append(time.perf_counter() - t0)
+        await asyncio.sleep(1.0 / hiz)
+    n = len(anlar)
+    gerceklesen = (n - 1) / (anlar[-1] - anlar[0]) if n > 1 else 0.0
+    sapma = sorted((t - k / hiz) * 1e6 for k, t in enumerate(anlar))
+    return {"istenen_hiz": float(hiz), "gerceklesen_hiz": gerceklesen,
+            "hiz_hatasi": (gerceklesen - hiz) / hiz, "sapma_p50_us": _yuzdelik(sapma, 0.5),
+            "sapma_p99_us": _yuzdelik(sapma, 0.99), "sapma_max_us": sapma[-1]}
+
+
+async def is_parcacigi(bus, akislar, sure):
+    uretec = TrafikUreteci(akislar, sure_s=sure)
+    uretec.baslat(bus)
+    await asyncio.to_thread(uretec.bekle)
+    return uretec.rapor()
+
+
+async def olay_dongusu(akislar, sure):
+    hat = VirtualCanBus()
+    dugum = hat.baglan(tx_kuyrugu=1 << 20)
+    uretec = TrafikUreteci(akislar, sure_s=sure)
+    await uretec.calistir(dugum)
+    await hat.kapat()
+    return uretec.rapor()
+
+
+def satir(yol, r):
+    print(f"{yol:>13} {r.get('desen', 'sabit'):>8} {r['istenen_hiz']:>11,.1f} {r['gerceklesen_hiz']:>11,.1f} "
+          f"{r['hiz_hatasi'] * 100:>+8.2f}% {r['sapma_p50_us']:>10,.0f} {r['sapma_p99_us']:>10,.0f} "
+          f"{r['sapma_max_us']:>11,.0f}")
+
+
+async def ana(args):
+    bus = can.interface.Bus(channel="bench_cangen", interface="virtual")
+    print(f"{'yol':>13} {'desen':>8} {'istenen/sn':>11} {'gerçek/sn':>11} {'hız hatası':>9} "
+          f"{'p50 µs':>10} {'p99 µs':>10} {'maks µs':>11}")
+    for hiz in args.hizlar:
+        satir("eski", await eski_dongu(bus, hiz, args.sure))
+        satir("is_parcacigi", (await is_parcacigi(bus, [akis("sel", SEL_ID, hiz, SEL_VERI)], args.sure))[0])
+        satir("olay", (await olay_dongusu([akis("sel", SEL_ID, hiz, SEL_VERI)], args.sure))[0])
+        print()
+
+    print("Desenler ve çok akışlı karışım (iş parçacığı):")
+    karisim = [
+        akis("sel", SEL_ID, 1000, SEL_VERI),
+        akis("patlama", 0x080, 500, desen="patlama", patlama_adet=25),
+        akis("rampa", 0x100, 10, desen="rampa", hiz_son=3000, sure_s=args.sure),
+        akis("poisson", 0x300, 1500, desen="poisson", tohum=7),
+    ]
+    for r in await is_parcacigi(bus, karisim, args.sure):
+        satir(r["ad"], r)
+    bus.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN trafik üreteci doğruluk ölçümü")
+    parser.add_argument('--hizlar', type=lambda s: [int(x) for x in s.split(",")],
+                        default=[10, 100, 1000, 5000, 10000])
+    parser.add_argument('--sure', type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
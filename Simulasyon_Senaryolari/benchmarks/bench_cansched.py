@@ -0,0 +1,133 @@
+"""
+Öncelikli gönderim: röle komutu gecikmesi, selli ve selsiz.
+
+``VirtualCanBus(--bitrate)`` üzerinde istasyon düğümü ``--aralik-ms``'de bir
+0x200 röle komutu yollar (``--sure`` sn). Her senaryo iki yolla koşulur:
+
+- ``fifo``: ``komut_yolla(taşıyıcı)`` (yalnız taşıyıcının FIFO kuyruğu),
+- ``oncelik``: ``komut_yolla(OncelikliCanGonderici)`` (kritik sınıf, 100 ms
+  son tarih, 3 yeniden deneme).
+
+Senaryolar:
+
+- ``bos``: hatta yalnız istasyonun periyodik telemetrisi,
+- ``yerel_toplu``: istasyon kendi kuyruğuna hat kapasitesinin 1.5 katı toplu
+  veri (0x400) basıyor (ör. günlük/firmware aktarımı),
+- ``sel_500``: başka düğümden 0x001 seli, 500 msg/s (Umut-Mihyaz senaryosu),
+- ``sel_doymus``: başka düğümden 0x001 seli, hat kapasitesinin 1.5 katı.
+
+Gecikme: komutun kuyruğa alınmasından hatta çıkışına kadar. Komut 2 sn içinde
+çıkmazsa ``kayip``; ``oncelik`` yolunda son tarih aşımı ``kacirilan``
+sayılır ve istemciye (OCPP tarafına) bildirilir.
+
+    python -m benchmarks.bench_cansched --sure 3
+"""
+import argparse
+import asyncio
+import logging
+
+import can
+
+from secvolt.cangen import TrafikUreteci, akis
+from secvolt.cansched import OncelikliCanGonderici
+from secvolt.donanim import VirtualCanBus, cerceve_bit, komut_mesaji, komut_yolla
+
+SENARYOLAR = ("bos", "yerel_toplu", "sel_500", "sel_doymus")
+
+
+def ozet(ornekler):
+    s = sorted(ornekler)
+    if not s:
+        return "      -          -          -"
+    return f"{s[len(s) // 2]:>7.2f} {s[min(len(s) - 1, int(len(s) * 0.99))]:>10.2f} {s[-1]:>10.2f}"
+
+
+class _SinifliTasiyici:
+    """ Üretecin çerçevelerini zamanlayıcıya belirli bir sınıfla verir. """
+
+    def __init__(self, gonderici, sinif):
+        self.gonderici = gonderici
+        self.sinif = sinif
+
+    def gonder_nowait(self, msg):
+        return self.gonderici.gonder_nowait(msg, self.sinif)
+
+
+async def kosu(args, senaryo, yol):
+    hat = VirtualCanBus(bitrate=args.bitrate)
+    istasyon = hat.baglan(tx_kuyrugu=1 << 16)
+    saldirgan = hat.baglan(tx_kuyrugu=1 << 20)
+    hat.baglan()
+    kacirilan = []
+    gonderici = OncelikliCanGonderici(istasyon, kacirma_fn=kacirilan.append) if yol == "oncelik" else istasyon
+    tam_hiz = args.bitrate / cerceve_bit(komut_mesaji(0x001, [0xAA] * 8))
+
+    arka_plan = [TrafikUreteci([akis("bms", 0x180, 50), akis("sayac", 0x300, 20)], sure_s=args.sure)
+                 .calistir(gonderici)]
+    if senaryo == "yerel_toplu":
+        # Toplu veri de istasyondan (aynı kuyruk), öncelik yolunda "toplu" sınıfında
+        toplu = TrafikUreteci([akis("toplu", 0x400, 1.5 * tam_hiz, desen="patlama", patlama_adet=50)],
+                              sure_s=args.sure)
+        arka_plan.append(toplu.calistir(gonderici if yol == "fifo" else _SinifliTasiyici(gonderici, "toplu")))
+    elif senaryo == "sel_500":
+        arka_plan.append(TrafikUreteci([akis("sel", 0x001, 500, [0xAA] * 8)], sure_s=args.sure).calistir(saldirgan))
+    elif senaryo == "sel_doymus":
+        arka_plan.append(TrafikUreteci([akis("sel", 0x001, 1.5 * tam_hiz, [0xAA] * 8)],
+                                       sure_s=args.sure).calistir(saldirgan))
+    gorevler = [asyncio.create_task(k) for k in arka_plan]
+
+    loop = asyncio.get_running_loop()
+    gecikmeler, bekleyen, komut, kayip = [], [], 0, 0
+    await asyncio.sleep(0.2)
+    bitis = loop.time() + args.sure - 0.2
+    while loop.time() < bitis:
+        t0 = loop.time()
+        komut += 1
+        fut = komut_yolla(gonderici, 0x200, [0x01, 0x01])
+        if fut is not None:
+            fut.add_done_callback(lambda f, t0=t0: f.cancelled() or f.exception() is not None
+                                  or gecikmeler.append((loop.time() - t0) * 1e3))
+            bekleyen.append(fut)
+        else:
+            kayip += 1
+        await asyncio.sleep(args.aralik_ms / 1e3)
+    for fut in bekleyen:
+        try:
+            await asyncio.wait_for(asyncio.shield(fut), 2.0)
+        except asyncio.TimeoutError:
+            # Son tarihi aşan (SonTarihAsildi) ya da 2 sn'de çıkmayan komut
+            kayip += 1
+        except (can.CanError, asyncio.CancelledError):
+            kayip += 1
+    for g in gorevler:
+        g.cancel()
+    await asyncio.gather(*gorevler, return_exceptions=True)
+    await hat.kapat()
+    return komut, gecikmeler, kayip, len(kacirilan)
+
+
+async def ana(args):
+    # Komut başına hata/uyarı logları tabloyu boğmasın
+    logging.disable(logging.ERROR)
+    print(f"{'senaryo':>12} {'yol':>8} {'komut':>6} {'iletilen':>9} {'p50 ms':>7} {'p99 ms':>10} {'maks ms':>10} "
+          f"{'kayıp':>6} {'kaçırılan':>10}")
+    for senaryo in args.senaryolar:
+        for yol in ("fifo", "oncelik"):
+            komut, gecikmeler, kayip, kacirilan = await kosu(args, senaryo, yol)
+            print(f"{senaryo:>12} {yol:>8} {komut:>6} {len(gecikmeler):>9} {ozet(gecikmeler)} {kayip:>6} "
+                  f"{kacirilan if yol == 'oncelik' else '-':>10}")
+    logging.disable(logging.NOTSET)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Öncelikli CAN gönderim ölçümü")
+    parser.add_argument('--bitrate', type=int, default=500000)
+    parser.add_argument('--sure', type=float, default=3.0)
+    parser.add_argument('--aralik-ms', type=float, default=50.0)
+    parser.add_argument('--senaryolar', type=lambda s: s.split(","), default=list(SENARYOLAR))
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
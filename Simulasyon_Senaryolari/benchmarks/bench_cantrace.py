@@ -0,0 +1,164 @@
+"""
+CAN iz kaydı: yazma/okuma verimi, boyut, indeksli atlama ve oynatma sadakati.
+
+Sentetik iz: ``--adet`` çerçeve, istasyon trafiği (BMS 0x180 100 Hz, sayaç
+0x300 20 Hz, röle 0x200 ...) ve araya serpiştirilmiş 0x1A0 firmware yükleme
+çerçeveleri (Hüseyin-Üzüm senaryosu); zaman damgaları ``--hiz`` çerçeve/sn.
+
+1. Yazma: ``IzYazici.ekle`` MB/sn ve çerçeve/sn; ``.svct`` boyutu candump -L
+   metniyle karşılaştırılır. Aynı candump metni ``ice_aktar`` ile geri çevrilir.
+2. Okuma: ham kayıt ve ``can.Message`` çerçeve/sn; izin ortasına indeksle
+   atlama süresi; süreç en yüksek RSS'i (iz belleğe alınmaz).
+3. Tespit: ``dogrudan`` ile tüm iz ``HatIzleyici`` + ``CanIzleyici``'ye
+   verilir; dakikada kaç saatlik trafik işlendiği.
+4. Oynatma: izin ilk ``--oynat-sn`` saniyesi 1x / 10x / en hızlı
+   ``VirtualCanBus`` taşıyıcısına (``calistir``) ve python-can ``virtual``
+   hattına (``baslat``, iş parçacığı) oynatılır; planlı ana göre gecikme.
+
+    python -m benchmarks.bench_cantrace --adet 1000000
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import resource
+import tempfile
+import time
+
+import can
+
+from secvolt.busmon import HatIzleyici
+from secvolt.cantrace import GELEN, IzOkuyucu, IzOynatici, IzYazici, ice_aktar, rapor_metni
+from secvolt.canwatch import CanIzleyici, kural
+from secvolt.donanim import VirtualCanBus
+
+KIMLIKLER = (0x180, 0x180, 0x180, 0x180, 0x300, 0x200, 0x201, 0x7E0)
+FIRMWARE_ID = 0x1A0
+
+
+def iz_uret(adet, hiz):
+    rng = random.Random(7)
+    t = 1_700_000_000_000_000
+    aralik = 1e6 / hiz
+    for i in range(adet):
+        t += int(rng.expovariate(1.0) * aralik) + 1
+        can_id = FIRMWARE_ID if i % 5000 == 0 else rng.choice(KIMLIKLER)
+        yield t, can_id, GELEN, bytes(rng.getrandbits(8) for _ in range(8))
+
+
+def mb(n):
+    return n / (1 << 20)
+
+
+def yazma(yol, args):
+    # Üretim ve candump metni ölçüme girmesin; iz parça parça yazılır (bellek sabit kalsın)
+    kaynak, metin, gecen = iz_uret(args.adet, args.hiz), yol + ".log", 0.0
+    with IzYazici(yol) as yazici, open(metin, "w") as f:
+        ekle = yazici.ekle
+        while parca := list(itertools.islice(kaynak, 100000)):
+            t0 = time.perf_counter()
+            for k in parca:
+                ekle(*k)
+            gecen += time.perf_counter() - t0
+            f.writelines(f"({ts / 1e6:.6f}) can0 {can_id:03X}#{veri.hex().upper()}\n"
+                         for ts, can_id, _, veri in parca)
+        t0 = time.perf_counter()
+    gecen += time.perf_counter() - t0
+    boyut = os.path.getsize(yol)
+    metin_boyut = os.path.getsize(metin)
+    print(f"Yazma: {args.adet:,} çerçeve {gecen:.2f} sn -> {args.adet / gecen:,.0f} çerçeve/sn, "
+          f"{mb(boyut) / gecen:.1f} MB/sn")
+    print(f"  boyut: .svct {mb(boyut):.1f} MB ({boyut / args.adet:.1f} bayt/çerçeve), candump -L "
+          f"{mb(metin_boyut):.1f} MB -> {metin_boyut / boyut:.1f}x küçük")
+    t0 = time.perf_counter()
+    adet = ice_aktar(metin, yol + ".ice.svct")
+    gecen = time.perf_counter() - t0
+    print(f"  candump içe aktarma: {adet / gecen:,.0f} çerçeve/sn ({mb(metin_boyut) / gecen:.1f} MB/sn metin)")
+    os.remove(metin)
+    os.remove(yol + ".ice.svct")
+
+
+def okuma(yol):
+    with IzOkuyucu(yol) as okuyucu:
+        t0 = time.perf_counter()
+        adet = sum(1 for _ in okuyucu.kayitlar())
+        ham = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        sum(1 for _ in okuyucu.mesajlar())
+        msg = time.perf_counter() - t0
+        ozet = okuyucu.ozet()
+        orta = (ozet["ilk_ts_us"] + ozet["son_ts_us"]) // 2
+        t0 = time.perf_counter()
+        ilk = next(okuyucu.kayitlar(baslangic=orta))
+        atlama = time.perf_counter() - t0
+        print(f"Okuma: ham {adet / ham:,.0f} çerçeve/sn, can.Message {adet / msg:,.0f} çerçeve/sn; "
+              f"{len(okuyucu.indeks())} indeks girdisi, ortaya atlama {atlama * 1e3:.2f} ms "
+              f"(hedef +{(ilk[0] - orta) / 1e3:.1f} ms)")
+        print(f"  iz süresi {ozet['sure_s'] / 3600:.2f} saat, {mb(ozet['boyut']):.1f} MB")
+
+
+def tespit(yol):
+    hat = HatIzleyici(bitrate=500000)
+    tetik = []
+    watch = CanIzleyici(None, [kural("yetkisiz_firmware", FIRMWARE_ID, tetik.append)])
+    with IzOkuyucu(yol) as okuyucu:
+        oynatici = IzOynatici(okuyucu, hiz=None)
+        oynatici.dogrudan(hat.cerceve, watch.cerceve)
+    r = oynatici.rapor()
+    print(f"Tespit (dogrudan -> HatIzleyici + CanIzleyici): {rapor_metni(r)}")
+    print(f"  dakikada {r['hizlanma'] / 60:.1f} saatlik trafik; 0x1A0 eşleşen {watch.eslesen['yetkisiz_firmware']:,}")
+
+
+async def oynatma_async(yol, args):
+    with IzOkuyucu(yol) as okuyucu:
+        ilk = next(okuyucu.kayitlar())[0]
+        for hiz in (1.0, 10.0, None):
+            hat = VirtualCanBus(bitrate=args.bitrate)
+            kaynak = hat.baglan(tx_kuyrugu=4096)
+            alici = hat.baglan(rx_kuyrugu=1 << 20)
+            oynatici = IzOynatici(okuyucu, hiz=hiz, bitis=ilk + int(args.oynat_sn * 1e6 * (hiz or 10)))
+            son = await oynatici.calistir(kaynak)
+            if son is not None:
+                await son
+            print(f"  sanal hat {hiz or 'max'!s:>5}: {rapor_metni(oynatici.rapor())}; hat {hat.cerceve:,}, "
+                  f"alıcı düşen {alici.rx_dusen}")
+            await hat.kapat()
+
+
+def oynatma_is_parcacigi(yol, args):
+    with IzOkuyucu(yol) as okuyucu:
+        ilk = next(okuyucu.kayitlar())[0]
+        for hiz in (1.0, 10.0, None):
+            bus = can.interface.Bus(channel="bench_cantrace", interface="virtual")
+            oynatici = IzOynatici(okuyucu, hiz=hiz, bitis=ilk + int(args.oynat_sn * 1e6 * (hiz or 10)))
+            oynatici.baslat(bus)
+            oynatici.bekle()
+            print(f"  thread  {hiz or 'max'!s:>5}: {rapor_metni(oynatici.rapor())}")
+            bus.shutdown()
+
+
+async def ana(args):
+    with tempfile.TemporaryDirectory() as dizin:
+        yol = os.path.join(dizin, "iz.svct")
+        yazma(yol, args)
+        okuma(yol)
+        tespit(yol)
+        print(f"Oynatma (izin ilk {args.oynat_sn:g} sn'si; max: 10 katı kadar iz):")
+        await oynatma_async(yol, args)
+        oynatma_is_parcacigi(yol, args)
+    print(f"En yüksek RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN iz kaydı / oynatma ölçümü")
+    parser.add_argument('--adet', type=int, default=1000000)
+    parser.add_argument('--hiz', type=float, default=300.0, help="İzdeki ortalama çerçeve/sn")
+    parser.add_argument('--bitrate', type=int, default=500000)
+    parser.add_argument('--oynat-sn', type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+CAN izleme: ``--hiz`` çerçeve/sn altında çerçeve kaybı, CPU ve olay döngüsü gecikmesi.
+
+Bir üreteç iş parçacığı hatta ``--hiz`` çerçeve/sn basar (5 ms'lik dilimler);
+``--ilgili`` oranı kural tablosuna uyar (0x1A0 ve UDS RequestDownload), gerisi
+arka plan trafiğidir. Üç koşu karşılaştırılır:
+
+- ``taban``: yalnız üreteç (CPU referansı),
+- ``yoklama``: eski ``monitor_can_traffic`` (``recv(timeout=0.01)`` + 10 ms uyku,
+  Python'da kimlik karşılaştırması),
+- ``olay``: ``AsyncCanBus`` + ``CanIzleyici`` (filtre + dinleyici).
+
+Kayıp: koşu bitiminden ``--tolerans`` sn sonra hâlâ işlenmemiş ilgili çerçeve
+oranı. CPU: koşunun süreç CPU süresinden taban koşununki çıkarılır.
+``virtual`` arayüzünde filtreler python-can içinde uygulanır; ``--arayuz
+socketcan --kanal vcan0`` ile çekirdek filtresi (CAN_RAW_FILTER) ölçülür.
+
+    python -m benchmarks.bench_canwatch --hiz 5000 --sure 5
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import can
+
+from secvolt.canwatch import CanIzleyici, kural
+from secvolt.donanim import AsyncCanBus
+
+SALDIRI_CAN_ID = 0x1A0
+UDS_ISTEK_ID = 0x7E0
+REQUEST_DOWNLOAD = bytes([0x04, 0x34, 0x00, 0x44, 0, 0, 0, 0])
+
+
+def uretec(bus, hiz, sure, ilgili, dur, sayac):
+    rng = random.Random(17)
+    dilim = 0.005
+    adet = max(1, round(hiz * dilim))
+    baslangic = time.perf_counter()
+    n = 0
+    while not dur.is_set() and time.perf_counter() - baslangic < sure:
+        for _ in range(adet):
+            r = rng.random()
+            if r < ilgili / 2:
+                msg = can.Message(arbitration_id=SALDIRI_CAN_ID, data=[0xDE, 0xAD], is_extended_id=False)
+                sayac["ilgili"] += 1
+            elif r < ilgili:
+                msg = can.Message(arbitration_id=UDS_ISTEK_ID + rng.randrange(8), data=REQUEST_DOWNLOAD,
+                                  is_extended_id=False)
+                sayac["ilgili"] += 1
+            else:
+                # Arka plan: UDS olmayan kimlikler ve RequestDownload olmayan tanı çerçeveleri
+                can_id = rng.choice((0x100, 0x123, 0x200, 0x2F0, 0x3A5, 0x400, 0x7E0))
+                veri = bytes([0x02, 0x10, 0x03]) if can_id == 0x7E0 else rng.randbytes(8)
+                msg = can.Message(arbitration_id=can_id, data=veri, is_extended_id=False)
+            bus.send(msg)
+            n += 1
+        hedef = baslangic + (n / hiz)
+        bekle = hedef - time.perf_counter()
+        if bekle > 0:
+            time.sleep(bekle)
+    sayac["gonderilen"] = n
+
+
+async def gecikme_olc(dur, ornekler, aralik=0.01):
+    loop = asyncio.get_running_loop()
+    while not dur.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(aralik)
+        ornekler.append((loop.time() - t0 - aralik) * 1e3)
+
+
+async def kosu(args, mod):
+    tx = can.interface.Bus(channel=args.kanal, interface=args.arayuz)
+    rx = can.interface.Bus(channel=args.kanal, interface=args.arayuz)
+    sayac = {"ilgili": 0, "gonderilen": 0, "islenen": 0}
+    dur_uretec = threading.Event()
+    dur = asyncio.Event()
+    gecikmeler = []
+    izleyici = None
+
+    if mod == "olay":
+        hat = AsyncCanBus(rx)
+
+        def yakala(msg):
+            sayac["islenen"] += 1
+
+        izleyici = CanIzleyici(hat, [
+            kural("yetkisiz_firmware", SALDIRI_CAN_ID, yakala),
+            kural("uds_request_download", UDS_ISTEK_ID, yakala, maske=0x7F8, veri_deseni=rb"\A[\x02-\x07]\x34"),
+        ])
+        izleyici.baslat()
+
+    async def yoklama():
+        while not dur.is_set():
+            msg = rx.recv(timeout=0.01)
+            if msg and (msg.arbitration_id == SALDIRI_CAN_ID
+                        or (msg.arbitration_id & 0x7F8 == UDS_ISTEK_ID and msg.data[1:2] == b"\x34")):
+                sayac["islenen"] += 1
+            await asyncio.sleep(0.01)
+
+    gorevler = [asyncio.create_task(gecikme_olc(dur, gecikmeler))]
+    if mod == "yoklama":
+        gorevler.append(asyncio.create_task(yoklama()))
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    uretim = threading.Thread(target=uretec, args=(tx, args.hiz, args.sure, args.ilgili, dur_uretec, sayac))
+    uretim.start()
+    while uretim.is_alive():
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(args.tolerans)
+    cpu, gecen = time.process_time() - cpu0, time.perf_counter() - t0
+    dur.set()
+    await asyncio.gather(*gorevler)
+    if izleyici is not None:
+        izleyici.durdur()
+        await hat.kapat()
+    else:
+        rx.shutdown()
+    tx.shutdown()
+    return sayac, cpu, gecen, sorted(gecikmeler) or [0.0]
+
+
+async def ana(args):
+    taban_cpu = None
+    print(f"{'mod':>8} {'çerçeve/sn':>11} {'ilgili':>7} {'işlenen':>8} {'kayıp':>7} {'CPU':>7} "
+          f"{'gecikme p50':>12} {'p99':>8}")
+    for mod in ("taban", "yoklama", "olay"):
+        sayac, cpu, gecen, g = await kosu(args, mod)
+        if mod == "taban":
+            taban_cpu = cpu
+            kayip = "-"
+        else:
+            kayip = f"%{(1 - sayac['islenen'] / max(1, sayac['ilgili'])) * 100:.1f}"
+        ek_cpu = cpu if mod == "taban" else max(0.0, cpu - taban_cpu)
+        print(f"{mod:>8} {sayac['gonderilen'] / args.sure:>11,.0f} {sayac['ilgili']:>7} {sayac['islenen']:>8} "
+              f"{kayip:>7} %{ek_cpu / gecen * 100:>5.1f} {g[len(g) // 2]:>9.2f} ms {g[int(len(g) * 0.99)]:>5.1f} ms")
+    print("CPU: taban satırı üretecin kendisi, diğerleri tabana göre ek yük.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN izleme ölçümü")
+    parser.add_argument('--hiz', type=int, default=5000)
+    parser.add_argument('--sure', type=float, default=5.0)
+    parser.add_argument('--ilgili', type=float, default=0.02)
+    parser.add_argument('--tolerans', type=float, default=0.5)
+    parser.add_argument('--arayuz', default="virtual")
+    parser.add_argument('--kanal', default="bench_canwatch")
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
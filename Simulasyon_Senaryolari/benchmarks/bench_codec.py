@@ -0,0 +1,102 @@
+"""
+OCPP çerçeve çözme + şema doğrulama mikro ölçümü (µs/mesaj, aksiyon başına).
+
+Sütunlar:
+- ``stdlib``: ocpp.messages.unpack + validate_payload (kütüphanenin yolu)
+- ``hizli``: secvolt.codec.unpack + derlenmiş doğrulayıcı (tam doğrulama)
+- ``orneklem``: secvolt.codec, %1 örneklemeli doğrulama
+- ``route std`` / ``route hizli``: csms_server.SablonChargePoint üzerinden
+  çerçevenin çözülüp handler'a gidip cevabın kodlanmasına kadar tüm yol
+
+    python -m benchmarks.bench_codec --adet 20000
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from ocpp.charge_point import ChargePoint as OcppChargePoint
+from ocpp.messages import unpack as std_unpack, validate_payload
+
+import csms_server
+from secvolt import codec
+
+CERCEVELER = {
+    "BootNotification": '[2,"1","BootNotification",{"chargePointModel":"SecVolt-Sim","chargePointVendor":"GroupProject"}]',
+    "Heartbeat": '[2,"2","Heartbeat",{}]',
+    "MeterValues": ('[2,"3","MeterValues",{"connectorId":1,"meterValue":[{"timestamp":"2025-01-01T00:00:00+00:00",'
+                    '"sampledValue":[{"value":"1000","context":"Sample.Periodic","measurand":"Energy.Active.Import.Register",'
+                    '"unit":"Wh"},{"value":"220.5","measurand":"Voltage","unit":"V"}]}]}]'),
+    "Authorize": '[2,"4","Authorize",{"idTag":"USER-A123"}]',
+    "StartTransaction": ('[2,"5","StartTransaction",{"connectorId":1,"idTag":"USER-A123","meterStart":150000,'
+                         '"timestamp":"2025-01-01T00:00:00+00:00"}]'),
+    "StatusNotification": '[2,"6","StatusNotification",{"connectorId":1,"errorCode":"NoError","status":"Available"}]',
+}
+
+
+class _BosBaglanti:
+    async def send(self, mesaj):
+        pass
+
+    async def recv(self):
+        raise ConnectionError
+
+
+class StandartCP(csms_server.SablonChargePoint):
+    """ Aynı handler'lar, kütüphanenin kendi çözme/doğrulama yolu. """
+    route_message = OcppChargePoint.route_message
+    _handle_call = OcppChargePoint._handle_call
+
+
+def _sure(fn, adet):
+    t0 = time.perf_counter()
+    for _ in range(adet):
+        fn()
+    return (time.perf_counter() - t0) / adet * 1e6
+
+
+def _async_sure(coro_fn, adet):
+    async def dongu():
+        t0 = time.perf_counter()
+        for _ in range(adet):
+            await coro_fn()
+        return (time.perf_counter() - t0) / adet * 1e6
+    return asyncio.run(dongu())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCPP codec mikro ölçümü")
+    parser.add_argument('--adet', type=int, default=20000)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    orneklem = codec.ValidationPolicy(varsayilan=0.01)
+    std_cp = StandartCP("BENCH", _BosBaglanti())
+    hizli_cp = csms_server.SablonChargePoint("BENCH", _BosBaglanti())
+
+    print(f"JSON arka ucu: {codec.JSON_BACKEND}, fastjsonschema: {codec.fastjsonschema is not None}")
+    print(f"{'Aksiyon':<20} {'stdlib':>8} {'hizli':>8} {'orneklem':>9} {'route std':>10} {'route hizli':>12}  (µs/mesaj)")
+    for aksiyon, ham in CERCEVELER.items():
+        def std():
+            validate_payload(std_unpack(ham), "1.6")
+
+        def hizli():
+            codec.dogrula(codec.unpack(ham))
+
+        def ornekli():
+            msg = codec.unpack(ham)
+            if orneklem.dogrula_mi(msg.action):
+                codec.dogrula(msg)
+
+        satir = f"{aksiyon:<20} {_sure(std, args.adet):>8.1f} {_sure(hizli, args.adet):>8.1f} {_sure(ornekli, args.adet):>9.1f}"
+        if aksiyon in std_cp.route_map:
+            r_std = _async_sure(lambda: std_cp.route_message(ham), args.adet)
+            r_hizli = _async_sure(lambda: hizli_cp.route_message(ham), args.adet)
+            satir += f" {r_std:>10.1f} {r_hizli:>12.1f}"
+        else:
+            satir += f" {'-':>10} {'-':>12}"
+        print(satir)
+
+
+if __name__ == '__main__':
+    main()
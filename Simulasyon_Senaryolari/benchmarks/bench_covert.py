@@ -0,0 +1,83 @@
+"""
+Gizli kanal çözücü: bağlantı ömrü boyunca mesaj başına maliyet.
+
+Yusuf-Arıkan istemcisinin voltaj dizisi (``SECVOLT_PASS``, 0 -> 220.0 V,
+1 -> 220.5 V) tek bir şarj noktasından ``--mesaj`` kez beslenir. Her pencere
+sonunda son pencerenin mesaj başına maliyeti yazılır: artımlı çözücüde maliyet
+ve bellek sabit kalmalı, eski string birikimli yöntemde (her mesajda tüm
+geçmişin yeniden çözülmesi) geçmişle doğrusal büyür. 5 sn aralıkla 1 saat =
+720 mesaj.
+
+    python -m benchmarks.bench_covert --mesaj 1000000 --eski-mesaj 20000
+"""
+import argparse
+import time
+
+from secvolt.covert import KODLAMALAR, CovertDecoder
+
+
+def voltajlar(metin="SECVOLT_PASS"):
+    bitler = bin(int.from_bytes(metin.encode(), 'big'))[2:]
+    bitler = bitler.zfill(8 * ((len(bitler) + 7) // 8))
+    return [220.5 if b == '1' else 220.0 for b in bitler]
+
+
+def eski_yontem(dizi, adet, pencere):
+    """ Sunucudaki önceki yöntem: string'e bit ekle, her mesajda tümünü çöz. """
+    bits, mesaj, sonuc = "", "", []
+    t0 = time.perf_counter()
+    for i in range(adet):
+        bits += '1' if dizi[i % len(dizi)] > 220.25 else '0'
+        cozulen = "".join(chr(int(bits[j:j + 8], 2)) for j in range(0, len(bits) - 7, 8))
+        if cozulen != mesaj:
+            mesaj = cozulen
+        if (i + 1) % pencere == 0:
+            t1 = time.perf_counter()
+            sonuc.append((i + 1, (t1 - t0) / pencere * 1e6, len(bits) + len(mesaj)))
+            t0 = t1
+    return sonuc
+
+
+def yeni_yontem(dizi, adet, pencere, kodlamalar):
+    cozucu = CovertDecoder(kodlamalar=kodlamalar, bayt_fn=None)
+    kanal = cozucu.kanallar("CP-1")
+    sonuc = []
+    t0 = time.perf_counter()
+    for i in range(adet):
+        cozucu.besle("CP-1", dizi[i % len(dizi)])
+        if (i + 1) % pencere == 0:
+            t1 = time.perf_counter()
+            kuyruk = sum(len(k.paket.kuyruk) for k in kanal.values())
+            sonuc.append((i + 1, (t1 - t0) / pencere * 1e6, kuyruk))
+            t0 = t1
+    return sonuc, cozucu
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gizli kanal çözücü ölçümü")
+    parser.add_argument('--mesaj', type=int, default=1000000)
+    parser.add_argument('--eski-mesaj', type=int, default=20000, help="Eski yöntem için mesaj (karesel)")
+    parser.add_argument('--pencere', type=int, default=None)
+    parser.add_argument('--kodlama', nargs='+', default=list(KODLAMALAR), choices=KODLAMALAR)
+    args = parser.parse_args()
+
+    dizi = voltajlar()
+    pencere = args.pencere or max(1, args.mesaj // 10)
+    sonuc, cozucu = yeni_yontem(dizi, args.mesaj, pencere, args.kodlama)
+    print(f"Artımlı çözücü ({', '.join(args.kodlama)}):")
+    print(f"{'mesaj':>10} {'saat (5 sn)':>12} {'µs/mesaj':>9} {'kuyruk bayt':>12}")
+    for adet, us, bellek in sonuc:
+        print(f"{adet:>10} {adet * 5 / 3600:>12.1f} {us:>9.2f} {bellek:>12}")
+    if "esik" in args.kodlama:
+        print(f"Çözülen (eşik, son 24): {cozucu.metin('CP-1', 'esik', 24)!r}")
+
+    if args.eski_mesaj:
+        eski_pencere = max(1, args.eski_mesaj // 10)
+        print("\nEski yöntem (string birikimi + tam yeniden çözme):")
+        print(f"{'mesaj':>10} {'saat (5 sn)':>12} {'µs/mesaj':>9} {'tampon kar.':>12}")
+        for adet, us, bellek in eski_yontem(dizi, args.eski_mesaj, eski_pencere):
+            print(f"{adet:>10} {adet * 5 / 3600:>12.1f} {us:>9.2f} {bellek:>12}")
+
+
+if __name__ == '__main__':
+    main()
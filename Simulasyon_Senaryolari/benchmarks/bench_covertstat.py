@@ -0,0 +1,110 @@
+"""
+Filo çapında istatistiksel gizli kanal dedektörü: tek çekirdekte ölçek ve isabet.
+
+``--cp`` şarj noktası her turda (5 sn) bir Voltage örneği gönderir; ``--tur``
+tur çalıştırılır. Şarj noktalarının çoğu şebeke gürültüsü üretir (AR(1) yavaş
+dalgalanma, beyaz gürültü, ara sıra yük basamakları; 0.1 V sayaç çözünürlüğü),
+``--saldirgan`` oranı ise ``SECVOLT_PASS`` metnini eşik, delta (NRZI),
+Manchester ya da 4 seviyeli kodlamayla sızdırır. Tur başına giriş (``ekle``) ve
+batch işleme süresi ile 5 sn'lik bütçeye oranı, ardından en yüksek skorlu
+şarj noktalarının isabeti raporlanır.
+
+    python -m benchmarks.bench_covertstat --cp 100000 --tur 60
+"""
+import argparse
+import time
+
+import numpy as np
+
+from secvolt.covertstat import CovertStatDetector
+
+TUR_SN = 5.0
+KODLAMALAR = ("esik", "delta", "manchester", "dort_seviye")
+
+
+def gizli_bitler(metin="SECVOLT_PASS"):
+    return np.unpackbits(np.frombuffer(metin.encode(), dtype=np.uint8)).astype(np.float64)
+
+
+def saldirgan_dizisi(kodlama, tur, rng):
+    bitler = np.resize(gizli_bitler(), tur * 2)
+    if kodlama == "esik":
+        seviye = bitler[:tur]
+    elif kodlama == "delta":
+        seviye = np.cumsum(bitler[:tur]) % 2
+    elif kodlama == "manchester":
+        seviye = np.stack([1 - bitler, bitler], axis=1).reshape(-1)[:tur]
+    else:
+        seviye = (bitler[0:2 * tur:2] * 2 + bitler[1:2 * tur:2])[:tur] / 1.5
+    return 220.0 + 0.5 * seviye + rng.normal(0, 0.02, tur)
+
+
+def sebeke_dizisi(tur, rng):
+    tip = rng.integers(0, 3)
+    if tip == 0:
+        # Yavaş dalgalanma: AR(1), r ~ 0.9
+        e = rng.normal(0, 0.6, tur)
+        x = np.empty(tur)
+        x[0] = e[0] * 2
+        for t in range(1, tur):
+            x[t] = 0.9 * x[t - 1] + e[t]
+    elif tip == 1:
+        x = rng.normal(0, rng.uniform(0.2, 1.5), tur)
+    else:
+        # Yük basamakları + gürültü
+        x = np.cumsum(rng.random(tur) < 0.05) % 3 * -1.5 + rng.normal(0, 0.3, tur)
+    return np.round(230.0 + x, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gizli kanal istatistik dedektörü ölçümü")
+    parser.add_argument('--cp', type=int, default=100000)
+    parser.add_argument('--tur', type=int, default=60)
+    parser.add_argument('--saldirgan', type=float, default=0.002)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    saldirgan = np.flatnonzero(rng.random(args.cp) < args.saldirgan)
+    kodlama = {int(i): KODLAMALAR[j % len(KODLAMALAR)] for j, i in enumerate(saldirgan)}
+    t0 = time.perf_counter()
+    veri = np.empty((args.cp, args.tur))
+    for i in range(args.cp):
+        veri[i] = saldirgan_dizisi(kodlama[i], args.tur, rng) if i in kodlama else sebeke_dizisi(args.tur, rng)
+    print(f"Veri üretimi: {time.perf_counter() - t0:.1f} sn ({args.cp} şarj noktası x {args.tur} tur)")
+
+    dedektor = CovertStatDetector(alarm_fn=None)
+    anahtarlar = [(f"CP-{i:06d}", 1, "Voltage") for i in range(args.cp)]
+    ekle = dedektor.ekle
+    giris = isleme = 0.0
+    for t in range(args.tur):
+        sutun = veri[:, t].tolist()
+        t0 = time.perf_counter()
+        for anahtar, deger in zip(anahtarlar, sutun):
+            ekle(anahtar, deger)
+        t1 = time.perf_counter()
+        dedektor.isle()
+        giris += t1 - t0
+        isleme += time.perf_counter() - t1
+    butce = args.tur * TUR_SN
+    print(f"Giriş (ekle): {giris / args.tur * 1e3:.0f} ms/tur, {giris / (args.tur * args.cp) * 1e6:.2f} µs/örnek")
+    print(f"Batch işleme: {isleme / args.tur * 1e3:.0f} ms/tur ({args.cp / (isleme / args.tur) / 1e6:.1f} M örnek/sn)")
+    print(f"Tek çekirdek bütçesi: %{(giris + isleme) / butce * 100:.1f} (5 sn'de {args.cp} şarj noktası)")
+    print(f"Durum belleği: {dedektor.bellek() / 2 ** 20:.1f} MiB ({dedektor.bellek() / len(dedektor):.0f} bayt/seri)")
+
+    adaylar = dedektor.sirala(n=len(saldirgan))
+    bulunan = {int(a.anahtar[0][3:]) for a in adaylar}
+    esik_ustu = {int(a.anahtar[0][3:]) for a in dedektor.sirala(n=args.cp, min_skor=dedektor.skor_esigi)}
+    print(f"Saldırgan: {len(saldirgan)}, ilk {len(saldirgan)} sırada doğru: {len(bulunan & set(kodlama))}")
+    print(f"Eşik ({dedektor.skor_esigi}) üstü: {len(esik_ustu)}, yanlış alarm: {len(esik_ustu - set(kodlama))}, "
+          f"kaçırılan: {len(set(kodlama) - esik_ustu)}")
+    print(f"{'kodlama':>12} {'adet':>5} {'ort skor':>9} {'min skor':>9}")
+    for k in KODLAMALAR:
+        skorlar = [dedektor.skor(anahtarlar[i]).skor for i, kk in kodlama.items() if kk == k]
+        if skorlar:
+            print(f"{k:>12} {len(skorlar):>5} {np.mean(skorlar):>9.2f} {np.min(skorlar):>9.2f}")
+    tum = dedektor._metrikler(np.array([i for i in range(args.cp) if i not in kodlama]))["skor"]
+    print(f"{'şebeke':>12} {len(tum):>5} {tum.mean():>9.2f} {'max %.2f' % tum.max():>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+CSMS mesaj yolu için uçtan uca ölçüm takımı; taban rapora göre gerileme kapısı.
+
+1. Mikro (``mikro/<sunucu>/<aksiyon>``): BootNotification, Heartbeat,
+   MeterValues, Authorize, StartTransaction çerçeveleri sunucunun kendi
+   ``on_connect``'ine bellek içi bir bağlantıyla art arda verilir; çerçevenin
+   ``recv``'den dönmesinden cevabın ``send``'e gelmesine kadar geçen süre
+   (çözme, doğrulama, handler, kodlama) tek tek ölçülür. Koşu ``--tekrar``
+   kez yapılır, her ölçütün en iyi değeri raporlanır (``timeit`` gibi: gürültü
+   yalnız yavaşlatır). Sunucuda işleyicisi olmayan aksiyon (cevapların tamamı
+   CallError) atlanır; varsayılan hedefler ``csms_server`` ve Authorize /
+   StartTransaction işleyicileri olan ``Hüseyin-Korkutan`` sunucusudur.
+2. Makro (``makro/<sunucu>/<aksiyon>``): sunucu ``secvolt.workers.Supervisor``
+   ile gerçek websocket olarak localhost'ta başlatılır; ``--surec`` yük süreci
+   toplam ``--baglanti`` bağlantı açar (``Baglanti``: el sıkışma süresi),
+   BootNotification gönderir, tüm bağlantılar hazır olunca ``--sure`` saniye
+   boyunca her bağlantı Heartbeat / MeterValues'u sırayla gönderip cevabını
+   bekler (kapalı döngü). ``Toplam`` satırı ölçüm penceresindeki tüm
+   çağrılardır. Yük süreçleri sunucuyla aynı çekirdekleri paylaşır; sayılar
+   yalnız aynı makinedeki taban raporla karşılaştırılmalıdır.
+
+Ölçüm boyunca loglar kapalıdır (handler maliyeti, log G/Ç'si değil).
+Sonuçlar ``benchmarks.rapor`` biçiminde ``--json``'a yazılır; ``--taban``
+verilirse karşılaştırılır. Kapı ölçütlerinden biri ``--tolerans``'tan fazla
+kötüleşmişse, CallError sayısı artmışsa ya da tabandaki bir ölçüm eksikse
+çıkış kodu 1'dir. Tabanda bulunan aksiyon, cevaplarının tamamı CallError
+olsa da atlanmaz (bozulan handler ölçümden sessizce düşmesin).
+
+    python -m benchmarks.bench_csms --json taban.json
+    python -m benchmarks.bench_csms --taban taban.json --json son.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import multiprocessing
+import resource
+import socket
+import sys
+import time
+
+import websockets
+from websockets.exceptions import ConnectionClosedOK
+
+from benchmarks import rapor
+from benchmarks.bench_codec import CERCEVELER
+from secvolt.replay import sunucu_yukle
+from secvolt.workers import Supervisor
+
+MIKRO_AKSIYONLAR = ("BootNotification", "Heartbeat", "MeterValues", "Authorize", "StartTransaction")
+MAKRO_DONGU = ("Heartbeat", "MeterValues")
+# Yük süreci başına kuyruğa konan en fazla gecikme örneği
+ORNEK_SINIRI = 100000
+
+
+def _govde(aksiyon):
+    """ Hazır çerçevenin benzersiz kimlikten sonrası: '"Heartbeat",{}]' """
+    return CERCEVELER[aksiyon].split(",", 2)[2]
+
+
+class _OlcumBaglantisi:
+    """ ``on_connect``'e verilen bağlantı: hazır çerçeveleri verir, her cevabın süresini ölçer. """
+
+    def __init__(self, path, aksiyon, adet):
+        self.path = path
+        self.subprotocol = "ocpp1.6"
+        self._govde = _govde(aksiyon)
+        self._adet = adet
+        self._i = 0
+        self._bekleyen = {}
+        self.gecikmeler = []
+        self.hata = 0
+
+    async def recv(self):
+        if self._i >= self._adet:
+            # Eşzamanlı dağıtan sunucularda son cevaplar gelmeden bağlantı kapanmasın
+            for _ in range(1000):
+                if not self._bekleyen:
+                    break
+                await asyncio.sleep(0.001)
+            raise ConnectionClosedOK(None, None)
+        self._i += 1
+        uid = str(self._i)
+        cerceve = f'[2,"{uid}",{self._govde}'
+        self._bekleyen[uid] = time.perf_counter_ns()
+        return cerceve
+
+    async def send(self, mesaj):
+        t = time.perf_counter_ns()
+        cerceve = json.loads(mesaj)
+        if cerceve[0] == 2:
+            # Sunucunun başlattığı çağrı (SendLocalList vb.); cevaplanmaz
+            return
+        t0 = self._bekleyen.pop(cerceve[1], None)
+        if t0 is not None:
+            self.gecikmeler.append(t - t0)
+        if cerceve[0] == 4:
+            self.hata += 1
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+async def _mikro_aksiyon(on_connect, aksiyon, adet):
+    isinma = _OlcumBaglantisi(f"/MIKRO-ISINMA-{aksiyon}", aksiyon, min(1000, adet))
+    await on_connect(isinma, isinma.path)
+    ws = _OlcumBaglantisi(f"/MIKRO-{aksiyon}", aksiyon, adet)
+    t0 = time.perf_counter()
+    await on_connect(ws, ws.path)
+    return ws, time.perf_counter() - t0
+
+
+def mikro(sunucular, adet, tekrar, korunan=()):
+    """ ``korunan``: tabanda bulunan anahtarlar; tüm cevapları CallError olsa da raporlanır. """
+    hedefler = {}
+    for sunucu in sunucular:
+        ad = "csms_server" if sunucu in ("csms", "csms_server") else sunucu
+        for aksiyon in MIKRO_AKSIYONLAR:
+            hedefler[f"mikro/{ad}/{aksiyon}"] = (sunucu_yukle(sunucu), aksiyon)
+    # Tekrarlar aksiyonlar arasında sırayla döner: makinenin yavaş anları tek bir ölçüme yığılmasın
+    tekrarlar = {anahtar: [] for anahtar in hedefler}
+    for _ in range(tekrar):
+        for anahtar, (on_connect, aksiyon) in list(hedefler.items()):
+            ws, gecen = asyncio.run(_mikro_aksiyon(on_connect, aksiyon, adet))
+            if ws.hata == len(ws.gecikmeler) and anahtar not in korunan:
+                del hedefler[anahtar]
+                continue
+            tekrarlar[anahtar].append(rapor.ozetle(ws.gecikmeler, gecen, ws.hata))
+
+    sonuclar = {}
+    print(f"{'Mikro':<40} {'Adet':>7} {'Çağrı/sn':>10} {'p50 µs':>8} {'p99 µs':>8} {'p999 µs':>9}")
+    for anahtar, ozetler in tekrarlar.items():
+        if not ozetler:
+            print(f"{anahtar:<40} işleyici yok, atlandı")
+            continue
+        s = sonuclar[anahtar] = rapor.en_iyi(ozetler)
+        print(f"{anahtar:<40} {s['adet']:>7,} {s['ops_sn']:>10,.0f} {s['p50_us']:>8.1f} {s['p99_us']:>8.1f} "
+              f"{s['p999_us']:>9.1f}" + (f"  ({s['hata']} CallError)" if s["hata"] else ""))
+    return sonuclar
+
+
+def _cerceve(uid, aksiyon):
+    return f'[2,"{uid}",{_govde(aksiyon)}'
+
+
+async def _cagir(ws, uid, aksiyon, gecikmeler, hatalar):
+    t0 = time.perf_counter_ns()
+    await ws.send(_cerceve(uid, aksiyon))
+    cevap = await ws.recv()
+    gecikmeler[aksiyon].append(time.perf_counter_ns() - t0)
+    if cevap[1] == "4":
+        hatalar[aksiyon] += 1
+
+
+def _yuk_sureci(port, surec_no, baglanti, sure, bariyer, sonuc_kuyrugu):
+    _, sert = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (sert, sert))
+    aksiyonlar = ("Baglanti", "BootNotification") + MAKRO_DONGU
+    gecikmeler = {a: [] for a in aksiyonlar}
+    # "Toplam": ölçüm penceresinde kopan bağlantılar
+    hatalar = dict.fromkeys(aksiyonlar + ("Toplam",), 0)
+
+    async def ac(i, sinir):
+        async with sinir:
+            t0 = time.perf_counter_ns()
+            try:
+                ws = await websockets.connect(f"ws://127.0.0.1:{port}/MAKRO-{surec_no}-{i:05d}",
+                                              subprotocols=['ocpp1.6'], ping_interval=None)
+            except Exception:
+                hatalar["Baglanti"] += 1
+                return None
+            gecikmeler["Baglanti"].append(time.perf_counter_ns() - t0)
+            await _cagir(ws, "0", "BootNotification", gecikmeler, hatalar)
+            return ws
+
+    async def dongu(ws, bitis):
+        n = 0
+        try:
+            while time.monotonic() < bitis:
+                n += 1
+                await _cagir(ws, str(n), MAKRO_DONGU[n % len(MAKRO_DONGU)], gecikmeler, hatalar)
+        finally:
+            await ws.close()
+
+    async def calistir():
+        t0 = time.perf_counter()
+        sinir = asyncio.Semaphore(200)
+        baglantilar = [ws for ws in await asyncio.gather(*(ac(i, sinir) for i in range(baglanti))) if ws]
+        acilis = time.perf_counter() - t0
+        # Tüm yük süreçleri bağlandıktan sonra ölçüm penceresi birlikte başlar
+        await asyncio.to_thread(bariyer.wait)
+        bitis = time.monotonic() + sure
+        sonuc = await asyncio.gather(*(dongu(ws, bitis) for ws in baglantilar), return_exceptions=True)
+        hatalar["Toplam"] += sum(1 for r in sonuc if isinstance(r, Exception))
+        return acilis
+
+    acilis = asyncio.run(calistir())
+    sonuc_kuyrugu.put((acilis, {a: g[::max(1, len(g) // ORNEK_SINIRI)] for a, g in gecikmeler.items()},
+                       {a: len(g) for a, g in gecikmeler.items()}, hatalar))
+
+
+def _port_bekle(port, sure=10.0):
+    son = time.monotonic() + sure
+    while time.monotonic() < son:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Sunucu {port} portunda dinlemeye başlamadı")
+
+
+def makro(sunucu, args):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    havuz = Supervisor(sunucu_yukle(sunucu), '127.0.0.1', port, workers=args.isci)
+    havuz.start()
+    try:
+        _port_bekle(port)
+        ctx = multiprocessing.get_context('fork')
+        kuyruk = ctx.Queue()
+        bariyer = ctx.Barrier(args.surec)
+        surecler = [ctx.Process(target=_yuk_sureci, args=(port, i, args.baglanti // args.surec, args.sure, bariyer,
+                                                          kuyruk), name=f"yuk-{i}")
+                    for i in range(args.surec)]
+        for p in surecler:
+            p.start()
+        sonuclar = [kuyruk.get() for _ in surecler]
+        for p in surecler:
+            p.join()
+    finally:
+        havuz.stop()
+
+    ad = "csms_server" if sunucu in ("csms", "csms_server") else sunucu
+    acilis = max(r[0] for r in sonuclar)
+    ozet = {}
+    for aksiyon in ("Baglanti", "BootNotification") + MAKRO_DONGU + ("Toplam",):
+        kaynak = MAKRO_DONGU if aksiyon == "Toplam" else (aksiyon,)
+        pencere = acilis if aksiyon in ("Baglanti", "BootNotification") else args.sure
+        ornek = [g for r in sonuclar for a in kaynak for g in r[1][a]]
+        adet = sum(r[2][a] for r in sonuclar for a in kaynak)
+        hata = sum(r[3][a] for r in sonuclar for a in set(kaynak) | {aksiyon})
+        s = rapor.ozetle(ornek, pencere, hata)
+        # Verim örneklemden değil gerçek çağrı sayısından
+        s["adet"] = adet
+        s["ops_sn"] = adet / pencere
+        ozet[f"makro/{ad}/{aksiyon}"] = s
+
+    print(f"\n{'Makro':<40} {'Adet':>9} {'Çağrı/sn':>10} {'p50 µs':>9} {'p99 µs':>9} {'p999 µs':>10} {'Hata':>5}")
+    for anahtar, s in ozet.items():
+        print(f"{anahtar:<40} {s['adet']:>9,} {s['ops_sn']:>10,.0f} {s['p50_us']:>9,.0f} {s['p99_us']:>9,.0f} "
+              f"{s['p999_us']:>10,.0f} {s['hata']:>5}")
+    print(f"({args.baglanti} bağlantı, {args.surec} yük süreci, {args.isci} sunucu işçisi; açılış {acilis:.1f} sn, "
+          f"ölçüm {args.sure:g} sn)")
+    return ozet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSMS mesaj yolu ölçüm takımı")
+    parser.add_argument('--sadece', choices=['mikro', 'makro'])
+    parser.add_argument('--sunucu', action='append', help="Mikro hedef(ler): csms_server ya da senaryo klasörü")
+    parser.add_argument('--makro-sunucu', default="csms_server")
+    parser.add_argument('--mikro-adet', type=int, default=20000)
+    parser.add_argument('--tekrar', type=int, default=5, help="Mikro ölçüm tekrarı (ölçüt başına en iyisi)")
+    parser.add_argument('--baglanti', type=int, default=1000)
+    parser.add_argument('--sure', type=float, default=10.0)
+    parser.add_argument('--surec', type=int, default=2, help="Yük süreci sayısı")
+    parser.add_argument('--isci', type=int, default=1, help="Sunucu işçi süreci sayısı")
+    parser.add_argument('--json', help="Raporun yazılacağı dosya")
+    parser.add_argument('--taban', help="Karşılaştırılacak taban rapor")
+    parser.add_argument('--tolerans', type=float, default=0.20)
+    args = parser.parse_args()
+    sunucular = args.sunucu or ["csms_server", "Hüseyin-Korkutan"]
+    taban = rapor.oku(args.taban) if args.taban else None
+
+    # Sunucu modülleri yüklenirken log hattını kurar; ölçüm boyunca hiçbir kayıt üretilmesin
+    for sunucu in sunucular + [args.makro_sunucu]:
+        sunucu_yukle(sunucu)
+    logging.disable(logging.CRITICAL)
+    # Yüklenen modüllerin nesneleri kalıcı nesle alınır; ölçümdeki tam GC turları onları taramasın
+    gc.collect()
+    gc.freeze()
+
+    sonuclar = {}
+    if args.sadece != "makro":
+        sonuclar.update(mikro(sunucular, args.mikro_adet, args.tekrar, taban["sonuclar"] if taban else ()))
+    if args.sadece != "mikro":
+        sonuclar.update(makro(args.makro_sunucu, args))
+    logging.disable(logging.NOTSET)
+
+    ayarlar = {k: v for k, v in vars(args).items() if k not in ("json", "taban", "tolerans")}
+    simdiki = rapor.yaz(args.json, sonuclar, ayarlar) if args.json else \
+        {"surum": rapor.SURUM, "ortam": rapor.ortam(), "ayarlar": ayarlar, "sonuclar": sonuclar}
+    if args.json:
+        print(f"\nRapor: {args.json}")
+    if taban is not None:
+        basarisiz = rapor.karsilastirma_yazdir(taban, simdiki, rapor.karsilastir(taban, simdiki, args.tolerans),
+                                               args.tolerans)
+        if basarisiz:
+            print(f"\n*** BAŞARISIZ: {basarisiz} ölçütte gerileme (%{args.tolerans * 100:.0f} tolerans, "
+                  f"hata artışı) ya da eksik ölçüm ***")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Tespit motoru: batch boyutu / aralığı ile tespit gecikmesi ve örnek başına maliyet.
+
+Üretici ``--hiz`` örnek/sn hızla ``--cp`` şarj noktasından enerji + voltaj
+örneği besler (``--anomali`` oranında geri giden sayaç ve gerilim sapması).
+Her ``batch_ms`` değeri için motor ``--sure`` saniye çalıştırılır; örnek başına
+işleme maliyeti, tespit gecikmesi (p50/p99, örneğin motora girişinden alarmın
+üretilmesine kadar) ve bulunan alarm sayısı raporlanır. Ayrıca aynı kuralların
+mesaj başına skaler ``if`` ile çalıştırılmasının maliyeti verilir.
+
+    python -m benchmarks.bench_detection --cp 10000 --hiz 20000 --sure 3
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from secvolt.detection import DetectionEngine
+from secvolt.tsdb import ENERJI
+
+
+def ornekler_uret(cp_sayisi, adet, anomali, tohum=7):
+    rng = np.random.default_rng(tohum)
+    cp = rng.integers(0, cp_sayisi, adet)
+    # Saniyeler mertebesinde aralıklar için gerçekçi artış (< 3 Wh, ~10 kW)
+    artis = rng.random(adet) * 3
+    geri = rng.random(adet) < anomali
+    artis[geri] = -200.0
+    voltaj = rng.normal(230, 2, adet)
+    voltaj[rng.random(adet) < anomali] = 190.0
+    return cp, artis, voltaj
+
+
+async def calistir(batch_ms, args, veri):
+    cp, artis, voltaj = veri
+    motor = DetectionEngine(batch_ms=batch_ms, batch_boyutu=10 ** 9, alarm_fn=None)
+    sayaclar = np.full(args.cp, 150000.0)
+    adim = max(1, args.hiz // 1000)
+    i, n = 0, len(cp)
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < args.sure and i + adim <= n:
+        ts = time.time_ns() // 1000
+        for j in range(i, i + adim):
+            c = cp[j]
+            sayaclar[c] += artis[j]
+            cp_id = f"CP-{c:05d}"
+            motor.ekle(cp_id, 1, ENERJI, ts, sayaclar[c])
+            motor.ekle(cp_id, 1, "Voltage", ts, voltaj[j])
+        i += adim
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(batch_ms / 1000 * 1.5)
+    motor.isle()
+    if motor._gorev:
+        motor._gorev.cancel()
+    return motor.ozet()
+
+
+def skaler_maliyet(veri, adet):
+    cp, artis, voltaj = veri
+    son = {}
+    alarm = 0
+    t0 = time.perf_counter()
+    for j in range(adet):
+        c = cp[j]
+        onceki = son.get(c, 150000.0)
+        deger = onceki + artis[j]
+        if deger < onceki:
+            alarm += 1
+        if deger > 2_000_000:
+            alarm += 1
+        if abs(voltaj[j] - 230.0) > 23.0:
+            alarm += 1
+        son[c] = deger
+    return (time.perf_counter() - t0) / (2 * adet) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tespit motoru batch ölçümü")
+    parser.add_argument('--cp', type=int, default=10000)
+    parser.add_argument('--hiz', type=int, default=20000, help="Saniyede beslenen mesaj (x2 örnek)")
+    parser.add_argument('--sure', type=float, default=3.0)
+    parser.add_argument('--anomali', type=float, default=0.001)
+    parser.add_argument('--batch-ms', type=float, nargs='+', default=[10, 50, 100, 500])
+    args = parser.parse_args()
+
+    veri = ornekler_uret(args.cp, int(args.hiz * args.sure * 2), args.anomali)
+    print(f"{'batch_ms':>9} {'ort batch':>10} {'µs/örnek':>9} {'p50 ms':>8} {'p99 ms':>8} {'alarm':>7}")
+    for batch_ms in args.batch_ms:
+        ozet = asyncio.run(calistir(batch_ms, args, veri))
+        print(f"{batch_ms:>9.0f} {ozet['ort_batch']:>10.0f} {ozet['ornek_basina_us']:>9.2f} "
+              f"{ozet['gecikme_p50_ms']:>8.1f} {ozet['gecikme_p99_ms']:>8.1f} {ozet['alarm']:>7}")
+    print(f"Skaler if karşılaştırması (yalnız kurallar): {skaler_maliyet(veri, len(veri[0])):.2f} µs/örnek")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Bağlantı içi head-of-line bekleme ölçümü: sıralı ``start()`` vs ConcurrentDispatchMixin.
+
+Sunucu ve istemci secvolt.memws ile aynı süreçte konuşur (ağ maliyeti yok).
+
+1. Yavaş handler: istemci önce ``--yavas-ms`` süren bir DataTransfer, hemen
+   ardından ``--adet`` Heartbeat gönderir; Heartbeat cevap gecikmeleri
+   (p50/p99/max) raporlanır. Sıralı modda her Heartbeat yavaş handler'ı bekler.
+2. Geri çağıran handler: sunucunun Authorize handler'ı cevap vermeden önce
+   istemciye GetConfiguration çağrısı yapar (Korkutan istemcisindeki
+   RemoteStartTransaction -> StartTransaction deseni). Sıralı modda bu çağrının
+   cevabı okunamaz ve ``--zaman-asimi`` dolar.
+
+    python -m benchmarks.bench_dispatch --adet 200 --yavas-ms 200
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+
+from ocpp.routing import on
+from ocpp.v16 import ChargePoint as cp, call, call_result
+from ocpp.v16.enums import AuthorizationStatus, DataTransferStatus
+
+from secvolt import codec
+from secvolt.dispatch import ConcurrentDispatchMixin
+from secvolt.memws import websocket_cifti
+
+
+class SiraliCP(cp):
+    yavas_sn = 0.2
+
+    @on('Heartbeat')
+    async def on_heartbeat(self, **kwargs):
+        return call_result.Heartbeat(current_time=datetime.now(timezone.utc).isoformat())
+
+    @on('DataTransfer')
+    async def on_data_transfer(self, vendor_id, **kwargs):
+        await asyncio.sleep(self.yavas_sn)
+        return call_result.DataTransfer(status=DataTransferStatus.accepted)
+
+    @on('Authorize')
+    async def on_authorize(self, id_tag, **kwargs):
+        await self.call(call.GetConfiguration(key=["HeartbeatInterval"]))
+        return call_result.Authorize(id_tag_info={'status': AuthorizationStatus.accepted})
+
+
+class EszamanliCP(ConcurrentDispatchMixin, SiraliCP):
+    pass
+
+
+class IstemciCP(cp):
+    @on('GetConfiguration')
+    async def on_get_configuration(self, key=None, **kwargs):
+        return call_result.GetConfiguration(configuration_key=[
+            {"key": "HeartbeatInterval", "readonly": False, "value": "10"}])
+
+
+def _yuzdelik(degerler, p):
+    if not degerler:
+        return float('nan')
+    sirali = sorted(degerler)
+    return sirali[min(len(sirali) - 1, int(p / 100 * len(sirali)))]
+
+
+async def yavas_handler_olc(sinif, adet, yavas_ms):
+    sunucu_ucu, istemci_ucu = websocket_cifti()
+    sinif.yavas_sn = yavas_ms / 1000
+    sunucu = sinif("BENCH", sunucu_ucu)
+    sunucu_gorevi = asyncio.ensure_future(sunucu.start())
+
+    gonderim, gecikmeler = {}, []
+    sayac = itertools.count()
+
+    async def okuyucu():
+        while len(gecikmeler) < adet:
+            cevap = codec.loads(await istemci_ucu.recv())
+            t0 = gonderim.pop(cevap[1], None)
+            if t0 is not None:
+                gecikmeler.append((time.perf_counter() - t0) * 1000)
+
+    okuma = asyncio.ensure_future(okuyucu())
+    await istemci_ucu.send(codec.dumps([2, "yavas", "DataTransfer", {"vendorId": "bench"}]))
+    for _ in range(adet):
+        uid = f"hb-{next(sayac)}"
+        gonderim[uid] = time.perf_counter()
+        await istemci_ucu.send(codec.dumps([2, uid, "Heartbeat", {}]))
+        await asyncio.sleep(0)
+    await okuma
+
+    await istemci_ucu.close()
+    await asyncio.gather(sunucu_gorevi, return_exceptions=True)
+    return gecikmeler
+
+
+async def geri_cagri_olc(sinif, adet, zaman_asimi):
+    sunucu_ucu, istemci_ucu = websocket_cifti()
+    sunucu = sinif("BENCH", sunucu_ucu, response_timeout=zaman_asimi)
+    istemci = IstemciCP("BENCH", istemci_ucu, response_timeout=zaman_asimi * 2 + 1)
+    gorevler = [asyncio.ensure_future(sunucu.start()), asyncio.ensure_future(istemci.start())]
+
+    gecikmeler, hatalar = [], 0
+    for _ in range(adet):
+        t0 = time.perf_counter()
+        try:
+            await istemci.call(call.Authorize(id_tag="USER-A123"), suppress=False)
+            gecikmeler.append((time.perf_counter() - t0) * 1000)
+        except Exception:
+            hatalar += 1
+
+    await istemci_ucu.close()
+    await asyncio.gather(*gorevler, return_exceptions=True)
+    return gecikmeler, hatalar
+
+
+def _satir(ad, gecikmeler, ek=""):
+    print(f"{ad:<28} {_yuzdelik(gecikmeler, 50):>9.2f} {_yuzdelik(gecikmeler, 99):>9.2f} "
+          f"{max(gecikmeler, default=float('nan')):>9.2f} {ek}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bağlantı içi dağıtım gecikme ölçümü")
+    parser.add_argument('--adet', type=int, default=200)
+    parser.add_argument('--yavas-ms', type=float, default=200.0)
+    parser.add_argument('--geri-cagri-adet', type=int, default=3)
+    parser.add_argument('--zaman-asimi', type=float, default=1.0)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.CRITICAL)
+
+    print(f"{'Yavaş handler (Heartbeat)':<28} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for ad, sinif in (("sıralı start()", SiraliCP), ("ConcurrentDispatchMixin", EszamanliCP)):
+        _satir(ad, asyncio.run(yavas_handler_olc(sinif, args.adet, args.yavas_ms)))
+
+    print(f"\n{'Geri çağıran handler':<28} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} hata")
+    for ad, sinif in (("sıralı start()", SiraliCP), ("ConcurrentDispatchMixin", EszamanliCP)):
+        gecikmeler, hatalar = asyncio.run(geri_cagri_olc(sinif, args.geri_cagri_adet, args.zaman_asimi))
+        _satir(ad, gecikmeler, f"{hatalar}/{args.geri_cagri_adet}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+asyncio CAN katmanı: iletim hızı ve doymuş hatta olay döngüsü gecikmesi.
+
+1. ``VirtualCanBus(bitrate=None)`` üzerinde ``gonder_toplu`` ile ``--adet``
+   çerçeve gönderilip karşı düğümde alınır (çerçeve/sn).
+2. python-can ``virtual`` arayüzü ``AsyncCanBus`` ile sarılır (fd olmayan
+   arayüz: yürütücü ile gönderim, Notifier ile alım).
+3. Doymuş hat: ``--bitrate`` hızındaki sanal hatta bir düğüm 0x001 ile sel
+   (flood) yaparken kontrol düğümü 100 ms'de bir 0x200 röle komutunu
+   ``gonder(zaman_asimi)`` ile yollar. Aynı sırada olay döngüsü gecikmesi
+   (10 ms'lik uyku sapması) ölçülür ve eski senkron gönderimle (çerçeve süresi
+   kadar bloklayan ``send``) karşılaştırılır.
+
+    python -m benchmarks.bench_donanim --adet 200000 --bitrate 500000 --sure 3
+"""
+import argparse
+import asyncio
+import time
+
+import can
+
+from secvolt.donanim import AsyncCanBus, VirtualCanBus, cerceve_bit, komut_mesaji
+
+
+async def gecikme_olc(dur, ornekler, aralik=0.01):
+    loop = asyncio.get_running_loop()
+    while not dur.is_set():
+        t0 = loop.time()
+        await asyncio.sleep(aralik)
+        ornekler.append((loop.time() - t0 - aralik) * 1e3)
+
+
+def ozet(ornekler):
+    s = sorted(ornekler) or [0.0]
+    return f"p50 {s[len(s) // 2]:.2f} ms, p99 {s[min(len(s) - 1, int(len(s) * 0.99))]:.2f} ms, max {s[-1]:.1f} ms"
+
+
+async def verim(adet):
+    hat = VirtualCanBus()
+    a, b = hat.baglan(tx_kuyrugu=adet), hat.baglan(rx_kuyrugu=adet)
+    mesajlar = [can.Message(arbitration_id=0x100 + i % 0x100, data=bytes(8), is_extended_id=False)
+                for i in range(adet)]
+    t0 = time.perf_counter()
+    futlar = a.gonder_toplu(mesajlar)
+    await futlar[-1]
+    gecen = time.perf_counter() - t0
+    print(f"Sanal hat (anında): {adet / gecen:,.0f} çerçeve/sn, alınan {b.alinan:,}")
+    await hat.kapat()
+
+
+async def python_can_verim(adet):
+    tx = AsyncCanBus(can.interface.Bus(channel="bench", interface="virtual"), tx_kuyrugu=adet)
+    rx = AsyncCanBus(can.interface.Bus(channel="bench", interface="virtual"), rx_kuyrugu=adet)
+    rx.alim_baslat()
+    t0 = time.perf_counter()
+    futlar = tx.gonder_toplu([komut_mesaji(0x200, [1, 1]) for _ in range(adet)])
+    await futlar[-1]
+    while rx.alinan < adet and time.perf_counter() - t0 < 30:
+        await asyncio.sleep(0.01)
+    gecen = time.perf_counter() - t0
+    print(f"python-can virtual (yürütücü + Notifier): {adet / gecen:,.0f} çerçeve/sn, alınan {rx.alinan:,}")
+    await tx.kapat()
+    await rx.kapat()
+
+
+async def doymus_hat(bitrate, sure):
+    hat = VirtualCanBus(bitrate=bitrate)
+    saldirgan, kontrol = hat.baglan(tx_kuyrugu=4096), hat.baglan()
+    dinleyici = hat.baglan()
+    dur = asyncio.Event()
+    gecikmeler, komut_suresi = [], []
+    zaman_asimi = 0
+
+    async def sel():
+        while not dur.is_set():
+            saldirgan.gonder_toplu([komut_mesaji(0x001, [0xAA] * 8)] * (4096 - len(saldirgan._tx)))
+            await asyncio.sleep(0.005)
+
+    async def komutlar():
+        nonlocal zaman_asimi
+        loop = asyncio.get_running_loop()
+        while not dur.is_set():
+            t0 = loop.time()
+            try:
+                await kontrol.gonder(komut_mesaji(0x200, [0x01, 0x01]), zaman_asimi=0.05)
+                komut_suresi.append((loop.time() - t0) * 1e3)
+            except asyncio.TimeoutError:
+                zaman_asimi += 1
+            await asyncio.sleep(0.1)
+
+    gorevler = [asyncio.create_task(f) for f in (sel(), komutlar(), gecikme_olc(dur, gecikmeler))]
+    await asyncio.sleep(sure)
+    dur.set()
+    await asyncio.gather(*gorevler, return_exceptions=True)
+    print(f"Doymuş hat ({bitrate // 1000} kbit/s, asyncio): hat yükü %{hat.hat_yuku() * 100:.0f}, "
+          f"{dinleyici.alinan / sure:,.0f} çerçeve/sn")
+    print(f"  olay döngüsü gecikmesi: {ozet(gecikmeler)}")
+    print(f"  0x200 komutu: {len(komut_suresi)} iletildi ({ozet(komut_suresi)}), {zaman_asimi} zaman aşımı "
+          f"(0x001 seli arabulucuyu kazanıyor)")
+    await hat.kapat()
+
+
+async def senkron_gonderim(bitrate, sure):
+    """ Eski yol: handler içinden hatta çıkana kadar bloklayan send. """
+    dur = asyncio.Event()
+    gecikmeler = []
+    cerceve_suresi = cerceve_bit(komut_mesaji(0x001, [0xAA] * 8)) / bitrate
+
+    async def sel():
+        while not dur.is_set():
+            # Doymuş hatta her send ~bir çerçeve süresi bekler; 100 çerçevelik dilimler
+            for _ in range(100):
+                time.sleep(cerceve_suresi)
+            await asyncio.sleep(0)
+
+    gorevler = [asyncio.create_task(sel()), asyncio.create_task(gecikme_olc(dur, gecikmeler))]
+    await asyncio.sleep(sure)
+    dur.set()
+    await asyncio.gather(*gorevler)
+    print(f"Senkron send (karşılaştırma): olay döngüsü gecikmesi {ozet(gecikmeler)}")
+
+
+async def ana(args):
+    await verim(args.adet)
+    await python_can_verim(min(args.adet, 50000))
+    await doymus_hat(args.bitrate, args.sure)
+    await senkron_gonderim(args.bitrate, args.sure)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="asyncio CAN katmanı ölçümü")
+    parser.add_argument('--adet', type=int, default=200000)
+    parser.add_argument('--bitrate', type=int, default=500000)
+    parser.add_argument('--sure', type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(ana(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Log çağrısının olay döngüsüne maliyeti: basicConfig vs secvolt.logpipe.
+
+Her varyant için handler'lardaki tipik ENERJİ RAPORU satırı N kez bir
+coroutine içinden loglanır ve çağrı başına süre (µs) raporlanır. Tek çekirdekli
+makinede yazıcı thread'i de aynı çekirdeği kullandığından "yalnız kuyruğa alma"
+satırı, olay döngüsünün kendi ödediği maliyeti ayrıca gösterir. Yazılan
+akım varsayılan olarak /dev/null'dur; ``--yavas-akim-us`` ile her ``write``
+çağrısına gecikme eklenerek yavaş bir terminal taklit edilir.
+
+    python -m benchmarks.bench_logging --adet 200000 --yavas-akim-us 20
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import time
+
+from secvolt import logpipe
+
+BICIM = '%(asctime)s - [SUNUCU] - %(message)s'
+
+
+class YavasAkim(io.TextIOWrapper):
+    """ Her write çağrısında sabit gecikme ekleyen akım (yavaş stderr taklidi). """
+
+    def __init__(self, gecikme_us):
+        super().__init__(open(os.devnull, 'wb'), encoding='utf-8')
+        self.gecikme = gecikme_us / 1e6
+
+    def write(self, s):
+        if self.gecikme:
+            time.sleep(self.gecikme)
+        return super().write(s)
+
+
+def _kok_temizle():
+    kok = logging.getLogger()
+    for h in kok.handlers[:]:
+        kok.removeHandler(h)
+    return kok
+
+
+async def _fstring_dongusu(adet):
+    value, connector_id = 1234, 1
+    for _ in range(adet):
+        logging.info(f"ENERJİ RAPORU: {value} Wh (Konnektör: {connector_id})")
+
+
+async def _lazy_dongusu(adet):
+    value, connector_id = 1234, 1
+    for _ in range(adet):
+        logging.info("ENERJİ RAPORU: %s Wh (Konnektör: %s)", value, connector_id)
+
+
+def olc(ad, kurulum, dongu, adet, gecikme_us):
+    kok = _kok_temizle()
+    akim = YavasAkim(gecikme_us)
+    kapat = kurulum(kok, akim)
+    t0 = time.perf_counter()
+    asyncio.run(dongu(adet))
+    gecen = time.perf_counter() - t0
+    dusurulen = kapat()
+    print(f"{ad:<34} {gecen / adet * 1e6:>10.2f} µs/mesaj {dusurulen:>10}")
+
+
+def _stream_kur(kok, akim):
+    h = logging.StreamHandler(akim)
+    h.setFormatter(logging.Formatter(BICIM))
+    kok.addHandler(h)
+    kok.setLevel(logging.INFO)
+    return lambda: 0
+
+
+def _pipe_kur(bicim, politika, kapasite):
+    def kurulum(kok, akim):
+        handler, yazici = logpipe.kur(level=logging.INFO, format=BICIM, bicim=bicim, akim=akim,
+                                      kapasite=kapasite, politika=politika)
+
+        def kapat():
+            yazici.stop()
+            return handler.dusurulen
+        return kapat
+    return kurulum
+
+
+def _sadece_kuyruk_kur(kok, akim):
+    # Yazıcı çalışmaz: olay döngüsünün gördüğü saf kuyruğa alma maliyeti
+    h = logpipe.BoundedQueueHandler(kapasite=10 ** 9)
+    kok.addHandler(h)
+    kok.setLevel(logging.INFO)
+    return lambda: h.dusurulen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log hattı maliyet ölçümü")
+    parser.add_argument('--adet', type=int, default=100000)
+    parser.add_argument('--yavas-akim-us', type=float, default=0.0,
+                        help="Her write çağrısına eklenecek gecikme (µs)")
+    parser.add_argument('--kapasite', type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'Varyant':<34} {'Maliyet':>19} {'Düşürülen':>10}")
+    olc("basicConfig + f-string", _stream_kur, _fstring_dongusu, args.adet, args.yavas_akim_us)
+    olc("basicConfig + %-argüman", _stream_kur, _lazy_dongusu, args.adet, args.yavas_akim_us)
+    olc("logpipe yalnız kuyruğa alma", _sadece_kuyruk_kur, _lazy_dongusu, args.adet, args.yavas_akim_us)
+    for politika in logpipe.POLITIKALAR:
+        olc(f"logpipe text ({politika})", _pipe_kur("text", politika, args.kapasite),
+            _lazy_dongusu, args.adet, args.yavas_akim_us)
+    olc("logpipe jsonl (drop_new)", _pipe_kur("jsonl", "drop_new", args.kapasite),
+        _lazy_dongusu, args.adet, args.yavas_akim_us)
+
+
+if __name__ == '__main__':
+    main()
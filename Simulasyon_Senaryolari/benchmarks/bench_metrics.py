@@ -0,0 +1,189 @@
+"""
+``secvolt.metrics`` ölçüm katmanının mesaj başına ek yükü.
+
+Kapı satırları sarmalayıcının kendi maliyetini ölçer: ``metrics``'in
+``_handle_call`` / ``call`` sarmalayıcısı boş bir korutinin etrafına kurulur
+ve doğrudan boş korutin çağrısıyla karşılaştırılır (ek korutin, iki saat
+okuması, seri araması, histogram kaydı, uçuş sayacı):
+
+- ``sarmal/gelen``, ``sarmal/giden``: kapı; fark ``--sinir`` ns'yi aşarsa
+  çıkış kodu 1,
+- ``kaydet``: yalnız ``Histogram.kaydet``.
+
+Bilgi satırları gerçek yolları katman kurulu değilken ve ``install()``
+sonrası koşturur; mesaj başına 40-150 µs'lik yollarda tur arası gürültü
+µs mertebesindeki farktan büyük olduğundan kapı değildir:
+
+- ``gelen/csms_server/Heartbeat``: ``FastCodecMixin._handle_call`` yolu,
+- ``gelen/Hüseyin-Korkutan/Authorize``: kütüphanenin ``_handle_call`` yolu,
+- ``giden/cp_client/Heartbeat``: ``ChargePoint.call``; cevap bağlantıdan
+  okunmaz, ``_get_specific_response`` hazır CallResult'ı hemen döner.
+
+Bağlantı ``send``'i boş bir korutindir. Her yol ``--tekrar`` kez, kapalı /
+açık sırayla dönüşümlü ölçülür; her taraf için en iyi tur alınır.
+
+    python -m benchmarks.bench_metrics --adet 50000 --tekrar 7
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import sys
+import time
+
+from ocpp.messages import CallResult, unpack
+from ocpp.v16 import call
+
+import cp_client
+import csms_server
+from benchmarks.bench_codec import CERCEVELER
+from secvolt import metrics
+from secvolt.senaryolar import modul_yukle
+
+
+class _BosBaglanti:
+    path = "/OLCUM"
+    subprotocol = "ocpp1.6"
+
+    async def send(self, mesaj):
+        pass
+
+    async def recv(self):
+        await asyncio.Future()
+
+
+def _kurulu(acik):
+    if acik:
+        metrics.install()
+    else:
+        metrics.kaldir()
+
+
+def _sarmal_yolu(sarmalayici, yon):
+    """ Boş korutin ile ``metrics`` sarmalayıcısına alınmış hali. """
+    async def bos(self, msg, *args):
+        return msg
+
+    sarili = sarmalayici(bos)
+    cp = cp_client.SablonChargePoint("OLCUM", _BosBaglanti())
+    arguman = unpack(CERCEVELER["Heartbeat"]) if yon == metrics.GELEN else call.Heartbeat()
+
+    async def kos(adet, acik):
+        metrics.install()
+        fn = sarili if acik else bos
+        t0 = time.perf_counter_ns()
+        for _ in range(adet):
+            await fn(cp, arguman)
+        return time.perf_counter_ns() - t0
+
+    return kos
+
+
+def _gelen_yolu(sinif, aksiyon):
+    cp = sinif("OLCUM", _BosBaglanti())
+    msg = unpack(CERCEVELER[aksiyon])
+
+    async def kos(adet, acik):
+        _kurulu(acik)
+        t0 = time.perf_counter_ns()
+        for _ in range(adet):
+            await cp._handle_call(msg)
+        return time.perf_counter_ns() - t0
+
+    return kos
+
+
+def _giden_yolu():
+    cp = cp_client.SablonChargePoint("OLCUM", _BosBaglanti())
+    cevap = CallResult(unique_id="1", payload={"currentTime": "2025-01-01T00:00:00+00:00"})
+
+    async def hazir_cevap(unique_id, timeout):
+        cevap.unique_id = unique_id
+        return cevap
+
+    cp._get_specific_response = hazir_cevap
+    istek = call.Heartbeat()
+
+    async def kos(adet, acik):
+        _kurulu(acik)
+        t0 = time.perf_counter_ns()
+        for _ in range(adet):
+            await cp.call(istek)
+        return time.perf_counter_ns() - t0
+
+    return kos
+
+
+def _kaydet_yolu():
+    hist = metrics.Histogram()
+
+    async def kos(adet, acik):
+        kaydet = hist.kaydet
+        t0 = time.perf_counter_ns()
+        if acik:
+            for i in range(adet):
+                kaydet(40000 + i)
+        else:
+            for i in range(adet):
+                pass
+        return time.perf_counter_ns() - t0
+
+    return kos
+
+
+async def olc(yollar, adet, tekrar):
+    sonuclar = {ad: {"kapali": [], "acik": []} for ad in yollar}
+    for kos, _ in yollar.values():
+        # Isınma: önbellekler, seri kaydı, handler imza analizi
+        await kos(min(adet, 1000), True)
+        await kos(min(adet, 1000), False)
+    for _ in range(tekrar):
+        for ad, (kos, _) in yollar.items():
+            for taraf in ("kapali", "acik"):
+                sonuclar[ad][taraf].append(await kos(adet, taraf == "acik") / adet)
+    metrics.kaldir()
+    return sonuclar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Metrik katmanının mesaj başına yükü")
+    parser.add_argument('--adet', type=int, default=50000)
+    parser.add_argument('--tekrar', type=int, default=7)
+    parser.add_argument('--sinir', type=float, default=1000.0, help="Mesaj başına izin verilen yük (ns)")
+    args = parser.parse_args()
+
+    huseyin = modul_yukle("Hüseyin-Korkutan", "server")
+    # ad -> (koşu, kapı mı)
+    yollar = {
+        "sarmal/gelen": (_sarmal_yolu(metrics._handle_call_sar, metrics.GELEN), True),
+        "sarmal/giden": (_sarmal_yolu(metrics._call_sar, metrics.GIDEN), True),
+        "kaydet": (_kaydet_yolu(), True),
+        "gelen/csms_server/Heartbeat": (_gelen_yolu(csms_server.SablonChargePoint, "Heartbeat"), False),
+        "gelen/Hüseyin-Korkutan/Authorize": (_gelen_yolu(huseyin.SablonChargePoint, "Authorize"), False),
+        "giden/cp_client/Heartbeat": (_giden_yolu(), False),
+    }
+    logging.disable(logging.CRITICAL)
+    gc.collect()
+    gc.freeze()
+    sonuclar = asyncio.run(olc(yollar, args.adet, args.tekrar))
+    logging.disable(logging.NOTSET)
+
+    print(f"{'Yol':<36} {'Kapalı ns':>10} {'Açık ns':>10} {'Yük ns':>8} {'Yük %':>7}  Kapı")
+    asan = 0
+    for ad, s in sonuclar.items():
+        kapi = yollar[ad][1]
+        kapali, acik = min(s["kapali"]), min(s["acik"])
+        yuk = acik - kapali
+        durum = "-"
+        if kapi:
+            durum = "AŞIYOR" if yuk > args.sinir else "tamam"
+            asan += yuk > args.sinir
+        print(f"{ad:<36} {kapali:>10,.0f} {acik:>10,.0f} {yuk:>8,.0f} {yuk / kapali * 100:>6.1f}%  {durum}")
+    print(f"{len(metrics.seriler())} seri, seri başına {metrics.KOVA_SAYISI} kova")
+    if asan:
+        print(f"*** BAŞARISIZ: {asan} yolda mesaj başına yük {args.sinir:,.0f} ns'yi aşıyor ***")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Kayıtlı OCPP trafiğinin süreç içi CSMS'e hızlandırılmış oynatılması.
+
+``--adet`` şarj noktası için ``--dakika`` dakikalık üretim benzeri bir segment
+kaydı üretilir: BootNotification + StatusNotification, 60 sn'de bir
+Heartbeat, ``--meter`` sn'de bir MeterValues (4 measurand); şarj noktalarının
+%10'u oturum ortasında yeniden bağlanır. Başlangıçlar ilk dakikaya yayılır.
+
+Kayıt ``secvolt.replay`` ile oturumlara ayrılır ve ``--sunucu``'ya (süreç
+içi, ``secvolt.memws``) ``--hizlar`` katlarında oynatılır; her hız için
+gerçekleşen hızlanma, aksiyon başına gecikme yüzdelikleri ve planlı andan
+kayma basılır.
+
+    python -m benchmarks.bench_replay --adet 500 --dakika 5 --hizlar 30,max
+"""
+import argparse
+import json
+import logging
+import random
+import shutil
+import tempfile
+import time
+
+from secvolt.replay import ReplayConfig, oturumlar, planla, rapor_yazdir, run_replay
+from secvolt.segmentlog import BAGLANTI, GELEN, GIDEN, KOPMA, SegmentLog, oku
+
+MEASURANDLAR = ("Energy.Active.Import.Register", "Power.Active.Import", "Voltage", "Current.Import")
+
+
+def cagri(uid, aksiyon, yuk):
+    return json.dumps([2, uid, aksiyon, yuk], separators=(",", ":"))
+
+
+def sonuc(uid, yuk):
+    return json.dumps([3, uid, yuk], separators=(",", ":"))
+
+
+def kayit_uret(dizin, args):
+    rng = random.Random(11)
+    log = SegmentLog(dizin, fsync=False, max_bekleyen=1 << 24)
+    t0 = 1_700_000_000_000_000
+    sure_us = int(args.dakika * 60e6)
+    olaylar = []
+    for i in range(args.adet):
+        cp_id = f"KAYIT-{i:05d}"
+        bas = t0 + rng.randrange(60_000_000)
+        kopma = bas + sure_us // 2 if rng.random() < 0.1 else None
+        sayac, n = 0, 0
+
+        def ekle(ts, yon, cerceve):
+            olaylar.append((ts, cp_id, yon, cerceve))
+
+        def oturum_ac(ts):
+            nonlocal n
+            ekle(ts, BAGLANTI, f"/{cp_id}")
+            n += 1
+            ekle(ts + 1000, GELEN, cagri(f"{cp_id}-{n}", "BootNotification",
+                                         {"chargePointModel": "EVSE-X1", "chargePointVendor": "SecVolt"}))
+            ekle(ts + 3000, GIDEN, sonuc(f"{cp_id}-{n}", {"currentTime": "2025-01-01T00:00:00+00:00",
+                                                          "interval": 60, "status": "Accepted"}))
+            n += 1
+            ekle(ts + 5000, GELEN, cagri(f"{cp_id}-{n}", "StatusNotification",
+                                         {"connectorId": 1, "errorCode": "NoError", "status": "Available"}))
+            ekle(ts + 6000, GIDEN, sonuc(f"{cp_id}-{n}", {}))
+
+        oturum_ac(bas)
+        t = bas
+        while t + args.meter * 1e6 < bas + sure_us - 100_000:
+            t += int(args.meter * 1e6)
+            if kopma is not None and t >= kopma:
+                ekle(kopma, KOPMA, b"")
+                oturum_ac(kopma + 2_000_000)
+                t = max(t, kopma + 2_100_000)
+                kopma = None
+            sayac += rng.randint(50, 150)
+            n += 1
+            ekle(t, GELEN, cagri(f"{cp_id}-{n}", "MeterValues", {"connectorId": 1, "meterValue": [{
+                "timestamp": "2025-01-01T00:00:00+00:00",
+                "sampledValue": [{"value": str(sayac if m.startswith("Energy") else rng.randint(200, 240)),
+                                  "measurand": m} for m in MEASURANDLAR]}]}))
+            ekle(t + rng.randint(1000, 5000), GIDEN, sonuc(f"{cp_id}-{n}", {}))
+            if (t - bas) % 60_000_000 < args.meter * 1e6:
+                n += 1
+                ekle(t + 10_000, GELEN, cagri(f"{cp_id}-{n}", "Heartbeat", {}))
+                ekle(t + 12_000, GIDEN, sonuc(f"{cp_id}-{n}", {"currentTime": "2025-01-01T00:00:00+00:00"}))
+        ekle(bas + sure_us, KOPMA, b"")
+    olaylar.sort()
+    for ts, cp_id, yon, cerceve in olaylar:
+        log.ekle(cp_id, yon, cerceve, ts_us=ts)
+    log.kapat()
+    return len(olaylar)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCPP kayıt oynatma ölçümü")
+    parser.add_argument('--adet', type=int, default=500)
+    parser.add_argument('--dakika', type=float, default=5.0)
+    parser.add_argument('--meter', type=float, default=10.0)
+    parser.add_argument('--sunucu', default="csms_server")
+    parser.add_argument('--hizlar', type=lambda s: s.split(","), default=["30", "max"])
+    parser.add_argument('--surec', type=int, default=1)
+    args = parser.parse_args()
+
+    dizin = tempfile.mkdtemp(prefix="secvolt-replay-")
+    try:
+        t0 = time.perf_counter()
+        adet = kayit_uret(dizin, args)
+        print(f"Kayıt: {adet:,} kayıt ({time.perf_counter() - t0:.1f} sn)")
+        t0 = time.perf_counter()
+        planlar = [planla(o) for o in oturumlar(oku(dizin))]
+        print(f"Oturumlara ayırma: {len(planlar)} oturum, {sum(len(p.cagrilar) for p in planlar):,} çağrı "
+              f"({time.perf_counter() - t0:.2f} sn)")
+        kayit_suresi = (max(p.baslangic_us + p.sure_us for p in planlar) - planlar[0].baslangic_us) / 1e6
+
+        for hiz in args.hizlar:
+            cfg = ReplayConfig(sunucu=args.sunucu, hiz=None if hiz == "max" else float(hiz), surec=args.surec)
+            # Sunucu her mesajı loglar; yalnız oynatma tablosu basılsın
+            logging.disable(logging.CRITICAL)
+            ist, gecen = run_replay(planlar, cfg)
+            logging.disable(logging.NOTSET)
+            print(f"\n--- hız {hiz} ({args.sunucu}) ---")
+            rapor_yazdir(ist, gecen, kayit_suresi)
+    finally:
+        shutil.rmtree(dizin, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
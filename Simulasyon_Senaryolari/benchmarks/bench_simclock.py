@@ -0,0 +1,146 @@
+"""
+Sanal saatle senaryo saatlerinin saniyelerde koşturulması.
+
+``--adet`` şarj noktası (``cp_client.SablonChargePoint``; ``--saldiri``
+oranında Kevser-Aslan anomali istemcisi) ``csms_server``'a süreç içi
+(``secvolt.memws``, ``--gecikme`` tek yön gecikme) bağlanır ve
+``--saat`` sanal saat boyunca BootNotification, 60 sn'de bir Heartbeat,
+``--meter`` sn'de bir MeterValues gönderir. Tüm koşu ``secvolt.simclock``
+döngüsünde çalışır; tespit motorunun batch zamanlayıcısı da sanal zamandadır.
+
+Basılanlar: duvar süresi, duvar dakikası başına sanal saat, işlenen mesaj,
+tespit alarmları, döngünün zaman atlama sayısı. Koşu aynı tohumla iki kez
+yapılır; sunucunun aldığı (sanal an, cp, aksiyon, yük) dizisinin özeti
+karşılaştırılır (mesaj kimlikleri uuid4 olduğundan özete girmez).
+
+    python -m benchmarks.bench_simclock --adet 100 --saat 8
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+
+from ocpp.v16 import call
+
+import cp_client
+import csms_server
+from secvolt import simclock
+from secvolt.covertstat import CovertStatDetector
+from secvolt.detection import DetectionEngine
+from secvolt.fleet import FleetConfig, _heartbeat_dongusu, _meter_dongusu
+from secvolt.memws import websocket_cifti
+from secvolt.senaryolar import saldiri_yukle
+from secvolt.tsdb import TimeSeriesStore
+
+
+class _IzliUc:
+    """ Sunucu ucunu sarar; alınan her çağrıyı sanal anıyla özete katar. """
+
+    def __init__(self, ws, ozet):
+        self._ws = ws
+        self._ozet = ozet
+
+    async def recv(self):
+        mesaj = await self._ws.recv()
+        cerceve = json.loads(mesaj)
+        if cerceve[0] == 2:
+            kayit = (round(asyncio.get_running_loop().time(), 6), self._ws.path, cerceve[2], cerceve[3])
+            self._ozet.update(json.dumps(kayit, sort_keys=True).encode())
+        return mesaj
+
+    def __getattr__(self, ad):
+        return getattr(self._ws, ad)
+
+
+async def sarj_noktasi(index, rol, cfg, args, ozet, sayac):
+    rng = random.Random(cfg.tohum * 1_000_003 + index)
+    await asyncio.sleep(rng.uniform(0, 60))
+    cp_id = f"SANAL-{index:05d}"
+    sunucu_ucu, istemci_ucu = websocket_cifti(f"/{cp_id}", args.gecikme)
+    sunucu = asyncio.ensure_future(csms_server.on_connect(_IzliUc(sunucu_ucu, ozet), sunucu_ucu.path))
+
+    if rol == "normal":
+        cp, saldiri = cp_client.SablonChargePoint(cp_id, istemci_ucu), None
+    else:
+        sinif, metot, kwargs = saldiri_yukle(rol)
+        cp = sinif(cp_id, istemci_ucu)
+        saldiri = getattr(cp, metot)(**kwargs)
+    asil_call = cp.call
+
+    async def sayan_call(payload, *a, **kw):
+        sayac[type(payload).__name__] = sayac.get(type(payload).__name__, 0) + 1
+        return await asil_call(payload, *a, **kw)
+
+    cp.call = sayan_call
+    gorevler = [asyncio.ensure_future(cp.start())]
+    try:
+        await cp.call(call.BootNotification(charge_point_model="SecVolt-Sanal", charge_point_vendor="GroupProject"))
+        gorevler.append(asyncio.ensure_future(_heartbeat_dongusu(cp, cfg, rng)))
+        gorevler.append(asyncio.ensure_future(saldiri or _meter_dongusu(cp, cfg, rng)))
+        await asyncio.wait(gorevler, timeout=args.saat * 3600, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        for g in gorevler:
+            g.cancel()
+        await asyncio.gather(*gorevler, return_exceptions=True)
+        await istemci_ucu.close()
+        await sunucu
+
+
+async def filo(args, ozet, sayac):
+    cfg = FleetConfig(adet=args.adet, heartbeat_araligi=60.0, meter_araligi=args.meter, tohum=args.tohum)
+    rng = random.Random(args.tohum)
+    roller = ["kevser" if rng.random() < args.saldiri else "normal" for _ in range(args.adet)]
+    await asyncio.gather(*(sarj_noktasi(i, rol, cfg, args, ozet, sayac) for i, rol in enumerate(roller)))
+    csms_server.TESPIT.isle()
+    return asyncio.get_running_loop()
+
+
+def kos(args):
+    # Sunucu modülündeki tespit durumları her koşuda sıfırdan başlasın
+    csms_server.METER_DEPOSU = TimeSeriesStore()
+    csms_server.TESPIT = DetectionEngine(alarm_fn=None)
+    csms_server.KANAL_ANALIZI = CovertStatDetector()
+    # Saldırı istemcileri modül düzeyindeki random'u kullanır
+    random.seed(args.tohum)
+    ozet, sayac = hashlib.sha256(), {}
+    t0 = time.perf_counter()
+    dongu = simclock.run(filo(args, ozet, sayac))
+    return time.perf_counter() - t0, dongu, ozet.hexdigest(), sayac
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sanal saatli senaryo koşusu ölçümü")
+    parser.add_argument('--adet', type=int, default=100)
+    parser.add_argument('--saat', type=float, default=8.0, help="Sanal senaryo süresi (saat)")
+    parser.add_argument('--meter', type=float, default=5.0)
+    parser.add_argument('--saldiri', type=float, default=0.05, help="Kevser-Aslan anomali istemcisi oranı")
+    parser.add_argument('--gecikme', type=float, default=0.005, help="Tek yön sanal ağ gecikmesi (sn)")
+    parser.add_argument('--tohum', type=int, default=1)
+    args = parser.parse_args()
+
+    # İstemci ve sunucu her mesajı loglar; yalnız ölçüm tablosu basılsın
+    logging.disable(logging.CRITICAL)
+    ozetler = []
+    for tur in (1, 2):
+        gecen, dongu, ozet, sayac = kos(args)
+        ozetler.append(ozet)
+        tespit = csms_server.TESPIT.ozet()
+        print(f"--- koşu {tur}: {args.adet} şarj noktası, {args.saat:g} sanal saat ---")
+        print(f"  duvar süresi {gecen:.1f} sn -> {args.saat * 3600 / gecen:,.0f}x, "
+              f"duvar dakikası başına {args.saat * 60 / gecen:,.1f} sanal saat")
+        print(f"  mesaj {sum(sayac.values()):,} ({sum(sayac.values()) / gecen:,.0f}/sn): "
+              + ", ".join(f"{k} {v:,}" for k, v in sorted(sayac.items())))
+        print(f"  tespit: {tespit['ornek']:,} örnek, {tespit['alarm']:,} alarm, {tespit['batch']:,} batch; "
+              f"depo {csms_server.METER_DEPOSU.ozet()['eklenen']:,} örnek")
+        print(f"  döngü: {dongu.atlama:,} atlama, {dongu.atlanan_s / 3600:.2f} saat atlandı; "
+              f"son sanal an {dongu.simdi().isoformat()}")
+        print(f"  olay dizisi özeti {ozet[:16]}")
+    print("Belirlenimcilik:", "AYNI" if ozetler[0] == ozetler[1] else "FARKLI")
+    logging.disable(logging.NOTSET)
+
+
+if __name__ == '__main__':
+    main()
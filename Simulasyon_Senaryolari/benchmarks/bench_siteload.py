@@ -0,0 +1,76 @@
+"""
+Site yük ağacı: rapor başına güncelleme ve kapasite sorgusu maliyeti.
+
+``--site`` site x ``--trafo`` trafo x ``--cp`` şarj noktası (her trafoda bir
+taban yük düğümü) kurulur. Rastgele sırayla gelen enerji sayacı raporları
+``konnektor_yuku`` ile işlenir (%0.1'i fiziksel sınırı aşan sahte sıçrama);
+rapor başına süre, ``bos_kapasite`` sorgusu, vektörel ``ozet`` ve
+``yeniden_hesapla`` ile artımlı toplamların sapması raporlanır.
+
+    python -m benchmarks.bench_siteload --site 2000 --trafo 5 --cp 10 --rapor 1000000
+"""
+import argparse
+import random
+import time
+
+from secvolt.siteload import KONNEKTOR, SiteLoadAggregator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site yük ağacı ölçümü")
+    parser.add_argument('--site', type=int, default=2000)
+    parser.add_argument('--trafo', type=int, default=5)
+    parser.add_argument('--cp', type=int, default=10, help="Trafo başına şarj noktası")
+    parser.add_argument('--rapor', type=int, default=1000000)
+    args = parser.parse_args()
+
+    rng = random.Random(4)
+    agac = SiteLoadAggregator(alarm_fn=None)
+    t0 = time.perf_counter()
+    konnektorler, max_guc = [], []
+    for s in range(args.site):
+        site = agac.site_ekle(f"SITE-{s}", 400_000)
+        for t in range(args.trafo):
+            trafo = agac.trafo_ekle(f"SITE-{s}/TR-{t}", site, 100_000)
+            agac.taban_yuk_ekle(f"SITE-{s}/TR-{t}/TABAN", trafo, rng.uniform(5000, 30000))
+            for c in range(args.cp):
+                cp_id = f"CP-{s}-{t}-{c}"
+                max_guc.append(rng.choice((7400, 11000, 22000)))
+                agac.konnektor_ekle(cp_id, 1, trafo, max_guc_w=max_guc[-1])
+                konnektorler.append(cp_id)
+    print(f"Kurulum: {len(agac):,} düğüm ({len(konnektorler):,} konnektör), {time.perf_counter() - t0:.2f} sn")
+
+    n = len(konnektorler)
+    enerji = [0.0] * n
+    zaman = [0] * n
+    olaylar = [rng.randrange(n) for _ in range(args.rapor)]
+    t0 = time.perf_counter()
+    for j in olaylar:
+        zaman[j] += 5_000_000
+        guc = rng.random() * max_guc[j]
+        # %0.1 sahte sıçrama: 5 sn'de 1 kWh (720 kW)
+        enerji[j] += 1000.0 if rng.random() < 0.001 else guc * 5 / 3600
+        agac.konnektor_yuku(konnektorler[j], 1, None, enerji[j], zaman[j])
+    gecen = time.perf_counter() - t0
+    print(f"Rapor işleme: {args.rapor / gecen:,.0f} rapor/sn ({gecen / args.rapor * 1e6:.2f} µs/rapor, "
+          f"rastgele sayı üretimi dahil)")
+
+    dugumler = [agac.indeks((konnektorler[rng.randrange(n)], 1)) for _ in range(100000)]
+    t0 = time.perf_counter()
+    for d in dugumler:
+        agac.bos_kapasite(d)
+    print(f"bos_kapasite (konnektör -> site yolu): {(time.perf_counter() - t0) / len(dugumler) * 1e9:.0f} ns")
+
+    t0 = time.perf_counter()
+    ozet = agac.ozet()
+    print(f"Vektörel site özeti: {(time.perf_counter() - t0) * 1e3:.1f} ms, en dolu: {ozet[0][0]} "
+          f"(%{ozet[0][3] * 100:.0f})")
+    supheli = sum(1 for i, k in agac.supheli.items() if k != "olcum_yok" and agac.tur[i] == KONNEKTOR)
+    print(f"Şüpheli konnektör: {supheli}, aşımdaki düğüm: {len(agac.asimlar())}")
+    t0 = time.perf_counter()
+    sapma = agac.yeniden_hesapla()
+    print(f"Yeniden hesaplama: {(time.perf_counter() - t0) * 1e3:.1f} ms, artımlı toplam sapması {sapma:.2e} W")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+secvolt.tsdb ölçümü: ekleme hızı, örnek başına bellek ve aralık sorgusu süresi.
+
+``--cp`` şarj noktası, her biri ``--ornek`` MeterValues mesajı (enerji + voltaj
++ akım) gönderir. Karşılaştırma için aynı örnekler dict listesinde tutulur ve
+tracemalloc ile ölçülür.
+
+    python -m benchmarks.bench_tsdb --cp 1000 --ornek 500
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from secvolt.tsdb import ENERJI, TimeSeriesStore
+
+
+def meter_value_uret(adet, baslangic):
+    """ on_meter_values'a gelen (snake_case) biçimde mesajlar. """
+    mesajlar = []
+    sayac = 150000
+    for i in range(adet):
+        sayac += random.randint(0, 60)
+        mesajlar.append([{
+            "timestamp": (baslangic + timedelta(seconds=10 * i)).isoformat(),
+            "sampled_value": [
+                {"value": str(sayac), "measurand": ENERJI, "unit": "Wh"},
+                {"value": f"{random.gauss(230, 2):.1f}", "measurand": "Voltage", "unit": "V"},
+                {"value": f"{random.gauss(16, 1):.2f}", "measurand": "Current.Import", "unit": "A"},
+            ],
+        }])
+    return mesajlar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zaman serisi deposu ölçümü")
+    parser.add_argument('--cp', type=int, default=1000)
+    parser.add_argument('--ornek', type=int, default=500)
+    parser.add_argument('--float32', action='store_true', help="Değerleri float32 tut")
+    args = parser.parse_args()
+
+    baslangic = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    mesajlar = meter_value_uret(args.ornek, baslangic)
+    depo = TimeSeriesStore(kapasite=max(64, args.ornek), deger_tipi=np.float32 if args.float32 else np.float64)
+
+    t0 = time.perf_counter()
+    for cp_no in range(args.cp):
+        cp_id = f"CP-{cp_no:05d}"
+        for mv in mesajlar:
+            depo.meter_values_ekle(cp_id, 1, mv)
+    gecen = time.perf_counter() - t0
+    ozet = depo.ozet()
+    print(f"Ekleme: {ozet['eklenen']} örnek, {ozet['eklenen'] / gecen:,.0f} örnek/sn "
+          f"({gecen / (args.cp * args.ornek) * 1e6:.1f} µs/mesaj)")
+    print(f"Tampon: {ozet['bellek_bayt'] / ozet['ornek']:.1f} bayt/örnek "
+          f"(belgelenen: {depo.ornek_basina_bayt}), {ozet['seri']} seri, "
+          f"{ozet['bellek_bayt'] / 2 ** 20:.1f} MiB")
+
+    # Karşılaştırma: örnek başına dict (ilk 100 cp)
+    cp_sayisi = min(100, args.cp)
+    tracemalloc.start()
+    liste = []
+    for cp_no in range(cp_sayisi):
+        for mv in mesajlar:
+            for sv in mv[0]["sampled_value"]:
+                liste.append({"cp": f"CP-{cp_no:05d}", "connector": 1, "measurand": sv["measurand"],
+                              "ts": mv[0]["timestamp"], "deger": float(sv["value"])})
+    boyut, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"dict listesi: {boyut / len(liste):.1f} bayt/örnek")
+
+    # Aralık sorgusu: rastgele 1 saatlik pencereler
+    us = 1_000_000
+    bas = int(baslangic.timestamp() * us)
+    sorgu = 20000
+    t0 = time.perf_counter()
+    for _ in range(sorgu):
+        cp_id = f"CP-{random.randrange(args.cp):05d}"
+        a = bas + random.randrange(args.ornek * 10) * us
+        depo.aralik(cp_id, 1, "Voltage", a, a + 3600 * us)
+    print(f"Aralık sorgusu (1 saat): {(time.perf_counter() - t0) / sorgu * 1e6:.1f} µs")
+    print(f"Tüketim CP-00000: {depo.tuketim('CP-00000', 1):.0f} Wh")
+
+
+if __name__ == '__main__':
+    main()
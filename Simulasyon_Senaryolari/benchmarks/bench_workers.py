@@ -0,0 +1,119 @@
+"""
+İşçi havuzu ölçeklenme ölçümü.
+
+csms_server.on_connect'i farklı işçi sayılarıyla (1, 2, 4, ...) başlatır, ayrı
+yük süreçlerinden çok sayıda websocket bağlantısı açıp Heartbeat gönderir ve
+saniyedeki cevap sayısını (throughput) ile gecikme yüzdeliklerini raporlar.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --baglanti 400 --sure 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import statistics
+import time
+
+import websockets
+
+import csms_server
+from secvolt.workers import Supervisor
+
+
+def bos_port_bul():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _baglanti_yuku(url, sure, gecikmeler):
+    """ Tek bağlantı: süre dolana kadar Heartbeat gönderip cevabı bekler. """
+    adet = 0
+    async with websockets.connect(url, subprotocols=['ocpp1.6']) as ws:
+        son = time.perf_counter() + sure
+        while time.perf_counter() < son:
+            t0 = time.perf_counter()
+            await ws.send(json.dumps([2, str(adet), "Heartbeat", {}]))
+            await ws.recv()
+            gecikmeler.append(time.perf_counter() - t0)
+            adet += 1
+    return adet
+
+
+def _yuk_sureci(port, surec_no, baglanti, sure, sonuc_kuyrugu):
+    async def calistir():
+        gecikmeler = []
+        gorevler = [
+            _baglanti_yuku(f"ws://127.0.0.1:{port}/BENCH-{surec_no}-{i}", sure, gecikmeler)
+            for i in range(baglanti)
+        ]
+        sonuclar = await asyncio.gather(*gorevler, return_exceptions=True)
+        adet = sum(r for r in sonuclar if isinstance(r, int))
+        hata = sum(1 for r in sonuclar if isinstance(r, Exception))
+        return adet, hata, gecikmeler
+
+    adet, hata, gecikmeler = asyncio.run(calistir())
+    # Örneklem: kuyruğa tüm gecikmeleri göndermek yerine en fazla 20k değer
+    adim = max(1, len(gecikmeler) // 20000)
+    sonuc_kuyrugu.put((adet, hata, gecikmeler[::adim]))
+
+
+def olc(isci_sayisi, baglanti, sure, yuk_sureci):
+    port = bos_port_bul()
+    havuz = Supervisor(csms_server.on_connect, '127.0.0.1', port, workers=isci_sayisi)
+    havuz.start()
+    time.sleep(1.0)  # işçilerin dinlemeye başlaması için
+
+    ctx = multiprocessing.get_context('fork')
+    kuyruk = ctx.Queue()
+    surecler = [
+        ctx.Process(target=_yuk_sureci, args=(port, i, baglanti // yuk_sureci, sure, kuyruk))
+        for i in range(yuk_sureci)
+    ]
+    for p in surecler:
+        p.start()
+    sonuclar = [kuyruk.get() for _ in surecler]
+    for p in surecler:
+        p.join()
+    sayaclar = havuz.counters()
+    havuz.stop()
+
+    adet = sum(r[0] for r in sonuclar)
+    hata = sum(r[1] for r in sonuclar)
+    gecikmeler = sorted(g for r in sonuclar for g in r[2])
+    yuzdelik = statistics.quantiles(gecikmeler, n=100) if len(gecikmeler) > 1 else [0.0] * 99
+    return {
+        "isci": isci_sayisi,
+        "mesaj_sn": adet / sure,
+        "p50_ms": yuzdelik[49] * 1000,
+        "p99_ms": yuzdelik[98] * 1000,
+        "baglanti_hatasi": hata,
+        "sunucu_mesaj_gelen": sayaclar["mesaj_gelen"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSMS işçi havuzu ölçeklenme ölçümü")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--baglanti', type=int, default=400, help="Toplam eşzamanlı bağlantı")
+    parser.add_argument('--sure', type=float, default=10.0, help="Her ölçümün süresi (sn)")
+    parser.add_argument('--yuk-sureci', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # Handler logları ölçümü boğmasın
+    logging.basicConfig(level=logging.WARNING, force=True)
+
+    taban = None
+    print(f"{'İşçi':>5} {'Mesaj/sn':>12} {'Ölçek':>7} {'p50 ms':>8} {'p99 ms':>8} {'Hata':>5}")
+    for n in args.workers:
+        r = olc(n, args.baglanti, args.sure, args.yuk_sureci)
+        taban = taban or r["mesaj_sn"]
+        print(f"{r['isci']:>5} {r['mesaj_sn']:>12.0f} {r['mesaj_sn'] / taban:>6.2f}x "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['baglanti_hatasi']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Ölçüm sonuçlarının makinece okunur raporu ve taban çizgisiyle karşılaştırma.
+
+Her ölçüm ``"grup/hedef/aksiyon"`` biçiminde sabit bir anahtarla, aynı
+alanlarla tutulur: ``adet``, ``ops_sn`` (verim), ``p50_us`` / ``p99_us`` /
+``p999_us`` / ``max_us`` (gecikme) ve ``hata``. Rapor JSON'dur; anahtarlar
+sıralı yazılır, iki rapor satır satır karşılaştırılabilir:
+
+    {"surum": 1, "ortam": {...}, "sonuclar": {"mikro/csms_server/Heartbeat": {...}}}
+
+``karsilastir`` bir taban rapora göre her anahtarın ``KAPILAR``'daki
+ölçütlerini kontrol eder: verim ``tolerans`` oranından fazla düşmüş ya da
+p50 / p99 o orandan fazla artmışsa ``gerileme`` sayılır. ``hata`` (CallError
+sayısı) toleranssız kapıdır: herhangi bir artış gerilemedir. Tabanda olup
+şimdiki raporda olmayan anahtar (``eksik``) da başarısızlıktır. p999 ve maks
+raporlanır ama gürültülü olduğundan kapı değildir. Ortam (Python sürümü,
+makine) farklıysa uyarı basılır; karşılaştırma yine yapılır.
+"""
+import json
+import os
+import platform
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+SURUM = 1
+
+# Ölçüt -> kötü yön (-1: düşüş gerileme, +1: artış gerileme)
+KAPILAR = {"ops_sn": -1, "p50_us": +1, "p99_us": +1}
+# Toleranssız kapı: tabana göre her artış gerileme
+HATA_OLCUTU = "hata"
+
+Fark = namedtuple("Fark", "anahtar olcut taban simdi oran durum")
+
+
+def ozetle(gecikmeler_ns, sure_s=None, hata=0):
+    """ Gecikme örneklerinden (ns) rapor satırı; ``sure_s`` yoksa verim örneklerin toplamından. """
+    a = np.asarray(gecikmeler_ns, dtype=np.float64) / 1e3
+    if a.size == 0:
+        return {"adet": 0, "ops_sn": 0.0, "p50_us": 0.0, "p99_us": 0.0, "p999_us": 0.0, "max_us": 0.0,
+                "hata": hata}
+    p50, p99, p999 = np.percentile(a, [50, 99, 99.9])
+    toplam_s = sure_s if sure_s else a.sum() / 1e6
+    return {
+        "adet": int(a.size),
+        "ops_sn": a.size / toplam_s if toplam_s else 0.0,
+        "p50_us": float(p50),
+        "p99_us": float(p99),
+        "p999_us": float(p999),
+        "max_us": float(a.max()),
+        "hata": hata,
+    }
+
+
+def en_iyi(ozetler):
+    """ Aynı ölçümün tekrarlarından ölçüt başına en iyi değer (verim en yüksek, gecikmeler en düşük). """
+    sonuc = dict(ozetler[0])
+    sonuc["ops_sn"] = max(o["ops_sn"] for o in ozetler)
+    for olcut in ("p50_us", "p99_us", "p999_us", "max_us"):
+        sonuc[olcut] = min(o[olcut] for o in ozetler)
+    sonuc["hata"] = max(o["hata"] for o in ozetler)
+    return sonuc
+
+
+def ortam():
+    return {
+        "python": platform.python_version(),
+        "makine": platform.machine(),
+        "platform": platform.platform(),
+        "cpu": os.cpu_count(),
+        "zaman": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def yaz(yol, sonuclar, ayarlar=None):
+    rapor = {"surum": SURUM, "ortam": ortam(), "ayarlar": ayarlar or {}, "sonuclar": sonuclar}
+    with open(yol, "w") as f:
+        json.dump(rapor, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write("\n")
+    return rapor
+
+
+def oku(yol):
+    with open(yol) as f:
+        rapor = json.load(f)
+    if rapor.get("surum") != SURUM:
+        raise ValueError(f"{yol}: rapor sürümü {rapor.get('surum')} desteklenmiyor (beklenen {SURUM})")
+    return rapor
+
+
+def karsilastir(taban, simdiki, tolerans=0.20):
+    """ İki raporun ``sonuclar``'ını karşılaştırır; ``Fark`` listesi döner. """
+    farklar = []
+    t_sonuc, s_sonuc = taban["sonuclar"], simdiki["sonuclar"]
+    for anahtar in sorted(set(t_sonuc) | set(s_sonuc)):
+        if anahtar not in s_sonuc:
+            farklar.append(Fark(anahtar, "-", None, None, None, "eksik"))
+            continue
+        if anahtar not in t_sonuc:
+            farklar.append(Fark(anahtar, "-", None, None, None, "yeni"))
+            continue
+        for olcut, yon in KAPILAR.items():
+            t, s = t_sonuc[anahtar].get(olcut), s_sonuc[anahtar].get(olcut)
+            if not t or s is None:
+                continue
+            oran = s / t - 1.0
+            if oran * yon > tolerans:
+                durum = "gerileme"
+            elif -oran * yon > tolerans:
+                durum = "iyilesme"
+            else:
+                durum = "ayni"
+            farklar.append(Fark(anahtar, olcut, t, s, oran, durum))
+        t, s = t_sonuc[anahtar].get(HATA_OLCUTU, 0), s_sonuc[anahtar].get(HATA_OLCUTU, 0)
+        if t or s:
+            durum = "gerileme" if s > t else ("iyilesme" if s < t else "ayni")
+            farklar.append(Fark(anahtar, HATA_OLCUTU, t, s, s / t - 1.0 if t else float("inf"), durum))
+    return farklar
+
+
+def karsilastirma_yazdir(taban, simdiki, farklar, tolerans):
+    """ Karşılaştırma tablosunu basar; başarısızlık (gerileme + eksik ölçüm) sayısını döner. """
+    t_ortam, s_ortam = taban.get("ortam", {}), simdiki.get("ortam", {})
+    for alan in ("python", "makine", "cpu"):
+        if t_ortam.get(alan) != s_ortam.get(alan):
+            print(f"UYARI: ortam farklı ({alan}: taban {t_ortam.get(alan)}, şimdi {s_ortam.get(alan)}); "
+                  f"karşılaştırma yanıltıcı olabilir")
+    print(f"\nTaban karşılaştırması (tolerans %{tolerans * 100:.0f}, taban {t_ortam.get('zaman', '?')}):")
+    print(f"{'Ölçüm':<46} {'Ölçüt':<8} {'Taban':>12} {'Şimdi':>12} {'Fark':>8}  Durum")
+    for f in farklar:
+        if f.olcut == "-":
+            isaret = "  <<< EKSİK" if f.durum == "eksik" else ""
+            print(f"{f.anahtar:<46} {'-':<8} {'':>12} {'':>12} {'':>8}  {f.durum}{isaret}")
+            continue
+        isaret = "  <<< GERİLEME" if f.durum == "gerileme" else ""
+        oran = f"{f.oran * 100:>+7.1f}%" if f.oran != float("inf") else f"{'yeni':>8}"
+        print(f"{f.anahtar:<46} {f.olcut:<8} {f.taban:>12,.1f} {f.simdi:>12,.1f} {oran}  {f.durum}{isaret}")
+    gerileme = sum(1 for f in farklar if f.durum == "gerileme")
+    eksik = sum(1 for f in farklar if f.durum == "eksik")
+    print(f"{gerileme} gerileme, {sum(1 for f in farklar if f.durum == 'iyilesme')} iyileşme, "
+          f"{eksik} eksik ölçüm")
+    return gerileme + eksik
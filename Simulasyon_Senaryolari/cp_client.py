@@ -2,12 +2,14 @@ import asyncio
 import logging
 import can
 import websockets
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
+from secvolt.donanim import AsyncCanBus, komut_yolla
+from secvolt.simclock import simdi
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - [İSTEMCİ] - %(message)s')
 
 # --- DONANIM (vcan0) AYARI ---
@@ -18,24 +20,41 @@ except Exception:
     # Hata vermemesi için pass geçiyoruz, donanım yoksa simülasyon devam eder
     can_bus = None
 
+# Gönderimler kuyruğa alınır; OCPP handler'ları doymuş hatta beklemez
+CAN_HATTI = AsyncCanBus(can_bus) if can_bus else None
+
 def donanima_komut_yolla(can_id, data):
-    if can_bus:
-        try:
-            msg = can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
-            can_bus.send(msg)
-            logging.info(f"Donanıma İletildi -> ID: {hex(can_id)} Data: {data}")
-        except Exception as e:
-            logging.error(f"Donanım Hatası: {e}")
+    if CAN_HATTI:
+        komut_yolla(CAN_HATTI, can_id, data)
 
 class SablonChargePoint(cp):
 
+    async def send_boot_notification(self):
+        """ Şarj istasyonu açılış bildirimi (Standart Prosedür) """
+        request = call.BootNotification(
+            charge_point_model="SecVolt-Sim",
+            charge_point_vendor="GroupProject"
+        )
+        response = await self.call(request)
+        if response.status == RegistrationStatus.accepted:
+            logging.info("BootNotification KABUL EDİLDİ.")
+        else:
+            logging.info("BootNotification REDDEDİLDİ.")
+        return response
+
+    async def send_heartbeat(self, interval=10):
+        """ Sunucuya düzenli yaşam sinyali gönderir """
+        while True:
+            await self.call(call.Heartbeat())
+            await asyncio.sleep(interval)
+
     async def send_meter_values(self):
         """ Düzenli enerji raporu gönderir (NORMAL DAVRANIŞ) """
         sayac = 0
         while True:
             sayac += 10 # Normal artış
             payload = [{
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": simdi().isoformat(),
                 "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
             }]
             # Göndermek için alttaki satırı aktif edebilirsiniz
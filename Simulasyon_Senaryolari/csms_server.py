@@ -1,21 +1,50 @@
+import argparse
 import asyncio
 import logging
+import os
 from websockets.server import serve
-from datetime import datetime, timezone
 
 from ocpp.v16 import ChargePoint as cp, call, call_result 
 from ocpp.v16.enums import RegistrationStatus, RemoteStartStopStatus
 from ocpp.routing import on
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+from secvolt import logpipe, metrics
+from secvolt.codec import FastCodecMixin, ValidationPolicy
+from secvolt.covertstat import CovertStatDetector
+from secvolt.detection import DetectionEngine
+from secvolt.segmentlog import SegmentLog
+from secvolt.simclock import simdi
+from secvolt.tsdb import TimeSeriesStore
+from secvolt.workers import Supervisor
 
-class SablonChargePoint(cp):
+logpipe.kur(level=logging.INFO, format='%(asctime)s - [SUNUCU] - %(message)s')
+
+# Tüm MeterValues örnekleri (cp, konnektör, measurand) anahtarıyla burada tutulur
+METER_DEPOSU = TimeSeriesStore()
+
+# Sayaç / gerilim kuralları tüm şarj noktaları için mikro-batch halinde değerlendirilir
+TESPIT = DetectionEngine()
+
+# Voltaj dalgalanmalarında kodlamadan bağımsız gizli kanal puanlaması
+KANAL_ANALIZI = CovertStatDetector()
+
+# OCPP trafik kaydı (--kayit-dizini); her süreç kendi alt dizinine yazar
+KAYIT_DIZINI = None
+_trafik_kaydi = None
+
+def trafik_kaydi():
+    global _trafik_kaydi
+    if _trafik_kaydi is None and KAYIT_DIZINI:
+        _trafik_kaydi = SegmentLog(os.path.join(KAYIT_DIZINI, f"surec-{os.getpid()}"))
+    return _trafik_kaydi
+
+class SablonChargePoint(FastCodecMixin, cp):
     
     @on('BootNotification')
     async def on_boot_notification(self, charge_point_model, charge_point_vendor, **kwargs):
-        logging.info(f"BAĞLANTI İSTEĞİ: {charge_point_model} ({charge_point_vendor})")
+        logging.info("BAĞLANTI İSTEĞİ: %s (%s)", charge_point_model, charge_point_vendor)
         return call_result.BootNotification(
-            current_time=datetime.now(timezone.utc).isoformat(),
+            current_time=simdi().isoformat(),
             interval=10,
             status=RegistrationStatus.accepted
         )
@@ -24,26 +53,37 @@ class SablonChargePoint(cp):
     async def on_heartbeat(self, **kwargs):
         logging.info("Heartbeat (Yaşam Sinyali) alındı.")
         return call_result.Heartbeat(
-            current_time=datetime.now(timezone.utc).isoformat()
+            current_time=simdi().isoformat()
         )
 
     @on('MeterValues')
     async def on_meter_values(self, connector_id, meter_value, **kwargs):
         try:
+            METER_DEPOSU.meter_values_ekle(self.id, connector_id, meter_value)
+            TESPIT.meter_values_ekle(self.id, connector_id, meter_value)
+            KANAL_ANALIZI.meter_values_ekle(self.id, connector_id, meter_value)
             value = meter_value[0]['sampled_value'][0]['value']
-            logging.info(f"ENERJİ RAPORU: {value} Wh (Konnektör: {connector_id})")
+            logging.info("ENERJİ RAPORU: %s Wh (Konnektör: %s)", value, connector_id)
         except Exception as e:
-            logging.error(f"Veri okuma hatası: {e}")
+            logging.error("Veri okuma hatası: %s", e)
         return call_result.MeterValues()
 
+    @on('StatusNotification')
+    async def on_status_notification(self, connector_id, error_code, status, **kwargs):
+        logging.info("DURUM: %s / %s (Konnektör: %s)", status, error_code, connector_id)
+        return call_result.StatusNotification()
+
 async def on_connect(websocket, path):
     try:
         charge_point_id = path.strip('/')
-        logging.info(f"Cihaz Bağlandı: {charge_point_id}")
+        logging.info("Cihaz Bağlandı: %s", charge_point_id)
+        kayit = trafik_kaydi()
+        if kayit is not None:
+            websocket = kayit.baglanti(websocket, charge_point_id)
         cp_instance = SablonChargePoint(charge_point_id, websocket)
         await cp_instance.start()
     except Exception as e:
-        logging.error(f"Bağlantı hatası: {e}")
+        logging.error("Bağlantı hatası: %s", e)
 
 async def main():
     async with serve(on_connect, '0.0.0.0', 9000):
@@ -51,7 +91,37 @@ async def main():
         await asyncio.Future()
 
 if __name__ == '__main__':
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        pass
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="SecVolt CSMS sunucusu")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="İşçi süreç sayısı (1 = tek asyncio döngüsü)")
+    parser.add_argument('--mod', choices=['reuseport', 'prefork'], default='reuseport',
+                        help="Port paylaşım yöntemi (işçi modunda)")
+    parser.add_argument('--dogrulama', action='append', default=[], metavar="AKSIYON=ORAN",
+                        help="Aksiyon başına şema doğrulama oranı, örn. MeterValues=0.05 (0 = güvenilir yol)")
+    parser.add_argument('--kayit-dizini', default=None,
+                        help="Gelen/giden tüm OCPP çerçevelerinin yazılacağı segment kaydı dizini")
+    parser.add_argument('--metrik-port', type=int, default=None,
+                        help="Aksiyon başına gecikme / hata metriklerini bu portta /metrics olarak sun")
+    args = parser.parse_args()
+    KAYIT_DIZINI = args.kayit_dizini
+
+    SablonChargePoint.validation_policy = ValidationPolicy(
+        aksiyonlar={a: float(o) for a, _, o in (d.partition('=') for d in args.dogrulama)}
+    )
+
+    if args.metrik_port is not None:
+        if args.workers > 1:
+            # Uç nokta thread'i fork'la işçilere geçmez; sayılar işçi süreçlerinde birikirdi
+            logging.warning("--metrik-port yalnız tek süreç modunda desteklenir, metrikler kapalı.")
+        else:
+            metrics.install()
+            metrics.sun(args.metrik_port)
+
+    if args.workers > 1:
+        # Çok çekirdekli mod: işçiler 9000 portunu paylaşır, gözetmen izler
+        Supervisor(on_connect, '0.0.0.0', 9000, workers=args.workers, mode=args.mod).run()
+    else:
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            pass
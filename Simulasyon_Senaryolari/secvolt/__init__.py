@@ -0,0 +1,8 @@
+"""
+SecVolt ortak kütüphanesi.
+
+Senaryo sunucularının ve istemcilerinin paylaştığı altyapı modülleri burada
+tutulur. Her modül tek bir alt sistemi kapsar. Simulasyon_Senaryolari
+klasöründeki betikler paketi doğrudan, senaryo klasörlerindeki betikler ise
+üst dizini sys.path'e ekleyerek içe aktarır.
+"""
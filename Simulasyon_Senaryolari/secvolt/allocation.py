@@ -0,0 +1,442 @@
+"""
+Site kapasitesinin aktif şarj işlemlerine vektörel paylaştırılması (akıllı şarj).
+
+Enes-Kızılca sunucusundaki "karar" tek bir ``if bos_kapasite > 10000`` dalıydı
+ve yalnızca log basıyordu. ``ChargingAllocator`` ``SiteLoadAggregator``
+ağacındaki yükleri kullanarak her site için adil paylaşım (max-min fairness)
+çözer ve sonucu şarj noktalarına ``SetChargingProfile`` ile gönderir:
+
+- ``su_doldur``: tek kapasite altında ağırlıklı su doldurma. Doyma seviyeleri
+  (``ust / agirlik``) sıralanır, kümülatif toplamlardan su seviyesi tek
+  geçişte bulunur: O(n log n), Python döngüsü yok.
+- ``hiyerarsik_doldur``: site kapasitesiyle birlikte her konnektörün bağlı
+  olduğu trafonun kapasitesini de gözetir. Site seviyesinde çözülür, sınırını
+  aşan trafolar kendi kapasitelerinde doldurulup sabitlenir, kalan site
+  kapasitesi diğerlerine yeniden dağıtılır (en fazla trafo sayısı kadar tur).
+- Yönetilen yük: aktif işlemi olan ve şüpheli olmayan konnektörler. Taban
+  yükler, aktif olmayan konnektörlerin ölçülen yükü ve şüpheli / ölçülmemiş
+  konnektörler (ağaçta konnektör gücüyle sayılır) sabit yük kabul edilip
+  kapasiteden düşülür; şüpheli konnektörün bildirdiği değere güvenilmez.
+- ``min_guc_w`` altında kalan pay şarjı fiilen başlatamaz (IEC 61851 6 A).
+  Kapasite herkese yetmezse işlemler başlama sırasıyla min güce yerleştirilir,
+  sığmayanlara 0 W (beklet) verilir ve kalan kapasite yeniden dağıtılır.
+
+Yeni MeterValues yalnızca ilgili siteyi kirli işaretler; ``aralik_ms``'de bir
+yalnızca kirli siteler yeniden çözülür. Gönderilen limitten ``degisim_esigi_w``
+kadar değişmeyen konnektörler için profil gönderilmez; bekleyen profiller
+şarj noktası başına gruplanır, şarj noktaları arasında ``eszamanli`` sınırıyla
+paralel gönderilir. Bir şarj noktası için henüz gönderilmemiş eski limit yeni
+çözümle üzerine yazılır (yalnızca son limit gider). SetChargingProfile'ı hiç
+desteklemeyen (NotImplemented / NotSupported dönen) şarj noktası
+``desteklemeyen`` kümesine alınır ve yeniden bağlanana kadar ona profil
+gönderilmez; reddedilen (Rejected) profil ise sonraki çözümde yeniden denenir.
+
+10k konnektörlü bir sitenin yeniden çözümü birkaç ms sürer
+(``benchmarks.bench_allocation``).
+"""
+import asyncio
+import logging
+import math
+import time
+from operator import itemgetter
+
+import numpy as np
+from ocpp.exceptions import NotImplementedError as OcppNotImplementedError, NotSupportedError
+from ocpp.v16 import call
+from ocpp.v16.enums import (ChargingProfileKindType, ChargingProfilePurposeType, ChargingProfileStatus,
+                            ChargingRateUnitType)
+
+from secvolt.siteload import KONNEKTOR, SITE
+
+
+def su_doldur(kapasite, ust, agirlik=None):
+    """
+    Her elemana ``min(ust_i, seviye * agirlik_i)`` verir; toplam ``kapasite``'yi
+    aşmayacak en yüksek seviye seçilir. Talepler kapasiteye sığıyorsa ``ust`` döner.
+    """
+    ust = np.asarray(ust, dtype=np.float64)
+    if ust.size == 0 or kapasite <= 0:
+        return np.zeros(ust.size)
+    if ust.sum() <= kapasite:
+        return ust.copy()
+    w = np.ones(ust.size) if agirlik is None else np.asarray(agirlik, dtype=np.float64)
+    doyma = ust / w
+    sira = np.argsort(doyma, kind="stable")
+    d, u, ws = doyma[sira], ust[sira], w[sira]
+    # Seviye d[k-1]..d[k] arasındaysa: toplam = sum(u[:k]) + seviye * sum(w[k:])
+    onceki = np.empty(u.size)
+    onceki[0] = 0.0
+    np.cumsum(u[:-1], out=onceki[1:])
+    kalan_agirlik = np.cumsum(ws[::-1])[::-1]
+    seviye = (kapasite - onceki) / kalan_agirlik
+    k = int(np.argmax(seviye <= d))
+    return np.minimum(ust, seviye[k] * w)
+
+
+def grup_doldur(kapasite, grup, ust, agirlik=None):
+    """
+    Her grup kendi ``kapasite[g]``'si altında ayrı ayrı su doldurulur; tüm
+    gruplar tek sıralamayla (grup, doyma seviyesi) ve parça kümülatif toplamlarla çözülür.
+    """
+    ust = np.asarray(ust, dtype=np.float64)
+    n = ust.size
+    if n == 0:
+        return np.zeros(0)
+    w = np.ones(n) if agirlik is None else np.asarray(agirlik, dtype=np.float64)
+    kapasite = np.asarray(kapasite, dtype=np.float64)
+    doyma = ust / w
+    sira = np.lexsort((doyma, grup))
+    g, d, u, ws = grup[sira], doyma[sira], ust[sira], w[sira]
+    bas = np.searchsorted(g, g)
+    kum_u = np.cumsum(u)
+    kum_w = np.cumsum(ws)
+    onceki = kum_u - u - (kum_u[bas] - u[bas])
+    kalan_agirlik = np.bincount(g, weights=ws, minlength=kapasite.size)[g] - (kum_w - ws - (kum_w[bas] - ws[bas]))
+    kap = np.maximum(kapasite[g], 0.0)
+    seviye = (kap - onceki) / kalan_agirlik
+    # Grubun seviyesi: seviye <= doyma olan ilk konum; yoksa talepler sığar
+    konum = np.where(seviye <= d, np.arange(n), n)
+    baslar = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    ilk = np.minimum.reduceat(konum, baslar)
+    grup_seviye = np.full(kapasite.size, np.inf)
+    grup_seviye[g[baslar]] = np.where(ilk < n, seviye[np.minimum(ilk, n - 1)], np.inf)
+    return np.minimum(ust, grup_seviye[grup] * w)
+
+
+def hiyerarsik_doldur(site_kapasite, grup, grup_kapasite, ust, agirlik=None):
+    """
+    Site kapasitesi ve grup (trafo) kapasiteleri altında max-min adil paylaşım.
+    ``grup[i]`` elemanın ``grup_kapasite`` içindeki indeksidir; sınırsız grup ``inf``.
+    """
+    ust = np.asarray(ust, dtype=np.float64)
+    n = ust.size
+    w = np.ones(n) if agirlik is None else np.asarray(agirlik, dtype=np.float64)
+    grup = np.asarray(grup, dtype=np.int64)
+    grup_kapasite = np.asarray(grup_kapasite, dtype=np.float64)
+    x = np.zeros(n)
+    serbest = np.ones(n, dtype=bool)
+    kalan = float(site_kapasite)
+    while True:
+        idx = np.flatnonzero(serbest)
+        if idx.size == 0:
+            return x
+        xs = su_doldur(kalan, ust[idx], w[idx])
+        toplam = np.bincount(grup[idx], weights=xs, minlength=grup_kapasite.size)
+        asan = toplam > grup_kapasite * (1 + 1e-9) + 1e-6
+        if not asan.any():
+            x[idx] = xs
+            return x
+        # Sınırı aşan grup site seviyesi yükseldikçe de aşar: hepsi kendi kapasitesinde
+        # tek seferde doldurulup sabitlenir, kalan site kapasitesi diğerlerine kalır
+        uyeler = idx[asan[grup[idx]]]
+        xg = grup_doldur(grup_kapasite, grup[uyeler], ust[uyeler], w[uyeler])
+        x[uyeler] = xg
+        serbest[uyeler] = False
+        kalan -= float(xg.sum())
+
+
+def _sec(liste, idx):
+    if not idx:
+        return np.zeros(0)
+    if len(idx) == 1:
+        return np.array([liste[idx[0]]], dtype=np.float64)
+    return np.array(itemgetter(*idx)(liste), dtype=np.float64)
+
+
+class _SiteYapisi:
+    """ Bir sitenin konnektörleri ve trafo grupları (topoloji değişince yeniden kurulur). """
+
+    __slots__ = ("konnektorler", "konnektor_dizi", "grup", "grup_dugumleri", "max_guc")
+
+    def __init__(self, agac, site):
+        konnektorler, grup, grup_dugumleri, grup_no = [], [], [], {}
+        yigin = [site]
+        while yigin:
+            d = yigin.pop()
+            for c in agac.cocuklar[d]:
+                if agac.tur[c] == KONNEKTOR:
+                    ust = agac.ust[c]
+                    g = grup_no.get(ust)
+                    if g is None:
+                        g = grup_no[ust] = len(grup_dugumleri)
+                        grup_dugumleri.append(ust)
+                    konnektorler.append(c)
+                    grup.append(g)
+                elif agac.cocuklar[c]:
+                    yigin.append(c)
+        self.konnektorler = konnektorler
+        self.konnektor_dizi = np.array(konnektorler, dtype=np.int64)
+        self.grup = np.array(grup, dtype=np.int64)
+        self.grup_dugumleri = grup_dugumleri
+        self.max_guc = _sec(agac.kapasite, konnektorler)
+
+
+def _karar_logla(site_adi, ozet):
+    logging.info("⚡ YÜK DAĞITIMI %s: %s aktif konnektöre %.0f W (boş %.0f W), %s bekletilen, %s profil",
+                 site_adi, ozet["aktif"], ozet["dagitilan_w"], ozet["site_bos_w"], ozet["bekletilen"],
+                 ozet["profil"])
+
+
+class ChargingAllocator:
+    """ Kirli siteleri vektörel çözüp limitleri SetChargingProfile ile gönderir. """
+
+    def __init__(self, agac, min_guc_w=1380.0, adim_w=100.0, degisim_esigi_w=500.0, aralik_ms=1000.0,
+                 eszamanli=64, profil_id=1, karar_fn=_karar_logla):
+        self.agac = agac
+        self.min_guc_w = min_guc_w
+        self.adim_w = adim_w
+        self.degisim_esigi_w = degisim_esigi_w
+        self.aralik_ms = aralik_ms
+        self.eszamanli = eszamanli
+        self.profil_id = profil_id
+        self.karar_fn = karar_fn
+        # Adıma yuvarlanmış limit min gücün altına düşmesin
+        self._min_limit = math.ceil(min_guc_w / adim_w) * adim_w if adim_w else min_guc_w
+
+        self.baglantilar = {}   # cp_id -> ChargePoint
+        self.desteklemeyen = set()  # SetChargingProfile işleyicisi olmayan şarj noktaları
+        # Ağaç düğüm indeksine göre sütunlar: başlama sırası (0 = işlem yok),
+        # son çözüm ve gönderilen / gönderimde olan limit (nan = yok)
+        self._oncelik = np.zeros(0, dtype=np.int64)
+        self._limit = np.zeros(0)
+        self._hedef = np.zeros(0)
+        self._sira = 0
+        self.aktif_sayisi = 0
+        self._kirli = set()
+        self._bekleyen = {}     # cp_id -> {connector_id: (dugum, limit)}
+        self._yapilar = {}
+        self._yapi_surum = -1
+        self._gorev = None
+
+        self.cozum_sayisi = 0
+        self.son_cozum_us = 0.0
+        self.gonderilen_profil = 0
+        self.reddedilen_profil = 0
+
+    # --- bağlantı ve işlem durumu ---
+    def baglan(self, charge_point):
+        self.baglantilar[charge_point.id] = charge_point
+
+    def ayril(self, cp_id):
+        self.baglantilar.pop(cp_id, None)
+        self._bekleyen.pop(cp_id, None)
+        # Yeniden bağlanan şarj noktası (ör. yeni yazılımla) tekrar denenir
+        self.desteklemeyen.discard(cp_id)
+
+    def _buyut(self):
+        eski = self._oncelik.size
+        if eski >= len(self.agac):
+            return
+        yeni = max(len(self.agac), eski * 2, 1024)
+        for ad, dolgu in (("_oncelik", 0), ("_limit", np.nan), ("_hedef", np.nan)):
+            dizi = np.full(yeni, dolgu, dtype=getattr(self, ad).dtype)
+            dizi[:eski] = getattr(self, ad)
+            setattr(self, ad, dizi)
+
+    def islem_baslat(self, cp_id, connector_id):
+        dugum = self.agac._konnektor(cp_id, connector_id)
+        self._buyut()
+        if not self._oncelik[dugum]:
+            self._sira += 1
+            self._oncelik[dugum] = self._sira
+            self.aktif_sayisi += 1
+            self._kirlet(dugum)
+        return dugum
+
+    def islem_bitir(self, cp_id, connector_id):
+        dugum = self.agac.indeks((cp_id, connector_id))
+        if dugum is not None and dugum < self._oncelik.size and self._oncelik[dugum]:
+            self._oncelik[dugum] = 0
+            self._limit[dugum] = self._hedef[dugum] = np.nan
+            self.aktif_sayisi -= 1
+            self._kirlet(dugum)
+
+    def rapor(self, cp_id, connector_id):
+        """
+        Ağaca işlenmiş bir MeterValues sonrası çağrılır: konnektör aktif işlem
+        sayılır ve sitesi bir sonraki turda yeniden çözülür.
+        """
+        dugum = self.islem_baslat(cp_id, connector_id)
+        self._kirlet(dugum)
+
+    def limit(self, cp_id, connector_id):
+        """ Konnektörün son çözümdeki limiti (W); aktif işlem ya da çözüm yoksa None. """
+        dugum = self.agac.indeks((cp_id, connector_id))
+        if dugum is None or dugum >= self._limit.size or np.isnan(self._limit[dugum]):
+            return None
+        return float(self._limit[dugum])
+
+    def _kirlet(self, dugum):
+        self._kirli.add(self.site(dugum))
+        gorev = self._gorev
+        if not gorev or gorev.done() or gorev.get_loop() is not asyncio._get_running_loop():
+            self._zamanlayici_kur()
+
+    def site(self, dugum):
+        ust = self.agac.ust
+        while ust[dugum] >= 0:
+            dugum = ust[dugum]
+        return dugum
+
+    def _yapi(self, site):
+        if self._yapi_surum != len(self.agac):
+            self._yapilar.clear()
+            self._yapi_surum = len(self.agac)
+        yapi = self._yapilar.get(site)
+        if yapi is None:
+            yapi = self._yapilar[site] = _SiteYapisi(self.agac, site)
+        return yapi
+
+    # --- çözüm ---
+    def coz(self, site):
+        """ Sitenin yönetilen konnektörleri için (düğüm dizisi, limit dizisi W) döner. """
+        t0 = time.perf_counter()
+        agac = self.agac
+        yapi = self._yapi(site)
+        self._buyut()
+        yonetilen = self._oncelik[yapi.konnektor_dizi] > 0
+        supheli = agac.supheli
+        if supheli:
+            yonetilen &= np.fromiter((d not in supheli for d in yapi.konnektorler), dtype=bool,
+                                     count=len(yapi.konnektorler))
+        idx = np.flatnonzero(yonetilen)
+        dugumler = yapi.konnektor_dizi[idx]
+        dugum_liste = dugumler.tolist()
+        grup = yapi.grup[idx]
+        ust = yapi.max_guc[idx]
+
+        # Sabit yük = düğüm toplamı - yönetilen konnektörlerin ölçülen yükü
+        olculen = _sec(agac.yuk, dugum_liste)
+        g_dugum = yapi.grup_dugumleri
+        g_yonetilen = np.bincount(grup, weights=olculen, minlength=len(g_dugum))
+        g_kapasite = np.array([agac.kapasite[g] if g != site else np.inf for g in g_dugum])
+        g_kalan = g_kapasite - (_sec(agac.yuk, g_dugum) - g_yonetilen)
+        site_kalan = agac.kapasite[site] - (agac.yuk[site] - float(olculen.sum()))
+
+        x = hiyerarsik_doldur(site_kalan, grup, g_kalan, ust)
+        if self._min_limit > 0 and np.any(x < self._min_limit):
+            x = self._min_guc_uygula(x, dugumler, grup, g_kalan, site_kalan, ust)
+        x = np.floor(x / self.adim_w) * self.adim_w if self.adim_w else x
+
+        self.cozum_sayisi += 1
+        self.son_cozum_us = (time.perf_counter() - t0) * 1e6
+        return dugumler, x
+
+    def _min_guc_uygula(self, x, dugumler, grup, g_kalan, site_kalan, ust):
+        # Başlama sırasıyla min güce yerleştir; site ya da trafo sınırına sığmayan beklet
+        oncelik = self._oncelik[dugumler]
+        sira = np.lexsort((oncelik, grup))
+        taban = np.minimum(self._min_limit, ust)[sira]
+        g_sirali = grup[sira]
+        kumulatif = np.cumsum(taban)
+        g_bas = np.searchsorted(g_sirali, g_sirali)
+        g_kumulatif = kumulatif - np.where(g_bas > 0, kumulatif[g_bas - 1], 0.0)
+        sigar = np.zeros(x.size, dtype=bool)
+        sigar[sira] = g_kumulatif <= g_kalan[g_sirali]
+        # Site sınırı başlama sırasıyla (gruplar arası)
+        site_sira = np.argsort(oncelik, kind="stable")
+        aday = sigar[site_sira]
+        site_kumulatif = np.cumsum(np.where(aday, np.minimum(self._min_limit, ust)[site_sira], 0.0))
+        sigar[site_sira] = aday & (site_kumulatif <= site_kalan)
+        x = hiyerarsik_doldur(site_kalan, grup, g_kalan, np.where(sigar, ust, 0.0))
+        x[x < self._min_limit] = 0.0
+        return x
+
+    def isle(self):
+        """ Kirli siteleri çözer, değişen limitleri gönderim kuyruğuna alır; kuyruğa giren profil sayısı. """
+        kirli, self._kirli = self._kirli, set()
+        agac = self.agac
+        toplam = 0
+        for site in kirli:
+            dugumler, x = self.coz(site)
+            self._limit[dugumler] = x
+            # Yalnız gönderilenden anlamlı ölçüde değişen (ya da bekletme durumu değişen) limitler
+            onceki = self._hedef[dugumler]
+            with np.errstate(invalid="ignore"):
+                degisen = (np.isnan(onceki) | (np.abs(onceki - x) >= self.degisim_esigi_w)
+                           | ((onceki > 0) != (x > 0)))
+            profil = 0
+            for d, limit in zip(dugumler[degisen].tolist(), x[degisen].tolist()):
+                cp_id, connector_id = agac.ad[d]
+                if cp_id not in self.baglantilar or cp_id in self.desteklemeyen:
+                    continue
+                self._hedef[d] = limit
+                self._bekleyen.setdefault(cp_id, {})[connector_id] = (d, limit)
+                profil += 1
+            toplam += profil
+            if self.karar_fn is not None and agac.tur[site] == SITE:
+                self.karar_fn(agac.ad[site], {"aktif": len(dugumler), "dagitilan_w": float(x.sum()),
+                                              "site_bos_w": agac.bos_kapasite(site),
+                                              "bekletilen": int(np.count_nonzero(x == 0)), "profil": profil})
+        return toplam
+
+    # --- gönderim ---
+    def profil(self, limit_w):
+        return {
+            "charging_profile_id": self.profil_id,
+            "stack_level": 0,
+            "charging_profile_purpose": ChargingProfilePurposeType.tx_default_profile,
+            "charging_profile_kind": ChargingProfileKindType.relative,
+            "charging_schedule": {
+                "charging_rate_unit": ChargingRateUnitType.watts,
+                "charging_schedule_period": [{"start_period": 0, "limit": round(float(limit_w), 1)}],
+            },
+        }
+
+    async def gonder(self):
+        """ Bekleyen profilleri şarj noktası başına sırayla, şarj noktaları arasında paralel gönderir. """
+        bekleyen, self._bekleyen = self._bekleyen, {}
+        if not bekleyen:
+            return 0
+        sinir = asyncio.Semaphore(self.eszamanli)
+
+        async def cp_gonder(cp_id, limitler):
+            async with sinir:
+                charge_point = self.baglantilar.get(cp_id)
+                for connector_id, (dugum, limit) in limitler.items():
+                    if charge_point is None:
+                        self._hedef[dugum] = np.nan
+                        continue
+                    try:
+                        cevap = await charge_point.call(call.SetChargingProfile(
+                            connector_id=connector_id, cs_charging_profiles=self.profil(limit)), suppress=False)
+                    except (OcppNotImplementedError, NotSupportedError) as e:
+                        # Kalıcı: her çözümde yeniden göndermek yalnız CallError üretir
+                        self.desteklemeyen.add(cp_id)
+                        self.reddedilen_profil += 1
+                        logging.warning("[%s] SetChargingProfile desteklenmiyor (%s); bağlantı süresince "
+                                        "profil gönderilmeyecek.", cp_id, type(e).__name__)
+                        return
+                    except Exception as e:
+                        cevap = None
+                        logging.debug("[%s] SetChargingProfile hatası: %s", cp_id, e)
+                    if getattr(cevap, 'status', None) == ChargingProfileStatus.accepted.value:
+                        self.gonderilen_profil += 1
+                    else:
+                        # Bir sonraki çözümde yeniden denenir
+                        self.reddedilen_profil += 1
+                        if self._hedef[dugum] == limit:
+                            self._hedef[dugum] = np.nan
+                        logging.debug("[%s] Şarj profili kabul edilmedi (konnektör %s): %s", cp_id,
+                                      connector_id, getattr(cevap, 'status', None))
+
+        await asyncio.gather(*(cp_gonder(cp_id, limitler) for cp_id, limitler in bekleyen.items()))
+        return sum(len(l) for l in bekleyen.values())
+
+    def _zamanlayici_kur(self):
+        # Önceki görev bitmiş ya da kapanmış bir döngüye ait olabilir (ardışık asyncio.run)
+        dongu = asyncio._get_running_loop()
+        if dongu is None:
+            # Olay döngüsü yok: isle() / gonder() elle çağrılır
+            self._gorev = False
+        else:
+            self._gorev = dongu.create_task(self.calistir())
+
+    async def calistir(self):
+        while True:
+            await asyncio.sleep(self.aralik_ms / 1000)
+            try:
+                if self.isle() or self._bekleyen:
+                    await self.gonder()
+            except Exception:
+                logging.exception("Yük dağıtım turu hatası")
@@ -0,0 +1,324 @@
+"""
+Süreç genelinde paylaşılan yetkilendirme servisi (Authorize / StartTransaction).
+
+Senaryo sunucuları yetkili kart listesini her bağlantının ``__init__``'inde
+sabit bir küme olarak kuruyordu: her şarj noktası kendi kopyasını tutuyor,
+liste çalışırken güncellenemiyordu. ``AuthorizationService`` tek bir değişmez
+(immutable) anlık görüntü tutar:
+
+- **Anlık görüntü**: ``taban`` (büyük, nadiren yeniden kurulan sözlük) +
+  ``katman`` (son güncellemeler, silinenler için ``None``) + Bloom filtresi.
+  Güncelleme yeni bir ``_AnlikGoruntu`` kurar ve tek atama ile yerine koyar;
+  okuyucu ya eskiyi ya yeniyi görür, kilit gerekmez. Katman tabanın
+  ``sikistirma_orani`` kadarına ulaşınca ikisi birleştirilir (amortize O(1)).
+- **Bloom filtresi**: bilinmeyen etiketleri sözlüğe ve önbelleğe dokunmadan
+  reddeder. Kaba kuvvet / kimlik sahtekarlığı denemeleri (Korkutan senaryosu)
+  LRU'daki gerçek kararları dışarı itemez. Filtre Python'un str için önbelleğe
+  aldığı ``hash()``'i kullandığından süreç içi geçerlidir.
+- **LRU önbellek**: son kararların hazır ``id_tag_info`` sözlükleri. Her anlık
+  görüntünün kendi önbelleği vardır; değiştirme önbelleği de geçersiz kılar.
+- **Sürümlü yerel liste**: her güncelleme liste sürümünü bir artırır ve farkı
+  ``gecmis`` kadar saklar. ``send_local_list_istekleri`` şarj noktasının
+  sürümünden bugüne birleşik farkı ``Differential`` olarak, geçmiş yetmezse
+  tüm listeyi ``Full`` olarak tek bir ``SendLocalList`` ile gönderir. Liste
+  parçalanmaz: her parça sürüm artırmak zorundadır (aksi halde şarj noktası
+  VersionMismatch döner), ara sürümler ise gerçek sürümlerle çakışır ve yarıda
+  kalan aktarım şarj noktasında yanlış etiketli bir liste bırakır.
+
+Etiket başına bellek (CPython 3, 64 bit, ``benchmarks.bench_auth`` ile
+ölçülür): ~16 karakterlik str nesnesi 65 B + sözlük girdisi ~30-40 B (yeniden
+boyutlamaya bağlı) + Bloom filtresi ~2.4 B (%1 hata hedefi, %25 pay). Durum
+değerleri paylaşılan str nesneleridir; yalnızca son kullanma tarihi / üst
+etiketi olan kayıtlar ayrıca bir sözlük tutar. Toplam ~100-110 B/etiket.
+"""
+import logging
+import math
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+from ocpp.v16 import call
+from ocpp.v16.enums import AuthorizationStatus, UpdateStatus, UpdateType
+
+from secvolt import simclock
+
+KABUL = AuthorizationStatus.accepted.value
+GECERSIZ = AuthorizationStatus.invalid.value
+SURESI_DOLMUS = AuthorizationStatus.expired.value
+
+_MASKE64 = (1 << 64) - 1
+
+
+class BloomFilter:
+    """
+    Süreç içi blok Bloom filtresi: her anahtarın ``K`` biti tek bir 64 bitlik
+    kelimede tutulur, sorgu tek dizi erişimi + maske karşılaştırmasıdır.
+    """
+
+    __slots__ = ("kelime", "bitler", "adet")
+    K = 4
+
+    def __init__(self, kapasite, hata=0.01):
+        kapasite = max(1, kapasite)
+        # Blok yapısı yanlış pozitifi bir miktar artırır; bit bütçesi %25 fazla tutulur
+        m = -kapasite * math.log(hata) / math.log(2) ** 2 * 1.25
+        self.kelime = max(1, int(math.ceil(m / 64)))
+        self.bitler = array("Q", bytes(8 * self.kelime))
+        self.adet = 0
+
+    def ekle(self, anahtar):
+        h = hash(anahtar) & _MASKE64
+        b = h >> 32
+        self.bitler[(h & 0xFFFFFFFF) % self.kelime] |= (
+            (1 << (b & 63)) | (1 << ((b >> 6) & 63)) | (1 << ((b >> 12) & 63)) | (1 << ((b >> 18) & 63)))
+        self.adet += 1
+
+    def __contains__(self, anahtar):
+        h = hash(anahtar) & _MASKE64
+        b = h >> 32
+        maske = (1 << (b & 63)) | (1 << ((b >> 6) & 63)) | (1 << ((b >> 12) & 63)) | (1 << ((b >> 18) & 63))
+        return self.bitler[(h & 0xFFFFFFFF) % self.kelime] & maske == maske
+
+    def doluluk(self):
+        """ Beklenen yanlış pozitif oranı (eklenen adet üzerinden, blok etkisi hariç). """
+        return (1 - math.exp(-self.K * self.adet / (64 * self.kelime))) ** self.K
+
+
+class _AnlikGoruntu:
+    """ Değişmez yetki listesi sürümü; yalnızca kendi LRU önbelleği değişir. """
+
+    __slots__ = ("surum", "taban", "katman", "bloom", "onbellek", "onbellek_boyutu", "adet")
+
+    def __init__(self, surum, taban, katman, bloom, onbellek_boyutu, adet):
+        self.surum = surum
+        self.taban = taban
+        self.katman = katman
+        self.bloom = bloom
+        self.onbellek = OrderedDict()
+        self.onbellek_boyutu = onbellek_boyutu
+        self.adet = adet
+
+    def kayit(self, id_tag):
+        deger = self.katman.get(id_tag, self)
+        if deger is self:
+            return self.taban.get(id_tag)
+        return deger
+
+    def __iter__(self):
+        for id_tag, deger in self.taban.items():
+            if id_tag not in self.katman:
+                yield id_tag, deger
+        for id_tag, deger in self.katman.items():
+            if deger is not None:
+                yield id_tag, deger
+
+
+def _bilgi(deger):
+    """ Saklanan değerden (durum str'i ya da IdTagInfo sözlüğü) OCPP id_tag_info'su. """
+    if isinstance(deger, str):
+        return {'status': deger}
+    return dict(deger)
+
+
+def _normalize(deger):
+    # Yalnız durumdan oluşan kayıtlar paylaşılan str olarak saklanır
+    if isinstance(deger, AuthorizationStatus):
+        return deger.value
+    if isinstance(deger, str):
+        return AuthorizationStatus(deger).value
+    deger = {k: v for k, v in deger.items() if v is not None}
+    deger['status'] = AuthorizationStatus(deger.get('status', KABUL)).value
+    if len(deger) == 1:
+        return deger['status']
+    return deger
+
+
+class AuthorizationService:
+    """ Paylaşılan, atomik olarak değiştirilen yetki listesi + LRU + Bloom + yerel liste sürümleri. """
+
+    def __init__(self, etiketler=(), onbellek_boyutu=65536, bloom_hata=0.01, sikistirma_orani=0.125,
+                 gecmis=64):
+        self.onbellek_boyutu = onbellek_boyutu
+        self.bloom_hata = bloom_hata
+        self.sikistirma_orani = sikistirma_orani
+        self.gecmis = gecmis
+        self._farklar = OrderedDict()   # surum -> {id_tag: deger | None}
+        self.cp_surumleri = {}
+        self.istatistik = {"onbellek": 0, "bloom_red": 0, "sozluk": 0}
+
+        if hasattr(etiketler, 'items'):
+            taban = {t: _normalize(d) for t, d in etiketler.items()}
+        else:
+            taban = dict.fromkeys(etiketler, KABUL)
+        self._anlik = self._kur(1 if taban else 0, taban, {})
+
+    def _kur(self, surum, taban, katman):
+        bloom = BloomFilter(int((len(taban) + len(katman)) * 1.25) + 1024, self.bloom_hata)
+        for id_tag in taban:
+            bloom.ekle(id_tag)
+        for id_tag, deger in katman.items():
+            if deger is not None:
+                bloom.ekle(id_tag)
+        adet = len(taban) + sum(1 if d is not None else 0 for d in katman.values()) - sum(
+            1 for t in katman if t in taban)
+        return _AnlikGoruntu(surum, taban, katman, bloom, self.onbellek_boyutu, adet)
+
+    @property
+    def surum(self):
+        return self._anlik.surum
+
+    def __len__(self):
+        return self._anlik.adet
+
+    def __contains__(self, id_tag):
+        return self.dogrula(id_tag)['status'] == KABUL
+
+    # --- sorgu (sıcak yol) ---
+    def dogrula(self, id_tag, simdi=None):
+        """ ``id_tag`` için OCPP ``id_tag_info`` sözlüğü döner (bilinmeyen: Invalid). """
+        anlik = self._anlik
+        onbellek = anlik.onbellek
+        bilgi = onbellek.get(id_tag)
+        if bilgi is not None:
+            onbellek.move_to_end(id_tag)
+            self.istatistik["onbellek"] += 1
+            return self._sure_kontrol(bilgi, simdi)
+        if id_tag not in anlik.bloom:
+            self.istatistik["bloom_red"] += 1
+            return {'status': GECERSIZ}
+        self.istatistik["sozluk"] += 1
+        deger = anlik.kayit(id_tag)
+        if deger is None:
+            return {'status': GECERSIZ}
+        bilgi = _bilgi(deger)
+        onbellek[id_tag] = bilgi
+        if len(onbellek) > anlik.onbellek_boyutu:
+            onbellek.popitem(last=False)
+        return self._sure_kontrol(bilgi, simdi)
+
+    @staticmethod
+    def _sure_kontrol(bilgi, simdi):
+        bitis = bilgi.get('expiry_date')
+        if bitis and bilgi['status'] == KABUL:
+            simdi = simdi or simclock.simdi()
+            if datetime.fromisoformat(bitis) <= simdi:
+                return dict(bilgi, status=SURESI_DOLMUS)
+        return dict(bilgi)
+
+    # --- güncelleme ---
+    def guncelle(self, ekle=None, sil=()):
+        """
+        ``ekle``: {id_tag: durum | id_tag_info}; ``sil``: kaldırılacak etiketler.
+        Yeni anlık görüntüyü atomik olarak yayınlar ve yeni liste sürümünü döner.
+        """
+        fark = {t: _normalize(d) for t, d in (ekle or {}).items()}
+        for id_tag in sil:
+            fark[id_tag] = None
+        if not fark:
+            return self.surum
+        eski = self._anlik
+        katman = dict(eski.katman)
+        katman.update(fark)
+        surum = eski.surum + 1
+        if len(katman) > max(1024, self.sikistirma_orani * len(eski.taban)):
+            taban = dict(eski.taban)
+            for id_tag, deger in katman.items():
+                if deger is None:
+                    taban.pop(id_tag, None)
+                else:
+                    taban[id_tag] = deger
+            yeni = self._kur(surum, taban, {})
+        else:
+            # Filtre eski görüntüyle paylaşılır: eklenen bitler eski görüntüde yalnızca
+            # yanlış pozitifi artırır (sözlük yine Invalid der), yanlış negatif olmaz
+            bloom = eski.bloom
+            for id_tag, deger in fark.items():
+                if deger is not None:
+                    bloom.ekle(id_tag)
+            if bloom.doluluk() > self.bloom_hata * 2:
+                yeni = self._kur(surum, eski.taban, katman)
+            else:
+                adet = eski.adet
+                for id_tag, deger in fark.items():
+                    vardi = eski.kayit(id_tag) is not None
+                    adet += (deger is not None) - vardi
+                yeni = _AnlikGoruntu(surum, eski.taban, katman, bloom, self.onbellek_boyutu, adet)
+        self._farklar[surum] = fark
+        while len(self._farklar) > self.gecmis:
+            self._farklar.popitem(last=False)
+        self._anlik = yeni
+        logging.info("Yetki listesi güncellendi: sürüm %s, %s değişiklik, %s etiket", surum, len(fark), yeni.adet)
+        return surum
+
+    def degistir(self, etiketler):
+        """ Listenin tamamını değiştirir (farkı hesaplayıp ``guncelle`` ile yayınlar). """
+        yeni = {t: _normalize(d) for t, d in etiketler.items()} if hasattr(etiketler, 'items') \
+            else dict.fromkeys(etiketler, KABUL)
+        eski = dict(self._anlik)
+        ekle = {t: d for t, d in yeni.items() if eski.get(t) != d}
+        return self.guncelle(ekle, sil=[t for t in eski if t not in yeni])
+
+    # --- SendLocalList ---
+    def fark(self, surum):
+        """ ``surum``'dan bugüne birleşik fark; geçmiş yetmiyorsa None (Full gerekir). """
+        guncel = self.surum
+        if surum == guncel:
+            return {}
+        if surum <= 0 or surum > guncel or (surum + 1) not in self._farklar:
+            return None
+        birlesik = {}
+        for s in range(surum + 1, guncel + 1):
+            birlesik.update(self._farklar[s])
+        return birlesik
+
+    def send_local_list_istekleri(self, cp_surumu=0):
+        """ Şarj noktasını ``cp_surumu``'ndan güncel sürüme taşıyan ``SendLocalList`` çağrıları (en fazla bir). """
+        anlik = self._anlik
+        fark = self.fark(cp_surumu)
+        if fark is None:
+            kayitlar = [self._liste_girdisi(t, d) for t, d in anlik]
+            tur = UpdateType.full
+        else:
+            kayitlar = [self._liste_girdisi(t, d) for t, d in fark.items()]
+            tur = UpdateType.differential
+        if not kayitlar and tur == UpdateType.differential:
+            return []
+        return [call.SendLocalList(list_version=anlik.surum, update_type=tur, local_authorization_list=kayitlar)]
+
+    @staticmethod
+    def _liste_girdisi(id_tag, deger):
+        if deger is None:
+            return {'id_tag': id_tag}
+        return {'id_tag': id_tag, 'id_tag_info': _bilgi(deger)}
+
+    async def yerel_liste_gonder(self, charge_point):
+        """
+        Şarj noktasının yerel listesini güncel sürüme getirir (GetLocalListVersion +
+        SendLocalList). Şarj noktası yerel listeyi desteklemiyorsa sessizce vazgeçer.
+        """
+        cevap = await charge_point.call(call.GetLocalListVersion())
+        if cevap is None:
+            logging.debug("[%s] Yerel liste desteklenmiyor.", charge_point.id)
+            return None
+        cp_surumu = cevap.list_version
+        for istek in self.send_local_list_istekleri(max(0, cp_surumu)):
+            cevap = await charge_point.call(istek)
+            durum = getattr(cevap, 'status', None)
+            if durum == UpdateStatus.version_mismatch.value and istek.update_type != UpdateType.full:
+                # Şarj noktası farkı uygulayamadı: tüm listeyi baştan gönder
+                return await self._tam_liste_gonder(charge_point)
+            if durum != UpdateStatus.accepted.value:
+                logging.warning("[%s] SendLocalList başarısız: %s", charge_point.id, durum)
+                return None
+            cp_surumu = istek.list_version
+        self.cp_surumleri[charge_point.id] = cp_surumu
+        logging.info("[%s] Yerel yetki listesi sürüm %s.", charge_point.id, cp_surumu)
+        return cp_surumu
+
+    async def _tam_liste_gonder(self, charge_point):
+        for istek in self.send_local_list_istekleri(0):
+            cevap = await charge_point.call(istek)
+            if getattr(cevap, 'status', None) != UpdateStatus.accepted.value:
+                return None
+        self.cp_surumleri[charge_point.id] = self.surum
+        return self.surum
@@ -0,0 +1,270 @@
+"""
+Gerçek zamanlı CAN hat yükü ve arbitration DoS tespiti.
+
+Umut-Mihyaz senaryosundaki düşük kimlikli sel (0x001, 500 msg/s) hiçbir yerde
+ölçülmüyordu; tek belirti röle komutlarının (0x200/0x201) geç iletilmesiydi.
+
+``HatIzleyici`` bir taşıyıcının dinleyicisi olarak (``dinleyici_ekle``) her
+çerçeveyi görür ve çerçeve başına yalnızca birkaç sözlük işlemi yapar:
+
+- Zaman ``kova_s`` uzunluğunda kovalara bölünür; açık kovada kimlik başına
+  çerçeve ve bit sayılır. Kova kapanınca her kayan pencereye (``pencereler``,
+  saniye) eklenir, pencereden taşan en eski kova çıkarılır; toplamlar artımlı
+  tutulur, pencere yeniden taranmaz.
+- Hat kullanımı, çerçeve uzunluklarından (``donanim.cerceve_bit``, bit
+  doldurma hariç: alt sınır) ve ``bitrate``'ten hesaplanır.
+- Değerlendirme kova kapanışında, en kısa pencere üzerinde yapılır:
+
+  - ``dusuk_id_seli``: ``dusuk_id_esigi`` altındaki, ``bilinen_kimlikler``
+    dışında kalan bir kimlik ``hiz_esigi`` çerçeve/sn'yi aşıyor,
+  - ``baskinlik``: hat kullanımı ``baskinlik_kullanim``'ı geçmişken tek bir
+    kimlik hat süresinin ``baskinlik_esigi`` oranından fazlasını tutuyor ve
+    hatta ondan düşük kimlikli trafik yok (az kimlikli sakin hatta yanlış
+    alarm vermez),
+  - ``hat_doymus``: kullanım ``yuk_esigi``'ni aşıyor.
+
+- Alarm durum değişiminde (başlama / bitiş) ``alarm_fn(olay)`` çağrılır;
+  korutin dönerse görev olarak başlatılır. Bitiş için koşulun ``temiz_s``
+  boyunca kesintisiz kalkmış olması gerekir (titreşim yok).
+
+Zaman damgası olarak ``msg.timestamp`` kullanılır (socketcan'de çekirdek
+zamanı, ``VirtualCanBus``'ta hat zamanı); kaynak içinde tekdüze olmalıdır.
+"""
+import asyncio
+import logging
+from collections import deque
+
+from .donanim import cerceve_bit
+
+ALARM_TURLERI = ("dusuk_id_seli", "baskinlik", "hat_doymus")
+
+
+class _Pencere:
+    """ Kova kuyruğu üzerinde kimlik başına artımlı çerçeve/bit toplamları. """
+
+    def __init__(self, sure_s, kova_s):
+        self.sure_s = sure_s
+        self.kova_sayisi = max(1, round(sure_s / kova_s))
+        self.sifirla()
+
+    def sifirla(self):
+        self.kovalar = deque()
+        self.adet = {}
+        self.bit = {}
+        self.toplam_adet = 0
+        self.toplam_bit = 0
+
+    def ekle(self, kova):
+        adet, bit = kova
+        self.kovalar.append(kova)
+        for k, n in adet.items():
+            self.adet[k] = self.adet.get(k, 0) + n
+            self.bit[k] = self.bit.get(k, 0) + bit[k]
+            self.toplam_adet += n
+            self.toplam_bit += bit[k]
+        while len(self.kovalar) > self.kova_sayisi:
+            eski_adet, eski_bit = self.kovalar.popleft()
+            for k, n in eski_adet.items():
+                kalan = self.adet[k] - n
+                if kalan:
+                    self.adet[k] = kalan
+                    self.bit[k] -= eski_bit[k]
+                else:
+                    del self.adet[k]
+                    del self.bit[k]
+                self.toplam_adet -= n
+                self.toplam_bit -= eski_bit[k]
+
+    def dolu_sure(self, kova_s):
+        return len(self.kovalar) * kova_s
+
+
+class HatIzleyici:
+    """ Kimlik başına kayan pencere hızları, hat kullanımı ve DoS alarmları. """
+
+    def __init__(self, bitrate=500000, kova_s=0.1, pencereler=(1.0, 10.0), dusuk_id_esigi=0x100,
+                 hiz_esigi=200.0, baskinlik_esigi=0.3, baskinlik_kullanim=0.25, yuk_esigi=0.8, temiz_s=2.0,
+                 bilinen_kimlikler=(), alarm_fn=None):
+        self.bitrate = bitrate
+        self.kova_s = kova_s
+        self.pencereler = [_Pencere(s, kova_s) for s in sorted(pencereler)]
+        self.dusuk_id_esigi = dusuk_id_esigi
+        self.hiz_esigi = hiz_esigi
+        self.baskinlik_esigi = baskinlik_esigi
+        self.baskinlik_kullanim = baskinlik_kullanim
+        self.yuk_esigi = yuk_esigi
+        self.temiz_s = temiz_s
+        self.bilinen_kimlikler = frozenset(bilinen_kimlikler)
+        self.alarm_fn = alarm_fn
+
+        self._kova_sonu = None
+        self._son_t = None
+        self._adet = {}
+        self._bit = {}
+        self._bit_onbellek = {}     # (genişletilmiş, dlc) -> bit
+        self._gorevler = set()
+        self.aktif = {}             # tür -> olay
+        self._son_gorulme = {}      # tür -> koşulun en son sağlandığı an
+        self.alinan = 0
+        self.kapanan_kova = 0
+        self.alarm_sayisi = 0
+
+    # --- çerçeve yolu ---
+    def cerceve(self, msg):
+        """ Taşıyıcı dinleyicisi; her alınan çerçeve için çağrılır. """
+        self._son_t = t = msg.timestamp
+        if self._kova_sonu is None:
+            self._kova_sonu = t + self.kova_s
+        elif t >= self._kova_sonu:
+            self._kovalari_kapat(t)
+        anahtar = (msg.is_extended_id, len(msg.data))
+        bit = self._bit_onbellek.get(anahtar)
+        if bit is None:
+            bit = self._bit_onbellek[anahtar] = cerceve_bit(msg)
+        k = msg.arbitration_id
+        adet = self._adet
+        if k in adet:
+            adet[k] += 1
+            self._bit[k] += bit
+        else:
+            adet[k] = 1
+            self._bit[k] = bit
+        self.alinan += 1
+
+    def _kovalari_kapat(self, t):
+        # Hat sessiz kaldıysa aradaki kovalar boş olarak kapanır (pencere yine kayar)
+        while t >= self._kova_sonu:
+            kova = (self._adet, self._bit)
+            self._adet, self._bit = {}, {}
+            for p in self.pencereler:
+                p.ekle(kova)
+            self.kapanan_kova += 1
+            self._degerlendir(self._kova_sonu)
+            self._kova_sonu += self.kova_s
+            if not self.pencereler[0].toplam_adet and t - self._kova_sonu > self.pencereler[-1].sure_s:
+                # Uzun sessizlik: kova kova ilerlemek yerine sıfırdan başla
+                for p in self.pencereler:
+                    p.sifirla()
+                self._kova_sonu = t + self.kova_s
+                self._degerlendir(t)
+
+    def tick(self, simdi):
+        """ Çerçeve gelmese de pencereyi ``simdi``'ye ilerletir (hat tamamen sustuğunda). """
+        if self._kova_sonu is not None and simdi >= self._kova_sonu:
+            self._kovalari_kapat(simdi)
+
+    # --- ölçümler ---
+    def kullanim(self, pencere=0):
+        p = self.pencereler[pencere]
+        sure = p.dolu_sure(self.kova_s)
+        return p.toplam_bit / (self.bitrate * sure) if sure else 0.0
+
+    def hizlar(self, pencere=0):
+        """ Kimlik -> çerçeve/sn (kayan pencere). """
+        p = self.pencereler[pencere]
+        sure = p.dolu_sure(self.kova_s)
+        return {k: n / sure for k, n in p.adet.items()} if sure else {}
+
+    def baskin(self, pencere=0):
+        """ (kimlik, hat süresi payı): pencerede en çok bit taşıyan kimlik. """
+        p = self.pencereler[pencere]
+        if not p.toplam_bit:
+            return None, 0.0
+        k = max(p.bit, key=p.bit.get)
+        return k, p.bit[k] / p.toplam_bit
+
+    def ozet(self, pencere=0):
+        p = self.pencereler[pencere]
+        k, pay = self.baskin(pencere)
+        sure = p.dolu_sure(self.kova_s)
+        return {"pencere_s": p.sure_s, "cerceve_hizi": p.toplam_adet / sure if sure else 0.0,
+                "kullanim": self.kullanim(pencere), "baskin_id": k, "baskin_pay": pay,
+                "kimlik_sayisi": len(p.adet), "aktif_alarmlar": sorted(self.aktif)}
+
+    # --- tespit ---
+    def _kosullar(self):
+        p = self.pencereler[0]
+        sure = p.dolu_sure(self.kova_s)
+        if not sure or not p.toplam_adet:
+            return {}
+        bulunan = {}
+        esik_adet = self.hiz_esigi * sure
+        dusuk = [(k, n) for k, n in p.adet.items()
+                 if k < self.dusuk_id_esigi and n > esik_adet and k not in self.bilinen_kimlikler]
+        if dusuk:
+            k, n = max(dusuk, key=lambda x: x[1])
+            bulunan["dusuk_id_seli"] = {"can_id": k, "hiz": n / sure}
+        kullanim = p.toplam_bit / (self.bitrate * sure)
+        if kullanim >= self.baskinlik_kullanim:
+            k = max(p.bit, key=p.bit.get)
+            pay = p.bit[k] / p.toplam_bit
+            if pay >= self.baskinlik_esigi and k == min(p.adet):
+                bulunan["baskinlik"] = {"can_id": k, "pay": pay}
+        if kullanim >= self.yuk_esigi:
+            bulunan["hat_doymus"] = {"kullanim": kullanim}
+        return bulunan
+
+    def _degerlendir(self, simdi):
+        bulunan = self._kosullar()
+        for tur, ayrinti in bulunan.items():
+            self._son_gorulme[tur] = simdi
+            if tur not in self.aktif:
+                olay = {"tur": tur, "durum": "basladi", "zaman": simdi, "kullanim": self.kullanim()}
+                olay.update(ayrinti)
+                self.aktif[tur] = olay
+                self.alarm_sayisi += 1
+                self._bildir(olay)
+        for tur in list(self.aktif):
+            if tur not in bulunan and simdi - self._son_gorulme[tur] >= self.temiz_s:
+                baslangic = self.aktif.pop(tur)
+                self._bildir({"tur": tur, "durum": "bitti", "zaman": simdi,
+                              "sure_s": simdi - baslangic["zaman"], "kullanim": self.kullanim()})
+
+    def _bildir(self, olay):
+        if olay["durum"] == "basladi":
+            logging.warning("CAN hat alarmı: %s %s", olay["tur"],
+                            {k: v for k, v in olay.items() if k not in ("tur", "durum", "zaman")})
+        else:
+            logging.info("CAN hat alarmı sona erdi: %s (%.1f sn)", olay["tur"], olay["sure_s"])
+        if self.alarm_fn is None:
+            return
+        try:
+            sonuc = self.alarm_fn(olay)
+        except Exception:
+            logging.exception("CAN hat alarmı bildirim hatası")
+            return
+        if asyncio.iscoroutine(sonuc):
+            gorev = asyncio.get_running_loop().create_task(sonuc)
+            self._gorevler.add(gorev)
+            gorev.add_done_callback(self._gorev_bitti)
+
+    def _gorev_bitti(self, gorev):
+        self._gorevler.discard(gorev)
+        if not gorev.cancelled() and gorev.exception() is not None:
+            logging.error("CAN hat alarmı bildirim hatası: %s", gorev.exception())
+
+    # --- bağlama ---
+    def bagla(self, tasiyici):
+        """ ``secvolt.donanim`` taşıyıcısının dinleyicisi olur. """
+        tasiyici.dinleyici_ekle(self.cerceve)
+
+    def ayir(self, tasiyici):
+        tasiyici.dinleyici_cikar(self.cerceve)
+
+    async def calistir(self, tasiyici, aralik_s=None):
+        """ Bağlanır; hat sustuğunda da pencerenin kayması için periyodik ``tick``. """
+        self.bagla(tasiyici)
+        loop = asyncio.get_running_loop()
+        aralik_s = aralik_s or self.kova_s
+        son_alinan, son_yerel = self.alinan, loop.time()
+        try:
+            while True:
+                await asyncio.sleep(aralik_s)
+                if self.alinan != son_alinan or self._son_t is None:
+                    son_alinan, son_yerel = self.alinan, loop.time()
+                    continue
+                # Çerçeve gelmiyor: son çerçeve zamanına yerel saatte geçen süre eklenir
+                # (çerçeve zaman damgası ile döngü saati farklı kaynak olabilir)
+                self.tick(self._son_t + loop.time() - son_yerel)
+        finally:
+            self.ayir(tasiyici)
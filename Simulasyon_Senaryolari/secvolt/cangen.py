@@ -0,0 +1,272 @@
+"""
+Hız denetimli CAN trafik üreteci (arbitration DoS deneyleri için).
+
+Umut-Mihyaz istemcisindeki ``start_arbitration_flood`` 500 msg/s hedefini
+``await asyncio.sleep(1/500)`` ile tutturmaya çalışıyordu. Olay döngüsü
+zamanlayıcısının çözünürlüğü ve her turdaki ``send`` süresi gecikmeye eklenir;
+gerçekleşen hız hedefin altında kalır ve koşudan koşuya oynar, DoS deneyleri
+tekrarlanamaz.
+
+- ``akis(...)``: tek bir kimlik akışı (``Akis``). Desenler: ``sabit`` (eşit
+  aralık), ``patlama`` (``patlama_adet`` çerçeve aynı anda, ortalama hız
+  ``hiz``), ``rampa`` (``sure_s`` içinde ``hiz``'dan ``hiz_son``'a doğrusal,
+  sonra sabit) ve ``poisson`` (üstel aralıklar, ``tohum`` ile tekrarlanabilir).
+- ``TrafikUreteci``: akışların planlı gönderim anlarını birleştirir. Planlı
+  anlar başlangıca göre mutlaktır; geç kalınan çerçeve hemen gönderilir ve
+  sonraki hedef kaymaz (sürüklenme birikmez).
+
+  - ``baslat(bus)``: python-can hattı için ayrı iş parçacığı. Hedefe
+    ``egirme_s`` kalana kadar ``time.sleep``, kalan kısım ``perf_counter`` ile
+    meşgul beklemedir; 10 ile 10 bin çerçeve/sn arası hızlarda sapma onlarca
+    mikrosaniyedir.
+  - ``await calistir(tasiyici)``: ``secvolt.donanim`` taşıyıcıları için olay
+    döngüsü içinde çalışır; her uyanışta vadesi gelen tüm çerçeveleri kuyruğa
+    alır (ortalama hız kesin, sapma döngü zamanlayıcısı kadar).
+  - ``bcm_baslat(bus)``: ``sabit`` akışları ``bus.send_periodic`` ile verir;
+    socketcan'de periyodik gönderimi çekirdeğin broadcast manager'ı (BCM)
+    yapar, süreç hiç uyanmaz. Bu yolda gönderim anları kaydedilmez.
+
+- ``rapor()``: akış başına istenen/gerçekleşen hız ve sapma (planlı ana göre
+  gecikme p50/p99/maks, mikrosaniye).
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+import can
+
+DESENLER = ("sabit", "patlama", "rampa", "poisson")
+
+Akis = namedtuple("Akis", "ad can_id veri desen hiz hiz_son sure_s patlama_adet tohum genisletilmis",
+                  defaults=("sabit", None, None, 1, None, False))
+
+
+def akis(ad, can_id, hiz, veri=bytes(8), desen="sabit", hiz_son=None, sure_s=None, patlama_adet=1,
+         tohum=None, genisletilmis=False):
+    """ ``Akis`` kurucusu; ``hiz`` çerçeve/sn (rampa için başlangıç hızı). """
+    if desen not in DESENLER:
+        raise ValueError(f"Bilinmeyen desen: {desen}")
+    if hiz <= 0 and not (desen == "rampa" and hiz_son):
+        raise ValueError("hiz pozitif olmalı")
+    if desen == "rampa" and (hiz_son is None or not sure_s):
+        raise ValueError("rampa için hiz_son ve sure_s gerekli")
+    return Akis(ad, can_id, bytes(veri), desen, float(hiz), hiz_son, sure_s, max(1, int(patlama_adet)),
+                tohum, genisletilmis)
+
+
+def planli_anlar(a):
+    """ Akışın başlangıca göre planlı gönderim anları (saniye, artan, sonsuz). """
+    if a.desen == "sabit":
+        aralik = 1.0 / a.hiz
+        k = 0
+        while True:
+            yield k * aralik
+            k += 1
+    elif a.desen == "patlama":
+        periyot = a.patlama_adet / a.hiz
+        k = 0
+        while True:
+            t = k * periyot
+            for _ in range(a.patlama_adet):
+                yield t
+            k += 1
+    elif a.desen == "rampa":
+        # N(t) = r0*t + (r1 - r0)*t^2 / (2T); k. çerçeve N(t) = k denkleminin kökü
+        r0, r1, T = a.hiz, float(a.hiz_son), float(a.sure_s)
+        egim = (r1 - r0) / T
+        rampa_adet = r0 * T + egim * T * T / 2
+        k = 0
+        while k < rampa_adet:
+            if abs(egim) < 1e-12:
+                yield k / r0
+            else:
+                yield (-r0 + math.sqrt(max(0.0, r0 * r0 + 2 * egim * k))) / egim
+            k += 1
+        while True:
+            yield T + (k - rampa_adet) / r1
+            k += 1
+    else:
+        rng = random.Random(a.tohum)
+        t = 0.0
+        while True:
+            yield t
+            t += rng.expovariate(a.hiz)
+
+
+def _yuzdelik(s, p):
+    return s[min(len(s) - 1, int(len(s) * p))] if s else 0.0
+
+
+class TrafikUreteci:
+    """ Birden çok akışı birleştirip planlı anlarında gönderir; gönderim anlarını kaydeder. """
+
+    def __init__(self, akislar, sure_s=None, egirme_s=0.0005, kayit=True):
+        self.akislar = list(akislar)
+        self.sure_s = sure_s
+        self.egirme_s = egirme_s
+        self.kayit = kayit
+        self._dur = threading.Event()
+        self._is_parcacigi = None
+        self._bcm_gorevleri = []
+        self.baslangic = None
+        self.bitis = None
+        self.gonderilen = [0] * len(self.akislar)
+        self.hata = [0] * len(self.akislar)
+        # Akış başına ardışık (planlı an, gerçekleşen an) çiftleri; tek dizi olduğundan
+        # rapor(sifirla=True) iş parçacığı yazarken de diziyi tutarlı biçimde değiştirir
+        self._kayitlar = [array("d") for _ in self.akislar]
+
+    def zamanlama(self):
+        """ (planlı an, akış indeksi) çiftleri; tüm akışlar zamana göre birleştirilmiş. """
+        kaynaklar = [zip(planli_anlar(a), itertools.repeat(i)) for i, a in enumerate(self.akislar)]
+        for t, i in heapq.merge(*kaynaklar):
+            if self.sure_s is not None and t >= self.sure_s:
+                return
+            yield t, i
+
+    def _mesaj(self, i):
+        a = self.akislar[i]
+        return can.Message(arbitration_id=a.can_id, data=a.veri, is_extended_id=a.genisletilmis)
+
+    def _kaydet(self, i, planli, gercek):
+        self.gonderilen[i] += 1
+        if self.kayit:
+            self._kayitlar[i].extend((planli, gercek))
+
+    # --- iş parçacığı (python-can BusABC) ---
+    def baslat(self, bus):
+        """ Üreteci ayrı iş parçacığında ``bus.send`` ile başlatır. """
+        if self._is_parcacigi is not None:
+            raise RuntimeError("Üreteç zaten çalışıyor")
+        self._dur.clear()
+        self._is_parcacigi = threading.Thread(target=self._dongu, args=(bus,), name="can-uretec", daemon=True)
+        self._is_parcacigi.start()
+
+    def _dongu(self, bus):
+        saat, egirme, dur = time.perf_counter, self.egirme_s, self._dur
+        # Çerçeveler akış başına bir kez kurulur; python-can send mesajı değiştirmez
+        mesajlar = [self._mesaj(i) for i in range(len(self.akislar))]
+        self.baslangic = t0 = saat()
+        try:
+            for t, i in self.zamanlama():
+                hedef = t0 + t
+                kalan = hedef - saat()
+                if kalan > egirme:
+                    if dur.wait(kalan - egirme):
+                        break
+                while saat() < hedef:
+                    pass
+                if dur.is_set():
+                    break
+                try:
+                    bus.send(mesajlar[i])
+                except can.CanError as e:
+                    self.hata[i] += 1
+                    if self.hata[i] == 1:
+                        logging.error("Trafik üreteci gönderim hatası (%s): %s", self.akislar[i].ad, e)
+                    continue
+                self._kaydet(i, t, saat() - t0)
+        finally:
+            self.bitis = saat() - t0
+
+    def durdur(self):
+        self._dur.set()
+        for gorev in self._bcm_gorevleri:
+            gorev.stop()
+        self._bcm_gorevleri = []
+
+    def bekle(self, zaman_asimi=None):
+        """ İş parçacığı bitene kadar bekler; hâlâ çalışıyorsa False. """
+        if self._is_parcacigi is None:
+            return True
+        self._is_parcacigi.join(zaman_asimi)
+        return not self._is_parcacigi.is_alive()
+
+    @property
+    def calisiyor(self):
+        return ((self._is_parcacigi is not None and self._is_parcacigi.is_alive())
+                or bool(self._bcm_gorevleri))
+
+    # --- olay döngüsü (secvolt.donanim taşıyıcıları) ---
+    async def calistir(self, tasiyici):
+        """ Vadesi gelen çerçeveleri her uyanışta ``gonder_nowait`` ile kuyruğa alır. """
+        loop = asyncio.get_running_loop()
+        self.baslangic = t0 = loop.time()
+        bekleyen = None
+        try:
+            for t, i in self.zamanlama():
+                if self._dur.is_set():
+                    break
+                kalan = t0 + t - loop.time()
+                if kalan > 0:
+                    await asyncio.sleep(kalan)
+                fut = tasiyici.gonder_nowait(self._mesaj(i))
+                if fut is None:
+                    self.hata[i] += 1
+                    continue
+                self._kaydet(i, t, loop.time() - t0)
+                bekleyen = fut
+        finally:
+            self.bitis = loop.time() - t0
+        return bekleyen
+
+    # --- çekirdek BCM ---
+    def bcm_baslat(self, bus):
+        """
+        ``sabit`` akışları ``send_periodic`` ile başlatır (socketcan: çekirdek
+        BCM, diğer arayüzler: python-can'in zamanlayıcı iş parçacığı). Diğer
+        desenler için ``ValueError``.
+        """
+        for a in self.akislar:
+            if a.desen != "sabit":
+                raise ValueError(f"BCM yalnızca sabit desen destekler ({a.ad}: {a.desen})")
+        self.baslangic = time.perf_counter()
+        for i, a in enumerate(self.akislar):
+            self._bcm_gorevleri.append(bus.send_periodic(self._mesaj(i), 1.0 / a.hiz, self.sure_s))
+
+    # --- rapor ---
+    def rapor(self, sifirla=False):
+        """
+        Akış başına istenen/gerçekleşen hız ve planlı ana göre sapma (µs).
+        İstenen hız planlı anlardan aynı formülle hesaplanır (patlama/poisson
+        desenlerinde ``hiz``'dan biraz sapar). ``sifirla`` kayıtları boşaltır;
+        uzun koşularda periyodik rapor ve sınırlı bellek için.
+        """
+        satirlar = []
+        for i, a in enumerate(self.akislar):
+            kayit = self._kayitlar[i]
+            if sifirla:
+                self._kayitlar[i] = array("d")
+            planli, gercek = kayit[0::2], kayit[1::2]
+            n = len(gercek)
+            if n > 1 and gercek[-1] > gercek[0]:
+                istenen = (n - 1) / (planli[-1] - planli[0]) if planli[-1] > planli[0] else a.hiz
+                gerceklesen = (n - 1) / (gercek[-1] - gercek[0])
+            else:
+                istenen, gerceklesen = a.hiz, 0.0
+            sapma = sorted((g - p) * 1e6 for p, g in zip(planli, gercek))
+            satirlar.append({
+                "ad": a.ad, "can_id": a.can_id, "desen": a.desen, "gonderilen": self.gonderilen[i],
+                "hata": self.hata[i], "istenen_hiz": istenen, "gerceklesen_hiz": gerceklesen,
+                "hiz_hatasi": (gerceklesen - istenen) / istenen if istenen else 0.0,
+                "sapma_p50_us": _yuzdelik(sapma, 0.5), "sapma_p99_us": _yuzdelik(sapma, 0.99),
+                "sapma_max_us": sapma[-1] if sapma else 0.0,
+            })
+        return satirlar
+
+    def rapor_metni(self, sifirla=False):
+        satirlar = [f"{'akış':>16} {'kimlik':>7} {'desen':>8} {'istenen/sn':>11} {'gerçek/sn':>10} "
+                    f"{'hata':>7} {'sapma p50':>10} {'p99':>9} {'maks':>9}"]
+        for r in self.rapor(sifirla):
+            satirlar.append(f"{r['ad']:>16} {r['can_id']:>#7x} {r['desen']:>8} {r['istenen_hiz']:>11,.1f} "
+                            f"{r['gerceklesen_hiz']:>10,.1f} {r['hiz_hatasi'] * 100:>+6.2f}% "
+                            f"{r['sapma_p50_us']:>7.0f} µs {r['sapma_p99_us']:>6.0f} µs "
+                            f"{r['sapma_max_us']:>6.0f} µs")
+        return "\n".join(satirlar)
@@ -0,0 +1,272 @@
+"""
+Öncelikli CAN gönderim zamanlayıcısı: son tarih, yeniden deneme, sınıf başına gecikme.
+
+``komut_yolla`` ile kuyruğa alınan röle komutları (0x200/0x201, Korkutan'da
+0x100) taşıyıcının tek FIFO kuyruğunda diğer her şeyin arkasına giriyordu;
+doymuş hatta geç kalıyor ya da kuyruk dolduğunda sessizce düşüyorlardı.
+
+``OncelikliCanGonderici`` taşıyıcının önüne oturur ve ``gonder_nowait``
+API'sini aynen sunar (``komut_yolla`` değişmeden kullanılır):
+
+- Her çerçeve bir ``TrafikSinifi``'na girer (``siniflandir(msg)`` ya da açık
+  ``sinif``); sınıf başına ayrı kuyruk vardır. Taşıyıcıya aynı anda en fazla
+  ``derinlik`` çerçeve verilir, gerisi zamanlayıcıda bekler. Böylece kritik
+  bir çerçevenin önünde en çok ``derinlik`` çerçeve olur; sıradaki her zaman
+  en yüksek öncelikli (küçük ``oncelik``) sınıfın başıdır.
+- ``son_tarih_s`` dolduğunda çerçeve kuyruktaysa atılır, taşıyıcıdaysa
+  iptal edilir (henüz hatta çıkmadıysa kuyruktan düşer); Future
+  ``SonTarihAsildi`` ile biter. ``bildir`` işaretli sınıflarda
+  ``kacirma_fn(olay)`` çağrılır (korutin ise görev olarak), istemci bunu
+  OCPP tarafına iletir.
+- Taşıyıcı hatası (dolu verici tamponu, bus-off) ``deneme`` kez ve son tarih
+  içinde kalmak koşuluyla kuyruğun başına geri konarak yeniden denenir.
+- Sınıf başına kuyruk+iletim gecikmesi (son ``ornek`` çerçeve) ve sayaçlar
+  ``istatistik()`` ile okunur.
+
+Yerel sıralama, hattaki başka bir düğümün düşük kimlikli selini
+(arabulucuyu kazanan 0x001) yenemez; orada son tarih ve raporlama devreye
+girer (``benchmarks.bench_cansched``).
+"""
+import asyncio
+import logging
+from collections import deque, namedtuple
+
+import can
+
+TrafikSinifi = namedtuple("TrafikSinifi", "ad oncelik son_tarih_s deneme kuyruk bildir",
+                          defaults=(None, 0, 1024, False))
+
+VARSAYILAN_SINIFLAR = (
+    TrafikSinifi("kritik", 0, son_tarih_s=0.1, deneme=3, kuyruk=64, bildir=True),
+    TrafikSinifi("kontrol", 1, son_tarih_s=0.5, deneme=1, kuyruk=256),
+    TrafikSinifi("telemetri", 2, son_tarih_s=1.0, deneme=0, kuyruk=1024),
+    TrafikSinifi("toplu", 3, son_tarih_s=None, deneme=0, kuyruk=4096),
+)
+
+# Röle kontrol çerçeveleri (istemcilerdeki on_remote_start / on_remote_stop)
+ROLE_KIMLIKLERI = (0x100, 0x200, 0x201)
+
+
+class SonTarihAsildi(asyncio.TimeoutError):
+    """ Çerçeve son tarihinden önce hatta çıkamadı. """
+
+
+def kimlik_siniflandirici(harita, varsayilan="kontrol"):
+    """ CAN kimliği -> sınıf adı sözlüğünden ``siniflandir`` fonksiyonu. """
+    return lambda msg: harita.get(msg.arbitration_id, varsayilan)
+
+
+def _yuzdelik(s, p):
+    return s[min(len(s) - 1, int(len(s) * p))] if s else 0.0
+
+
+class _Is:
+    __slots__ = ("msg", "sinif", "fut", "eklenme", "son_tarih", "kalan_deneme", "tasiyici_fut", "zamanlayici")
+
+    def __init__(self, msg, sinif, fut, eklenme, son_tarih):
+        self.msg = msg
+        self.sinif = sinif
+        self.fut = fut
+        self.eklenme = eklenme
+        self.son_tarih = son_tarih
+        self.kalan_deneme = sinif.deneme
+        self.tasiyici_fut = None
+        self.zamanlayici = None
+
+
+class _SinifDurumu:
+    def __init__(self, sinif, ornek):
+        self.sinif = sinif
+        self.kuyruk = deque()
+        self.gecikme = deque(maxlen=ornek)
+        self.gonderilen = 0
+        self.kacirilan = 0
+        self.yeniden = 0
+        self.dusen = 0
+        self.hata = 0
+
+
+class OncelikliCanGonderici:
+    """ Taşıyıcı önünde sınıf başına kuyruklar; ``gonder_nowait`` / ``gonder`` taşıyıcıyla aynı. """
+
+    def __init__(self, tasiyici, siniflar=VARSAYILAN_SINIFLAR, siniflandir=None, derinlik=2, ornek=4096,
+                 kacirma_fn=None):
+        self.tasiyici = tasiyici
+        self.derinlik = derinlik
+        self.kacirma_fn = kacirma_fn
+        self._durum = {s.ad: _SinifDurumu(s, ornek) for s in siniflar}
+        self._sirali = sorted(self._durum.values(), key=lambda d: d.sinif.oncelik)
+        # Varsayılan sınıflandırıcı VARSAYILAN_SINIFLAR adlarını kullanır
+        self.siniflandir = siniflandir or kimlik_siniflandirici(dict.fromkeys(ROLE_KIMLIKLERI, "kritik"))
+        self._ucusta = 0
+        self._gorevler = set()
+        self.kapali = False
+
+    # --- gönderim ---
+    def gonder_nowait(self, msg, sinif=None, son_tarih_s=None):
+        """
+        Çerçeveyi sınıf kuyruğuna alır; hatta çıkınca ``msg`` ile, son tarih
+        dolunca ``SonTarihAsildi`` ile biten Future. Sınıf kuyruğu doluysa None.
+        """
+        durum = self._durum[sinif or self.siniflandir(msg)]
+        if self.kapali or len(durum.kuyruk) >= durum.sinif.kuyruk:
+            durum.dusen += 1
+            return None
+        loop = asyncio.get_running_loop()
+        simdi = loop.time()
+        sure = son_tarih_s if son_tarih_s is not None else durum.sinif.son_tarih_s
+        is_ = _Is(msg, durum.sinif, loop.create_future(), simdi, simdi + sure if sure is not None else None)
+        if is_.son_tarih is not None:
+            is_.zamanlayici = loop.call_at(is_.son_tarih, self._son_tarih_doldu, is_, durum)
+        durum.kuyruk.append(is_)
+        self._pompala()
+        return is_.fut
+
+    def gonder_toplu(self, mesajlar, sinif=None):
+        return [self.gonder_nowait(m, sinif) for m in mesajlar]
+
+    async def gonder(self, msg, sinif=None, son_tarih_s=None):
+        fut = self.gonder_nowait(msg, sinif, son_tarih_s)
+        if fut is None:
+            raise can.CanOperationError("Gönderim kuyruğu dolu")
+        return await fut
+
+    def _siradaki(self):
+        for durum in self._sirali:
+            kuyruk = durum.kuyruk
+            while kuyruk:
+                is_ = kuyruk.popleft()
+                if not is_.fut.done():
+                    return is_, durum
+        return None, None
+
+    def _pompala(self):
+        while self._ucusta < self.derinlik:
+            is_, durum = self._siradaki()
+            if is_ is None:
+                return
+            tfut = self.tasiyici.gonder_nowait(is_.msg)
+            if tfut is None and self.tasiyici.kapali:
+                durum.hata += 1
+                self._hata_ile_bitir(is_, can.CanOperationError("Taşıyıcı kapalı"))
+                continue
+            if tfut is None:
+                # Taşıyıcı kuyruğu başka kullanıcılarla dolmuş: başa geri koy, kısa süre sonra dene
+                durum.kuyruk.appendleft(is_)
+                asyncio.get_running_loop().call_later(0.001, self._pompala)
+                return
+            self._ucusta += 1
+            is_.tasiyici_fut = tfut
+            tfut.add_done_callback(lambda f, is_=is_, durum=durum: self._iletildi(is_, durum, f))
+
+    def _iletildi(self, is_, durum, tfut):
+        self._ucusta -= 1
+        is_.tasiyici_fut = None
+        if is_.fut.done() or tfut.cancelled():
+            # Son tarih dolmuş ve çerçeve iptal edilmiş (ya da aynı anda hatta çıkmış)
+            self._pompala()
+            return
+        hata = tfut.exception()
+        if hata is None:
+            simdi = asyncio.get_running_loop().time()
+            durum.gonderilen += 1
+            durum.gecikme.append((simdi - is_.eklenme) * 1e3)
+            if is_.zamanlayici is not None:
+                is_.zamanlayici.cancel()
+            is_.fut.set_result(is_.msg)
+        elif is_.kalan_deneme > 0:
+            is_.kalan_deneme -= 1
+            durum.yeniden += 1
+            durum.kuyruk.appendleft(is_)
+        else:
+            durum.hata += 1
+            self._hata_ile_bitir(is_, hata)
+        self._pompala()
+
+    @staticmethod
+    def _hata_ile_bitir(is_, hata):
+        if is_.zamanlayici is not None:
+            is_.zamanlayici.cancel()
+        is_.fut.set_exception(hata)
+        # Bekleyen yoksa "exception never retrieved" uyarısı çıkmasın
+        is_.fut.exception()
+
+    def _son_tarih_doldu(self, is_, durum):
+        if is_.fut.done():
+            return
+        asama = "kuyruk"
+        if is_.tasiyici_fut is not None:
+            asama = "hat"
+            is_.tasiyici_fut.cancel()
+        else:
+            try:
+                durum.kuyruk.remove(is_)
+            except ValueError:
+                pass
+        durum.kacirilan += 1
+        sure_ms = (is_.son_tarih - is_.eklenme) * 1e3
+        is_.zamanlayici = None
+        self._hata_ile_bitir(is_, SonTarihAsildi(
+            f"ID {hex(is_.msg.arbitration_id)} {sure_ms:.0f} ms içinde iletilemedi ({asama})"))
+        if durum.sinif.bildir:
+            self._bildir({"sinif": durum.sinif.ad, "can_id": is_.msg.arbitration_id,
+                          "son_tarih_ms": sure_ms, "asama": asama,
+                          "deneme": durum.sinif.deneme - is_.kalan_deneme})
+
+    def _bildir(self, olay):
+        logging.warning("CAN son tarih aşıldı: %s sınıfı, ID %s (%.0f ms, %s)", olay["sinif"],
+                        hex(olay["can_id"]), olay["son_tarih_ms"], olay["asama"])
+        if self.kacirma_fn is None:
+            return
+        try:
+            sonuc = self.kacirma_fn(olay)
+        except Exception:
+            logging.exception("CAN son tarih bildirim hatası")
+            return
+        if asyncio.iscoroutine(sonuc):
+            gorev = asyncio.get_running_loop().create_task(sonuc)
+            self._gorevler.add(gorev)
+            gorev.add_done_callback(self._gorev_bitti)
+
+    def _gorev_bitti(self, gorev):
+        self._gorevler.discard(gorev)
+        if not gorev.cancelled() and gorev.exception() is not None:
+            logging.error("CAN son tarih bildirim hatası: %s", gorev.exception())
+
+    # --- durum ---
+    def istatistik(self):
+        sonuc = {}
+        for ad, d in self._durum.items():
+            g = sorted(d.gecikme)
+            sonuc[ad] = {"gonderilen": d.gonderilen, "kacirilan": d.kacirilan, "yeniden": d.yeniden,
+                         "dusen": d.dusen, "hata": d.hata, "bekleyen": len(d.kuyruk),
+                         "gecikme_p50_ms": _yuzdelik(g, 0.5), "gecikme_p99_ms": _yuzdelik(g, 0.99),
+                         "gecikme_max_ms": g[-1] if g else 0.0}
+        return sonuc
+
+    async def kapat(self):
+        self.kapali = True
+        for d in self._durum.values():
+            while d.kuyruk:
+                is_ = d.kuyruk.popleft()
+                if is_.zamanlayici is not None:
+                    is_.zamanlayici.cancel()
+                is_.fut.cancel()
+        await self.tasiyici.kapat()
+
+
+async def iletildi_mi(fut):
+    """ ``gonder_nowait`` / ``komut_yolla`` Future'ı hatta çıktıysa True; düştüyse, son tarih ya da hata varsa False. """
+    if fut is None:
+        return False
+    try:
+        # shield: çağıran görevin iptali çerçeve Future'ını iptal etmesin, ikisi ayırt edilebilsin
+        await asyncio.shield(fut)
+        return True
+    except asyncio.CancelledError:
+        if not fut.cancelled():
+            # İptal edilen çağıran görevin kendisi; yutulmaz
+            raise
+        return False
+    except (asyncio.TimeoutError, can.CanError):
+        return False
@@ -0,0 +1,612 @@
+"""
+CAN iz (trace) kaydı ve hızlandırılmış yeniden oynatma.
+
+Hat trafiği hiçbir yerde kaydedilmiyordu; Hüseyin-Üzüm senaryosundaki 0x1A0
+firmware yükleme çerçeveleri gibi olaylar yeniden üretilemiyordu.
+
+Dosya biçimi (``.svct``, little-endian)::
+
+    dosya başlığı : "SVCT" | sürüm:u16 | ayrılmış:u16
+    veri bloğu    : "SVB1" | taban_ts_us:i64 | adet:u32 | uzunluk:u32 | crc32:u32 | kayıtlar
+    kayıt         : dt_us:u32 | can_id:u32 | bayrak:u8 | veri_uzunluğu:u8 | veri
+    indeks bloğu  : "SVI1" | adet:u32 | önceki_indeks:u64 | adet x (taban_ts_us:i64, ofset:u64)
+    kapanış       : "SVT1" | son_indeks:u64
+
+- Kayıt zamanı bloğun taban zamanına göre mikrosaniye farkıdır; 8 baytlık bir
+  çerçeve 18 bayt tutar (candump -L satırı ~45 bayt). Fark u32'ye sığmazsa ya
+  da zaman geri giderse yeni blok açılır.
+- Her ``indeks_araligi`` blokta bir indeks bloğu yazılır; indeks blokları
+  birbirine geriye doğru bağlıdır, kapanış son indeksi gösterir. Kapanışı
+  olmayan (yarıda kesilmiş) dosyada indeks blok başlıkları taranarak kurulur;
+  CRC'si tutmayan ya da yarım blokta okuma durur.
+- ``bayrak``: genişletilmiş, uzak (RTR), hata, FD, BRS, ESI, gelen (rx).
+
+``IzYazici`` bir ``can.Listener``'dır: ``can.Notifier``'a ya da
+``secvolt.donanim`` taşıyıcısının ``dinleyici_ekle``'sine verilebilir.
+``ice_aktar`` candump (``-L`` ve ``-ta``) metnini hızlı yoldan, ASC/BLF/TRC
+gibi diğer biçimleri python-can ``LogReader`` ile dönüştürür.
+
+``IzOkuyucu`` dosyayı mmap ile açar ve blok blok akıtır (bellek kullanımı iz
+boyundan bağımsızdır); ``baslangic`` verilirse indeksle ilgili bloğa atlar.
+
+``IzOynatici`` izi ``hiz`` katında (1.0 gerçek zaman, N kat, ``None`` en hızlı)
+oynatır:
+
+- ``await calistir(tasiyici)``: ``secvolt.donanim`` taşıyıcısına (sanal hat ya
+  da ``AsyncCanBus``), vadesi gelenleri toplu kuyruğa alarak,
+- ``baslat(bus)``: python-can hattına ayrı iş parçacığında, hedefe
+  ``egirme_s`` kalana kadar uyuyup kalanı meşgul bekleyerek,
+- ``dogrudan(*dinleyiciler)``: hat olmadan, özgün zaman damgalarıyla
+  dinleyicilere (``CanIzleyici.cerceve``, ``HatIzleyici.cerceve``); saatlerce
+  trafiği dakikalar içinde tespit modüllerine vermek için.
+
+``rapor()``: planlı ana (iz zamanı / hız) göre gecikme p50/p99/maks (örneklem
+havuzu), gerçekleşen hızlanma ve çerçeve/sn.
+
+    python -m secvolt.cantrace yakala cikti.svct --kanal vcan0 --sure 60
+    python -m secvolt.cantrace ice-aktar candump.log cikti.svct
+    python -m secvolt.cantrace oynat iz.svct --kanal vcan0 --hiz 10
+    python -m secvolt.cantrace dok iz.svct --kimlik 0x1A0
+"""
+import argparse
+import asyncio
+import bisect
+import logging
+import mmap
+import os
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+
+import can
+
+MAGIC = b"SVCT"
+SURUM = 1
+DOSYA = struct.Struct("<4sHH")
+BLOK = struct.Struct("<4sqIII")
+KAYIT = struct.Struct("<IIBB")
+INDEKS = struct.Struct("<4sIQ")
+INDEKS_GIRDI = struct.Struct("<qQ")
+KAPANIS = struct.Struct("<4sQ")
+BLOK_MAGIC, INDEKS_MAGIC, KAPANIS_MAGIC = b"SVB1", b"SVI1", b"SVT1"
+
+GENISLETILMIS, UZAK, HATA, FD, BRS, ESI, GELEN = (1 << i for i in range(7))
+DT_MAX = 0xFFFFFFFF
+
+
+def bayrak(msg):
+    return (GENISLETILMIS * msg.is_extended_id | UZAK * msg.is_remote_frame | HATA * msg.is_error_frame
+            | FD * msg.is_fd | BRS * msg.bitrate_switch | ESI * msg.error_state_indicator | GELEN * msg.is_rx)
+
+
+def mesaj(ts_us, can_id, b, veri):
+    """ Ham kayıttan python-can ``Message``. """
+    return can.Message(timestamp=ts_us / 1e6, arbitration_id=can_id, data=bytes(veri),
+                       is_extended_id=bool(b & GENISLETILMIS), is_remote_frame=bool(b & UZAK),
+                       is_error_frame=bool(b & HATA), is_fd=bool(b & FD), bitrate_switch=bool(b & BRS),
+                       error_state_indicator=bool(b & ESI), is_rx=bool(b & GELEN),
+                       dlc=len(veri) if not b & UZAK else 0)
+
+
+class IzYazici(can.Listener):
+    """ Blok tamponlu iz yazıcısı; ``on_message_received`` ile python-can dinleyicisi. """
+
+    def __init__(self, yol, blok_cerceve=4096, indeks_araligi=64):
+        self.yol = yol
+        self.blok_cerceve = blok_cerceve
+        self.indeks_araligi = indeks_araligi
+        self._f = open(yol, "wb")
+        self._f.write(DOSYA.pack(MAGIC, SURUM, 0))
+        self._ofset = DOSYA.size
+        self._blok = bytearray()
+        self._adet = 0
+        self._taban = None
+        self._onceki_ts = None
+        self._indeks = []
+        self._son_indeks = 0
+        self._kilit = threading.Lock()
+        self.cerceve = 0
+        self.blok = 0
+        self.kapali = False
+
+    def ekle(self, ts_us, can_id, b, veri):
+        """ Ham kayıt ekler (``ts_us`` mikrosaniye, ``veri`` bayt benzeri). """
+        if self._taban is None or ts_us < self._onceki_ts or ts_us - self._taban > DT_MAX:
+            self._blok_yaz()
+            self._taban = ts_us
+        self._onceki_ts = ts_us
+        self._blok += KAYIT.pack(ts_us - self._taban, can_id, b, len(veri))
+        self._blok += veri
+        self._adet += 1
+        self.cerceve += 1
+        if self._adet >= self.blok_cerceve:
+            self._blok_yaz()
+
+    def on_message_received(self, msg):
+        with self._kilit:
+            if not self.kapali:
+                self.ekle(round(msg.timestamp * 1e6), msg.arbitration_id, bayrak(msg), msg.data)
+
+    # secvolt.donanim dinleyicisi olarak da kullanılabilsin
+    __call__ = on_message_received
+
+    def _blok_yaz(self):
+        if not self._adet:
+            return
+        self._f.write(BLOK.pack(BLOK_MAGIC, self._taban, self._adet, len(self._blok), zlib.crc32(self._blok)))
+        self._f.write(self._blok)
+        self._indeks.append((self._taban, self._ofset))
+        self._ofset += BLOK.size + len(self._blok)
+        self._blok = bytearray()
+        self._adet = 0
+        self._taban = None
+        self.blok += 1
+        if len(self._indeks) >= self.indeks_araligi:
+            self._indeks_yaz()
+
+    def _indeks_yaz(self):
+        if not self._indeks:
+            return
+        parca = bytearray(INDEKS.pack(INDEKS_MAGIC, len(self._indeks), self._son_indeks))
+        for ts, ofset in self._indeks:
+            parca += INDEKS_GIRDI.pack(ts, ofset)
+        self._f.write(parca)
+        self._son_indeks = self._ofset
+        self._ofset += len(parca)
+        self._indeks = []
+
+    def kapat(self):
+        with self._kilit:
+            if self.kapali:
+                return
+            self.kapali = True
+            self._blok_yaz()
+            self._indeks_yaz()
+            self._f.write(KAPANIS.pack(KAPANIS_MAGIC, self._son_indeks))
+            self._f.close()
+
+    stop = kapat
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.kapat()
+
+
+class IzOkuyucu:
+    """ mmap üzerinden blok blok okuma; kayıtlar (ts_us, can_id, bayrak, veri memoryview). """
+
+    def __init__(self, yol, dogrula=True):
+        self.yol = yol
+        self.dogrula = dogrula
+        self._f = open(yol, "rb")
+        self.boyut = os.fstat(self._f.fileno()).st_size
+        if self.boyut < DOSYA.size:
+            raise ValueError(f"{yol}: CAN iz dosyası değil")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mm, "madvise"):
+            # Tek geçişli okuma: çekirdek önden okusun, okunan sayfalar önbellekte birikmesin
+            self._mm.madvise(mmap.MADV_SEQUENTIAL)
+        self._mv = memoryview(self._mm)
+        magic, surum, _ = DOSYA.unpack_from(self._mv, 0)
+        if magic != MAGIC or surum != SURUM:
+            raise ValueError(f"{yol}: CAN iz dosyası değil ya da desteklenmeyen sürüm ({surum})")
+        self._indeks = None
+
+    def bloklar(self, ofset=DOSYA.size):
+        """ (ofset, taban_ts_us, adet, uzunluk, crc) blok başlıkları; yarım blokta durur. """
+        mv, boyut = self._mv, self.boyut
+        while ofset + 4 <= boyut:
+            magic = bytes(mv[ofset:ofset + 4])
+            if magic == BLOK_MAGIC:
+                if ofset + BLOK.size > boyut:
+                    return
+                _, taban, adet, uzunluk, crc = BLOK.unpack_from(mv, ofset)
+                if ofset + BLOK.size + uzunluk > boyut:
+                    return
+                yield ofset, taban, adet, uzunluk, crc
+                ofset += BLOK.size + uzunluk
+            elif magic == INDEKS_MAGIC:
+                if ofset + INDEKS.size > boyut:
+                    return
+                _, adet, _ = INDEKS.unpack_from(mv, ofset)
+                ofset += INDEKS.size + adet * INDEKS_GIRDI.size
+            else:
+                return
+
+    def indeks(self):
+        """ (taban_ts_us, ofset) listesi; kapanış yoksa blok başlıkları taranarak kurulur. """
+        if self._indeks is not None:
+            return self._indeks
+        girdiler = []
+        son = self.boyut - KAPANIS.size
+        if son >= DOSYA.size and bytes(self._mv[son:son + 4]) == KAPANIS_MAGIC:
+            _, ofset = KAPANIS.unpack_from(self._mv, son)
+            while ofset:
+                _, adet, onceki = INDEKS.unpack_from(self._mv, ofset)
+                bas = ofset + INDEKS.size
+                parca = [INDEKS_GIRDI.unpack_from(self._mv, bas + i * INDEKS_GIRDI.size) for i in range(adet)]
+                girdiler[:0] = parca
+                ofset = onceki
+        else:
+            girdiler = [(taban, ofset) for ofset, taban, _, _, _ in self.bloklar()]
+        self._indeks = girdiler
+        return girdiler
+
+    def _baslangic_ofseti(self, baslangic):
+        girdiler = self.indeks()
+        i = bisect.bisect_right([ts for ts, _ in girdiler], baslangic) - 1
+        return girdiler[i][1] if i >= 0 else DOSYA.size
+
+    def kayitlar(self, baslangic=None, bitis=None, kimlikler=None):
+        """ Zaman sıralı ham kayıtlar; ``baslangic``/``bitis`` mikrosaniye, ``kimlikler`` küme. """
+        mv, coz, boy = self._mv, KAYIT.unpack_from, KAYIT.size
+        ofset = self._baslangic_ofseti(baslangic) if baslangic is not None else DOSYA.size
+        for blok_ofset, taban, adet, uzunluk, crc in self.bloklar(ofset):
+            if bitis is not None and taban > bitis:
+                return
+            o = blok_ofset + BLOK.size
+            if self.dogrula and zlib.crc32(mv[o:o + uzunluk]) != crc:
+                logging.warning("CAN izi %s: %s ofsetinde CRC hatası, okuma durduruldu.", self.yol, blok_ofset)
+                return
+            for _ in range(adet):
+                dt, can_id, b, n = coz(mv, o)
+                o += boy
+                ts = taban + dt
+                if (baslangic is None or ts >= baslangic) and (kimlikler is None or can_id in kimlikler):
+                    if bitis is not None and ts > bitis:
+                        return
+                    yield ts, can_id, b, mv[o:o + n]
+                o += n
+
+    def mesajlar(self, baslangic=None, bitis=None, kimlikler=None):
+        for k in self.kayitlar(baslangic, bitis, kimlikler):
+            yield mesaj(*k)
+
+    def ozet(self):
+        adet, ilk, son_taban, bloklar = 0, None, None, 0
+        for _, taban, n, _, _ in self.bloklar():
+            adet += n
+            bloklar += 1
+            ilk = taban if ilk is None else ilk
+            son_taban = taban
+        son = ilk
+        if son_taban is not None:
+            for ts, _, _, _ in self.kayitlar(baslangic=son_taban):
+                son = ts
+        return {"cerceve": adet, "blok": bloklar, "boyut": self.boyut, "ilk_ts_us": ilk, "son_ts_us": son,
+                "sure_s": (son - ilk) / 1e6 if adet else 0.0}
+
+    def kapat(self):
+        try:
+            self._mv.release()
+            self._mm.close()
+        except BufferError:
+            # Dışarıda hâlâ tutulan veri görünümleri var; eşleme onlarla birlikte çöp toplayıcıda kapanır
+            pass
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.kapat()
+
+
+# --- içe aktarma ---
+def candump_oku(satirlar):
+    """
+    candump metni -> ham kayıtlar. ``-L`` (``(ts) can0 123#DEADBEEF``,
+    ``123##1..`` FD, ``123#R`` uzak) ve ``-ta`` (``(ts) can0 123 [4] DE AD BE EF``)
+    biçimleri; zaman damgasız satırlar atlanır.
+    """
+    for satir in satirlar:
+        parca = satir.split()
+        if len(parca) < 3 or not parca[0].startswith("("):
+            continue
+        ts = round(float(parca[0][1:-1]) * 1e6)
+        alan = parca[2]
+        b = GELEN if (len(parca) < 4 or parca[3] != "T") else 0
+        if "#" in alan:
+            kimlik, _, veri = alan.partition("#")
+            if veri.startswith("#"):
+                b |= FD | (BRS if int(veri[1], 16) & 1 else 0) | (ESI if int(veri[1], 16) & 2 else 0)
+                veri = veri[2:]
+            elif veri.startswith("R"):
+                b |= UZAK
+                veri = ""
+            ham = bytes.fromhex(veri)
+        else:
+            kimlik = alan
+            uz = int(parca[3].strip("[]"))
+            if len(parca) > 4 and parca[4] == "remote":
+                b |= UZAK
+                ham = b""
+            else:
+                ham = bytes.fromhex("".join(parca[4:4 + uz]))
+        can_id = int(kimlik, 16)
+        if len(kimlik) > 3:
+            b |= GENISLETILMIS
+        if can_id & 0x20000000:
+            b |= HATA
+            can_id &= 0x1FFFFFFF
+        yield ts, can_id, b, ham
+
+
+def ice_aktar(girdi, cikti, **yazici_args):
+    """ candump / ASC / BLF / TRC dosyasını ``.svct``'ye çevirir; çerçeve sayısını döner. """
+    with IzYazici(cikti, **yazici_args) as yazici:
+        if girdi.endswith((".log", ".candump", ".txt")):
+            with open(girdi, encoding="ascii", errors="replace") as f:
+                for k in candump_oku(f):
+                    yazici.ekle(*k)
+        else:
+            for msg in can.LogReader(girdi):
+                yazici.ekle(round(msg.timestamp * 1e6), msg.arbitration_id, bayrak(msg), msg.data)
+        return yazici.cerceve
+
+
+def yakala(bus, yol, **yazici_args):
+    """ Hattı ayrı bir ``can.Notifier`` iş parçacığıyla ``yol``'a kaydeder; (notifier, yazici). """
+    yazici = IzYazici(yol, **yazici_args)
+    return can.Notifier(bus, [yazici]), yazici
+
+
+# --- oynatma ---
+class _Sapma:
+    """ Planlı ana göre gecikme: sayaç, ortalama, maks ve sabit boyutlu örneklem havuzu. """
+
+    def __init__(self, ornek):
+        self.ornek = ornek
+        self.havuz = []
+        self.adet = 0
+        self.toplam = 0.0
+        self.maks = 0.0
+        self._rng = random.Random(0)
+
+    def ekle(self, us):
+        self.adet += 1
+        self.toplam += us
+        if us > self.maks:
+            self.maks = us
+        if len(self.havuz) < self.ornek:
+            self.havuz.append(us)
+        else:
+            j = self._rng.randrange(self.adet)
+            if j < self.ornek:
+                self.havuz[j] = us
+
+    def yuzdelik(self, p):
+        s = sorted(self.havuz)
+        return s[min(len(s) - 1, int(len(s) * p))] if s else 0.0
+
+
+class IzOynatici:
+    """ Bir izi ``hiz`` katında hatta ya da dinleyicilere verir. """
+
+    def __init__(self, okuyucu, hiz=1.0, baslangic=None, bitis=None, kimlikler=None, egirme_s=0.0005,
+                 ornek=100000):
+        self.okuyucu = okuyucu
+        self.hiz = hiz or None
+        self.baslangic = baslangic
+        self.bitis = bitis
+        self.kimlikler = kimlikler
+        self.egirme_s = egirme_s
+        self.sapma = _Sapma(ornek)
+        self._dur = threading.Event()
+        self._is_parcacigi = None
+        self.gonderilen = 0
+        self.hata = 0
+        self.iz_suresi = 0.0
+        self.gercek_sure = 0.0
+
+    def _kayitlar(self):
+        return self.okuyucu.kayitlar(self.baslangic, self.bitis, self.kimlikler)
+
+    async def calistir(self, tasiyici):
+        """ ``secvolt.donanim`` taşıyıcısına oynatır; kuyruk doluysa boşalmasını bekler (çerçeve düşmez). """
+        loop = asyncio.get_running_loop()
+        hiz, sapma = self.hiz, self.sapma
+        t0 = iz0 = son_fut = None
+        ts = None
+        for k in self._kayitlar():
+            if self._dur.is_set():
+                break
+            ts = k[0]
+            if t0 is None:
+                t0, iz0 = loop.time(), ts
+            if hiz is not None:
+                hedef = t0 + (ts - iz0) / 1e6 / hiz
+                kalan = hedef - loop.time()
+                if kalan > 0:
+                    await asyncio.sleep(kalan)
+            while tasiyici.dolu() and not tasiyici.kapali:
+                await (son_fut if son_fut is not None and not son_fut.done() else asyncio.sleep(0.001))
+            fut = tasiyici.gonder_nowait(mesaj(*k))
+            if fut is None:
+                self.hata += 1
+                continue
+            son_fut = fut
+            self.gonderilen += 1
+            if hiz is not None:
+                sapma.ekle((loop.time() - hedef) * 1e6)
+            elif self.gonderilen % 4096 == 0:
+                await asyncio.sleep(0)
+        if t0 is not None:
+            self.iz_suresi = (ts - iz0) / 1e6
+            self.gercek_sure = loop.time() - t0
+        return son_fut
+
+    def baslat(self, bus):
+        """ python-can hattına ayrı iş parçacığında oynatır. """
+        self._dur.clear()
+        self._is_parcacigi = threading.Thread(target=self._dongu, args=(bus,), name="can-oynatici", daemon=True)
+        self._is_parcacigi.start()
+
+    def _dongu(self, bus):
+        saat, egirme, dur, hiz, sapma = time.perf_counter, self.egirme_s, self._dur, self.hiz, self.sapma
+        t0 = iz0 = ts = None
+        for k in self._kayitlar():
+            ts = k[0]
+            if t0 is None:
+                t0, iz0 = saat(), ts
+            if hiz is not None:
+                hedef = t0 + (ts - iz0) / 1e6 / hiz
+                kalan = hedef - saat()
+                if kalan > egirme and dur.wait(kalan - egirme):
+                    break
+                while saat() < hedef:
+                    pass
+            if dur.is_set():
+                break
+            try:
+                bus.send(mesaj(*k))
+            except can.CanError as e:
+                self.hata += 1
+                if self.hata == 1:
+                    logging.error("CAN izi oynatma hatası: %s", e)
+                continue
+            self.gonderilen += 1
+            if hiz is not None:
+                sapma.ekle((saat() - hedef) * 1e6)
+        if t0 is not None:
+            self.iz_suresi = (ts - iz0) / 1e6
+            self.gercek_sure = saat() - t0
+
+    def bekle(self, zaman_asimi=None):
+        if self._is_parcacigi is None:
+            return True
+        self._is_parcacigi.join(zaman_asimi)
+        return not self._is_parcacigi.is_alive()
+
+    def durdur(self):
+        self._dur.set()
+
+    def dogrudan(self, *dinleyiciler):
+        """ Zamanlama ve hat olmadan, özgün zaman damgalarıyla her dinleyiciye ``fn(msg)``. """
+        t0 = time.perf_counter()
+        ilk = ts = None
+        for k in self._kayitlar():
+            msg = mesaj(*k)
+            for fn in dinleyiciler:
+                fn(msg)
+            ts = k[0]
+            if ilk is None:
+                ilk = ts
+            self.gonderilen += 1
+        self.iz_suresi = (ts - ilk) / 1e6 if ilk is not None else 0.0
+        self.gercek_sure = time.perf_counter() - t0
+        return self.gonderilen
+
+    def rapor(self):
+        s = self.sapma
+        return {"cerceve": self.gonderilen, "hata": self.hata, "hiz": self.hiz, "iz_suresi_s": self.iz_suresi,
+                "gercek_sure_s": self.gercek_sure,
+                "hizlanma": self.iz_suresi / self.gercek_sure if self.gercek_sure else 0.0,
+                "cerceve_hizi": self.gonderilen / self.gercek_sure if self.gercek_sure else 0.0,
+                "sapma_ort_us": s.toplam / s.adet if s.adet else 0.0, "sapma_p50_us": s.yuzdelik(0.5),
+                "sapma_p99_us": s.yuzdelik(0.99), "sapma_max_us": s.maks}
+
+
+def rapor_metni(r):
+    metin = (f"{r['cerceve']:,} çerçeve, iz {r['iz_suresi_s']:.1f} sn -> {r['gercek_sure_s']:.2f} sn "
+             f"({r['hizlanma']:.1f}x, {r['cerceve_hizi']:,.0f} çerçeve/sn)")
+    if r["hiz"] is not None:
+        metin += (f"; sapma ort {r['sapma_ort_us']:.0f} µs, p50 {r['sapma_p50_us']:.0f} µs, "
+                  f"p99 {r['sapma_p99_us']:.0f} µs, maks {r['sapma_max_us']:.0f} µs")
+    return metin
+
+
+# --- komut satırı ---
+def _zaman(metin):
+    return round(float(metin) * 1e6) if metin else None
+
+
+def _kimlikler(metin):
+    return {int(k, 16) for k in metin.split(",")} if metin else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAN iz kaydı ve yeniden oynatma")
+    alt = parser.add_subparsers(dest="komut", required=True)
+
+    p = alt.add_parser("yakala", help="Hattı .svct dosyasına kaydeder")
+    p.add_argument("cikti")
+    p.add_argument("--kanal", default="vcan0")
+    p.add_argument("--arayuz", default="socketcan")
+    p.add_argument("--sure", type=float, help="Saniye (verilmezse Ctrl+C'ye kadar)")
+
+    p = alt.add_parser("ice-aktar", help="candump / ASC / BLF / TRC -> .svct")
+    p.add_argument("girdi")
+    p.add_argument("cikti")
+
+    p = alt.add_parser("oynat", help=".svct izini hatta oynatır")
+    p.add_argument("iz")
+    p.add_argument("--kanal", default="vcan0")
+    p.add_argument("--arayuz", default="socketcan")
+    p.add_argument("--hiz", default="1", help="Kat (1, 10...) ya da 'max'")
+    p.add_argument("--baslangic", help="Epoch saniye")
+    p.add_argument("--bitis", help="Epoch saniye")
+    p.add_argument("--kimlik", help="Virgülle onaltılık kimlikler")
+
+    for ad, yardim in (("bilgi", "İz özeti"), ("dok", "candump -L biçiminde yazdırır")):
+        p = alt.add_parser(ad, help=yardim)
+        p.add_argument("iz")
+        p.add_argument("--baslangic", help="Epoch saniye")
+        p.add_argument("--bitis", help="Epoch saniye")
+        p.add_argument("--kimlik", help="Virgülle onaltılık kimlikler")
+    args = parser.parse_args()
+
+    if args.komut == "yakala":
+        bus = can.interface.Bus(channel=args.kanal, interface=args.arayuz)
+        notifier, yazici = yakala(bus, args.cikti)
+        try:
+            time.sleep(args.sure) if args.sure else threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            notifier.stop()
+            yazici.kapat()
+            bus.shutdown()
+        print(f"{yazici.cerceve:,} çerçeve, {yazici.blok} blok -> {args.cikti}")
+    elif args.komut == "ice-aktar":
+        adet = ice_aktar(args.girdi, args.cikti)
+        print(f"{adet:,} çerçeve -> {args.cikti} ({os.path.getsize(args.cikti):,} bayt)")
+    elif args.komut == "oynat":
+        bus = can.interface.Bus(channel=args.kanal, interface=args.arayuz)
+        with IzOkuyucu(args.iz) as okuyucu:
+            oynatici = IzOynatici(okuyucu, hiz=None if args.hiz == "max" else float(args.hiz),
+                                  baslangic=_zaman(args.baslangic), bitis=_zaman(args.bitis),
+                                  kimlikler=_kimlikler(args.kimlik))
+            oynatici.baslat(bus)
+            try:
+                while not oynatici.bekle(0.5):
+                    pass
+            except KeyboardInterrupt:
+                oynatici.durdur()
+                oynatici.bekle()
+            print(rapor_metni(oynatici.rapor()))
+        bus.shutdown()
+    else:
+        with IzOkuyucu(args.iz) as okuyucu:
+            if args.komut == "bilgi":
+                for k, v in okuyucu.ozet().items():
+                    print(f"{k}: {v}")
+                return
+            yaz = sys.stdout.write
+            for ts, can_id, b, veri in okuyucu.kayitlar(_zaman(args.baslangic), _zaman(args.bitis),
+                                                        _kimlikler(args.kimlik)):
+                kimlik = f"{can_id:08X}" if b & GENISLETILMIS else f"{can_id:03X}"
+                if b & FD:
+                    govde = f"#{(b & BRS and 1) | (b & ESI and 2):X}{bytes(veri).hex().upper()}"
+                else:
+                    govde = "R" if b & UZAK else bytes(veri).hex().upper()
+                yaz(f"({ts / 1e6:.6f}) iz {kimlik}#{govde}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Olay güdümlü CAN izleme: çekirdek filtreleri + kural tablosu.
+
+Hüseyin-Üzüm istemcisindeki ``monitor_can_traffic`` hattı yoklayarak
+okuyordu: ``can_bus.recv(timeout=0.01)`` olay döngüsünü 10 ms'ye kadar
+bloklar, ardından 10 ms daha uyur ve ``SALDIRI_CAN_ID``'yi Python'da ayıklar.
+Saniyede en fazla ~50 çerçeve okunur; yüksek hat yükünde soket tamponu taşar
+ve çerçeveler kaybolur, OCPP ise 20 ms'ye kadar gecikir.
+
+``CanIzleyici``:
+
+- Kural tablosundaki kimlik/maske çiftlerinden filtre listesi üretip
+  taşıyıcıya verir (``AsyncCanBus`` socketcan'de bunu ``CAN_RAW_FILTER`` ile
+  çekirdeğe kurar); ilgisiz çerçeveler kullanıcı alanına hiç çıkmaz.
+- Alım ``dinleyici_ekle`` ile olay güdümlüdür (socketcan'de ``add_reader``):
+  döngü yalnızca çerçeve geldiğinde uyanır, yoklama ya da uyku yoktur.
+- Her çerçeve ``CanKurali`` tablosunda aranır: tam maskeli kimlikler sözlükten
+  O(1), maskeli kurallar sırayla; ``veri_deseni`` (bayt regex'i) varsa yük de
+  eşleşmelidir. Eylem senkron fonksiyon ya da korutin olabilir; korutinler
+  görev olarak başlatılır, okuyucu beklemez. ``bekleme_s`` aynı kuralın eylemini
+  seyreltir (sel altında binlerce görev açılmaz), ``tek_sefer`` bir kez çalıştırır.
+"""
+import asyncio
+import logging
+import re
+import time
+from collections import namedtuple
+
+STANDART_MASKE = 0x7FF
+GENISLETILMIS_MASKE = 0x1FFFFFFF
+
+CanKurali = namedtuple("CanKurali", "ad can_id maske veri_deseni eylem bekleme_s tek_sefer genisletilmis",
+                       defaults=(STANDART_MASKE, None, None, 0.0, False, False))
+
+
+def kural(ad, can_id, eylem, maske=None, veri_deseni=None, bekleme_s=0.0, tek_sefer=False, genisletilmis=False):
+    """ ``CanKurali`` kurucusu; ``veri_deseni`` bayt dizesi ya da derlenmiş regex olabilir. """
+    if maske is None:
+        maske = GENISLETILMIS_MASKE if genisletilmis else STANDART_MASKE
+    if isinstance(veri_deseni, (bytes, bytearray)):
+        veri_deseni = re.compile(bytes(veri_deseni), re.DOTALL)
+    return CanKurali(ad, can_id & maske, maske, veri_deseni, eylem, bekleme_s, tek_sefer, genisletilmis)
+
+
+class CanIzleyici:
+    """ Kural tablosunu çekirdek filtresine ve olay güdümlü alıma bağlar. """
+
+    def __init__(self, tasiyici, kurallar=()):
+        self.tasiyici = tasiyici
+        self.kurallar = []
+        self._tam = {}          # (can_id, genişletilmiş) -> [kural]
+        self._maskeli = []
+        self._son_tetik = {}
+        self._gorevler = set()
+        self.eslesen = {}
+        self.tetiklenen = {}
+        self.alinan = 0
+        self.eslesmeyen = 0
+        self._calisiyor = False
+        for k in kurallar:
+            self.ekle(k)
+
+    def ekle(self, k):
+        self.kurallar.append(k)
+        tam_maske = GENISLETILMIS_MASKE if k.genisletilmis else STANDART_MASKE
+        if k.maske == tam_maske:
+            self._tam.setdefault((k.can_id, k.genisletilmis), []).append(k)
+        else:
+            self._maskeli.append(k)
+        self.eslesen.setdefault(k.ad, 0)
+        self.tetiklenen.setdefault(k.ad, 0)
+        if self._calisiyor:
+            self.tasiyici.filtre_ayarla(self.filtreler())
+
+    def filtreler(self):
+        """ python-can ``can_filters`` listesi (aynı kimlik/maske bir kez). """
+        gorulen, sonuc = set(), []
+        for k in self.kurallar:
+            anahtar = (k.can_id, k.maske, k.genisletilmis)
+            if anahtar not in gorulen:
+                gorulen.add(anahtar)
+                sonuc.append({"can_id": k.can_id, "can_mask": k.maske, "extended": k.genisletilmis})
+        return sonuc
+
+    def baslat(self):
+        self.tasiyici.filtre_ayarla(self.filtreler())
+        self.tasiyici.dinleyici_ekle(self.cerceve)
+        self._calisiyor = True
+
+    def durdur(self):
+        if self._calisiyor:
+            self.tasiyici.dinleyici_cikar(self.cerceve)
+            self._calisiyor = False
+
+    async def calistir(self):
+        """ ``asyncio.gather`` içinde eski ``monitor_can_traffic`` yerine kullanılır. """
+        self.baslat()
+        try:
+            await asyncio.Future()
+        finally:
+            self.durdur()
+
+    def esles(self, msg):
+        """ Çerçeveye uyan kurallar (tablo sırasıyla). """
+        adaylar = self._tam.get((msg.arbitration_id, msg.is_extended_id), ())
+        if self._maskeli:
+            adaylar = list(adaylar) + [k for k in self._maskeli if k.genisletilmis == msg.is_extended_id
+                                       and msg.arbitration_id & k.maske == k.can_id]
+        return [k for k in adaylar if k.veri_deseni is None or k.veri_deseni.search(bytes(msg.data))]
+
+    def cerceve(self, msg):
+        self.alinan += 1
+        uyan = self.esles(msg)
+        if not uyan:
+            self.eslesmeyen += 1
+            return
+        simdi = time.monotonic()
+        for k in uyan:
+            self.eslesen[k.ad] += 1
+            son = self._son_tetik.get(k.ad)
+            if son is not None and (k.tek_sefer or simdi - son < k.bekleme_s):
+                continue
+            self._son_tetik[k.ad] = simdi
+            self.tetiklenen[k.ad] += 1
+            try:
+                sonuc = k.eylem(msg)
+            except Exception:
+                logging.exception("CAN kural eylemi hatası (%s)", k.ad)
+                continue
+            if asyncio.iscoroutine(sonuc):
+                gorev = asyncio.get_running_loop().create_task(sonuc)
+                self._gorevler.add(gorev)
+                gorev.add_done_callback(self._gorev_bitti)
+
+    def _gorev_bitti(self, gorev):
+        self._gorevler.discard(gorev)
+        if not gorev.cancelled() and gorev.exception() is not None:
+            logging.error("CAN kural eylemi hatası: %s", gorev.exception())
+
+    def istatistik(self):
+        return {"alinan": self.alinan, "eslesmeyen": self.eslesmeyen, "eslesen": dict(self.eslesen),
+                "tetiklenen": dict(self.tetiklenen)}
@@ -0,0 +1,304 @@
+"""
+Hızlı OCPP-J çerçeve kodlayıcısı ve örneklemeli şema doğrulama.
+
+ocpp kütüphanesinde her gelen çerçeve stdlib ``json`` ile çözülür ve
+jsonschema ile tam doğrulanır; Heartbeat gibi küçük mesajlarda CPU zamanının
+çoğu buraya gider. Bu modül:
+
+- JSON arka ucunu takılabilir yapar: orjson kuruluysa onu, değilse stdlib
+  ``json``'u kullanır (``JSON_BACKEND``).
+- Her (mesaj tipi, aksiyon) için doğrulayıcıyı bir kez derleyip önbellekte
+  tutar. fastjsonschema kuruluysa şema Python koduna derlenir, değilse
+  ocpp'nin Draft4Validator'ının hızlı ``is_valid`` yolu kullanılır. Geçersiz
+  mesajlarda ocpp'nin kendi ``validate_payload``'u çağrılır, böylece istemciye
+  dönen CallError kodları kütüphaneyle aynı kalır.
+- ``ValidationPolicy`` ile aksiyon başına doğrulama oranı verilir: 1.0 her
+  mesaj, 0.0 hiç (güvenilir yol), 0.01 her 100 mesajdan biri. Örnekleme
+  sayaç tabanlıdır, yani deterministiktir.
+
+``FastCodecMixin`` bir ChargePoint alt sınıfına eklenerek gelen çağrıların
+çözülmesini, doğrulanmasını ve cevapların kodlanmasını bu yola taşır.
+"""
+import asyncio
+import decimal
+import inspect
+import logging
+
+from ocpp.charge_point import (_raise_key_error, camel_to_snake_case, remove_nones,
+                               serialize_as_dict, snake_to_camel_case)
+from ocpp.exceptions import (FormatViolationError, OCPPError, PropertyConstraintViolationError,
+                             ProtocolError)
+from ocpp.messages import Call, CallError, CallResult, MessageType, get_validator, validate_payload
+
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+
+    def _decimal_float(obj):
+        if isinstance(obj, decimal.Decimal):
+            return float(obj)
+        raise TypeError
+
+    def loads(raw):
+        return orjson.loads(raw)
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_decimal_float).decode()
+
+    _JSONHatasi = orjson.JSONDecodeError
+except ImportError:
+    import json
+
+    JSON_BACKEND = "json"
+
+    class _DecimalEncoder(json.JSONEncoder):
+        def default(self, obj):
+            if isinstance(obj, decimal.Decimal):
+                return float(obj)
+            return super().default(obj)
+
+    def loads(raw):
+        return json.loads(raw)
+
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), cls=_DecimalEncoder)
+
+    _JSONHatasi = json.JSONDecodeError
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+LOGGER = logging.getLogger("ocpp")
+
+# ocpp kütüphanesinin Decimal ile doğruladığı aksiyonlar; bunlar her zaman
+# kütüphanenin kendi yolundan doğrulanır (float hassasiyeti sorunu)
+_DECIMAL_AKSIYONLAR = {
+    (MessageType.Call, "SetChargingProfile"),
+    (MessageType.Call, "RemoteStartTransaction"),
+    (MessageType.CallResult, "GetCompositeSchedule"),
+}
+
+_derlenmis = {}
+
+
+def unpack(raw):
+    """ ocpp.messages.unpack ile aynı sözleşme, hızlı JSON arka ucuyla. """
+    try:
+        msg = loads(raw)
+    except _JSONHatasi:
+        raise FormatViolationError(
+            details={"cause": "Message is not valid JSON", "ocpp_message": raw}
+        )
+    if not isinstance(msg, list):
+        raise ProtocolError(details={"cause": (
+            "OCPP message hasn't the correct format. It "
+            f"should be a list, but got '{type(msg)}' instead"
+        )})
+    if not msg:
+        raise ProtocolError(details={"cause": "Message does not contain MessageTypeId"})
+
+    tip = msg[0]
+    try:
+        if tip == MessageType.Call:
+            return Call(*msg[1:])
+        if tip == MessageType.CallResult:
+            return CallResult(*msg[1:])
+        if tip == MessageType.CallError:
+            return CallError(*msg[1:])
+    except TypeError:
+        raise ProtocolError(details={"cause": "Message is missing elements."})
+    raise PropertyConstraintViolationError(
+        details={"cause": f"MessageTypeId '{tip}' isn't valid"}
+    )
+
+
+def pack(msg):
+    """ Call / CallResult'ı hızlı JSON arka ucuyla kodlar. """
+    if isinstance(msg, Call):
+        return dumps([MessageType.Call, msg.unique_id, msg.action, msg.payload])
+    if isinstance(msg, CallResult):
+        return dumps([MessageType.CallResult, msg.unique_id, msg.payload])
+    return msg.to_json()
+
+
+def derlenmis_dogrulayici(message_type_id, action, ocpp_version="1.6"):
+    """
+    (mesaj tipi, aksiyon) için ``payload -> bool`` dönen derlenmiş doğrulayıcı.
+    Şema dosyası bulunamazsa None döner (doğrulama kütüphaneye bırakılır).
+    """
+    anahtar = (message_type_id, action, ocpp_version)
+    try:
+        return _derlenmis[anahtar]
+    except KeyError:
+        pass
+
+    try:
+        temel = get_validator(message_type_id, action, ocpp_version)
+    except OSError:
+        fn = None
+    else:
+        if fastjsonschema is not None:
+            derlenen = fastjsonschema.compile(temel.schema)
+
+            def fn(payload, _derlenen=derlenen, _hata=fastjsonschema.JsonSchemaException):
+                try:
+                    _derlenen(payload)
+                    return True
+                except _hata:
+                    return False
+        else:
+            fn = temel.is_valid
+    _derlenmis[anahtar] = fn
+    return fn
+
+
+class ValidationPolicy:
+    """
+    Aksiyon başına şema doğrulama oranı.
+
+    ``ValidationPolicy(varsayilan=1.0, aksiyonlar={"MeterValues": 0.01, "Heartbeat": 0.0})``
+    MeterValues mesajlarının %1'ini doğrular, Heartbeat'i güvenilir kabul eder,
+    diğer her şeyi tam doğrular.
+    """
+
+    def __init__(self, varsayilan=1.0, aksiyonlar=None):
+        self.varsayilan = varsayilan
+        self.aksiyonlar = dict(aksiyonlar or {})
+        self._adim = {}
+        self._sayac = {}
+        self.dogrulanan = 0
+        self.atlanan = 0
+
+    def _adim_hesapla(self, action):
+        oran = self.aksiyonlar.get(action, self.varsayilan)
+        if oran >= 1.0:
+            adim = 1
+        elif oran <= 0.0:
+            adim = 0
+        else:
+            adim = max(1, round(1 / oran))
+        self._adim[action] = adim
+        return adim
+
+    def dogrula_mi(self, action):
+        adim = self._adim.get(action)
+        if adim is None:
+            adim = self._adim_hesapla(action)
+        if adim == 1:
+            self.dogrulanan += 1
+            return True
+        if adim == 0:
+            self.atlanan += 1
+            return False
+        n = self._sayac.get(action, 0)
+        self._sayac[action] = n + 1
+        if n % adim == 0:
+            self.dogrulanan += 1
+            return True
+        self.atlanan += 1
+        return False
+
+
+def dogrula(message, ocpp_version="1.6"):
+    """ Mesajı derlenmiş doğrulayıcıyla doğrular; geçersizse OCPPError yükseltir. """
+    if (message.message_type_id, message.action) not in _DECIMAL_AKSIYONLAR:
+        fn = derlenmis_dogrulayici(message.message_type_id, message.action, ocpp_version)
+        if fn is not None and fn(message.payload):
+            return
+    # Geçersiz (ya da özel) mesaj: kütüphane doğru OCPPError'u üretsin
+    validate_payload(message, ocpp_version)
+
+
+class FastCodecMixin:
+    """
+    ChargePoint alt sınıflarına eklenir (``class X(FastCodecMixin, cp)``).
+
+    Gelen çağrıları hızlı JSON ile çözer, ``validation_policy``'ye göre
+    doğrular ve cevapları hızlı JSON ile kodlar. Handler imzası analizi
+    (``call_unique_id`` parametresi) handler başına bir kez yapılır.
+    """
+
+    validation_policy = ValidationPolicy()
+
+    async def route_message(self, raw_msg):
+        try:
+            msg = unpack(raw_msg)
+        except OCPPError as e:
+            LOGGER.exception(
+                "Unable to parse message: '%s', it doesn't seem to be valid OCPP: %s", raw_msg, e
+            )
+            return
+
+        if msg.message_type_id == MessageType.Call:
+            try:
+                await self._handle_call(msg)
+            except OCPPError as error:
+                LOGGER.exception("Error while handling request '%s'", msg)
+                await self._send(msg.create_call_error(error).to_json())
+        elif msg.message_type_id in (MessageType.CallResult, MessageType.CallError):
+            self._response_queue.put_nowait(msg)
+
+    @staticmethod
+    def _unique_id_ister(handler):
+        try:
+            return handler.__func__._secvolt_uid
+        except AttributeError:
+            pass
+        ister = "call_unique_id" in inspect.signature(handler).parameters
+        try:
+            handler.__func__._secvolt_uid = ister
+        except AttributeError:
+            pass
+        return ister
+
+    async def _handle_call(self, msg):
+        try:
+            handlers = self.route_map[msg.action]
+        except KeyError:
+            _raise_key_error(msg.action, self._ocpp_version)
+            return
+
+        # Örneklenen çağrıda hem istek hem cevap doğrulanır
+        dogrulama = (not handlers.get("_skip_schema_validation", False)
+                     and self.validation_policy.dogrula_mi(msg.action))
+        if dogrulama:
+            dogrula(msg, self._ocpp_version)
+
+        snake_case_payload = camel_to_snake_case(msg.payload)
+
+        try:
+            handler = handlers["_on_action"]
+        except KeyError:
+            _raise_key_error(msg.action, self._ocpp_version)
+        try:
+            if self._unique_id_ister(handler):
+                response = handler(**snake_case_payload, call_unique_id=msg.unique_id)
+            else:
+                response = handler(**snake_case_payload)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as e:
+            LOGGER.exception("Error while handling request '%s'", msg)
+            await self._send(msg.create_call_error(e).to_json())
+            return
+
+        response_payload = remove_nones(serialize_as_dict(response))
+        response = msg.create_call_result(snake_to_camel_case(response_payload))
+        if dogrulama:
+            dogrula(response, self._ocpp_version)
+        await self._send(pack(response))
+
+        after = handlers.get("_after_action")
+        if after is not None:
+            if self._unique_id_ister(after):
+                sonuc = after(**snake_case_payload, call_unique_id=msg.unique_id)
+            else:
+                sonuc = after(**snake_case_payload)
+            # after handler içinde call yapılabilsin diye beklemeden görev olarak çalışır
+            if inspect.isawaitable(sonuc):
+                asyncio.ensure_future(sonuc)
+            return sonuc
+        return response
@@ -0,0 +1,210 @@
+"""
+Voltaj örneklerine gömülü gizli kanal için artımlı, sabit bellekli bit çözücü.
+
+Yusuf-Arıkan istemcisi sızdırdığı metnin bitlerini Voltage örneğine 0.5 V'luk
+dalgalanma olarak gömer. Sunucu önceden bitleri bir string'e ekleyip her
+mesajda tüm geçmişi yeniden çözüyordu (bağlantı ömrüyle karesel iş, sınırsız
+bellek). Burada her akış için:
+
+- bitler bir tamsayı akümülatörüne paketlenir (MSB önce, istemcideki
+  ``text_to_bits`` ile aynı sıra), bayt tamamlandığında bir kez yayılır;
+- tamamlanan baytlar ``kuyruk_boyutu`` ile sınırlı bir ``bytearray`` kuyruğunda
+  tutulur, daha eskisi atılır.
+
+Desteklenen kodlamalar aynı akış üzerinde yan yana çalışabilir:
+
+- ``esik``: örnek ``esik``'in üstündeyse 1, değilse 0
+- ``delta``: önceki örnekten en az ``adim`` kadar değişim 1, değişmeme 0 (NRZI)
+- ``manchester``: iki yarı sembol; düşük→yüksek 1, yüksek→düşük 0. Eşit yarılar
+  geçersizdir, ikinci yarı yeni sembolün ilk yarısı sayılarak yeniden eşlenir.
+
+Kullanılmayan bir kodlamanın çözücüsü gürültüden de bayt üretir; her bayt
+raporlanırsa alarm yağar. Bu yüzden ``bayt_fn`` yalnız güven kontrolünden
+geçen kanalda çağrılır: son ``min_seri`` baytın hepsi metin karakteri
+(harf, rakam, boşluk, ``_-.,:;/@``) olmalıdır. Rastgele baytların buna
+uyma olasılığı 8 baytta ~3e-5'tir. Süren bir dizide yeni rapor her
+``min_seri`` baytta bir verilir. ``bayt_fn`` kodlama -> fonksiyon sözlüğü de
+olabilir; sözlükte olmayan kodlama raporlanmaz (yalnız ``metin`` ile okunur).
+"""
+import logging
+import string
+
+KODLAMALAR = ("esik", "delta", "manchester")
+
+# Sızdırılan metinde beklenen karakterler; güven kontrolü bunlardan oluşan diziyi arar
+METIN_BAYTLARI = frozenset((string.ascii_letters + string.digits + " _-.,:;/@").encode())
+
+
+def _bayt_logla(anahtar, kodlama, bayt, kuyruk):
+    logging.critical(" >>> GİZLİ MESAJ [%s/%s]: %r <<<", anahtar, kodlama,
+                     kuyruk.decode("latin-1"))
+
+
+class EsikCozucu:
+    """ Sabit eşik: örnek başına bir bit. """
+    __slots__ = ("esik",)
+    ad = "esik"
+
+    def __init__(self, esik=220.25):
+        self.esik = esik
+
+    def bit(self, deger):
+        return 1 if deger > self.esik else 0
+
+
+class DeltaCozucu:
+    """ Ardışık örnekler arasındaki değişim: değişim 1, sabit kalma 0. """
+    __slots__ = ("adim", "_onceki")
+    ad = "delta"
+
+    def __init__(self, adim=0.25):
+        self.adim = adim
+        self._onceki = None
+
+    def bit(self, deger):
+        onceki, self._onceki = self._onceki, deger
+        if onceki is None:
+            return None
+        return 1 if abs(deger - onceki) >= self.adim else 0
+
+
+class ManchesterCozucu:
+    """ İki örnekte bir bit; geçersiz çiftte bir örnek kaydırarak yeniden eşlenir. """
+    __slots__ = ("esik", "_ilk_yari", "gecersiz")
+    ad = "manchester"
+
+    def __init__(self, esik=220.25):
+        self.esik = esik
+        self._ilk_yari = None
+        self.gecersiz = 0
+
+    def bit(self, deger):
+        yari = 1 if deger > self.esik else 0
+        ilk = self._ilk_yari
+        if ilk is None:
+            self._ilk_yari = yari
+            return None
+        if ilk == yari:
+            self.gecersiz += 1
+            self._ilk_yari = yari
+            return None
+        self._ilk_yari = None
+        return yari
+
+
+class BitPaketleyici:
+    """ Bitleri baytlara paketler; tamamlanan baytları sınırlı kuyrukta tutar. """
+    __slots__ = ("kuyruk", "kuyruk_boyutu", "toplam_bit", "toplam_bayt", "_akum", "_n")
+
+    def __init__(self, kuyruk_boyutu=256):
+        self.kuyruk = bytearray()
+        self.kuyruk_boyutu = kuyruk_boyutu
+        self.toplam_bit = 0
+        self.toplam_bayt = 0
+        self._akum = 0
+        self._n = 0
+
+    def ekle(self, bit):
+        """ Bit ekler; bayt tamamlandıysa baytı, değilse None döner. """
+        self.toplam_bit += 1
+        self._akum = (self._akum << 1) | bit
+        self._n += 1
+        if self._n < 8:
+            return None
+        bayt = self._akum
+        self._akum = self._n = 0
+        self.toplam_bayt += 1
+        kuyruk = self.kuyruk
+        kuyruk.append(bayt)
+        if len(kuyruk) > self.kuyruk_boyutu * 2:
+            # Amortize kırpma: kuyruk iki katına çıktığında bir kez kes
+            del kuyruk[:-self.kuyruk_boyutu]
+        return bayt
+
+    def son(self, n=None):
+        """ Son ``n`` (varsayılan ``kuyruk_boyutu``) bayt. """
+        n = self.kuyruk_boyutu if n is None else n
+        return bytes(self.kuyruk[-n:]) if n else b""
+
+
+class Kanal:
+    """ Bir akış + bir kodlama: bit çıkarıcı, paketleyici ve ardışık metin baytı sayacı. """
+    __slots__ = ("cozucu", "paket", "seri")
+
+    def __init__(self, cozucu, kuyruk_boyutu=256):
+        self.cozucu = cozucu
+        self.paket = BitPaketleyici(kuyruk_boyutu)
+        self.seri = 0
+
+    def besle(self, deger):
+        """ Örnek ekler; (bit, tamamlanan bayt) döner, ikisi de None olabilir. """
+        bit = self.cozucu.bit(deger)
+        if bit is None:
+            return None, None
+        bayt = self.paket.ekle(bit)
+        if bayt is not None:
+            self.seri = self.seri + 1 if bayt in METIN_BAYTLARI else 0
+        return bit, bayt
+
+
+class CovertDecoder:
+    """ Filo genelinde akış başına (anahtar: genellikle cp_id) çok kodlamalı çözücü. """
+
+    def __init__(self, kodlamalar=KODLAMALAR, esik=220.25, delta_adim=0.25, kuyruk_boyutu=256,
+                 bayt_fn=_bayt_logla, min_seri=8):
+        bilinmeyen = set(kodlamalar) - set(KODLAMALAR)
+        if bilinmeyen:
+            raise ValueError(f"Bilinmeyen kodlama: {', '.join(sorted(bilinmeyen))}")
+        self.kodlamalar = tuple(kodlamalar)
+        self.esik = esik
+        self.delta_adim = delta_adim
+        self.kuyruk_boyutu = kuyruk_boyutu
+        self.bayt_fn = bayt_fn
+        self.min_seri = min_seri
+        self._akislar = {}
+
+    def _cozucu(self, kodlama):
+        if kodlama == "esik":
+            return EsikCozucu(self.esik)
+        if kodlama == "delta":
+            return DeltaCozucu(self.delta_adim)
+        return ManchesterCozucu(self.esik)
+
+    def kanallar(self, anahtar):
+        """ Akışın kodlama -> Kanal sözlüğü (yoksa oluşturulur). """
+        kanallar = self._akislar.get(anahtar)
+        if kanallar is None:
+            kanallar = self._akislar[anahtar] = {k: Kanal(self._cozucu(k), self.kuyruk_boyutu)
+                                                  for k in self.kodlamalar}
+        return kanallar
+
+    def besle(self, anahtar, deger):
+        """ Tek örnek; kodlama -> çözülen bit (ya da None) sözlüğü döner. """
+        bitler = {}
+        for kodlama, kanal in self.kanallar(anahtar).items():
+            bit, bayt = kanal.besle(deger)
+            bitler[kodlama] = bit
+            if bayt is not None and self.bayt_fn is not None and self.guvenli_mi(kanal):
+                fn = self.bayt_fn.get(kodlama) if isinstance(self.bayt_fn, dict) else self.bayt_fn
+                if fn is not None:
+                    fn(anahtar, kodlama, bayt, kanal.paket.son(kanal.seri or None))
+        return bitler
+
+    def guvenli_mi(self, kanal):
+        """ Son bayt, en az ``min_seri`` uzunluğundaki metin dizisinin rapor noktası mı? """
+        if not self.min_seri:
+            return True
+        return kanal.seri >= self.min_seri and kanal.seri % self.min_seri == 0
+
+    def metin(self, anahtar, kodlama="esik", n=None):
+        """ Akışın son çözülen baytları (latin-1 metin olarak). """
+        kanallar = self._akislar.get(anahtar)
+        if not kanallar or kodlama not in kanallar:
+            return ""
+        return kanallar[kodlama].paket.son(n).decode("latin-1")
+
+    def unut(self, anahtar):
+        self._akislar.pop(anahtar, None)
+
+    def __len__(self):
+        return len(self._akislar)
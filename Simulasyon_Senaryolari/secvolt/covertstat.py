@@ -0,0 +1,281 @@
+"""
+Voltaj ölçümlerinde kodlamadan bağımsız, filo çapında istatistiksel gizli kanal tespiti.
+
+``secvolt.covert`` saldırganın kodlamasını (eşik, delta, Manchester) bilerek
+bit çözer. Bu modül kodlamayı bilmeden, dalgalanmanın şebeke gürültüsüne mi
+yoksa bilgi taşıyan bir sinyale mi benzediğini ölçer. Her seri
+(cp_id, connector_id, measurand) için üstel sönümlü akış tahminleri tutulur:
+
+- **Bimodalite / nicemleme**: Sarle katsayısı ``b = (çarpıklık² + 1) / basıklık``.
+  Gauss gürültüsünde 1/3, iki seviyeli (0/1) sinyalde 1'e yakındır.
+- **Entropi**: ortalamaya göre standartlaştırılmış değerin ``kutu_sayisi``
+  kutuluk (0.5 σ genişlik) histogramının normalize Shannon entropisi.
+  Gauss gürültüsü ~0.75, ikili sinyal ~0.25, dört seviyeli sinyal ~0.5 verir.
+- **Otokorelasyon (gecikme 1)**: şebeke dalgalanması yavaş değişir (|r| büyük),
+  bit dizileri ise beyaza daha yakındır (|r| küçük).
+
+Skor: ``clip((b - 1/3) / (2/3), 0, 1) * (1 - entropi) * (1 - r²)``. Şebeke
+gürültüsü (AR(1), beyaz gürültü, yük basamakları) için ~0-0.2, ikili kodlamalar
+(eşik, delta, Manchester) için 0.45-0.6, dört seviyeli kodlama için ~0.2 olur;
+bu yüzden ``skor_esigi`` ikili kodlamaları yakalar, ``sirala()`` ise daha zayıf
+kodlamaları da listenin başına taşır. ``min_sapma``'nın altındaki (düz) seriler
+ve ``isinma`` örnekten az gözlenenler 0 alır.
+
+Örnekler ``DetectionEngine`` gibi sütunlar halinde biriktirilir ve ``batch_ms``
+aralıklarla tüm seriler için NumPy ile güncellenir; durum seri başına sabit
+(~210 bayt, ayrılmış kapasite hariç) olduğundan 5 sn'de bir rapor veren 100k şarj noktası tek çekirdekte
+işlenir (``benchmarks.bench_covertstat``).
+"""
+import asyncio
+import logging
+import math
+import time
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+from secvolt.tsdb import measurand_adi
+
+Aday = namedtuple("Aday", "anahtar skor bimodalite entropi otokorelasyon sapma adet")
+
+_MOMENTLER = ("_w", "_s1", "_s2", "_s3", "_s4", "_wl", "_sl", "_onceki", "_merkez")
+
+
+def _alarm_logla(aday):
+    logging.warning("🚨 GİZLİ KANAL ŞÜPHESİ %s: skor %.2f (bimodalite %.2f, entropi %.2f, otokorelasyon %.2f, "
+                    "σ %.3f)", aday.anahtar, aday.skor, aday.bimodalite, aday.entropi, aday.otokorelasyon,
+                    aday.sapma)
+
+
+class CovertStatDetector:
+    """ Voltaj serilerinin bilgi taşıma olasılığını vektörel batch'lerle puanlar. """
+
+    def __init__(self, yari_omur=256, kutu_sayisi=16, min_sapma=0.05, isinma=32, skor_esigi=0.3,
+                 batch_ms=1000.0, batch_boyutu=1 << 17, measurand="Voltage", alarm_fn=_alarm_logla):
+        self.azalma = 2.0 ** (-1.0 / yari_omur)
+        self.kutu_sayisi = kutu_sayisi
+        self.min_sapma = min_sapma
+        self.isinma = isinma
+        self.skor_esigi = skor_esigi
+        self.batch_ms = batch_ms
+        self.batch_boyutu = batch_boyutu
+        self.measurand = measurand
+        self.alarm_fn = alarm_fn
+
+        self.toplam_ornek = 0
+        self.batch_sayisi = 0
+        self.son_isleme_us = 0.0
+        self._gorev = None
+
+        self._sid = {}
+        self._anahtarlar = []
+        self._kapasite = 0
+        self._buyut(1024)
+        self._batch_sifirla()
+
+    def _buyut(self, yeni):
+        eski = self._kapasite
+        for ad in _MOMENTLER:
+            dizi = np.zeros(yeni)
+            if eski:
+                dizi[:eski] = getattr(self, ad)
+            setattr(self, ad, dizi)
+        for ad, dtype in (("_adet", np.int64), ("_onceki_var", bool), ("_isaretli", bool)):
+            dizi = np.zeros(yeni, dtype=dtype)
+            if eski:
+                dizi[:eski] = getattr(self, ad)
+            setattr(self, ad, dizi)
+        hist = np.zeros((yeni, self.kutu_sayisi))
+        if eski:
+            hist[:eski] = self._hist
+        self._hist = hist
+        self._kapasite = yeni
+
+    def _batch_sifirla(self):
+        self._b_sid = array("q")
+        self._b_deger = array("d")
+
+    def _seri_kimligi(self, anahtar):
+        sid = self._sid.get(anahtar)
+        if sid is None:
+            sid = len(self._anahtarlar)
+            if sid == self._kapasite:
+                self._buyut(self._kapasite * 2)
+            self._sid[anahtar] = sid
+            self._anahtarlar.append(anahtar)
+        return sid
+
+    # --- örnek girişi ---
+    def ekle(self, anahtar, deger):
+        self._b_sid.append(self._seri_kimligi(anahtar))
+        self._b_deger.append(deger)
+        if len(self._b_sid) >= self.batch_boyutu:
+            self.isle()
+        elif self._gorev is None:
+            self._zamanlayici_kur()
+
+    def meter_values_ekle(self, cp_id, connector_id, meter_value):
+        for mv in meter_value:
+            for sv in mv.get('sampled_value', ()):
+                measurand = measurand_adi(sv)
+                if measurand.split("/", 1)[0] != self.measurand:
+                    continue
+                try:
+                    deger = float(sv['value'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self.ekle((cp_id, connector_id, measurand), deger)
+
+    def _zamanlayici_kur(self):
+        try:
+            self._gorev = asyncio.get_running_loop().create_task(self.calistir())
+        except RuntimeError:
+            # Olay döngüsü yok: batch_boyutu ya da isle() ile tetiklenir
+            self._gorev = False
+
+    async def calistir(self):
+        while True:
+            await asyncio.sleep(self.batch_ms / 1000)
+            try:
+                self.isle()
+            except Exception:
+                logging.exception("Gizli kanal istatistik batch hatası")
+
+    # --- vektörel güncelleme ---
+    def isle(self):
+        """ Biriken örnekleri durumlara işler; yeni eşik aşan adayları döner. """
+        n = len(self._b_sid)
+        if n == 0:
+            return []
+        t0 = time.perf_counter()
+        sid = np.frombuffer(self._b_sid, dtype=np.int64)
+        x = np.frombuffer(self._b_deger, dtype=np.float64)
+        # Varış sırası seri içinde korunur
+        sira = np.argsort(sid, kind="stable")
+        sid, x = sid[sira], x[sira]
+        self._batch_sifirla()
+
+        ilk = np.empty(n, dtype=bool)
+        ilk[0] = True
+        np.not_equal(sid[1:], sid[:-1], out=ilk[1:])
+        baslar = np.flatnonzero(ilk)
+        uzunluk = np.diff(np.append(baslar, n))
+        grup = np.repeat(np.arange(len(baslar)), uzunluk)
+        konum = np.arange(n) - baslar[grup]
+        g_sid = sid[baslar]
+
+        # Yeni serilerin merkezi ilk örnekleri olur (momentler sayısal olarak küçük kalır)
+        yeni = self._adet[g_sid] == 0
+        self._merkez[g_sid[yeni]] = x[baslar[yeni]]
+        d = x - self._merkez[sid]
+
+        # Serideki son örnek ağırlık 1; öncekiler azalma^(sonrakiler)
+        w = self.azalma ** (uzunluk[grup] - 1 - konum)
+        carpan = self.azalma ** uzunluk
+        k = self._kapasite
+        d2 = d * d
+        for ad, katki in (("_w", w), ("_s1", w * d), ("_s2", w * d2), ("_s3", w * d2 * d), ("_s4", w * d2 * d2)):
+            durum = getattr(self, ad)
+            durum[g_sid] *= carpan
+            durum += np.bincount(sid, weights=katki, minlength=k)
+
+        # Gecikme-1 çarpımı: seri içindeki önceki örnek, ilk örnek için durumdaki son değer
+        onceki = np.empty(n)
+        onceki[1:] = d[:-1]
+        onceki[ilk] = self._onceki[g_sid]
+        var = ~ilk
+        var[ilk] = self._onceki_var[g_sid]
+        wl = w * var
+        self._wl[g_sid] *= carpan
+        self._sl[g_sid] *= carpan
+        self._wl += np.bincount(sid, weights=wl, minlength=k)
+        self._sl += np.bincount(sid, weights=wl * d * onceki, minlength=k)
+        son = baslar + uzunluk - 1
+        self._onceki[g_sid] = d[son]
+        self._onceki_var[g_sid] = True
+        self._adet[g_sid] += uzunluk
+
+        # Histogram: güncel ortalama / sapmaya göre standartlaştırılmış değer
+        ort, sapma = self._ort_sapma(g_sid)
+        gecerli = sapma > self.min_sapma * 0.5
+        self._hist[g_sid] *= carpan[:, None]
+        ornek_gecerli = gecerli[grup]
+        z = (d - ort[grup]) / np.where(ornek_gecerli, sapma[grup], 1.0)
+        kutu = np.clip(((z + self.kutu_sayisi / 4) * 2).astype(np.int64), 0, self.kutu_sayisi - 1)
+        duz = sid[ornek_gecerli] * self.kutu_sayisi + kutu[ornek_gecerli]
+        self._hist.reshape(-1)[:] += np.bincount(duz, weights=w[ornek_gecerli], minlength=k * self.kutu_sayisi)
+
+        self.toplam_ornek += n
+        self.batch_sayisi += 1
+
+        # Yalnız dokunulan serilerin skoru değerlendirilir
+        m = self._metrikler(g_sid)
+        asan = m["skor"] >= self.skor_esigi
+        yeni_alarm = g_sid[asan & ~self._isaretli[g_sid]]
+        self._isaretli[g_sid] = asan
+        adaylar = [self._aday(i) for i in yeni_alarm.tolist()]
+        self.son_isleme_us = (time.perf_counter() - t0) * 1e6
+        if self.alarm_fn is not None:
+            for aday in adaylar:
+                self.alarm_fn(aday)
+        return adaylar
+
+    def _ort_sapma(self, idx):
+        w = np.maximum(self._w[idx], 1e-12)
+        ort = self._s1[idx] / w
+        varyans = np.maximum(self._s2[idx] / w - ort * ort, 0.0)
+        return ort, np.sqrt(varyans)
+
+    def _metrikler(self, idx):
+        w = np.maximum(self._w[idx], 1e-12)
+        e1, e2, e3, e4 = (self._s1[idx] / w, self._s2[idx] / w, self._s3[idx] / w, self._s4[idx] / w)
+        m2 = np.maximum(e2 - e1 * e1, 0.0)
+        m3 = e3 - 3 * e1 * e2 + 2 * e1 ** 3
+        m4 = np.maximum(e4 - 4 * e1 * e3 + 6 * e1 * e1 * e2 - 3 * e1 ** 4, 0.0)
+        sapma = np.sqrt(m2)
+        gecerli = (sapma > self.min_sapma) & (self._adet[idx] >= self.isinma)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            carpiklik2 = np.where(gecerli, m3 * m3 / (m2 ** 3), 0.0)
+            basiklik = np.where(gecerli, m4 / (m2 * m2), 3.0)
+            bimodalite = np.where(gecerli, (carpiklik2 + 1) / basiklik, 0.0)
+            otokor = np.where(gecerli, (self._sl[idx] / np.maximum(self._wl[idx], 1e-12) - e1 * e1) / m2, 0.0)
+        hist = self._hist[idx]
+        toplam = hist.sum(axis=1, keepdims=True)
+        p = hist / np.maximum(toplam, 1e-12)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropi = -np.where(p > 0, p * np.log2(p), 0.0).sum(axis=1) / math.log2(self.kutu_sayisi)
+        otokor = np.clip(otokor, -1.0, 1.0)
+        skor = (np.clip((bimodalite - 1 / 3) / (2 / 3), 0.0, 1.0) * (1 - entropi) * (1 - otokor * otokor))
+        skor = np.where(gecerli, skor, 0.0)
+        return {"skor": skor, "bimodalite": bimodalite, "entropi": entropi, "otokorelasyon": otokor,
+                "sapma": sapma}
+
+    def _aday(self, sid):
+        m = self._metrikler(np.array([sid]))
+        return Aday(self._anahtarlar[sid], float(m["skor"][0]), float(m["bimodalite"][0]),
+                    float(m["entropi"][0]), float(m["otokorelasyon"][0]), float(m["sapma"][0]),
+                    int(self._adet[sid]))
+
+    # --- sorgular ---
+    def sirala(self, n=20, min_skor=0.0):
+        """ Skoru en yüksek ``n`` seri (büyükten küçüğe ``Aday`` listesi). """
+        adet = len(self._anahtarlar)
+        if adet == 0:
+            return []
+        skor = self._metrikler(np.arange(adet))["skor"]
+        n = min(n, adet)
+        en_iyi = np.argpartition(-skor, n - 1)[:n]
+        en_iyi = en_iyi[np.argsort(-skor[en_iyi], kind="stable")]
+        return [self._aday(i) for i in en_iyi.tolist() if skor[i] > min_skor]
+
+    def skor(self, anahtar):
+        sid = self._sid.get(anahtar)
+        return None if sid is None else self._aday(sid)
+
+    def bellek(self):
+        """ Seri durumlarının kapladığı bayt (ayrılmış kapasite dahil). """
+        return sum(getattr(self, ad).nbytes for ad in _MOMENTLER + ("_adet", "_onceki_var", "_isaretli", "_hist"))
+
+    def __len__(self):
+        return len(self._anahtarlar)
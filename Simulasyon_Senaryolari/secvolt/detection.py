@@ -0,0 +1,270 @@
+"""
+MeterValues akışları üzerinde vektörel, mikro-batch anomali tespit motoru.
+
+Senaryo sunucularındaki kontroller her mesajda çalışan tekil ``if``'lerdi
+(Korkutan'daki ANOMAL_SAYAC_ESIGI_WH gibi) ve Kevser-Aslan istemcisinin ürettiği
+geri giden sayaçları hiçbiri yakalamıyordu. ``DetectionEngine`` örnekleri
+sütunlar halinde biriktirir; ``batch_ms`` dolduğunda ya da ``batch_boyutu``
+örneğe ulaşıldığında tüm şarj noktalarının örneklerini tek seferde NumPy ile
+değerlendirir.
+
+Kurallar (seri = (cp_id, connector_id, measurand)):
+
+- ``monotonluk``: enerji sayacı bir önceki örneğin altına düştü
+- ``hiz``: iki enerji örneği arasındaki artışın ima ettiği güç ``max_guc_w``'yi aştı
+- ``esik``: değer measurand için tanımlı [alt, üst] aralığının dışında
+- ``bosluk``: iki örnek arası ``bosluk_sn``'den uzun (örnek kaybı / susturma)
+- ``gerilim``: Voltage, ``nominal_gerilim``'den ``gerilim_toleransi`` oranından fazla saptı
+
+Geç gelen örnek (serinin işlenmiş son örneğinden eski zaman damgalı) daha
+yeni duruma karşı karşılaştırılmaz: ``monotonluk`` / ``hiz`` / ``bosluk``
+ondan üretilmez, yalnız tek örnek kuralları (``esik``, ``gerilim``) çalışır;
+sayısı ``gec_ornek``'te tutulur. Batch'te ondan sonra gelen örnekler yine
+seri durumuyla karşılaştırılır.
+
+Her batch için ``BatchMetrik`` tutulur: örnek sayısı, işleme süresi ve
+örneğin motora girişinden değerlendirilmesine kadar geçen tespit gecikmesi
+(ortalama / en kötü). Batch boyutu büyüdükçe örnek başına maliyet düşer,
+gecikme artar; ``benchmarks.bench_detection`` bu dengeyi ölçer.
+"""
+import asyncio
+import logging
+import time
+from array import array
+from collections import deque, namedtuple
+
+import numpy as np
+
+from secvolt.tsdb import ENERJI, measurand_adi, zaman_us
+
+KURALLAR = ("monotonluk", "hiz", "esik", "bosluk", "gerilim")
+
+VARSAYILAN_ESIKLER = {
+    ENERJI: (0.0, 2_000_000.0),
+    "Power.Active.Import": (0.0, 350_000.0),
+    "Current.Import": (0.0, 500.0),
+    "SoC": (0.0, 100.0),
+}
+
+Alarm = namedtuple("Alarm", "kural cp_id connector_id measurand ts_us deger onceki")
+BatchMetrik = namedtuple("BatchMetrik", "boyut alarm isleme_us gecikme_ort_ms gecikme_max_ms")
+
+_TUR_ENERJI, _TUR_GERILIM, _TUR_DIGER = 0, 1, 2
+
+
+def _alarm_logla(alarm):
+    logging.warning("🚨 ANOMALİ [%s] %s/%s %s: %s (önceki: %s)", alarm.kural, alarm.cp_id,
+                    alarm.connector_id, alarm.measurand, alarm.deger, alarm.onceki)
+
+
+def _turu(measurand):
+    temel = measurand.split("/", 1)[0]
+    if temel.startswith("Energy.") and temel.endswith(".Register"):
+        return _TUR_ENERJI
+    if temel == "Voltage":
+        return _TUR_GERILIM
+    return _TUR_DIGER
+
+
+class DetectionEngine:
+    """ Örnekleri biriktirip kuralları tüm seriler üzerinde vektörel çalıştırır. """
+
+    def __init__(self, batch_ms=100.0, batch_boyutu=4096, esikler=None, max_guc_w=350_000.0,
+                 bosluk_sn=60.0, nominal_gerilim=230.0, gerilim_toleransi=0.10, kurallar=KURALLAR,
+                 alarm_fn=_alarm_logla, metrik_gecmisi=1000):
+        self.batch_ms = batch_ms
+        self.batch_boyutu = batch_boyutu
+        self.esikler = dict(VARSAYILAN_ESIKLER, **(esikler or {}))
+        self.max_guc_w = max_guc_w
+        self.bosluk_us = bosluk_sn * 1_000_000
+        self.nominal_gerilim = nominal_gerilim
+        self.gerilim_toleransi = gerilim_toleransi
+        self.kurallar = frozenset(kurallar)
+        self.alarm_fn = alarm_fn
+
+        self.metrikler = deque(maxlen=metrik_gecmisi)
+        self.toplam_ornek = 0
+        self.toplam_alarm = 0
+        self.gec_ornek = 0
+        self._gorev = None
+
+        # Seri durumu: sid -> son değer / zaman, tür ve eşikler
+        self._sid = {}
+        self._anahtarlar = []
+        self._son_deger = np.zeros(1024)
+        self._son_ts = np.zeros(1024, dtype=np.int64)
+        self._var = np.zeros(1024, dtype=bool)
+        self._tur = np.zeros(1024, dtype=np.int8)
+        self._alt = np.full(1024, -np.inf)
+        self._ust = np.full(1024, np.inf)
+
+        self._batch_sifirla()
+
+    def _batch_sifirla(self):
+        self._b_sid = array("q")
+        self._b_ts = array("q")
+        self._b_deger = array("d")
+        self._b_varis = array("d")
+
+    def _seri_kimligi(self, cp_id, connector_id, measurand):
+        anahtar = (cp_id, connector_id, measurand)
+        sid = self._sid.get(anahtar)
+        if sid is not None:
+            return sid
+        sid = len(self._anahtarlar)
+        if sid == len(self._son_deger):
+            yeni = sid * 2
+            for ad, dolgu in (("_son_deger", 0), ("_son_ts", 0), ("_var", False), ("_tur", 0),
+                              ("_alt", -np.inf), ("_ust", np.inf)):
+                eski = getattr(self, ad)
+                buyuk = np.full(yeni, dolgu, dtype=eski.dtype)
+                buyuk[:sid] = eski
+                setattr(self, ad, buyuk)
+        self._sid[anahtar] = sid
+        self._anahtarlar.append(anahtar)
+        self._tur[sid] = _turu(measurand)
+        self._alt[sid], self._ust[sid] = self.esikler.get(measurand.split("/", 1)[0], (-np.inf, np.inf))
+        return sid
+
+    # --- örnek girişi (handler'lardan) ---
+    def ekle(self, cp_id, connector_id, measurand, ts, deger):
+        self._b_sid.append(self._seri_kimligi(cp_id, connector_id, measurand))
+        self._b_ts.append(ts)
+        self._b_deger.append(deger)
+        self._b_varis.append(time.perf_counter())
+        if len(self._b_sid) >= self.batch_boyutu:
+            self.isle()
+        else:
+            gorev = self._gorev
+            if not gorev or gorev.done() or gorev.get_loop() is not asyncio._get_running_loop():
+                self._zamanlayici_kur()
+
+    def meter_values_ekle(self, cp_id, connector_id, meter_value):
+        for mv in meter_value:
+            ts = zaman_us(mv.get('timestamp'))
+            for sv in mv.get('sampled_value', ()):
+                try:
+                    deger = float(sv['value'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self.ekle(cp_id, connector_id, measurand_adi(sv), ts, deger)
+
+    def _zamanlayici_kur(self):
+        # Modül düzeyi motor ardışık asyncio.run'larda kullanılır: önceki görev bitmiş ya da
+        # kapanmış bir döngüye ait olabilir, her seferinde çalışan döngüde yeniden kurulur
+        dongu = asyncio._get_running_loop()
+        if dongu is None:
+            # Olay döngüsü yok (senkron kullanım): batch_boyutu ya da isle() ile tetiklenir
+            self._gorev = False
+        else:
+            self._gorev = dongu.create_task(self.calistir())
+
+    async def calistir(self):
+        """ Her ``batch_ms``'de bir biriken örnekleri değerlendirir. """
+        while True:
+            await asyncio.sleep(self.batch_ms / 1000)
+            try:
+                self.isle()
+            except Exception:
+                logging.exception("Tespit motoru batch hatası")
+
+    # --- vektörel değerlendirme ---
+    def isle(self):
+        """ Biriken batch'i değerlendirir; üretilen alarmları döner. """
+        n = len(self._b_sid)
+        if n == 0:
+            return []
+        t0 = time.perf_counter()
+        b_sid, b_ts, b_deger, b_varis = self._b_sid, self._b_ts, self._b_deger, self._b_varis
+        self._batch_sifirla()
+
+        sid = np.frombuffer(b_sid, dtype=np.int64)
+        ts = np.frombuffer(b_ts, dtype=np.int64)
+        deger = np.frombuffer(b_deger, dtype=np.float64)
+        sira = np.lexsort((ts, sid))
+        sid, ts, deger = sid[sira], ts[sira], deger[sira]
+
+        # Geç gelen örnek: seri durumundan eski; ilişkisel kurallara girmez
+        durum_var = self._var[sid]
+        gec = durum_var & (ts < self._son_ts[sid])
+
+        # Serinin batch içindeki ilk örneği, geç örneklerden sonraki ilk örnek de önceki değerini durumdan alır
+        ilk = np.empty(n, dtype=bool)
+        ilk[0] = True
+        np.not_equal(sid[1:], sid[:-1], out=ilk[1:])
+        durumdan = ilk.copy()
+        durumdan[1:] |= gec[:-1]
+        onceki = np.empty(n)
+        onceki[1:] = deger[:-1]
+        onceki[durumdan] = self._son_deger[sid[durumdan]]
+        onceki_ts = np.empty(n, dtype=np.int64)
+        onceki_ts[1:] = ts[:-1]
+        onceki_ts[durumdan] = self._son_ts[sid[durumdan]]
+        oncesi_var = (~durumdan | durum_var) & ~gec
+        dt = ts - onceki_ts
+        tur = self._tur[sid]
+
+        maskeler = {}
+        enerji = (tur == _TUR_ENERJI) & oncesi_var
+        if "monotonluk" in self.kurallar:
+            maskeler["monotonluk"] = enerji & (deger < onceki)
+        if "hiz" in self.kurallar:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                guc = (deger - onceki) * 3.6e9 / dt
+            maskeler["hiz"] = enerji & (dt > 0) & (guc > self.max_guc_w)
+        if "esik" in self.kurallar:
+            maskeler["esik"] = (deger < self._alt[sid]) | (deger > self._ust[sid])
+        if "bosluk" in self.kurallar:
+            maskeler["bosluk"] = oncesi_var & (dt > self.bosluk_us)
+        if "gerilim" in self.kurallar:
+            maskeler["gerilim"] = (tur == _TUR_GERILIM) & (
+                np.abs(deger - self.nominal_gerilim) > self.gerilim_toleransi * self.nominal_gerilim)
+
+        alarmlar = []
+        for kural, maske in maskeler.items():
+            for i in np.flatnonzero(maske):
+                cp_id, connector_id, measurand = self._anahtarlar[sid[i]]
+                alarmlar.append(Alarm(kural, cp_id, connector_id, measurand, int(ts[i]),
+                                      float(deger[i]), float(onceki[i]) if oncesi_var[i] else None))
+
+        # Durum: her serinin (zamanca) son örneği; geç gelen batch durumu geri almaz
+        son = np.empty(n, dtype=bool)
+        son[-1] = True
+        son[:-1] = ilk[1:]
+        s_sid, s_ts = sid[son], ts[son]
+        ileri = ~self._var[s_sid] | (s_ts >= self._son_ts[s_sid])
+        s_sid = s_sid[ileri]
+        self._son_deger[s_sid] = deger[son][ileri]
+        self._son_ts[s_sid] = s_ts[ileri]
+        self._var[s_sid] = True
+
+        bitis = time.perf_counter()
+        gecikme = bitis - np.frombuffer(b_varis, dtype=np.float64)
+        self.metrikler.append(BatchMetrik(n, len(alarmlar), (bitis - t0) * 1e6,
+                                          float(gecikme.mean()) * 1e3, float(gecikme.max()) * 1e3))
+        self.toplam_ornek += n
+        self.toplam_alarm += len(alarmlar)
+        self.gec_ornek += int(np.count_nonzero(gec))
+
+        if self.alarm_fn is not None:
+            for alarm in alarmlar:
+                self.alarm_fn(alarm)
+        return alarmlar
+
+    def ozet(self):
+        """ Son batch'lerin gecikme / maliyet özeti. """
+        if not self.metrikler:
+            return {"batch": 0, "ornek": self.toplam_ornek, "alarm": self.toplam_alarm, "gec": self.gec_ornek}
+        boyut = np.array([m.boyut for m in self.metrikler])
+        isleme = np.array([m.isleme_us for m in self.metrikler])
+        gecikme = np.array([m.gecikme_max_ms for m in self.metrikler])
+        return {
+            "batch": len(self.metrikler),
+            "ornek": self.toplam_ornek,
+            "alarm": self.toplam_alarm,
+            "gec": self.gec_ornek,
+            "ort_batch": float(boyut.mean()),
+            "ornek_basina_us": float(isleme.sum() / boyut.sum()),
+            "gecikme_p50_ms": float(np.percentile(gecikme, 50)),
+            "gecikme_p99_ms": float(np.percentile(gecikme, 99)),
+        }
@@ -0,0 +1,113 @@
+"""
+Bağlantı içi eşzamanlı mesaj dağıtımı (concurrent dispatch).
+
+ocpp kütüphanesinin ``start()`` döngüsü her gelen çağrının handler'ını
+bekledikten sonra sıradaki çerçeveyi okur. Handler içinden ``self.call(...)``
+yapıldığında (örn. Hüseyin-Korkutan istemcisinde RemoteStartTransaction ->
+StartTransaction) beklenen cevap, handler bitmeden okunamaz; yavaş bir
+handler da bağlantıdaki tüm sonraki çerçeveleri bekletir (head-of-line).
+
+``ConcurrentDispatchMixin`` gelen her çağrıyı ayrı bir görevde çalıştırır ve
+alma döngüsünü hemen serbest bırakır, böylece cevaplar (CallResult) her zaman
+okunur. Kurallar:
+
+- OCPP'nin sıra gerektirdiği aksiyonlar (``siralama_gruplari``) aynı şeritte
+  geliş sırasıyla, birbiri ardına çalışır; örneğin StartTransaction,
+  MeterValues ve StopTransaction işlem şeridini paylaşır.
+- Aynı anda en fazla ``max_inflight`` handler çalışır; ``max_bekleyen``
+  aşılırsa yeni çağrı GenericError ile reddedilir (bellek sınırlı kalır,
+  alma döngüsü hiç bloklanmaz).
+"""
+import asyncio
+import logging
+
+from ocpp.exceptions import GenericError, OCPPError
+
+LOGGER = logging.getLogger("ocpp")
+
+# OCPP 1.6'da sırası korunması gereken aksiyonlar -> şerit adı
+SIRALAMA_GRUPLARI = {
+    "BootNotification": "kayit",
+    "StartTransaction": "islem",
+    "MeterValues": "islem",
+    "StopTransaction": "islem",
+    "StatusNotification": "durum",
+    "RemoteStartTransaction": "uzaktan",
+    "RemoteStopTransaction": "uzaktan",
+    "ChangeAvailability": "uzaktan",
+    "Reset": "uzaktan",
+}
+
+
+class ConcurrentDispatchMixin:
+    """
+    ChargePoint alt sınıflarına eklenir (``class X(ConcurrentDispatchMixin, cp)``).
+    FastCodecMixin ile birlikte kullanılacaksa bu mixin MRO'da önce gelmelidir.
+    """
+
+    max_inflight = 32
+    max_bekleyen = 1024
+    siralama_gruplari = SIRALAMA_GRUPLARI
+
+    def _dispatch_durumu(self):
+        try:
+            return self._dispatch
+        except AttributeError:
+            self._dispatch = (asyncio.Semaphore(self.max_inflight), {}, set())
+            return self._dispatch
+
+    async def _handle_call(self, msg):
+        sem, seritler, gorevler = self._dispatch_durumu()
+        if len(gorevler) >= self.max_bekleyen:
+            raise GenericError(details={"cause": "Too many in-flight requests on this connection"})
+
+        serit = self.siralama_gruplari.get(msg.action)
+        kilit = None
+        if serit is not None:
+            kilit = seritler.get(serit)
+            if kilit is None:
+                kilit = seritler[serit] = asyncio.Lock()
+
+        gorev = asyncio.ensure_future(self._eszamanli_calistir(msg, sem, kilit))
+        gorevler.add(gorev)
+        gorev.add_done_callback(gorevler.discard)
+
+    async def _eszamanli_calistir(self, msg, sem, kilit):
+        try:
+            if kilit is None:
+                async with sem:
+                    await super()._handle_call(msg)
+            else:
+                # Şerit kilidi FIFO'dur: görevler geliş sırasıyla oluşturulduğu için sıra korunur
+                async with kilit:
+                    async with sem:
+                        await super()._handle_call(msg)
+        except OCPPError as error:
+            LOGGER.exception("Error while handling request '%s'", msg)
+            await self._send(msg.create_call_error(error).to_json())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            LOGGER.exception("Error while handling request '%s'", msg)
+
+    async def start(self):
+        try:
+            await super().start()
+        finally:
+            _, _, gorevler = self._dispatch_durumu()
+            for gorev in list(gorevler):
+                gorev.cancel()
+
+    async def run_with(self, *coros):
+        """
+        Alma döngüsünü verilen coroutine'lerle birlikte çalıştırır. Coroutine'ler
+        bitince döngü açık kalır; bağlantı kapanınca kalan coroutine'ler iptal edilir.
+        """
+        alma = asyncio.ensure_future(self.start())
+        yan = [asyncio.ensure_future(c) for c in coros]
+        try:
+            await alma
+        finally:
+            for g in yan:
+                g.cancel()
+            await asyncio.gather(*yan, return_exceptions=True)
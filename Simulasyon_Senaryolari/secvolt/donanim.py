@@ -0,0 +1,413 @@
+"""
+asyncio uyumlu CAN giriş/çıkış katmanı.
+
+İstemcilerin her biri ``donanima_komut_yolla`` kopyasında ``can_bus.send(msg)``
+çağrısını OCPP handler'larının (``on_remote_start`` / ``on_remote_stop``)
+içinden senkron yapıyordu. Umut-Mihyaz'daki gibi doymuş bir hatta gönderim
+bloklanır ve tüm OCPP olay döngüsü durur. Bu modül gönderimleri kuyruğa alıp
+ayrı bir görevde iletir; handler hiç beklemez.
+
+- ``AsyncCanBus``: python-can ``BusABC`` sarmalayıcısı. Dosya tanımlayıcısı
+  olan arayüzlerde (socketcan) gönderim ``send(timeout=0)`` ile engellemesiz
+  denenir, verici tamponu doluysa soket ``add_writer`` ile yazılabilir olana
+  kadar beklenir. Tanımlayıcısı olmayan arayüzlerde gönderim tek iş parçacıklı
+  bir yürütücüde yapılır. Alım ``can.Notifier``'ın olay döngüsü modu ile
+  (``add_reader``) gelir; çekirdek filtreleri ``filtre_ayarla`` ile kurulur.
+- ``VirtualCanBus``: süreç içi sanal hat; ``baglan()`` ile düğüm (aynı API)
+  verir. ``bitrate`` verilirse çerçeve süresi ve arabulucu (arbitration)
+  modellenir: bekleyen çerçevelerden en düşük kimlikli olan hattı alır, doymuş
+  hatta yüksek kimlikli çerçeveler gecikir. ``bitrate=None`` anında teslim eder.
+  ``vcan0`` olmadan ölçüm için kullanılır (``benchmarks.bench_donanim``).
+
+Ortak API (``_CanTasiyici``):
+
+- ``gonder_nowait(msg)``: kuyruğa alır, iletim ``Future``'ını döner; kuyruk
+  doluysa ``None`` (``dusen`` sayılır). Olay döngüsünü hiç bloklamaz.
+- ``await gonder(msg, zaman_asimi)``: hatta çıkana kadar bekler;
+  süre dolarsa ``asyncio.TimeoutError`` (çerçeve kuyruktan düşürülür).
+- ``gonder_toplu(mesajlar)``: birden fazla çerçeveyi tek çağrıda kuyruğa alır.
+- ``await al(zaman_asimi)`` / ``dinleyici_ekle(fn)``: alım.
+"""
+import asyncio
+import collections
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import can
+
+
+def cerceve_bit(msg):
+    """ Bit doldurma hariç çerçeve uzunluğu (SOF..IFS): standart 47, genişletilmiş 67 bit + veri. """
+    return (67 if msg.is_extended_id else 47) + 8 * len(msg.data)
+
+
+def filtre_eslesir(filtreler, msg):
+    """ python-can ``can_filters`` biçiminde (can_id, can_mask, extended) yazılım filtresi. """
+    if not filtreler:
+        return True
+    for f in filtreler:
+        if "extended" in f and f["extended"] != msg.is_extended_id:
+            continue
+        if (msg.arbitration_id ^ f["can_id"]) & f["can_mask"] == 0:
+            return True
+    return False
+
+
+class _CanTasiyici:
+    """ Gönderim kuyruğu, alım kuyruğu/dinleyiciler ve sayaçlar; iletim alt sınıfta. """
+
+    def __init__(self, tx_kuyrugu=1024, rx_kuyrugu=4096):
+        self.tx_kuyrugu = tx_kuyrugu
+        self.rx_kuyrugu = rx_kuyrugu
+        self._tx = collections.deque()
+        self._tx_olay = None
+        self._tx_gorev = None
+        self._rx = collections.deque()
+        self._rx_bekleyen = None
+        self._dinleyiciler = []
+        self.filtreler = None
+        self.kapali = False
+
+        self.gonderilen = 0
+        self.alinan = 0
+        self.dusen = 0
+        self.rx_dusen = 0
+        self.hata = 0
+        self.zaman_asimi = 0
+
+    # --- gönderim ---
+    def gonder_nowait(self, msg):
+        """ Çerçeveyi kuyruğa alır; iletildiğinde tamamlanan Future ya da kuyruk doluysa None. """
+        if self.kapali or len(self._tx) >= self.tx_kuyrugu:
+            self.dusen += 1
+            return None
+        fut = asyncio.get_running_loop().create_future()
+        self._tx.append((msg, fut))
+        self._kuyruga_alindi()
+        return fut
+
+    def _kuyruga_alindi(self):
+        if self._tx_gorev is None:
+            self._tx_olay = asyncio.Event()
+            self._tx_gorev = asyncio.get_running_loop().create_task(self._verici())
+        self._tx_olay.set()
+
+    def dolu(self):
+        """ Gönderim kuyruğu dolu mu (``gonder_nowait`` None dönecek mi). """
+        return self.kapali or len(self._tx) >= self.tx_kuyrugu
+
+    def gonder_toplu(self, mesajlar):
+        """ Mesajları sırayla kuyruğa alır; Future listesi (dolu kuyrukta None öğeler). """
+        return [self.gonder_nowait(m) for m in mesajlar]
+
+    async def gonder(self, msg, zaman_asimi=None):
+        fut = self.gonder_nowait(msg)
+        if fut is None:
+            raise can.CanOperationError("Gönderim kuyruğu dolu")
+        try:
+            return await asyncio.wait_for(fut, zaman_asimi)
+        except asyncio.TimeoutError:
+            # Henüz hatta çıkmadıysa kuyruktan düşer (verici iptal edilmiş Future'ı atlar)
+            self.zaman_asimi += 1
+            raise
+
+    async def _verici(self):
+        tx = self._tx
+        while not self.kapali:
+            if not tx:
+                self._tx_olay.clear()
+                await self._tx_olay.wait()
+                continue
+            msg, fut = tx.popleft()
+            if fut.done():
+                continue
+            try:
+                await self._ilet(msg)
+            except Exception as e:
+                self.hata += 1
+                if not fut.done():
+                    fut.set_exception(e)
+                    # Bekleyen yoksa "exception never retrieved" uyarısı çıkmasın
+                    fut.exception()
+                continue
+            self.gonderilen += 1
+            if not fut.done():
+                fut.set_result(msg)
+
+    async def _ilet(self, msg):
+        raise NotImplementedError
+
+    # --- alım ---
+    def _teslim(self, msg):
+        if self.filtreler and not filtre_eslesir(self.filtreler, msg):
+            return
+        self.alinan += 1
+        for fn in self._dinleyiciler:
+            fn(msg)
+        if self._rx_bekleyen is not None and not self._rx_bekleyen.done():
+            self._rx_bekleyen.set_result(msg)
+            self._rx_bekleyen = None
+            return
+        if len(self._rx) >= self.rx_kuyrugu:
+            self._rx.popleft()
+            self.rx_dusen += 1
+        self._rx.append(msg)
+
+    def dinleyici_ekle(self, fn):
+        """ Her alınan çerçeve için olay döngüsünde ``fn(msg)`` çağrılır. """
+        self._dinleyiciler.append(fn)
+
+    def dinleyici_cikar(self, fn):
+        self._dinleyiciler.remove(fn)
+
+    async def al(self, zaman_asimi=None):
+        """ Sıradaki çerçeve; süre dolarsa None. """
+        if self._rx:
+            return self._rx.popleft()
+        self._rx_bekleyen = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(self._rx_bekleyen, zaman_asimi)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._rx_bekleyen = None
+
+    def filtre_ayarla(self, filtreler):
+        self.filtreler = list(filtreler) if filtreler else None
+
+    async def kapat(self):
+        self.kapali = True
+        if self._tx_gorev is not None:
+            self._tx_gorev.cancel()
+            try:
+                await self._tx_gorev
+            except asyncio.CancelledError:
+                pass
+        while self._tx:
+            _, fut = self._tx.popleft()
+            fut.cancel()
+
+    def istatistik(self):
+        return {"gonderilen": self.gonderilen, "alinan": self.alinan, "dusen": self.dusen,
+                "rx_dusen": self.rx_dusen, "hata": self.hata, "zaman_asimi": self.zaman_asimi,
+                "tx_bekleyen": len(self._tx)}
+
+
+class AsyncCanBus(_CanTasiyici):
+    """ python-can hattını olay döngüsünü bloklamadan kullanır. """
+
+    def __init__(self, bus, tx_kuyrugu=1024, rx_kuyrugu=4096, gonderim_zaman_asimi=1.0):
+        super().__init__(tx_kuyrugu, rx_kuyrugu)
+        self.bus = bus
+        self.gonderim_zaman_asimi = gonderim_zaman_asimi
+        self._notifier = None
+        self._yurutucu = None
+        try:
+            self._fd = bus.fileno()
+        except (NotImplementedError, AttributeError):
+            self._fd = -1
+
+    def alim_baslat(self):
+        """ Alımı olay döngüsüne bağlar (fd varsa ``add_reader``, yoksa Notifier iş parçacığı). """
+        if self._notifier is None:
+            self._notifier = can.Notifier(self.bus, [self._teslim], loop=asyncio.get_running_loop())
+
+    def dinleyici_ekle(self, fn):
+        super().dinleyici_ekle(fn)
+        self.alim_baslat()
+
+    async def al(self, zaman_asimi=None):
+        self.alim_baslat()
+        return await super().al(zaman_asimi)
+
+    def filtre_ayarla(self, filtreler):
+        """ Filtreler çekirdeğe (socketcan) iletilir; istenmeyen çerçeve sürece hiç ulaşmaz. """
+        self.bus.set_filters(list(filtreler) if filtreler else None)
+        self.filtreler = None
+
+    async def _ilet(self, msg):
+        if self._fd < 0:
+            if self._yurutucu is None:
+                self._yurutucu = ThreadPoolExecutor(max_workers=1, thread_name_prefix="can-tx")
+            await asyncio.get_running_loop().run_in_executor(self._yurutucu, self.bus.send, msg,
+                                                             self.gonderim_zaman_asimi)
+            return
+        son = time.monotonic() + self.gonderim_zaman_asimi
+        while True:
+            try:
+                self.bus.send(msg, timeout=0)
+                return
+            except can.CanOperationError:
+                kalan = son - time.monotonic()
+                if kalan <= 0:
+                    raise
+                await self._yazilabilir(kalan)
+
+    async def _yazilabilir(self, zaman_asimi):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        loop.add_writer(self._fd, lambda: fut.done() or fut.set_result(None))
+        try:
+            await asyncio.wait_for(fut, zaman_asimi)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            loop.remove_writer(self._fd)
+
+    async def kapat(self):
+        await super().kapat()
+        if self._notifier is not None:
+            self._notifier.stop()
+        if self._yurutucu is not None:
+            self._yurutucu.shutdown(wait=False)
+        self.bus.shutdown()
+
+
+class SanalCanDugumu(_CanTasiyici):
+    """ ``VirtualCanBus`` üzerindeki bir düğüm; gönderim kuyruğunu hat görevi boşaltır. """
+
+    def __init__(self, hat, tx_kuyrugu, rx_kuyrugu, kendi_mesajini_al):
+        super().__init__(tx_kuyrugu, rx_kuyrugu)
+        self.hat = hat
+        self.kendi_mesajini_al = kendi_mesajini_al
+
+    def _kuyruga_alindi(self):
+        self.hat._uyandir()
+
+    async def kapat(self):
+        await super().kapat()
+        self.hat.dugumler.remove(self)
+
+
+class VirtualCanBus:
+    """
+    Süreç içi CAN hattı. Tek bir hat görevi düğümlerin gönderim kuyruklarını
+    boşaltır (düğüm başına görev ya da çerçeve başına uyanma yok).
+
+    ``bitrate=None`` ise kuyruktaki çerçeveler gönderen dışındaki tüm düğümlere
+    bir sonraki döngü turunda teslim edilir. Aksi halde her adımda kuyruk
+    başlarından en düşük kimlikli çerçeve hattı kazanır ve çerçeve süresi
+    kadar hat zamanı ilerler; görev her uyandığında geçen süreye sığan
+    çerçeveleri toplu teslim eder (arabulucu, teslim anında kuyrukta olanlar
+    arasında yapılır).
+    """
+
+    def __init__(self, bitrate=None):
+        self.bitrate = bitrate
+        self.dugumler = []
+        self._olay = None
+        self._gorev = None
+        self.hat_zamani = 0.0
+        self.mesgul_sure = 0.0
+        self.cerceve = 0
+        self._baslangic = None
+
+    def baglan(self, tx_kuyrugu=1024, rx_kuyrugu=4096, kendi_mesajini_al=False):
+        dugum = SanalCanDugumu(self, tx_kuyrugu, rx_kuyrugu, kendi_mesajini_al)
+        self.dugumler.append(dugum)
+        return dugum
+
+    def _uyandir(self):
+        if self._gorev is None:
+            loop = asyncio.get_running_loop()
+            self._olay = asyncio.Event()
+            self._baslangic = self.hat_zamani = loop.time()
+            self._gorev = loop.create_task(self._hat())
+        self._olay.set()
+
+    def _ilet(self, kaynak, msg, fut):
+        self.cerceve += 1
+        kaynak.gonderilen += 1
+        for d in self.dugumler:
+            if d is not kaynak or d.kendi_mesajini_al:
+                d._teslim(msg)
+        if not fut.done():
+            fut.set_result(msg)
+
+    def _kazanan(self):
+        """ Kuyruk başı en düşük kimlikli düğüm (iptal edilmiş çerçeveler atlanır). """
+        en_iyi = None
+        for d in self.dugumler:
+            tx = d._tx
+            while tx and tx[0][1].done():
+                tx.popleft()
+            if tx and (en_iyi is None or tx[0][0].arbitration_id < en_iyi._tx[0][0].arbitration_id):
+                en_iyi = d
+        return en_iyi
+
+    async def _hat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            dugum = self._kazanan()
+            if dugum is None:
+                self._olay.clear()
+                await self._olay.wait()
+                self.hat_zamani = max(self.hat_zamani, loop.time())
+                continue
+            simdi = loop.time()
+            if self.bitrate is None:
+                for d in list(self.dugumler):
+                    tx = d._tx
+                    while tx:
+                        msg, fut = tx.popleft()
+                        if not fut.done():
+                            msg.timestamp = simdi
+                            self._ilet(d, msg, fut)
+                await asyncio.sleep(0)
+                continue
+            while dugum is not None:
+                sure = cerceve_bit(dugum._tx[0][0]) / self.bitrate
+                if self.hat_zamani + sure > simdi:
+                    break
+                msg, fut = dugum._tx.popleft()
+                self.hat_zamani += sure
+                self.mesgul_sure += sure
+                msg.timestamp = self.hat_zamani
+                self._ilet(dugum, msg, fut)
+                dugum = self._kazanan()
+            if dugum is not None:
+                await asyncio.sleep(max(0.0, self.hat_zamani + sure - simdi))
+
+    def hat_yuku(self):
+        """ Başlangıçtan bu yana hattın meşgul olduğu sürenin oranı. """
+        if self._baslangic is None:
+            return 0.0
+        gecen = asyncio.get_running_loop().time() - self._baslangic
+        return self.mesgul_sure / gecen if gecen > 0 else 0.0
+
+    async def kapat(self):
+        for d in list(self.dugumler):
+            await d.kapat()
+        if self._gorev is not None:
+            self._gorev.cancel()
+            try:
+                await self._gorev
+            except asyncio.CancelledError:
+                pass
+
+
+def komut_mesaji(can_id, data):
+    return can.Message(arbitration_id=can_id, data=data, is_extended_id=False)
+
+
+def komut_yolla(tasiyici, can_id, data):
+    """
+    Röle / kontrol komutunu engellemesiz kuyruğa alır (istemcilerdeki
+    ``donanima_komut_yolla`` gövdesi). İletim sonucu ayrıca loglanır.
+    """
+    fut = tasiyici.gonder_nowait(komut_mesaji(can_id, data))
+    if fut is None:
+        logging.error("Donanım Hatası: gönderim kuyruğu dolu, ID %s düşürüldü", hex(can_id))
+        return None
+
+    def bitti(f):
+        if f.cancelled():
+            return
+        if f.exception() is not None:
+            logging.error("Donanım Hatası: %s", f.exception())
+        else:
+            logging.info("Donanıma İletildi -> ID: %s Data: %s", hex(can_id), data)
+
+    fut.add_done_callback(bitti)
+    return fut
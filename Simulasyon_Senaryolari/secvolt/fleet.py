@@ -0,0 +1,317 @@
+"""
+Sanal şarj noktası filosu (yük üreteci).
+
+cp_client.SablonChargePoint davranışından on binlerce sanal şarj noktası
+üretir ve bunları birkaç süreç x birkaç olay döngüsü (thread) üzerinde
+çoğullar. Her sanal şarj noktası kendi websocket bağlantısını açar,
+BootNotification gönderir, ardından ayarlanan aralıklarla Heartbeat ve
+MeterValues gönderir. Filonun bir yüzdesi senaryo klasörlerindeki saldırı
+davranışlarıyla (örn. Kevser-Aslan ``send_anomalous_meter_values``) çalışır.
+
+    python -m secvolt.fleet --url ws://localhost:9000 --adet 20000 \\
+        --surec 4 --dongu 2 --rampa 60 --saldiri kevser=0.05 --saldiri samet=0.02
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import resource
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+
+import websockets
+from ocpp.v16 import call
+
+from cp_client import SablonChargePoint
+from secvolt.senaryolar import saldiri_yukle
+from secvolt.simclock import simdi
+
+# Aksiyon başına tutulan en fazla gecikme örneği (rezervuar örnekleme)
+REZERVUAR_BOYUTU = 10000
+
+
+@dataclass
+class FleetConfig:
+    url: str = "ws://localhost:9000"
+    adet: int = 1000
+    surec: int = 1
+    dongu: int = 1
+    id_onek: str = "FILO"
+    boot: bool = True
+    heartbeat_araligi: float = 60.0
+    meter_araligi: float = 5.0
+    rampa: float = 10.0
+    rampa_profili: str = "linear"  # linear | step
+    sure: float = 60.0
+    saldiri_orani: dict = field(default_factory=dict)
+    tohum: int = 0
+
+
+class FleetStats:
+    """ Aksiyon başına sayaç, hata ve gecikme örneklerini toplar. """
+
+    def __init__(self, tohum=0):
+        self.baglanti_basarili = 0
+        self.baglanti_hatali = 0
+        self.aksiyonlar = {}
+        self._rng = random.Random(tohum)
+
+    def kaydet(self, aksiyon, gecikme=None, hata=False):
+        kayit = self.aksiyonlar.get(aksiyon)
+        if kayit is None:
+            kayit = self.aksiyonlar[aksiyon] = [0, 0, []]
+        kayit[0] += 1
+        if hata:
+            kayit[1] += 1
+            return
+        ornekler = kayit[2]
+        if len(ornekler) < REZERVUAR_BOYUTU:
+            ornekler.append(gecikme)
+        else:
+            j = self._rng.randrange(kayit[0])
+            if j < REZERVUAR_BOYUTU:
+                ornekler[j] = gecikme
+
+    def birlestir(self, diger):
+        self.baglanti_basarili += diger.baglanti_basarili
+        self.baglanti_hatali += diger.baglanti_hatali
+        for aksiyon, (adet, hata, ornekler) in diger.aksiyonlar.items():
+            kayit = self.aksiyonlar.setdefault(aksiyon, [0, 0, []])
+            kayit[0] += adet
+            kayit[1] += hata
+            kayit[2].extend(ornekler)
+
+    def ozet(self, sure):
+        satirlar = {}
+        for aksiyon, (adet, hata, ornekler) in sorted(self.aksiyonlar.items()):
+            ornekler = sorted(ornekler)
+            if len(ornekler) > 1:
+                yuzdelik = statistics.quantiles(ornekler, n=100, method="inclusive")
+            else:
+                yuzdelik = [ornekler[0] if ornekler else 0.0] * 99
+            satirlar[aksiyon] = {
+                "adet": adet,
+                "hata": hata,
+                "mesaj_sn": adet / sure,
+                "p50_ms": yuzdelik[49] * 1000,
+                "p90_ms": yuzdelik[89] * 1000,
+                "p99_ms": yuzdelik[98] * 1000,
+                "max_ms": ornekler[-1] * 1000 if ornekler else 0.0,
+            }
+        return satirlar
+
+
+def rol_dagilimi(cfg):
+    """ Her sanal şarj noktasının rolünü ('normal' veya saldırı adı) belirler. """
+    roller = ["normal"] * cfg.adet
+    sira = list(range(cfg.adet))
+    random.Random(cfg.tohum).shuffle(sira)
+    i = 0
+    for ad, oran in sorted(cfg.saldiri_orani.items()):
+        n = int(round(cfg.adet * oran))
+        for j in sira[i:i + n]:
+            roller[j] = ad
+        i += n
+    return roller
+
+
+def baslangic_zamani(cfg, index):
+    """ Rampa profiline göre sanal şarj noktasının bağlanma gecikmesi (sn). """
+    if cfg.rampa <= 0:
+        return 0.0
+    oran = index / max(1, cfg.adet)
+    if cfg.rampa_profili == "step":
+        # 10 eşit basamakta bağlan
+        return cfg.rampa * int(oran * 10) / 10
+    return cfg.rampa * oran
+
+
+def _zamanli_yap(cp, ist):
+    """ cp.call'ı sarar; saldırı metotlarının gönderdikleri de ölçülür. """
+    asil_call = cp.call
+
+    async def zamanli_call(payload, *args, **kwargs):
+        aksiyon = type(payload).__name__
+        t0 = time.perf_counter()
+        try:
+            cevap = await asil_call(payload, *args, **kwargs)
+        except Exception:
+            ist.kaydet(aksiyon, hata=True)
+            raise
+        ist.kaydet(aksiyon, time.perf_counter() - t0)
+        return cevap
+
+    cp.call = zamanli_call
+
+
+async def _heartbeat_dongusu(cp, cfg, rng):
+    await asyncio.sleep(rng.uniform(0, cfg.heartbeat_araligi))
+    while True:
+        await cp.call(call.Heartbeat())
+        await asyncio.sleep(cfg.heartbeat_araligi)
+
+
+async def _meter_dongusu(cp, cfg, rng):
+    """ cp_client.SablonChargePoint.send_meter_values ile aynı normal davranış """
+    sayac = 0
+    await asyncio.sleep(rng.uniform(0, cfg.meter_araligi))
+    while True:
+        sayac += 10
+        payload = [{
+            "timestamp": simdi().isoformat(),
+            "sampled_value": [{"value": str(sayac), "unit": "Wh"}]
+        }]
+        await cp.call(call.MeterValues(connector_id=1, meter_value=payload))
+        await asyncio.sleep(cfg.meter_araligi)
+
+
+async def sanal_sarj_noktasi(index, rol, cfg, bitis, ist):
+    rng = random.Random(cfg.tohum * 1_000_003 + index)
+    await asyncio.sleep(baslangic_zamani(cfg, index))
+    cp_id = f"{cfg.id_onek}-{index:06d}"
+
+    if rol == "normal":
+        sinif, saldiri_metodu, saldiri_kwargs = SablonChargePoint, None, {}
+    else:
+        sinif, saldiri_metodu, saldiri_kwargs = saldiri_yukle(rol)
+
+    try:
+        ws = await websockets.connect(f"{cfg.url}/{cp_id}", subprotocols=['ocpp1.6'])
+    except Exception as e:
+        ist.baglanti_hatali += 1
+        logging.debug(f"[{cp_id}] Bağlantı hatası: {e}")
+        return
+    ist.baglanti_basarili += 1
+
+    cp = sinif(cp_id, ws)
+    _zamanli_yap(cp, ist)
+    gorevler = [asyncio.ensure_future(cp.start())]
+    try:
+        if cfg.boot:
+            await cp.call(call.BootNotification(
+                charge_point_model="SecVolt-Filo", charge_point_vendor="GroupProject"))
+        gorevler.append(asyncio.ensure_future(_heartbeat_dongusu(cp, cfg, rng)))
+        if saldiri_metodu:
+            gorevler.append(asyncio.ensure_future(getattr(cp, saldiri_metodu)(**saldiri_kwargs)))
+        elif rol == "normal":
+            gorevler.append(asyncio.ensure_future(_meter_dongusu(cp, cfg, rng)))
+        kalan = bitis - asyncio.get_running_loop().time()
+        if kalan > 0:
+            await asyncio.wait(gorevler, timeout=kalan, return_when=asyncio.FIRST_EXCEPTION)
+    except Exception as e:
+        logging.debug(f"[{cp_id}] Oturum hatası: {e}")
+    finally:
+        for g in gorevler:
+            g.cancel()
+        await asyncio.gather(*gorevler, return_exceptions=True)
+        await ws.close()
+
+
+def _dongu_calistir(indeksler, roller, cfg, bitis, ist):
+    async def calistir():
+        # Bitiş duvar saatinden döngü saatine çevrilir (SECVOLT_SAAT=sanal ise döngü saati sanaldır)
+        son = asyncio.get_running_loop().time() + bitis - time.monotonic()
+        await asyncio.gather(*(sanal_sarj_noktasi(i, roller[i], cfg, son, ist) for i in indeksler))
+    asyncio.run(calistir())
+
+
+def _surec_main(surec_no, cfg, roller, bitis_farki, sonuc_kuyrugu):
+    # Her bağlantı bir dosya tanımlayıcısı harcar; yumuşak sınırı sert sınıra çek
+    _, sert = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (sert, sert))
+
+    bitis = time.monotonic() + bitis_farki
+    indeksler = list(range(surec_no, cfg.adet, cfg.surec))
+    istatistikler = []
+    threadler = []
+    for d in range(cfg.dongu):
+        ist = FleetStats(tohum=cfg.tohum + surec_no * 100 + d)
+        istatistikler.append(ist)
+        t = threading.Thread(
+            target=_dongu_calistir,
+            args=(indeksler[d::cfg.dongu], roller, cfg, bitis, ist),
+            name=f"filo-{surec_no}-{d}",
+        )
+        t.start()
+        threadler.append(t)
+    for t in threadler:
+        t.join()
+
+    toplam = FleetStats()
+    for ist in istatistikler:
+        toplam.birlestir(ist)
+    sonuc_kuyrugu.put(toplam)
+
+
+def run_fleet(cfg):
+    """ Filoyu çalıştırır, tüm süreçlerin birleşik istatistiğini döner. """
+    roller = rol_dagilimi(cfg)
+    # Saldırı modülleri fork'tan önce bir kez yüklenir (thread'ler arası yarışı önler)
+    for ad in cfg.saldiri_orani:
+        saldiri_yukle(ad)
+    bitis_farki = cfg.rampa + cfg.sure
+    ctx = multiprocessing.get_context('fork')
+    kuyruk = ctx.Queue()
+    surecler = [
+        ctx.Process(target=_surec_main, args=(i, cfg, roller, bitis_farki, kuyruk), name=f"filo-{i}")
+        for i in range(cfg.surec)
+    ]
+    for p in surecler:
+        p.start()
+    toplam = FleetStats()
+    for _ in surecler:
+        toplam.birlestir(kuyruk.get())
+    for p in surecler:
+        p.join()
+    return toplam
+
+
+def _saldiri_orani(deger):
+    ad, _, oran = deger.partition("=")
+    return ad, float(oran)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SecVolt sanal şarj noktası filosu")
+    parser.add_argument('--url', default="ws://localhost:9000")
+    parser.add_argument('--adet', type=int, default=1000, help="Sanal şarj noktası sayısı")
+    parser.add_argument('--surec', type=int, default=1, help="Süreç sayısı")
+    parser.add_argument('--dongu', type=int, default=1, help="Süreç başına olay döngüsü (thread)")
+    parser.add_argument('--heartbeat', type=float, default=60.0, help="Heartbeat aralığı (sn)")
+    parser.add_argument('--meter', type=float, default=5.0, help="MeterValues aralığı (sn)")
+    parser.add_argument('--rampa', type=float, default=10.0, help="Tüm filonun bağlanma süresi (sn)")
+    parser.add_argument('--rampa-profili', choices=['linear', 'step'], default='linear')
+    parser.add_argument('--sure', type=float, default=60.0, help="Rampa sonrası ölçüm süresi (sn)")
+    parser.add_argument('--saldiri', type=_saldiri_orani, action='append', default=[],
+                        metavar="AD=ORAN", help="Saldırı karışımı, örn. kevser=0.05")
+    parser.add_argument('--boot-yok', action='store_true', help="BootNotification gönderme")
+    parser.add_argument('--tohum', type=int, default=0)
+    parser.add_argument('--log-seviyesi', default="ERROR")
+    args = parser.parse_args()
+
+    # Saldırı metotları her mesajda uyarı loglar; filo ölçeğinde sadece hatalar basılır
+    logging.basicConfig(level=args.log_seviyesi, format='%(asctime)s - [FİLO] - %(message)s', force=True)
+
+    cfg = FleetConfig(
+        url=args.url, adet=args.adet, surec=args.surec, dongu=args.dongu,
+        boot=not args.boot_yok, heartbeat_araligi=args.heartbeat, meter_araligi=args.meter,
+        rampa=args.rampa, rampa_profili=args.rampa_profili, sure=args.sure,
+        saldiri_orani=dict(args.saldiri), tohum=args.tohum,
+    )
+    print(f"--- FİLO BAŞLATILIYOR: {cfg.adet} şarj noktası, {cfg.surec} süreç x {cfg.dongu} döngü ---")
+    t0 = time.monotonic()
+    ist = run_fleet(cfg)
+    gecen = time.monotonic() - t0
+
+    print(f"Bağlantı: {ist.baglanti_basarili} başarılı, {ist.baglanti_hatali} hatalı ({gecen:.1f} sn)")
+    print(f"{'Aksiyon':<18} {'Adet':>9} {'Hata':>6} {'Mesaj/sn':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for aksiyon, s in ist.ozet(gecen).items():
+        print(f"{aksiyon:<18} {s['adet']:>9} {s['hata']:>6} {s['mesaj_sn']:>10.1f} "
+              f"{s['p50_ms']:>8.2f} {s['p99_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
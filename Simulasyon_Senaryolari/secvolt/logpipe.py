@@ -0,0 +1,201 @@
+"""
+Olay döngüsünü bloklamayan, kuyruklu log hattı.
+
+``logging.basicConfig`` ile kurulan StreamHandler her kaydı çağıran thread'de
+biçimlendirir ve stderr'e senkron yazar; yük altında OCPP handler'larının
+zamanı string biçimlendirme ve terminal yazımıyla geçer. Bu modülde:
+
+- Handler (``BoundedQueueHandler``) kaydı biçimlendirmeden sınırlı bir
+  kuyruğa koyar. Kuyruk doluysa açık bir politika uygulanır:
+  ``drop_new`` (yeni kaydı at), ``drop_old`` (en eski kaydı at) veya
+  ``sample`` (her N kayıttan birini tut). ``koru_seviye`` ve üstü (varsayılan
+  WARNING) kayıtlar hiçbir politikada düşürülmez.
+- Biçimlendirme tembeldir: ``logging.info("... %s", deger)`` çağrısındaki
+  argümanlar ancak arka plan yazıcı thread'inde mesaja dönüştürülür. Bu yüzden
+  handler'larda f-string yerine %-argüman kullanılmalıdır.
+- Yazıcı (``LogWriter``) kuyruğu toplu olarak boşaltır ve kayıtları düz metin
+  ya da yapısal JSONL olarak tek ``write`` çağrısıyla yazar.
+
+Ortam değişkeni ``SECVOLT_LOG=jsonl`` verilirse ``kur`` yapısal çıktıya geçer.
+
+Fork edilen süreçlere (``secvolt.workers`` işçileri, filo süreçleri) yazıcı
+thread'i geçmez; ``kur`` ile kurulan hat çocukta ``os.register_at_fork`` ile
+boş bir kuyrukla yeniden başlatılır.
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+from collections import deque
+
+try:
+    import orjson
+
+    def _json_satir(d):
+        return orjson.dumps(d, default=str).decode()
+except ImportError:
+    import json
+
+    def _json_satir(d):
+        return json.dumps(d, ensure_ascii=False, default=str)
+
+POLITIKALAR = ("drop_new", "drop_old", "sample")
+
+# Son kur() çağrısının (handler, yazıcı) çifti; fork sonrası çocukta yeniden başlatılır
+_aktif = None
+
+# LogRecord'un standart alanları; bunların dışındakiler 'extra' ile gelmiştir
+_STANDART_ALANLAR = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class BoundedQueueHandler(logging.Handler):
+    """ Kayıtları biçimlendirmeden sınırlı bir kuyruğa koyan handler. """
+
+    def __init__(self, kapasite=10000, politika="drop_new", ornekleme=10, koru_seviye=logging.WARNING):
+        if politika not in POLITIKALAR:
+            raise ValueError(f"Bilinmeyen politika: {politika} (Seçenekler: {', '.join(POLITIKALAR)})")
+        super().__init__()
+        self.kuyruk = deque()
+        self.kapasite = kapasite
+        self.politika = politika
+        self.ornekleme = ornekleme
+        self.koru_seviye = koru_seviye
+        self.dusurulen = 0
+        self._baski_sayaci = 0
+
+    def handle(self, record):
+        # Handler kilidi alınmaz: deque.append/popleft thread-safe'tir
+        if self.filter(record):
+            self.emit(record)
+        return record
+
+    def emit(self, record):
+        kuyruk = self.kuyruk
+        if len(kuyruk) >= self.kapasite and record.levelno < self.koru_seviye:
+            if self.politika == "drop_new":
+                self.dusurulen += 1
+                return
+            if self.politika == "sample":
+                self._baski_sayaci += 1
+                if self._baski_sayaci % self.ornekleme:
+                    self.dusurulen += 1
+                    return
+            try:
+                kuyruk.popleft()
+                self.dusurulen += 1
+            except IndexError:
+                pass
+        kuyruk.append(record)
+
+
+class JsonlFormatter(logging.Formatter):
+    """ Her kaydı tek satırlık JSON nesnesine çevirir (şablon, argümanlar ve extra alanlar ayrı). """
+
+    def format(self, record):
+        d = {
+            "ts": record.created,
+            "seviye": record.levelname,
+            "mesaj": record.getMessage(),
+        }
+        if record.args:
+            d["sablon"] = record.msg
+            d["args"] = record.args
+        for ad, deger in record.__dict__.items():
+            if ad not in _STANDART_ALANLAR:
+                d[ad] = deger
+        if record.exc_info:
+            d["hata"] = self.formatException(record.exc_info)
+        return _json_satir(d)
+
+
+class LogWriter(threading.Thread):
+    """ Kuyruğu periyodik olarak boşaltıp kayıtları toplu yazan arka plan thread'i. """
+
+    def __init__(self, handler, akim=None, formatter=None, aralik=0.05):
+        super().__init__(name="secvolt-log-yazici", daemon=True)
+        self.handler = handler
+        self.akim = akim or sys.stderr
+        self.formatter = formatter or logging.Formatter()
+        self.aralik = aralik
+        self._dur = threading.Event()
+        self._raporlanan_dusurme = 0
+
+    def bosalt(self):
+        kuyruk = self.handler.kuyruk
+        satirlar = []
+        while True:
+            try:
+                record = kuyruk.popleft()
+            except IndexError:
+                break
+            try:
+                satirlar.append(self.formatter.format(record))
+            except Exception:
+                satirlar.append(f"LOG BİÇİMLENDİRME HATASI: {record.msg!r} {record.args!r}")
+
+        dusurulen = self.handler.dusurulen
+        if dusurulen != self._raporlanan_dusurme:
+            satirlar.append(f"[LOG] Kuyruk dolu: {dusurulen - self._raporlanan_dusurme} kayıt düşürüldü "
+                            f"(Politika: {self.handler.politika}, Toplam: {dusurulen})")
+            self._raporlanan_dusurme = dusurulen
+
+        if satirlar:
+            self.akim.write("\n".join(satirlar) + "\n")
+            self.akim.flush()
+
+    def run(self):
+        while not self._dur.wait(self.aralik):
+            self.bosalt()
+        self.bosalt()
+
+    def stop(self):
+        self._dur.set()
+        self.join()
+
+
+def kur(level=logging.INFO, format='%(asctime)s - %(message)s', bicim=None, akim=None,
+        kapasite=10000, politika="drop_new", ornekleme=10):
+    """
+    ``logging.basicConfig`` yerine kullanılır: kök logger'a kuyruklu handler
+    bağlar ve yazıcı thread'ini başlatır. ``bicim`` 'text' veya 'jsonl' olabilir;
+    verilmezse SECVOLT_LOG ortam değişkenine bakılır.
+    """
+    bicim = bicim or os.environ.get("SECVOLT_LOG", "text")
+    handler = BoundedQueueHandler(kapasite=kapasite, politika=politika, ornekleme=ornekleme)
+    formatter = JsonlFormatter() if bicim == "jsonl" else logging.Formatter(format)
+
+    kok = logging.getLogger()
+    for eski in kok.handlers[:]:
+        kok.removeHandler(eski)
+    kok.addHandler(handler)
+    kok.setLevel(level)
+
+    global _aktif
+    yazici = LogWriter(handler, akim=akim, formatter=formatter)
+    yazici.start()
+    atexit.register(yazici.stop)
+    _aktif = handler, yazici
+    return handler, yazici
+
+
+def _fork_sonrasi():
+    """ Çocuk süreçte yazıcı thread'ini yeniden başlatır (yoksa tüm kayıtlar kuyrukta kalır). """
+    global _aktif
+    if _aktif is None:
+        return
+    handler, eski = _aktif
+    # Ebeveynin kuyruğundaki kayıtları ebeveyn yazar; çocukta ikinci kez basılmasın
+    handler.kuyruk = deque()
+    handler.dusurulen = 0
+    handler._baski_sayaci = 0
+    yazici = LogWriter(handler, akim=eski.akim, formatter=eski.formatter, aralik=eski.aralik)
+    yazici.start()
+    atexit.register(yazici.stop)
+    # multiprocessing çocukları os._exit ile biter ve atexit çalışmaz; son kayıtlar finalizer ile yazılır
+    from multiprocessing import util
+    util.Finalize(yazici, yazici.stop, exitpriority=0)
+    _aktif = handler, yazici
+
+
+os.register_at_fork(after_in_child=_fork_sonrasi)
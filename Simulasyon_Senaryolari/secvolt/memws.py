@@ -0,0 +1,70 @@
+"""
+Bellek içi websocket çifti.
+
+ChargePoint sınıflarının bağlantıdan beklediği ``send`` / ``recv`` / ``close``
+arayüzünü iki asyncio kuyruğu üzerinden sağlar. TCP ve websocket çerçeveleme
+maliyeti olmadan sunucu ve istemci sınıflarını aynı süreçte konuşturmak için
+(ölçümler, senaryo koşucusu) kullanılır.
+"""
+import asyncio
+
+from websockets.exceptions import ConnectionClosedOK
+
+_KAPANIS = object()
+
+
+class MemoryWebSocket:
+    """ Çiftin bir ucu; ``karsi`` ucun kuyruğuna yazar, kendi kuyruğundan okur. """
+
+    def __init__(self, path="/", gecikme=0.0):
+        self.path = path
+        self.subprotocol = "ocpp1.6"
+        self.gecikme = gecikme
+        self.karsi = None
+        self.gelen = asyncio.Queue()
+        self.kapali = False
+        self.gonderilen = 0
+        self.alinan = 0
+
+    def _teslim_et(self, mesaj):
+        self.karsi.gelen.put_nowait(mesaj)
+
+    async def send(self, mesaj):
+        if self.kapali:
+            raise ConnectionClosedOK(None, None)
+        self.gonderilen += 1
+        if self.gecikme:
+            asyncio.get_running_loop().call_later(self.gecikme, self._teslim_et, mesaj)
+        else:
+            self._teslim_et(mesaj)
+
+    async def recv(self):
+        if self.kapali and self.gelen.empty():
+            raise ConnectionClosedOK(None, None)
+        mesaj = await self.gelen.get()
+        if mesaj is _KAPANIS:
+            self.kapali = True
+            raise ConnectionClosedOK(None, None)
+        self.alinan += 1
+        return mesaj
+
+    async def close(self, code=1000, reason=""):
+        if not self.kapali:
+            self.kapali = True
+            self.karsi.gelen.put_nowait(_KAPANIS)
+            self.gelen.put_nowait(_KAPANIS)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def websocket_cifti(path="/CHARGER-001", gecikme=0.0):
+    """ (sunucu_ucu, istemci_ucu) döner; ``gecikme`` tek yön ağ gecikmesidir (sn). """
+    sunucu = MemoryWebSocket(path, gecikme)
+    istemci = MemoryWebSocket(path, gecikme)
+    sunucu.karsi = istemci
+    istemci.karsi = sunucu
+    return sunucu, istemci
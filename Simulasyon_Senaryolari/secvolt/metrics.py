@@ -0,0 +1,362 @@
+"""
+ChargePoint mesaj yolları için aksiyon başına gecikme histogramları ve
+Prometheus metin biçiminde dışa aktarım.
+
+``@on(...)`` handler'larında ölçüm yoktu; yük altında hangi aksiyonun yavaş
+olduğu, kaç çağrının o an işlendiği görülemiyordu. ``install()`` çağrıldığında
+tüm ChargePoint alt sınıflarında (senaryo sunucuları, istemciler, filo) iki yol
+sarılır:
+
+- gelen çağrı (``yon="gelen"``): ``_handle_call``; çözülmüş mesajın şema
+  doğrulaması, handler ve cevabın gönderilmesi dahil. Asıl işi yapan iki
+  uygulama sarılır: ``ocpp.charge_point.ChargePoint._handle_call`` ve
+  ``FastCodecMixin._handle_call``. İkincisi ``super()``'i çağırmadığından
+  her mesaj bir kez sayılır; ``ConcurrentDispatchMixin`` ise ``super()``
+  ile bunlardan birine indiğinden görevde geçen gerçek süre ölçülür.
+- giden çağrı (``yon="giden"``): ``ChargePoint.call``; cevap bekleme dahil.
+
+Her (sınıf, aksiyon, yön) için bir seri tutulur: HDR tarzı log-doğrusal
+histogram (her ikinin kuvveti 16 alt kovaya bölünür, göreli hata ≤ %6.25,
+64 bitlik tüm aralık, sabit 976 tamsayı kova), o an işlenmekte olan çağrı
+sayısı (``ucusta``) ve hata adına göre sayaç. Gelen çağrıda hata, fırlatılan
+OCPPError ya da handler istisnası sonucu oluşturulan CallError'dur; giden
+çağrıda cevabın CallError (``suppress=True`` iken ``None`` döner) ya da zaman
+aşımı olmasıdır. Kayıt birkaç tamsayı işlemidir; kilit yoktur, sayılar
+olay döngüsünün thread'inde güncellenir.
+
+``sun(port)`` ayrı bir daemon thread'de ``/metrics`` HTTP uç noktasını açar
+(varsayılan yalnız 127.0.0.1). Süreç başınadır; fork edilen işçiler ve filo
+süreçleri kendi sayılarını tutar.
+
+    from secvolt import metrics
+    metrics.install()
+    metrics.sun(9464)       # curl localhost:9464/metrics
+
+Ölçüm yükü ``benchmarks.bench_metrics`` ile ölçülür.
+"""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter_ns
+
+from ocpp.charge_point import ChargePoint
+from ocpp.messages import Call
+
+from secvolt.codec import FastCodecMixin
+
+# Kova başına mantis biti: 2^ALT_BIT alt kova her ikinin kuvvetini böler
+ALT_BIT = 4
+# 64 bitlik her süre bir kovaya düşer; kayıtta sınır kontrolü gerekmez
+UST_BIT = 64
+KOVA_SAYISI = ((UST_BIT - ALT_BIT - 1) << ALT_BIT) + (2 << ALT_BIT)
+
+GELEN = "gelen"
+GIDEN = "giden"
+
+# Prometheus histogramının sabit sınırları (saniye); HDR kovalarından türetilir
+PROM_SINIRLARI = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                  0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROM_KANTILLER = (0.5, 0.9, 0.99, 0.999)
+
+
+def kova_araligi(indis):
+    """ Kovanın kapsadığı [alt, ust) ns aralığı. """
+    if indis < (2 << ALT_BIT):
+        return indis, indis + 1
+    kaydir = (indis >> ALT_BIT) - 1
+    mantis = indis - (kaydir << ALT_BIT)
+    return mantis << kaydir, (mantis + 1) << kaydir
+
+
+class Histogram:
+    """
+    Sabit boyutlu log-doğrusal gecikme histogramı (ns). Kayıt yalnız kovayı
+    ve toplamı artırır; adet ve maksimum okurken kovalardan çıkarılır.
+    """
+
+    __slots__ = ("kovalar", "toplam")
+
+    def __init__(self):
+        self.kovalar = [0] * KOVA_SAYISI
+        self.toplam = 0
+
+    def kaydet(self, ns):
+        kaydir = ns.bit_length() - ALT_BIT - 1
+        self.kovalar[(kaydir << ALT_BIT) + (ns >> kaydir) if kaydir > 0 else ns] += 1
+        self.toplam += ns
+
+    @property
+    def adet(self):
+        return sum(self.kovalar)
+
+    def maks(self, kovalar=None):
+        """ Gözlenen en büyük değerin kovasının üst sınırı (ns). """
+        kovalar = kovalar or self.kovalar
+        for i in range(len(kovalar) - 1, -1, -1):
+            if kovalar[i]:
+                return kova_araligi(i)[1] - 1
+        return 0
+
+    def kantil(self, q, kovalar=None):
+        """ q. kantil (ns): hedef sıradaki örneğin kovasının orta noktası. """
+        kovalar = kovalar or list(self.kovalar)
+        adet = sum(kovalar)
+        if not adet:
+            return 0
+        hedef = max(1, int(q * adet + 0.5))
+        kumulatif = 0
+        for i, n in enumerate(kovalar):
+            if n:
+                kumulatif += n
+                if kumulatif >= hedef:
+                    alt, ust = kova_araligi(i)
+                    return (alt + ust - 1) // 2
+        return 0
+
+    def birlestir(self, diger):
+        for i, n in enumerate(diger.kovalar):
+            if n:
+                self.kovalar[i] += n
+        self.toplam += diger.toplam
+
+
+class Seri(Histogram):
+    """ Bir (sınıf, aksiyon, yön) üçlüsünün histogramı, uçuştaki çağrı sayısı ve hataları. """
+
+    __slots__ = ("sinif", "aksiyon", "yon", "ucusta", "hatalar")
+
+    def __init__(self, sinif, aksiyon, yon):
+        super().__init__()
+        self.sinif = sinif
+        self.aksiyon = aksiyon
+        self.yon = yon
+        self.ucusta = 0
+        self.hatalar = {}
+
+    def hata(self, ad):
+        self.hatalar[ad] = self.hatalar.get(ad, 0) + 1
+
+
+# yön -> ChargePoint sınıfı -> aksiyon (gelen) ya da payload sınıfı (giden) -> Seri.
+# İki düzeyli sözlük: sıcak yolda demet oluşturup özetlemekten ucuz.
+_SERILER = {GELEN: {}, GIDEN: {}}
+_ASILLAR = {}
+
+
+def sinif_adi(sinif):
+    return f"{sinif.__module__}.{sinif.__qualname__}"
+
+
+def _seri_ekle(yon, sinif, aksiyon):
+    anahtar = aksiyon
+    if isinstance(aksiyon, type):
+        # Giden çağrıda anahtar payload sınıfıdır; ad ocpp'deki gibi türetilir
+        aksiyon = aksiyon.__name__
+        if aksiyon.endswith("Payload"):
+            aksiyon = aksiyon[:-7]
+    seri = Seri(sinif_adi(sinif), aksiyon, yon)
+    _SERILER[yon].setdefault(sinif, {})[anahtar] = seri
+    return seri
+
+
+# Sarmalayıcılarda kayıt (Histogram.kaydet, ALT_BIT=4) metot çağrısı olmadan, satır içi yapılır
+
+def _handle_call_sar(asil):
+    gelen = _SERILER[GELEN]
+
+    async def _handle_call(self, msg):
+        try:
+            seri = gelen[type(self)][msg.action]
+        except KeyError:
+            seri = _seri_ekle(GELEN, type(self), msg.action)
+        seri.ucusta += 1
+        t0 = perf_counter_ns()
+        try:
+            sonuc = await asil(self, msg)
+        except Exception as e:
+            seri.hata(type(e).__name__)
+            raise
+        finally:
+            ns = perf_counter_ns() - t0
+            seri.ucusta -= 1
+            kaydir = ns.bit_length() - 5
+            seri.kovalar[(kaydir << 4) + (ns >> kaydir) if kaydir > 0 else ns] += 1
+            seri.toplam += ns
+        if msg._secvolt_hata is not None:
+            # Handler istisnası: kütüphane CallError'u gönderip sessizce döner
+            seri.hata(msg._secvolt_hata)
+        return sonuc
+
+    _handle_call.__wrapped__ = asil
+    return _handle_call
+
+
+def _call_sar(asil):
+    giden = _SERILER[GIDEN]
+
+    async def call(self, payload, suppress=True, unique_id=None):
+        try:
+            seri = giden[type(self)][type(payload)]
+        except KeyError:
+            seri = _seri_ekle(GIDEN, type(self), type(payload))
+        seri.ucusta += 1
+        t0 = perf_counter_ns()
+        try:
+            sonuc = await asil(self, payload, suppress, unique_id)
+        except Exception as e:
+            seri.hata(type(e).__name__)
+            raise
+        finally:
+            ns = perf_counter_ns() - t0
+            seri.ucusta -= 1
+            kaydir = ns.bit_length() - 5
+            seri.kovalar[(kaydir << 4) + (ns >> kaydir) if kaydir > 0 else ns] += 1
+            seri.toplam += ns
+        if sonuc is None:
+            seri.hata("CallError")
+        return sonuc
+
+    call.__wrapped__ = asil
+    return call
+
+
+def _create_call_error_sar(asil):
+    def create_call_error(self, exception):
+        self._secvolt_hata = type(exception).__name__
+        return asil(self, exception)
+
+    create_call_error.__wrapped__ = asil
+    return create_call_error
+
+
+def install():
+    """ Gelen / giden çağrı yollarını sarar; tekrar çağrılması etkisizdir. """
+    if _ASILLAR:
+        return
+    for sinif in (ChargePoint, FastCodecMixin):
+        _ASILLAR[(sinif, "_handle_call")] = sinif.__dict__["_handle_call"]
+        sinif._handle_call = _handle_call_sar(sinif.__dict__["_handle_call"])
+    _ASILLAR[(ChargePoint, "call")] = ChargePoint.__dict__["call"]
+    ChargePoint.call = _call_sar(ChargePoint.__dict__["call"])
+    _ASILLAR[(Call, "create_call_error")] = Call.__dict__["create_call_error"]
+    Call.create_call_error = _create_call_error_sar(Call.__dict__["create_call_error"])
+    Call._secvolt_hata = None
+
+
+def kaldir():
+    """ Sarılan yolları eski haline getirir; biriken seriler korunur. """
+    for (sinif, ad), asil in _ASILLAR.items():
+        setattr(sinif, ad, asil)
+    if _ASILLAR:
+        del Call._secvolt_hata
+    _ASILLAR.clear()
+
+
+def kurulu():
+    return bool(_ASILLAR)
+
+
+def sifirla():
+    for siniflar in _SERILER.values():
+        siniflar.clear()
+
+
+def seriler():
+    """ Serilerin anlık kopyası; başka thread'den güvenle okunur. """
+    return [seri for siniflar in _SERILER.values() for aksiyonlar in list(siniflar.values())
+            for seri in list(aksiyonlar.values())]
+
+
+def ozet():
+    """ Seri başına tablo satırı (µs), sınıf / aksiyon / yön sıralı. """
+    satirlar = []
+    for s in seriler():
+        kovalar = list(s.kovalar)
+        satirlar.append({
+            "sinif": s.sinif, "aksiyon": s.aksiyon, "yon": s.yon, "adet": sum(kovalar),
+            "p50_us": s.kantil(0.5, kovalar) / 1e3,
+            "p99_us": s.kantil(0.99, kovalar) / 1e3,
+            "max_us": s.maks(kovalar) / 1e3,
+            "ucusta": s.ucusta, "hata": sum(s.hatalar.values()),
+        })
+    return sorted(satirlar, key=lambda r: (r["sinif"], r["aksiyon"], r["yon"]))
+
+
+def _etiket(deger):
+    return str(deger).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus_metni():
+    """ Tüm serileri Prometheus metin biçiminde (0.0.4) döner. """
+    sinirlar_ns = [int(s * 1e9) for s in PROM_SINIRLARI]
+    hist, kantil, ucusta, hata = [], [], [], []
+    for s in sorted(seriler(), key=lambda s: (s.sinif, s.aksiyon, s.yon)):
+        etiket = f'class="{_etiket(s.sinif)}",action="{_etiket(s.aksiyon)}",direction="{s.yon}"'
+        # Okuma sırasında döngü yazmaya devam eder; tek kopya üzerinden tutarlı sayılar
+        kovalar = list(s.kovalar)
+        adet, toplam = sum(kovalar), s.toplam
+
+        sayilar = [0] * (len(sinirlar_ns) + 1)
+        for i, n in enumerate(kovalar):
+            if n:
+                sayilar[bisect.bisect_left(sinirlar_ns, kova_araligi(i)[1] - 1)] += n
+        kumulatif = 0
+        for sinir, n in zip(PROM_SINIRLARI, sayilar):
+            kumulatif += n
+            hist.append(f'secvolt_ocpp_duration_seconds_bucket{{{etiket},le="{sinir:g}"}} {kumulatif}')
+        hist.append(f'secvolt_ocpp_duration_seconds_bucket{{{etiket},le="+Inf"}} {adet}')
+        hist.append(f"secvolt_ocpp_duration_seconds_sum{{{etiket}}} {toplam / 1e9:.9f}")
+        hist.append(f"secvolt_ocpp_duration_seconds_count{{{etiket}}} {adet}")
+
+        for q in PROM_KANTILLER:
+            kantil.append(f'secvolt_ocpp_latency_seconds{{{etiket},quantile="{q:g}"}} '
+                          f"{s.kantil(q, kovalar) / 1e9:.9f}")
+        kantil.append(f"secvolt_ocpp_latency_seconds_sum{{{etiket}}} {toplam / 1e9:.9f}")
+        kantil.append(f"secvolt_ocpp_latency_seconds_count{{{etiket}}} {adet}")
+
+        ucusta.append(f"secvolt_ocpp_inflight{{{etiket}}} {s.ucusta}")
+        for ad, n in sorted(dict(s.hatalar).items()):
+            hata.append(f'secvolt_ocpp_errors_total{{{etiket},error="{_etiket(ad)}"}} {n}')
+
+    satirlar = [
+        "# HELP secvolt_ocpp_duration_seconds OCPP çağrı süresi (gelen: handler yolu, giden: cevap dahil)",
+        "# TYPE secvolt_ocpp_duration_seconds histogram", *hist,
+        "# HELP secvolt_ocpp_latency_seconds OCPP çağrı süresi kantilleri (HDR histogramından)",
+        "# TYPE secvolt_ocpp_latency_seconds summary", *kantil,
+        "# HELP secvolt_ocpp_inflight O an işlenmekte olan çağrı sayısı",
+        "# TYPE secvolt_ocpp_inflight gauge", *ucusta,
+        "# HELP secvolt_ocpp_errors_total CallError ya da istisnayla biten çağrılar",
+        "# TYPE secvolt_ocpp_errors_total counter", *hata,
+    ]
+    return "\n".join(satirlar) + "\n"
+
+
+class _MetrikIsleyici(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        govde = prometheus_metni().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(govde)))
+        self.end_headers()
+        self.wfile.write(govde)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def sun(port=9464, adres="127.0.0.1"):
+    """
+    ``/metrics`` uç noktasını daemon thread'de açar; sunucu nesnesini döner
+    (``port=0`` ise atanan port ``sunucu.server_address[1]``, durdurmak için
+    ``sunucu.shutdown()``). Kayıtlar olay döngüsünü beklemeden okunur.
+    """
+    sunucu = ThreadingHTTPServer((adres, port), _MetrikIsleyici)
+    sunucu.daemon_threads = True
+    threading.Thread(target=sunucu.serve_forever, name="secvolt-metrik", daemon=True).start()
+    logging.info("Metrik uç noktası: http://%s:%d/metrics", adres, sunucu.server_address[1])
+    return sunucu
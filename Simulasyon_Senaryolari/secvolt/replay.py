@@ -0,0 +1,421 @@
+"""
+Kayıtlı OCPP oturumlarını bir CSMS'e N kat hızda yeniden oynatan yük testi.
+
+``csms_server.py --kayit-dizini`` ile ``on_connect``'te tutulan segment
+kaydı (``secvolt.segmentlog``) şarj noktası ve bağlantı bazında oturumlara
+ayrılır; açılış/kapanış işaretleri aynı şarj noktasının art arda
+bağlantılarını böler (işaretsiz eski kayıtlarda şarj noktası başına tek
+oturum).
+
+Her oturum kendi bağlantısıyla, kayıttaki zamanlamanın ``hiz`` katında
+oynatılır (``None``: beklemeden):
+
+- Şarj noktasının gönderdiği çağrılar (``[2, uid, aksiyon, ...]``) kayıttaki
+  metin ve benzersiz kimlikle aynen gönderilir; cevap aynı kimlikle
+  eşleştirilip aksiyon başına gecikme ölçülür. Cevap tipi (sonuç / hata)
+  kayıttakinden farklıysa ``uyumsuz`` sayılır.
+- ``sirali`` açıkken (OCPP 1.6: şarj noktası başına tek bekleyen çağrı) bir
+  sonraki çağrı önceki cevaplanmadan gönderilmez; planlı andan kayma ayrıca
+  raporlanır.
+- CSMS'in başlattığı çağrılara (RemoteStart, SetChargingProfile...) kayıtta
+  aynı aksiyona verilmiş sıradaki cevap, yeni benzersiz kimlikle döner;
+  karşılığı yoksa ``NotImplemented`` CallError.
+
+Hedef ya bir URL (``websockets``) ya da süreç içinde yüklenen bir senaryo
+sunucusudur (``--sunucu Umut-Mihyaz`` -> ``modul_yukle(..., "server")``,
+``--sunucu csms_server``); ikincisinde bağlantılar ``secvolt.memws`` ile
+kurulur, ölçüm TCP'siz sunucu maliyetini verir. Oturumlar tek olay
+döngüsünde eşzamanlı koşar; ``kopya`` her oturumu farklı şarj noktası
+kimlikleriyle çoğaltır, ``surec`` oturumları ``fork`` süreçlerine böler
+(``secvolt.fleet`` ile aynı desen).
+
+Yük içindeki zaman damgaları (MeterValues ``timestamp`` vb.) kayıttaki gibi
+gönderilir.
+
+    python -m secvolt.replay kayitlar/surec-* --url ws://localhost:9000 --hiz 10 --kopya 50
+    python -m secvolt.replay kayitlar/surec-* --sunucu Umut-Mihyaz --hiz max
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import resource
+import time
+from collections import deque, namedtuple
+from dataclasses import dataclass
+
+import websockets
+
+from secvolt.codec import dumps, loads
+from secvolt.fleet import FleetStats, REZERVUAR_BOYUTU
+from secvolt.memws import websocket_cifti
+from secvolt.segmentlog import BAGLANTI, GELEN, GIDEN, KOPMA, _zaman, oku
+from secvolt.senaryolar import modul_yukle
+
+CALL, CALLRESULT, CALLERROR = 2, 3, 4
+
+# cerceveler: [(ts_us, yon, çerçeve baytları)]
+Oturum = namedtuple("Oturum", "cp_id baslangic_us bitis_us cerceveler")
+# cagrilar: [(ofset_us, uid, aksiyon, metin, kayıttaki cevap tipi)]; cevaplar: aksiyon -> deque[mesaj]
+Plan = namedtuple("Plan", "cp_id baslangic_us sure_us cagrilar cevaplar")
+
+
+@dataclass
+class ReplayConfig:
+    url: str = "ws://localhost:9000"
+    sunucu: str = None
+    hiz: float = 1.0
+    kopya: int = 1
+    surec: int = 1
+    sirali: bool = True
+    zaman_asimi: float = 30.0
+    tohum: int = 0
+
+
+class ReplayStats(FleetStats):
+    """ Aksiyon başına gecikmeye ek olarak oynatma sayaçları ve planlı andan kayma. """
+
+    def __init__(self, tohum=0):
+        super().__init__(tohum)
+        self.oturum = 0
+        self.gonderilen = 0
+        self.cevapsiz = 0
+        self.uyumsuz = 0
+        self.beklenmeyen = 0
+        self.sunucu_cagrisi = 0
+        self.eslesmeyen_sunucu = 0
+        self.kopan = 0
+        self.kayma = []
+        self._kayma_adet = 0
+
+    def kayma_ekle(self, sn):
+        self._kayma_adet += 1
+        if len(self.kayma) < REZERVUAR_BOYUTU:
+            self.kayma.append(sn)
+        else:
+            j = self._rng.randrange(self._kayma_adet)
+            if j < REZERVUAR_BOYUTU:
+                self.kayma[j] = sn
+
+    def birlestir(self, diger):
+        super().birlestir(diger)
+        for ad in ("oturum", "gonderilen", "cevapsiz", "uyumsuz", "beklenmeyen", "sunucu_cagrisi",
+                   "eslesmeyen_sunucu", "kopan", "_kayma_adet"):
+            setattr(self, ad, getattr(self, ad) + getattr(diger, ad))
+        self.kayma.extend(diger.kayma)
+
+    def kayma_ozet(self):
+        s = sorted(self.kayma)
+        if not s:
+            return {"p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        return {"p50_ms": s[len(s) // 2] * 1000, "p99_ms": s[min(len(s) - 1, int(len(s) * 0.99))] * 1000,
+                "max_ms": s[-1] * 1000}
+
+
+# --- kayıttan oturumlar ---
+def oturumlar(kayitlar, cp_onek=None):
+    """ Segment kayıtlarını (şarj noktası, bağlantı) oturumlarına ayırır; başlangıca göre sıralı. """
+    acik, biten = {}, []
+
+    def kapat(cp_id):
+        cerceveler = acik.pop(cp_id, None)
+        if cerceveler:
+            biten.append(Oturum(cp_id, cerceveler[0][0], cerceveler[-1][0], cerceveler))
+
+    for k in kayitlar:
+        cp_id = bytes(k.cp_id).decode()
+        if cp_onek and not cp_id.startswith(cp_onek):
+            continue
+        if k.yon == BAGLANTI:
+            kapat(cp_id)
+            acik[cp_id] = [(k.ts_us, k.yon, b"")]
+        elif k.yon == KOPMA:
+            if cp_id in acik:
+                acik[cp_id].append((k.ts_us, k.yon, b""))
+            kapat(cp_id)
+        else:
+            acik.setdefault(cp_id, []).append((k.ts_us, k.yon, bytes(k.cerceve)))
+    for cp_id in list(acik):
+        kapat(cp_id)
+    biten.sort(key=lambda o: o.baslangic_us)
+    return biten
+
+
+def planla(oturum):
+    """ Oturumu gönderilecek çağrılara ve CSMS çağrılarına verilecek kayıtlı cevaplara çevirir. """
+    cagrilar, cevap_tipi, sunucu_cagrilari, cevaplar = [], {}, {}, {}
+    for ts, yon, cerceve in oturum.cerceveler:
+        if yon not in (GELEN, GIDEN):
+            continue
+        try:
+            msg = loads(cerceve)
+            tip, uid = msg[0], msg[1]
+        except Exception:
+            continue
+        if yon == GELEN:
+            if tip == CALL:
+                cagrilar.append((ts - oturum.baslangic_us, uid, msg[2], cerceve.decode()))
+            elif uid in sunucu_cagrilari:
+                cevaplar.setdefault(sunucu_cagrilari.pop(uid), deque()).append(msg)
+        elif tip == CALL:
+            sunucu_cagrilari[uid] = msg[2]
+        else:
+            cevap_tipi[uid] = tip
+    return Plan(oturum.cp_id, oturum.baslangic_us, oturum.bitis_us - oturum.baslangic_us,
+                [(o, uid, aksiyon, metin, cevap_tipi.get(uid)) for o, uid, aksiyon, metin in cagrilar], cevaplar)
+
+
+# --- oynatma ---
+class _OturumOynatici:
+    def __init__(self, plan, cp_id, ws, ist, cfg):
+        self.plan = plan
+        self.cp_id = cp_id
+        self.ws = ws
+        self.ist = ist
+        self.cfg = cfg
+        # Her kopya kayıttaki cevap kuyruklarını baştan tüketir
+        self.cevaplar = {a: deque(c) for a, c in plan.cevaplar.items()}
+        self.bekleyen = {}
+        self.kapali = False
+
+    async def oku(self):
+        loop, ist, bekleyen = asyncio.get_running_loop(), self.ist, self.bekleyen
+        try:
+            while True:
+                msg = loads(await self.ws.recv())
+                if msg[0] == CALL:
+                    await self._sunucu_cagrisi(msg)
+                    continue
+                kayit = bekleyen.pop(msg[1], None)
+                if kayit is None:
+                    ist.beklenmeyen += 1
+                    continue
+                aksiyon, t_gonder, beklenen, fut = kayit
+                if msg[0] == CALLRESULT:
+                    ist.kaydet(aksiyon, loop.time() - t_gonder)
+                else:
+                    ist.kaydet(aksiyon, hata=True)
+                if beklenen is not None and beklenen != msg[0]:
+                    ist.uyumsuz += 1
+                if not fut.done():
+                    fut.set_result(msg[0])
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.kapali = True
+            for aksiyon, _, _, fut in bekleyen.values():
+                if not fut.done():
+                    fut.set_result(None)
+
+    async def _sunucu_cagrisi(self, msg):
+        self.ist.sunucu_cagrisi += 1
+        kuyruk = self.cevaplar.get(msg[2])
+        if kuyruk:
+            kayitli = kuyruk.popleft()
+            cevap = [CALLRESULT, msg[1], kayitli[2]] if kayitli[0] == CALLRESULT else \
+                [CALLERROR, msg[1], *kayitli[2:]]
+        else:
+            self.ist.eslesmeyen_sunucu += 1
+            cevap = [CALLERROR, msg[1], "NotImplemented", "Kayıtta karşılığı yok", {}]
+        await self.ws.send(dumps(cevap))
+
+    async def calistir(self, baslangic, hiz):
+        loop, ist, bekleyen, cfg = asyncio.get_running_loop(), self.ist, self.bekleyen, self.cfg
+        for ofset, uid, aksiyon, metin, beklenen in self.plan.cagrilar:
+            if self.kapali:
+                break
+            if hiz is not None:
+                hedef = baslangic + ofset / 1e6 / hiz
+                kalan = hedef - loop.time()
+                if kalan > 0:
+                    await asyncio.sleep(kalan)
+                ist.kayma_ekle(max(0.0, loop.time() - hedef))
+            fut = loop.create_future()
+            bekleyen[uid] = (aksiyon, loop.time(), beklenen, fut)
+            await self.ws.send(metin)
+            ist.gonderilen += 1
+            if cfg.sirali:
+                await self._bekle(uid, [fut])
+        await self._bekle(None, [k[3] for k in bekleyen.values()])
+        if hiz is not None and not self.kapali:
+            # Kayıttaki oturum süresince açık kal: CSMS'in başlattığı çağrılar gelebilsin
+            kalan = baslangic + self.plan.sure_us / 1e6 / hiz - loop.time()
+            if kalan > 0:
+                await asyncio.sleep(kalan)
+
+    async def _bekle(self, uid, futs):
+        if not futs:
+            return
+        _, bekleyenler = await asyncio.wait(futs, timeout=self.cfg.zaman_asimi)
+        for u, (aksiyon, _, _, fut) in list(self.bekleyen.items()):
+            if fut in bekleyenler and (uid is None or u == uid):
+                del self.bekleyen[u]
+                self.ist.cevapsiz += 1
+                self.ist.kaydet(aksiyon, hata=True)
+
+
+def sunucu_yukle(ad):
+    """ Senaryo klasörü adı ya da ``csms_server`` -> ``on_connect(websocket, path)``. """
+    if ad in ("csms", "csms_server"):
+        return importlib.import_module("csms_server").on_connect
+    return modul_yukle(ad, "server").on_connect
+
+
+def baglayici(cfg):
+    """ ``cp_id -> websocket`` döndüren korutin fonksiyonu (URL ya da süreç içi sunucu). """
+    if cfg.sunucu is None:
+        async def baglan(cp_id):
+            return await websockets.connect(f"{cfg.url}/{cp_id}", subprotocols=['ocpp1.6'])
+        return baglan
+
+    on_connect = sunucu_yukle(cfg.sunucu)
+    gorevler = set()
+
+    async def baglan(cp_id):
+        sunucu_ucu, istemci_ucu = websocket_cifti(f"/{cp_id}")
+        gorev = asyncio.create_task(on_connect(sunucu_ucu, f"/{cp_id}"))
+        gorevler.add(gorev)
+        gorev.add_done_callback(gorevler.discard)
+        return istemci_ucu
+    return baglan
+
+
+async def _oturum(plan, cp_id, baslangic, baglan, cfg, ist):
+    loop = asyncio.get_running_loop()
+    hiz = cfg.hiz or None
+    kalan = baslangic - loop.time()
+    if hiz is not None and kalan > 0:
+        await asyncio.sleep(kalan)
+    try:
+        ws = await baglan(cp_id)
+    except Exception as e:
+        ist.baglanti_hatali += 1
+        logging.debug("[%s] Bağlantı hatası: %s", cp_id, e)
+        return
+    ist.baglanti_basarili += 1
+    ist.oturum += 1
+    oynatici = _OturumOynatici(plan, cp_id, ws, ist, cfg)
+    okuyucu = asyncio.create_task(oynatici.oku())
+    try:
+        await oynatici.calistir(baslangic, hiz)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    except Exception as e:
+        logging.debug("[%s] Oturum hatası: %s", cp_id, e)
+    finally:
+        if oynatici.kapali:
+            ist.kopan += 1
+        await ws.close()
+        okuyucu.cancel()
+        await asyncio.gather(okuyucu, return_exceptions=True)
+
+
+async def oynat(planlar, cfg, ist, t0=None):
+    """ Planları (kopyalarıyla) tek olay döngüsünde eşzamanlı oynatır. """
+    if not planlar:
+        return
+    loop = asyncio.get_running_loop()
+    baglan = baglayici(cfg)
+    t0 = t0 if t0 is not None else loop.time() + 0.1
+    ilk_us = min(p.baslangic_us for p in planlar)
+    hiz = cfg.hiz or None
+    gorevler = []
+    for kopya in range(cfg.kopya):
+        for p in planlar:
+            cp_id = p.cp_id if cfg.kopya == 1 else f"{p.cp_id}-K{kopya:04d}"
+            baslangic = t0 + ((p.baslangic_us - ilk_us) / 1e6 / hiz if hiz else 0.0)
+            gorevler.append(_oturum(p, cp_id, baslangic, baglan, cfg, ist))
+    await asyncio.gather(*gorevler)
+
+
+def _surec_main(planlar, cfg, t0, sonuc_kuyrugu, surec_no):
+    _, sert = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (sert, sert))
+    ist = ReplayStats(tohum=cfg.tohum + surec_no)
+    # Varsayılan olay döngüsü saati time.monotonic: t0 süreçler arasında ortaktır
+    asyncio.run(oynat(planlar, cfg, ist, t0))
+    sonuc_kuyrugu.put(ist)
+
+
+def run_replay(planlar, cfg):
+    """ Planları ``cfg.surec`` sürece bölerek oynatır; birleşik istatistik ve geçen süre. """
+    if cfg.sunucu is not None:
+        # Sunucu modülü fork'tan önce bir kez yüklenir
+        sunucu_yukle(cfg.sunucu)
+    t_bas = time.monotonic()
+    if cfg.surec <= 1:
+        ist = ReplayStats(cfg.tohum)
+        asyncio.run(oynat(planlar, cfg, ist))
+        return ist, time.monotonic() - t_bas
+    t0 = time.monotonic() + 0.5
+    ctx = multiprocessing.get_context('fork')
+    kuyruk = ctx.Queue()
+    surecler = [ctx.Process(target=_surec_main, args=(planlar[i::cfg.surec], cfg, t0, kuyruk, i),
+                            name=f"oynatma-{i}") for i in range(cfg.surec)]
+    for p in surecler:
+        p.start()
+    ist = ReplayStats()
+    for _ in surecler:
+        ist.birlestir(kuyruk.get())
+    for p in surecler:
+        p.join()
+    return ist, time.monotonic() - t_bas
+
+
+def rapor_yazdir(ist, gecen, kayit_suresi):
+    print(f"Oturum: {ist.oturum} ({ist.baglanti_hatali} bağlantı hatası, {ist.kopan} erken kopan); "
+          f"gönderilen çağrı {ist.gonderilen:,}; kayıt {kayit_suresi:.1f} sn -> {gecen:.1f} sn "
+          f"({kayit_suresi / gecen if gecen else 0:.1f}x)")
+    print(f"{'Aksiyon':<26} {'Adet':>9} {'Hata':>6} {'Mesaj/sn':>10} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'maks ms':>9}")
+    for aksiyon, s in ist.ozet(gecen).items():
+        print(f"{aksiyon:<26} {s['adet']:>9} {s['hata']:>6} {s['mesaj_sn']:>10.1f} {s['p50_ms']:>8.2f} "
+              f"{s['p90_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>9.2f}")
+    k = ist.kayma_ozet()
+    if ist.kayma:
+        print(f"Planlı andan kayma: p50 {k['p50_ms']:.2f} ms, p99 {k['p99_ms']:.2f} ms, maks {k['max_ms']:.2f} ms")
+    print(f"Cevapsız {ist.cevapsiz}, kayıttan farklı cevap tipi {ist.uyumsuz}, eşleşmeyen cevap "
+          f"{ist.beklenmeyen}; CSMS çağrısı {ist.sunucu_cagrisi} "
+          f"(kayıtta karşılığı yok: {ist.eslesmeyen_sunucu})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı OCPP oturumlarını CSMS'e yeniden oynatır")
+    parser.add_argument('dizin', nargs='+', help="Segment kaydı dizin(ler)i")
+    parser.add_argument('--url', default="ws://localhost:9000")
+    parser.add_argument('--sunucu', help="Süreç içi hedef: senaryo klasörü ya da csms_server")
+    parser.add_argument('--hiz', default="1", help="Hızlandırma katı ya da 'max'")
+    parser.add_argument('--kopya', type=int, default=1, help="Her oturumun eşzamanlı kopya sayısı")
+    parser.add_argument('--surec', type=int, default=1)
+    parser.add_argument('--sirasiz', action='store_true', help="Cevabı beklemeden sonraki çağrıya geç")
+    parser.add_argument('--zaman-asimi', type=float, default=30.0)
+    parser.add_argument('--cp', help="Yalnızca bu önekle başlayan şarj noktaları")
+    parser.add_argument('--baslangic', help="ISO-8601 zaman")
+    parser.add_argument('--bitis', help="ISO-8601 zaman")
+    # Sunucular normal bağlantı kapanışını da ERROR olarak loglar
+    parser.add_argument('--log-seviyesi', default="CRITICAL")
+    args = parser.parse_args()
+
+    cfg = ReplayConfig(url=args.url, sunucu=args.sunucu, hiz=None if args.hiz == "max" else float(args.hiz),
+                       kopya=args.kopya, surec=args.surec, sirali=not args.sirasiz, zaman_asimi=args.zaman_asimi)
+    if cfg.sunucu is not None:
+        sunucu_yukle(cfg.sunucu)
+    # Sunucu modülleri her mesajı loglar; yük testinde yalnız hatalar basılır
+    logging.basicConfig(level=args.log_seviyesi, format='%(asctime)s - [OYNATMA] - %(message)s', force=True)
+
+    oturum_listesi = oturumlar(oku(*args.dizin, baslangic=_zaman(args.baslangic), bitis=_zaman(args.bitis)),
+                               args.cp)
+    planlar = [planla(o) for o in oturum_listesi]
+    if not planlar:
+        print("Kayıtta oturum yok.")
+        return
+    kayit_suresi = (max(p.baslangic_us + p.sure_us for p in planlar) - planlar[0].baslangic_us) / 1e6
+    print(f"--- OYNATMA: {len(planlar)} oturum x {cfg.kopya} kopya, "
+          f"{sum(len(p.cagrilar) for p in planlar) * cfg.kopya:,} çağrı, hız {args.hiz} ---")
+    ist, gecen = run_replay(planlar, cfg)
+    rapor_yazdir(ist, gecen, kayit_suresi)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,401 @@
+"""
+Tüm saldırı senaryolarını tek süreçte (ya da süreç havuzunda) koşturan koşucu.
+
+Her senaryo klasöründe 9000 portuna bağlanan neredeyse aynı bir ``server.py``
+var; aynı anda tek senaryo çalışabiliyor, her koşu iki terminal, iki
+yorumlayıcı açılışı ve içe aktarma maliyeti demek. Koşucu senaryoların
+``server.py`` / ``client.py`` dosyalarını ``modul_yukle`` ile modül olarak
+yükler ve kendi ``main()`` fonksiyonlarını değiştirmeden aynı olay döngüsünde
+eşzamanlı çalıştırır:
+
+- Sunucu modülündeki ``serve`` ve istemci modülündeki ``websockets`` adı
+  senaryoya özel bellek içi ağla (``secvolt.memws``) değiştirilir;
+  ``websockets.connect(uri)`` TCP yerine o senaryonun ``on_connect``'ine
+  bağlanır. Senaryolar birbirinin sunucusunu görmez, port çakışması olmaz.
+- Varsayılan olarak döngü ``secvolt.simclock`` sanal saatidir: 5-25 sn'lik
+  ``asyncio.sleep``'ler beklenmez, ``--sure`` sanal saniyelik senaryo
+  CPU'nun izin verdiği hızda biter (``--gercek`` duvar saatiyle koşar).
+- Senaryo ve taraf (sunucu / istemci) bir ``contextvars`` değişkeninde
+  tutulur; senaryonun açtığı her görev bunu miras alır. Log kayıtları
+  ``[senaryo/taraf]`` önekiyle basılır, ölçümler senaryoya yazılır.
+
+Senaryo başına ölçümler:
+
+- ``mesaj``: bellek içi bağlantılardan geçen OCPP çerçevesi (iki yön),
+- ``ilk_tespit_s``: istemci başladıktan sonra sunucu tarafında ilk WARNING ve
+  üstü log kaydına (kök logger; ocpp kütüphanesinin protokol hataları hariç)
+  kadar geçen süre (sanal modda sanal saniye); ``alarm`` bu kayıtların sayısı
+  (bağlantı kapanışındaki hata logları sayılmaz),
+- ``cpu_ms``: senaryo görevlerinin adımlarında harcanan iş parçacığı CPU
+  süresi (görev fabrikası her adımı ``time.thread_time`` ile ölçer; başka
+  thread'lerde çalışan iş dahil değildir).
+
+``surec`` > 1 ise senaryolar ``fork`` süreçlerine dağıtılır (``secvolt.fleet``
+ile aynı desen); her süreç kendi grubunu kendi döngüsünde koşturur.
+
+    python -m secvolt.runner --sure 600 --surec 2
+    python -m secvolt.runner kevser samet --sure 120 --log-seviyesi INFO
+"""
+import argparse
+import asyncio
+import collections.abc
+import contextvars
+import logging
+import multiprocessing
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import websockets
+
+from secvolt import logpipe, simclock
+from secvolt.memws import websocket_cifti
+from secvolt.senaryolar import modul_yukle, senaryo_klasorleri
+
+# (SenaryoDurumu, taraf); senaryo görevleri ve onların açtığı tüm görevler miras alır
+BAGLAM = contextvars.ContextVar("secvolt_senaryo", default=None)
+
+LOG_BICIMI = '%(asctime)s - [%(senaryo)s/%(taraf)s] - %(message)s'
+
+
+@dataclass
+class RunnerConfig:
+    sure: float = 300.0
+    surec: int = 1
+    sanal: bool = True
+    gecikme: float = 0.001
+    cpu: bool = True
+    log_seviyesi: str = "ERROR"
+
+
+class SenaryoDurumu:
+    """ Bir senaryonun sayaçları; koşu bitince ``ozet()`` ile sürece döner. """
+
+    def __init__(self, klasor):
+        self.klasor = klasor
+        self.ag = None
+        self.baslangic = None
+        self.bitti = False
+        self.sure_s = 0.0
+        self.alarm = 0
+        self.ilk_tespit_s = None
+        self.log = 0
+        self.cpu_s = 0.0
+        self.gorev = 0
+        self.gorevler = set()
+        self.hata = None
+
+    def ozet(self):
+        return {
+            "senaryo": self.klasor,
+            "sure_s": self.sure_s,
+            "mesaj": self.ag.mesaj() if self.ag else 0,
+            "baglanti": len(self.ag.uclar) if self.ag else 0,
+            "alarm": self.alarm,
+            "ilk_tespit_s": self.ilk_tespit_s,
+            "log": self.log,
+            "cpu_ms": self.cpu_s * 1e3,
+            "gorev": self.gorev,
+            "hata": self.hata,
+        }
+
+
+class _BellekAgi:
+    """ Bir senaryonun sunucusu ile istemcisi arasındaki bellek içi ağ. """
+
+    def __init__(self, gecikme=0.0):
+        self.gecikme = gecikme
+        self.handler = None
+        self.hazir = asyncio.Event()
+        self.uclar = []
+        self._baglam = None
+
+    def serve(self, handler, host=None, port=None, **kwargs):
+        """ ``websockets.server.serve`` yerine geçer; ``async with`` ile kullanılır. """
+        return _Sunucu(self, handler)
+
+    def connect(self, uri, **kwargs):
+        """ ``websockets.connect`` yerine geçer; hem ``await`` hem ``async with`` desteklenir. """
+        return _Baglanti(self, uri)
+
+    async def ac(self, uri):
+        if self.handler is None:
+            raise ConnectionRefusedError(f"Senaryo sunucusu dinlemiyor: {uri}")
+        path = urlsplit(uri).path or "/"
+        sunucu_ucu, istemci_ucu = websocket_cifti(path, self.gecikme)
+        self.uclar.append((sunucu_ucu, istemci_ucu))
+        # Bağlantı görevi sunucunun bağlamında açılır: logları ve CPU'su sunucu tarafına yazılır
+        asyncio.get_running_loop().create_task(self.handler(sunucu_ucu, path), context=self._baglam.copy())
+        return istemci_ucu
+
+    def mesaj(self):
+        return sum(s.alinan + i.alinan for s, i in self.uclar)
+
+
+class _Sunucu:
+    def __init__(self, ag, handler):
+        self.ag = ag
+        self.handler = handler
+
+    async def __aenter__(self):
+        self.ag.handler = self.handler
+        self.ag._baglam = contextvars.copy_context()
+        self.ag.hazir.set()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.ag.handler = None
+
+
+class _Baglanti:
+    def __init__(self, ag, uri):
+        self.ag = ag
+        self.uri = uri
+        self.ws = None
+
+    def __await__(self):
+        return self.ag.ac(self.uri).__await__()
+
+    async def __aenter__(self):
+        self.ws = await self.ag.ac(self.uri)
+        return self.ws
+
+    async def __aexit__(self, *exc):
+        await self.ws.close()
+
+
+class _WebsocketsKabugu:
+    """ İstemci modülündeki ``websockets`` adı; ``connect`` dışındaki her şey gerçek modüle gider. """
+
+    def __init__(self, ag):
+        self.connect = ag.connect
+
+    def __getattr__(self, ad):
+        return getattr(websockets, ad)
+
+
+class _OlculenCoro(collections.abc.Coroutine):
+    """ Görev korutinini sarar; her adımın thread CPU süresini senaryoya ekler. """
+
+    __slots__ = ("_coro", "_durum")
+
+    def __init__(self, coro, durum):
+        self._coro = coro
+        self._durum = durum
+
+    def send(self, deger):
+        t0 = time.thread_time()
+        try:
+            return self._coro.send(deger)
+        finally:
+            self._durum.cpu_s += time.thread_time() - t0
+
+    def throw(self, *args):
+        t0 = time.thread_time()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._durum.cpu_s += time.thread_time() - t0
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self._coro.__await__()
+
+
+def _gorev_fabrikasi(cpu):
+    def fabrika(loop, coro, context=None):
+        baglam = (context or contextvars.copy_context()).get(BAGLAM)
+        durum = baglam[0] if baglam else None
+        if durum is not None and cpu:
+            coro = _OlculenCoro(coro, durum)
+        gorev = asyncio.Task(coro, loop=loop, context=context)
+        if durum is not None:
+            durum.gorev += 1
+            durum.gorevler.add(gorev)
+            gorev.add_done_callback(durum.gorevler.discard)
+        return gorev
+    return fabrika
+
+
+class _BaglamFiltresi(logging.Filter):
+    """ Kayda senaryo / taraf alanlarını ekler; sunucu uyarılarını tespit olarak sayar. """
+
+    def __init__(self, seviye=logging.NOTSET):
+        super().__init__()
+        self.seviye = seviye
+
+    def filter(self, record):
+        baglam = BAGLAM.get()
+        if baglam is None:
+            record.senaryo, record.taraf = "-", "-"
+            return record.levelno >= self.seviye
+        durum, taraf = baglam
+        record.senaryo, record.taraf = durum.klasor, taraf
+        durum.log += 1
+        # Senaryo kodu kök logger'a yazar; ocpp kütüphanesinin protokol hataları tespit sayılmaz
+        if taraf == "sunucu" and record.levelno >= logging.WARNING and record.name == "root" \
+                and durum.baslangic is not None and not durum.bitti:
+            durum.alarm += 1
+            if durum.ilk_tespit_s is None:
+                durum.ilk_tespit_s = asyncio.get_running_loop().time() - durum.baslangic
+        return record.levelno >= self.seviye
+
+
+async def senaryo_kos(klasor, cfg):
+    """ Senaryonun sunucu ve istemci ``main()``'ini bellek içi ağ üzerinde ``cfg.sure`` boyunca koşturur. """
+    durum = SenaryoDurumu(klasor)
+    loop = asyncio.get_running_loop()
+    try:
+        sunucu_modul = modul_yukle(klasor, "server")
+        istemci_modul = modul_yukle(klasor, "client")
+    except Exception as e:
+        durum.hata = f"yükleme: {e!r}"
+        return durum
+    durum.ag = ag = _BellekAgi(cfg.gecikme)
+    sunucu_modul.serve = ag.serve
+    istemci_modul.websockets = _WebsocketsKabugu(ag)
+
+    BAGLAM.set((durum, "sunucu"))
+    sunucu = loop.create_task(sunucu_modul.main())
+    hazir = loop.create_task(ag.hazir.wait())
+    await asyncio.wait({sunucu, hazir}, return_when=asyncio.FIRST_COMPLETED)
+    if sunucu.done():
+        durum.hata = f"sunucu: {sunucu.exception()!r}"
+        hazir.cancel()
+        return durum
+
+    BAGLAM.set((durum, "istemci"))
+    durum.baslangic = loop.time()
+    istemci = loop.create_task(istemci_modul.main())
+    await asyncio.wait({sunucu, istemci}, timeout=cfg.sure, return_when=asyncio.FIRST_COMPLETED)
+    durum.bitti = True
+    durum.sure_s = loop.time() - durum.baslangic
+    for taraf, gorev in (("istemci", istemci), ("sunucu", sunucu)):
+        if gorev.done() and not gorev.cancelled() and gorev.exception() is not None:
+            durum.hata = f"{taraf}: {gorev.exception()!r}"
+
+    # Senaryonun ateşleyip unuttuğu görevler (create_task ile açılan döngüler) de kapanır
+    for gorev in list(durum.gorevler):
+        gorev.cancel()
+    for _, istemci_ucu in ag.uclar:
+        await istemci_ucu.close()
+    await asyncio.gather(*durum.gorevler, istemci, sunucu, return_exceptions=True)
+    return durum
+
+
+async def _grup_kos(klasorler, cfg):
+    asyncio.get_running_loop().set_task_factory(_gorev_fabrikasi(cfg.cpu))
+    durumlar = await asyncio.gather(*(senaryo_kos(k, cfg) for k in klasorler))
+    return [d.ozet() for d in durumlar]
+
+
+def _grup_main(klasorler, cfg):
+    """ Bir grup senaryoyu tek döngüde koşturur; (senaryo özetleri, grup ölçümü) döner. """
+    t0 = time.perf_counter()
+    for klasor in klasorler:
+        # Yükleme hatası senaryo koşusunda raporlanır
+        try:
+            modul_yukle(klasor, "server")
+            modul_yukle(klasor, "client")
+        except Exception:
+            pass
+    yukleme_s = time.perf_counter() - t0
+    # Sunucu modülleri içe aktarılırken kendi log hattını kurar; koşucunun hattı en son kurulur
+    # Tespit sayımı WARNING kayıtlarına bakar; basılacak seviye filtrede ayrıca uygulanır
+    seviye = logging.getLevelName(cfg.log_seviyesi)
+    handler, yazici = logpipe.kur(level=min(seviye, logging.WARNING), format=LOG_BICIMI)
+    handler.addFilter(_BaglamFiltresi(seviye))
+
+    t0, c0 = time.perf_counter(), time.process_time()
+    if cfg.sanal:
+        ozetler = simclock.run(_grup_kos(klasorler, cfg))
+    else:
+        ozetler = asyncio.run(_grup_kos(klasorler, cfg))
+    grup = {"senaryo": len(klasorler), "yukleme_s": yukleme_s, "duvar_s": time.perf_counter() - t0,
+            "cpu_s": time.process_time() - c0}
+    yazici.stop()
+    return ozetler, grup
+
+
+def _surec_main(klasorler, cfg, sonuc_kuyrugu):
+    sonuc_kuyrugu.put(_grup_main(klasorler, cfg))
+
+
+def run_scenarios(klasorler, cfg):
+    """ Senaryoları ``cfg.surec`` sürece bölerek koşturur; (senaryo özetleri, grup ölçümleri) döner. """
+    if cfg.surec <= 1:
+        ozetler, grup = _grup_main(klasorler, cfg)
+        return ozetler, [grup]
+    ctx = multiprocessing.get_context('fork')
+    kuyruk = ctx.Queue()
+    surecler = [ctx.Process(target=_surec_main, args=(klasorler[i::cfg.surec], cfg, kuyruk), name=f"senaryo-{i}")
+                for i in range(cfg.surec) if klasorler[i::cfg.surec]]
+    for p in surecler:
+        p.start()
+    ozetler, gruplar = [], []
+    for _ in surecler:
+        o, g = kuyruk.get()
+        ozetler.extend(o)
+        gruplar.append(g)
+    for p in surecler:
+        p.join()
+    ozetler.sort(key=lambda o: klasorler.index(o["senaryo"]))
+    return ozetler, gruplar
+
+
+def senaryo_sec(adlar):
+    """ Klasör adının bir parçasıyla (büyük/küçük harf duyarsız) senaryoları seçer; boşsa hepsi. """
+    klasorler = senaryo_klasorleri()
+    if not adlar:
+        return klasorler
+    secilen = []
+    for ad in adlar:
+        eslesen = [k for k in klasorler if ad.casefold() in k.casefold()]
+        if not eslesen:
+            raise ValueError(f"Bilinmeyen senaryo: {ad} (Seçenekler: {', '.join(klasorler)})")
+        secilen.extend(k for k in eslesen if k not in secilen)
+    return secilen
+
+
+def rapor_yazdir(ozetler, gruplar, cfg):
+    duvar = max(g["duvar_s"] for g in gruplar)
+    birim = "sanal sn" if cfg.sanal else "sn"
+    print(f"{'Senaryo':<22} {'Süre':>7} {'Mesaj':>7} {'Mesaj/sn':>9} {'İlk tespit':>11} {'Alarm':>6} "
+          f"{'CPU ms':>8} {'µs/mesaj':>9} {'Görev':>6}  Hata")
+    for o in ozetler:
+        tespit = f"{o['ilk_tespit_s']:.2f}" if o["ilk_tespit_s"] is not None else "-"
+        us_mesaj = f"{o['cpu_ms'] * 1e3 / o['mesaj']:.0f}" if o["mesaj"] else "-"
+        print(f"{o['senaryo']:<22} {o['sure_s']:>7.1f} {o['mesaj']:>7,} {o['mesaj'] / duvar:>9,.0f} "
+              f"{tespit:>11} {o['alarm']:>6,} {o['cpu_ms']:>8.1f} {us_mesaj:>9} {o['gorev']:>6,}  "
+              f"{o['hata'] or ''}")
+    toplam_sure = sum(o["sure_s"] for o in ozetler)
+    print(f"Süre ve ilk tespit {birim}; mesaj/sn duvar saatine göre. {len(ozetler)} senaryo, "
+          f"{len(gruplar)} süreç: duvar {duvar:.2f} sn (içe aktarma "
+          f"{max(g['yukleme_s'] for g in gruplar):.2f} sn ayrı), süreç CPU {sum(g['cpu_s'] for g in gruplar):.2f} sn; "
+          f"sırayla gerçek zamanlı koşu {toplam_sure:,.0f} sn sürerdi ({toplam_sure / duvar:,.0f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Saldırı senaryolarını tek süreçte eşzamanlı koşturur")
+    parser.add_argument('senaryolar', nargs='*', help="Klasör adı ya da bir parçası (boşsa hepsi)")
+    parser.add_argument('--sure', type=float, default=300.0, help="Senaryo başına süre (sn)")
+    parser.add_argument('--surec', type=int, default=1)
+    parser.add_argument('--gercek', action='store_true', help="Sanal saat yerine duvar saatiyle koş")
+    parser.add_argument('--gecikme', type=float, default=0.001, help="Bellek içi ağın tek yön gecikmesi (sn)")
+    parser.add_argument('--cpu-olcmeden', action='store_true', help="Görev başına CPU ölçümünü kapat")
+    parser.add_argument('--log-seviyesi', default="ERROR")
+    args = parser.parse_args()
+
+    cfg = RunnerConfig(sure=args.sure, surec=args.surec, sanal=not args.gercek, gecikme=args.gecikme,
+                       cpu=not args.cpu_olcmeden, log_seviyesi=args.log_seviyesi)
+    klasorler = senaryo_sec(args.senaryolar)
+    print(f"--- SENARYO KOŞUCUSU: {len(klasorler)} senaryo x {cfg.sure:g} "
+          f"{'sanal ' if cfg.sanal else ''}sn, {cfg.surec} süreç ---")
+    ozetler, gruplar = run_scenarios(klasorler, cfg)
+    rapor_yazdir(ozetler, gruplar, cfg)
+
+
+if __name__ == '__main__':
+    main()
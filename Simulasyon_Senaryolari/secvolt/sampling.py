@@ -0,0 +1,220 @@
+"""
+Akış halinde örnekleme aralığı manipülasyonu tespiti (adaptive sampling).
+
+Samet-Altuner istemcisi rapor aralığını 8-25 sn'ye çeker, örneklerin %30'unu
+hiç göndermez ve sayacı düzleştirip sıçratır. Bu modül her (cp_id, konnektör)
+için örnek başına O(1) zaman ve sabit bellekle şu istatistikleri tutar:
+
+- Varışlar arası sürenin üstel sönümlü histogramı (log2 aralıklı kutular) ve
+  beklenen aralığın ``aralik_esik`` katından uzun aralıkların ağırlığı
+- Beklenen aralığa göre kayıp örnek oranı (gelen / beklenen örnek sayısı)
+- Sayaç düzlüğü: şarj sürerken (pozitif artışlar varken) sıfır artışlı örneklerin oranı
+
+Sönüm "forward decay" ile yapılır: ``t`` anındaki örneğin ağırlığı
+``exp(λ (t - L))``'dir (L: ortak referans zamanı). Böylece her güncelleme
+yalnızca birkaç skaler toplama yapar, eski ağırlıklara dokunmaz; oranlar
+ağırlıkların birbirine bölümüyle elde edildiği için sönüm kendiliğinden uygulanır.
+Üs büyüdüğünde tüm diziler bir kez yeniden ölçeklenir (yarı ömür 10 dk ile
+yaklaşık 12 saatte bir).
+
+Durum ``array('d')`` sütunlarında tutulur: şarj noktası başına ~200 bayt
+(16 kutu dahil) + sözlük girdisi. Hiç rapor vermeyen şarj noktaları için
+coroutine açılmaz; ``tarama()`` tüm sütunları NumPy ile tek seferde tarar.
+"""
+import asyncio
+import logging
+import math
+from array import array
+
+import numpy as np
+
+from secvolt import simclock
+from secvolt.tsdb import ENERJI, measurand_adi
+
+ARALIK, KAYIP, DUZ, SESSIZ = 1, 2, 4, 8
+BAYRAK_ADLARI = {ARALIK: "aralik_uzamasi", KAYIP: "kayip_ornek", DUZ: "sayac_duzlesmesi", SESSIZ: "sessiz"}
+
+_AGIRLIKLAR = ("w_toplam", "w_uzun", "w_beklenen", "w_gelen", "w_duz", "w_artis")
+
+
+def bayrak_adlari(bayrak):
+    return [ad for bit, ad in BAYRAK_ADLARI.items() if bayrak & bit]
+
+
+def _alarm_logla(anahtar, yeni, skor):
+    logging.warning("🚨 ÖRNEKLEME MANİPÜLASYONU %s: %s (uzun aralık: %.2f, kayıp: %.2f, düzlük: %.2f)",
+                    anahtar, ", ".join(bayrak_adlari(yeni)), skor["uzun"], skor["kayip"], skor["duz"])
+
+
+class SamplingDetector:
+    """ Şarj noktası başına O(1) güncellemeli örnekleme davranışı dedektörü. """
+
+    def __init__(self, beklenen_aralik=5.0, yari_omur=600.0, kutu_sayisi=16, min_aralik=0.25,
+                 aralik_esik=1.5, uzun_oran_esik=0.3, kayip_esik=0.2, duz_esik=0.3, sessiz_kat=6.0,
+                 isinma=8, alarm_fn=_alarm_logla):
+        self.beklenen_aralik = beklenen_aralik
+        self.lam = math.log(2) / yari_omur
+        self.kutu_sayisi = kutu_sayisi
+        self.min_aralik = min_aralik
+        self.aralik_esik = aralik_esik
+        self.uzun_oran_esik = uzun_oran_esik
+        self.kayip_esik = kayip_esik
+        self.duz_esik = duz_esik
+        self.sessiz_kat = sessiz_kat
+        self.isinma = isinma
+        self.alarm_fn = alarm_fn
+
+        self.referans = None
+        self.guncelleme = 0
+        self._slot = {}
+        self._anahtarlar = []
+        self.son_ts = array("d")
+        self.son_deger = array("d")
+        self.beklenen = array("d")
+        self.adet = array("L")
+        self.bayrak = array("B")
+        for ad in _AGIRLIKLAR:
+            setattr(self, ad, array("d"))
+        self.hist = array("d")
+        self._bos_kutular = array("d", [0.0] * kutu_sayisi)
+
+    def _yeni_slot(self, anahtar):
+        i = len(self._anahtarlar)
+        self._slot[anahtar] = i
+        self._anahtarlar.append(anahtar)
+        self.son_ts.append(0.0)
+        self.son_deger.append(0.0)
+        self.beklenen.append(self.beklenen_aralik)
+        self.adet.append(0)
+        self.bayrak.append(0)
+        for ad in _AGIRLIKLAR:
+            getattr(self, ad).append(0.0)
+        self.hist.extend(self._bos_kutular)
+        return i
+
+    def beklenen_ayarla(self, anahtar, aralik):
+        """ Şarj noktasının yapılandırılmış MeterValueSampleInterval değeri (sn). """
+        i = self._slot.get(anahtar)
+        if i is None:
+            i = self._yeni_slot(anahtar)
+        self.beklenen[i] = float(aralik)
+
+    def _yeniden_olcekle(self, ts):
+        carpan = math.exp(-self.lam * (ts - self.referans))
+        for ad in _AGIRLIKLAR + ("hist",):
+            np.frombuffer(getattr(self, ad), dtype=np.float64)[:] *= carpan
+        self.referans = ts
+
+    def guncelle(self, anahtar, ts, deger):
+        """ Tek örnek: ``ts`` varış zamanı (sn), ``deger`` enerji sayacı (Wh). """
+        i = self._slot.get(anahtar)
+        if i is None:
+            i = self._yeni_slot(anahtar)
+        if self.referans is None:
+            self.referans = ts
+        us = self.lam * (ts - self.referans)
+        if us > 50.0:
+            self._yeniden_olcekle(ts)
+            us = 0.0
+        w = math.exp(us)
+        self.guncelleme += 1
+
+        onceki = self.son_ts[i]
+        n = self.adet[i]
+        if n:
+            dt = ts - onceki
+            if dt > 0:
+                beklenen = self.beklenen[i]
+                kutu = int(math.log2(dt / self.min_aralik) * 2) if dt > self.min_aralik else 0
+                if kutu >= self.kutu_sayisi:
+                    kutu = self.kutu_sayisi - 1
+                self.hist[i * self.kutu_sayisi + kutu] += w
+                self.w_toplam[i] += w
+                if dt > self.aralik_esik * beklenen:
+                    self.w_uzun[i] += w
+                self.w_beklenen[i] += w * dt / beklenen
+                self.w_gelen[i] += w
+                fark = deger - self.son_deger[i]
+                if fark == 0:
+                    self.w_duz[i] += w
+                elif fark > 0:
+                    self.w_artis[i] += w
+        self.son_ts[i] = ts
+        self.son_deger[i] = deger
+        self.adet[i] = n + 1
+        if n >= self.isinma:
+            self._degerlendir(i)
+
+    def meter_values_ekle(self, cp_id, connector_id, meter_value, simdi=None):
+        """ Handler'dan çağrılır; varış zamanı ve enerji sayacı örneğiyle günceller. """
+        for mv in meter_value:
+            for sv in mv.get('sampled_value', ()):
+                if measurand_adi(sv) == ENERJI:
+                    try:
+                        deger = float(sv['value'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    self.guncelle((cp_id, connector_id), simclock.zaman() if simdi is None else simdi, deger)
+                    return
+
+    def skor(self, i):
+        toplam = self.w_toplam[i]
+        if toplam <= 0:
+            return {"uzun": 0.0, "kayip": 0.0, "duz": 0.0}
+        beklenen = self.w_beklenen[i]
+        kayip = 1.0 - self.w_gelen[i] / beklenen if beklenen > 0 else 0.0
+        duz = self.w_duz[i] / toplam if self.w_artis[i] / toplam > 0.1 else 0.0
+        return {"uzun": self.w_uzun[i] / toplam, "kayip": max(0.0, kayip), "duz": duz}
+
+    def _degerlendir(self, i):
+        s = self.skor(i)
+        # Yeni örnek geldiği için SESSIZ bayrağı da temizlenir
+        bayrak = 0
+        if s["uzun"] > self.uzun_oran_esik:
+            bayrak |= ARALIK
+        if s["kayip"] > self.kayip_esik:
+            bayrak |= KAYIP
+        if s["duz"] > self.duz_esik:
+            bayrak |= DUZ
+        self._bayrak_yaz(i, bayrak, s)
+
+    def _bayrak_yaz(self, i, bayrak, s):
+        yeni = bayrak & ~self.bayrak[i]
+        self.bayrak[i] = bayrak
+        if yeni and self.alarm_fn is not None:
+            self.alarm_fn(self._anahtarlar[i], yeni, s)
+
+    def tarama(self, simdi=None):
+        """ ``sessiz_kat`` x beklenen aralık boyunca rapor vermeyenleri işaretler (vektörel). """
+        if not self._anahtarlar:
+            return []
+        simdi = simclock.zaman() if simdi is None else simdi
+        son_ts = np.frombuffer(self.son_ts, dtype=np.float64)
+        beklenen = np.frombuffer(self.beklenen, dtype=np.float64)
+        bayrak = np.frombuffer(self.bayrak, dtype=np.uint8)
+        adet = np.frombuffer(self.adet, dtype=np.dtype(f"u{self.adet.itemsize}"))
+        sessiz = (adet > 0) & (simdi - son_ts > self.sessiz_kat * beklenen) & ((bayrak & SESSIZ) == 0)
+        yeni = np.flatnonzero(sessiz).tolist()
+        del son_ts, beklenen, bayrak, adet
+        for i in yeni:
+            self._bayrak_yaz(i, self.bayrak[i] | SESSIZ, self.skor(i))
+        return [self._anahtarlar[i] for i in yeni]
+
+    async def calistir(self, aralik=None):
+        """ Sessiz şarj noktası taraması; tüm filo için tek görev. """
+        aralik = aralik or self.beklenen_aralik
+        while True:
+            await asyncio.sleep(aralik)
+            self.tarama()
+
+    def isaretliler(self, bayrak=ARALIK | KAYIP | DUZ | SESSIZ):
+        """ Verilen bayraklardan en az biri işaretli anahtarlar. """
+        b = np.frombuffer(self.bayrak, dtype=np.uint8)
+        return [self._anahtarlar[i] for i in np.flatnonzero(b & bayrak).tolist()]
+
+    def histogram(self, anahtar):
+        """ Normalize edilmiş varışlar arası süre histogramı ve kutu alt sınırları (sn). """
+        i = self._slot[anahtar]
+        h = np.array(self.hist[i * self.kutu_sayisi:(i + 1) * self.kutu_sayisi])
+        sinirlar = self.min_aralik * 2 ** (np.arange(self.kutu_sayisi) / 2)
+        return (h / h.sum() if h.sum() else h), sinirlar
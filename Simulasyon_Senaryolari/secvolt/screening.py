@@ -0,0 +1,135 @@
+"""
+Authorize / StartTransaction öncesi id_tag taraması (enjeksiyon imzaları).
+
+Abdullah-Can-Tekin sunucusu SQL enjeksiyonunu tek bir alt dize testiyle
+(``"' OR '1'='1'" in id_tag``) arıyordu; büyük/küçük harf, boşluk ya da farklı
+bir totoloji ile kolayca atlatılır. Bu modül imza kümesini **tek bir birleşik
+düzenli ifadeye** derler: her kural bir isimli gruptur ve eşleşen kural
+``match.lastgroup`` ile okunur. Etiket tek geçişte taranır, kural başına ayrı
+arama yapılmaz.
+
+Kural öncelikleri listedeki sıradır: aynı konumda birden fazla kural
+eşleşebilirse öndeki kazanır, tüm eşleşmeler arasından en öncelikli olan
+raporlanır. ``karakter_seti`` (izin verilmeyen karakter) en sonda olduğundan
+yalnızca başka bir imza yoksa raporlanır. ``boyut`` OCPP 1.6 ``IdToken``
+(CiString20) sınırını ``len()`` ile denetler.
+
+Hızlı yol: meşru etiketlerin neredeyse tamamı izinli karakter kümesinde kalır.
+İmzaların çoğu en az bir izinsiz karakter (tırnak, boşluk, ``;``, ``$`` ...)
+gerektirdiğinden böyle bir etikette eşleşemez; bu kurallar ``OZEL_KARAKTER_GEREKTIREN``
+kümesindedir. Sınır içindeki ve tamamı izinli karakterlerden oluşan etiket için
+bir ``fullmatch`` ve yalnızca kalan kuralların (``information_schema``,
+``javascript:`` gibi) birleşik regex'i çalışır. Özel kurallar bu kümede
+olmadıkça her iki yolda da aranır.
+
+Kategoriler: ``sql``, ``komut``, ``yol``, ``betik``, ``bicim``, ``nosql``,
+``ldap``, ``kontrol``, ``boyut``, ``karakter_seti``.
+"""
+import logging
+import re
+from collections import namedtuple
+
+Eslesme = namedtuple("Eslesme", "kural kategori konum parca")
+
+# OCPP 1.6 IdToken: CiString20Type
+MAX_ID_TAG = 20
+
+# Gerçek kart kimlikleri bu kümenin dışına çıkmaz: RFID UID, plaka ve ISO 15118 /
+# DIN e-MAID (ayırıcı ``*``, ör. ``DE*ABC*C123456*7``)
+IZINLI_KARAKTERLER = r"A-Za-z0-9._:*\-"
+
+# (kural, kategori, desen) — sıra önceliktir
+KURALLAR = (
+    ("sql_union", "sql", r"\bunion\b(?:\s|/\*.*?\*/)+(?:all\s+)?select\b"),
+    ("sql_yigin", "sql", r";\s*(?:drop|delete|insert|update|create|alter|exec(?:ute)?|truncate|shutdown|grant)\b"),
+    ("sql_totoloji", "sql", r"['\"]\s*(?:or|and|\|\|)\s*(?:['\"]?\w*['\"]?\s*(?:=|<>|!=|\blike\b)\s*['\"]?\w*|\btrue\b|\d+\b)"),
+    ("sql_sayisal_totoloji", "sql", r"\b(?:or|and)\s+(\d+)\s*=\s*\d+"),
+    ("sql_parantez_kapama", "sql", r"['\"]\s*\)+\s*(?:or|and|;|--|#|union)"),
+    ("sql_yorum", "sql", r"['\"\s)](?:--|#)|/\*.*?\*/"),
+    ("sql_fonksiyon", "sql", r"\b(?:sleep|benchmark|pg_sleep|load_file|char|chr|concat|ascii|substring|extractvalue|updatexml)\s*\("),
+    ("sql_zaman", "sql", r"\bwaitfor\s+delay\b"),
+    ("sql_sema", "sql", r"\b(?:information_schema|sysobjects|sys\.tables|sqlite_master|pg_catalog)\b"),
+    ("sql_dosya", "sql", r"\binto\s+(?:out|dump)file\b|\bxp_cmdshell\b"),
+    ("jndi", "komut", r"\$\{\s*(?:jndi|lower|upper|env|sys)\s*:"),
+    ("komut_yerine_koyma", "komut", r"\$\(|`[^`]*`|\$\{"),
+    ("komut_ayirici", "komut", r"(?:;|\|\|?|&&?|\n)\s*(?:cat|ls|id|whoami|uname|rm|wget|curl|nc|ncat|bash|sh|zsh|python\d?|perl|php|chmod|chown|echo|ping|sleep|kill|reboot|shutdown)\b"),
+    ("komut_yonlendirme", "komut", r"[<>]\s*/(?:etc|dev|proc|tmp|var)\b"),
+    ("yol_gecisi", "yol", r"\.\.[/\\]|%2e%2e(?:%2f|%5c)|/etc/(?:passwd|shadow)|/bin/(?:ba|z)?sh\b|\bc:\\windows\b"),
+    ("betik", "betik", r"<\s*/?\s*(?:script|img|svg|iframe|object|embed)\b|javascript\s*:|\bon(?:error|load|click|mouseover)\s*="),
+    ("sablon", "betik", r"\{\{.*?\}\}|\{%.*?%\}|<%.*?%>"),
+    ("bicim_dizesi", "bicim", r"%(?:\d+\$)?[0-9.]*[nsxXpd]"),
+    ("nosql", "nosql", r"\$(?:ne|gt|gte|lt|lte|in|nin|where|regex|exists|or|and)\b|\[\s*\$\w+\s*\]"),
+    ("ldap", "ldap", r"\*\)\s*\(|\)\s*\(\s*[|&!]|\(\s*[|&]\s*\("),
+    ("kontrol_karakteri", "kontrol", r"[\x00-\x1f\x7f]"),
+    ("karakter_seti", "karakter_seti", rf"[^{IZINLI_KARAKTERLER}]"),
+)
+
+# Yalnızca izinli karakterlerden oluşan bir etikette eşleşemeyen yerleşik kurallar
+OZEL_KARAKTER_GEREKTIREN = frozenset(ad for ad, _, _ in KURALLAR) - {"sql_sema", "sql_dosya", "betik"}
+
+
+class IdTagScreener:
+    """ İmza kümesini tek birleşik regex'e derleyip id_tag'leri tarar. """
+
+    def __init__(self, kurallar=KURALLAR, max_uzunluk=MAX_ID_TAG):
+        self.kurallar = tuple(kurallar)
+        self.max_uzunluk = max_uzunluk
+        self._kategori = {ad: kategori for ad, kategori, _ in self.kurallar}
+        self._oncelik = {ad: i for i, (ad, _, _) in enumerate(self.kurallar)}
+        self._regex = _birlestir(self.kurallar)
+        self._guvenli = re.compile(rf"[{IZINLI_KARAKTERLER}]{{0,{max_uzunluk}}}")
+        self._ic_regex = _birlestir([k for k in self.kurallar if k[0] not in OZEL_KARAKTER_GEREKTIREN])
+        self.sayaclar = dict.fromkeys(self._kategori, 0)
+        self.sayaclar["boyut"] = 0
+        self.taranan = 0
+
+    def tara(self, id_tag):
+        """ Temiz etiket için None, değilse en öncelikli ``Eslesme``. """
+        self.taranan += 1
+        if not isinstance(id_tag, str):
+            return self._say(Eslesme("karakter_seti", "karakter_seti", 0, repr(id_tag)[:40]))
+        if self._guvenli.fullmatch(id_tag):
+            m = self._ic_regex.search(id_tag) if self._ic_regex is not None else None
+            if m is None:
+                return None
+            return self._say(Eslesme(m.lastgroup, self._kategori[m.lastgroup], m.start(), m.group()))
+        en_iyi = None
+        oncelik = self._oncelik
+        for m in self._regex.finditer(id_tag):
+            if en_iyi is None or oncelik[m.lastgroup] < oncelik[en_iyi.lastgroup]:
+                en_iyi = m
+                if oncelik[m.lastgroup] == 0:
+                    break
+        if en_iyi is not None and en_iyi.lastgroup != "karakter_seti":
+            return self._say(Eslesme(en_iyi.lastgroup, self._kategori[en_iyi.lastgroup], en_iyi.start(),
+                                     en_iyi.group()))
+        if len(id_tag) > self.max_uzunluk:
+            return self._say(Eslesme("boyut", "boyut", self.max_uzunluk, id_tag[self.max_uzunluk:][:40]))
+        if en_iyi is not None:
+            return self._say(Eslesme("karakter_seti", "karakter_seti", en_iyi.start(), en_iyi.group()))
+        return None
+
+    def _say(self, eslesme):
+        self.sayaclar[eslesme.kural] += 1
+        return eslesme
+
+    def temiz_mi(self, id_tag):
+        return self.tara(id_tag) is None
+
+
+def _birlestir(kurallar):
+    if not kurallar:
+        return None
+    # İç gruplar isimsizleştirilir ki lastgroup her zaman kural adını versin
+    return re.compile("|".join(f"(?P<{ad}>{_yakalamasiz(desen)})" for ad, _, desen in kurallar),
+                      re.IGNORECASE | re.DOTALL)
+
+
+def _yakalamasiz(desen):
+    """ Desendeki yakalayan grupları ``(?:...)`` yapar (kaçışlı parantezlere dokunmaz). """
+    return re.sub(r"(?<!\\)\((?!\?)", "(?:", desen)
+
+
+def supheli_logla(cp_id, mesaj, id_tag, eslesme):
+    logging.warning("[%s] 🚨 ENJEKSİYON TESPİTİ (%s): %s kuralı, konum %s -> %r (id_tag: %r)", cp_id, mesaj,
+                    eslesme.kural, eslesme.konum, eslesme.parca, id_tag[:64] if isinstance(id_tag, str) else id_tag)
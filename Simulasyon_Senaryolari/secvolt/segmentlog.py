@@ -0,0 +1,340 @@
+"""
+OCPP trafiği için kalıcı, yalnız-ekleme (append-only) segment kaydı.
+
+CSMS yeniden başladığında gelen/giden hiçbir çerçeve kalmıyordu; bir tespit
+tetiklendiğinde şarj noktasının öncesinde ne raporladığı yeniden kurulamıyordu.
+
+Yazma yolu:
+
+- ``SegmentLog.ekle(cp_id, yon, cerceve)`` olay döngüsünde yalnızca bir
+  ``deque.append`` yapar (~0,5 µs); paketleme, CRC ve disk işi arka plan
+  thread'indedir (``logpipe`` ile aynı desen).
+- Yazıcı thread'i kuyruğu ``commit_ms`` aralıkla toplu boşaltır, tek ``write``
+  ve tek ``fsync`` yapar (group commit). Çökmede en fazla son aralık kaybolur.
+- Segment ``segment_boyutu``'nu aşınca kapatılır ve yenisi açılır
+  (``00000001.seg``, ``00000002.seg``...). Açılışta her zaman yeni segment
+  başlatılır; yarım kalmış eski kuyruğa ekleme yapılmaz.
+- Kapanışta (``kapat``, süreç çıkışı ya da multiprocessing işçisinin
+  sonlanması) kuyrukta kalanlar yazılır ve son bir ``fsync`` yapılır.
+- Her ``indeks_araligi`` baytta bir ``.idx`` dosyasına ``(ts_us, ofset)`` yazılır
+  (seyrek zaman indeksi).
+
+Kayıt biçimi (little-endian)::
+
+    uzunluk:u32 | crc32:u32 | ts_us:i64 | yon:u8 | cp_uzunluk:u16 | cp_id | cerceve
+
+``yon``: 0 gelen, 1 giden; 2 bağlantı açıldı (çerçeve: websocket yolu),
+3 bağlantı kapandı (çerçeve boş). Açılış/kapanış işaretleri aynı şarj
+noktasının art arda oturumlarını ayırır (``secvolt.replay``).
+
+CRC, cp_id + çerçeve üzerinden hesaplanır. Zaman damgası alındığı andaki duvar
+saatidir; indeks araması bu saatin segment içinde ileri gittiğini varsayar.
+
+Okuma yolu: ``segment_oku`` / ``oku`` segmenti mmap ile açar ve her kayıt için
+``Kayit(ts_us, yon, cp_id, cerceve)`` döner; ``cp_id`` ve ``cerceve``
+kopyalanmamış ``memoryview``'lardır (``codec.loads(kayit.cerceve)`` ya da
+``bytes(...)`` ile çözülür). Başlangıç zamanı verilirse indeksle doğrudan ilgili
+ofsete atlanır.
+
+    python -m secvolt.segmentlog kayitlar/ --cp CHARGER-001 --baslangic 2025-01-01T10:00:00+00:00
+"""
+import argparse
+import atexit
+import bisect
+import glob
+import heapq
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+from datetime import datetime
+
+GELEN = 0
+GIDEN = 1
+BAGLANTI = 2
+KOPMA = 3
+YONLER = {GELEN: "<-", GIDEN: "->", BAGLANTI: "++", KOPMA: "--"}
+
+BASLIK = struct.Struct("<IIqBH")
+INDEKS = struct.Struct("<qQ")
+
+Kayit = namedtuple("Kayit", "ts_us yon cp_id cerceve")
+
+
+def _segment_yolu(dizin, sira):
+    return os.path.join(dizin, f"{sira:08d}.seg")
+
+
+def segmentler(dizin):
+    """ Dizindeki segment dosyaları, sıra numarasına göre. """
+    return sorted(glob.glob(os.path.join(dizin, "*.seg")))
+
+
+class SegmentLog:
+    """ Rotasyonlu, group-commit fsync'li segment yazıcısı. """
+
+    def __init__(self, dizin, segment_boyutu=64 * 2 ** 20, indeks_araligi=4096, commit_ms=5.0,
+                 fsync=True, max_bekleyen=100000):
+        os.makedirs(dizin, exist_ok=True)
+        self.dizin = dizin
+        self.segment_boyutu = segment_boyutu
+        self.indeks_araligi = indeks_araligi
+        self.commit_araligi = commit_ms / 1000
+        self.fsync = fsync
+        self.max_bekleyen = max_bekleyen
+
+        self.kuyruk = deque()
+        self.yazilan = 0
+        self.dusurulen = 0
+        self.commit = 0
+        self.son_commit_us = 0.0
+
+        mevcut = segmentler(dizin)
+        self._sira = int(os.path.basename(mevcut[-1])[:-4]) if mevcut else 0
+        self._seg_fd = self._idx_fd = None
+        self._ofset = 0
+        self._son_indeks = None
+        self._segment_ac()
+
+        self._dur = threading.Event()
+        self._thread = threading.Thread(target=self._calis, name="secvolt-segment-yazici", daemon=True)
+        self._thread.start()
+        atexit.register(self.kapat)
+        # multiprocessing çocukları (``--workers`` işçileri) os._exit ile biter, atexit çalışmaz
+        from multiprocessing import util
+        util.Finalize(self, self.kapat, exitpriority=0)
+
+    # --- sıcak yol ---
+    def ekle(self, cp_id, yon, cerceve, ts_us=None):
+        """ ``ts_us`` verilmezse şimdiki duvar saati (dışarıdan aktarılan kayıtlar için verilir). """
+        if len(self.kuyruk) >= self.max_bekleyen:
+            self.dusurulen += 1
+            return
+        self.kuyruk.append((time.time_ns() // 1000 if ts_us is None else ts_us, yon, cp_id, cerceve))
+
+    def baglanti(self, websocket, cp_id):
+        """ Websocket'i gelen ve giden her çerçeveyi kaydeden bir vekille sarar. """
+        return KayitliBaglanti(websocket, self, cp_id)
+
+    # --- yazıcı thread'i ---
+    def _segment_ac(self):
+        self._sira += 1
+        yol = _segment_yolu(self.dizin, self._sira)
+        bayrak = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        self._seg_fd = os.open(yol, bayrak, 0o644)
+        self._idx_fd = os.open(yol[:-4] + ".idx", bayrak, 0o644)
+        self._ofset = 0
+        self._son_indeks = None
+
+    def _segment_kapat(self):
+        if self._seg_fd is None:
+            return
+        if self.fsync:
+            os.fsync(self._seg_fd)
+            os.fsync(self._idx_fd)
+        os.close(self._seg_fd)
+        os.close(self._idx_fd)
+        self._seg_fd = self._idx_fd = None
+
+    def _diske_yaz(self, veri, indeks):
+        if veri:
+            os.write(self._seg_fd, veri)
+        if indeks:
+            os.write(self._idx_fd, indeks)
+
+    def bosalt(self):
+        """ Kuyruktaki kayıtları tek yazma + tek fsync ile diske işler. """
+        kuyruk = self.kuyruk
+        if not kuyruk:
+            return 0
+        t0 = time.perf_counter()
+        veri, indeks = bytearray(), bytearray()
+        adet = 0
+        paketle, crc32 = BASLIK.pack, zlib.crc32
+        while True:
+            try:
+                ts, yon, cp_id, cerceve = kuyruk.popleft()
+            except IndexError:
+                break
+            cp_b = cp_id.encode()
+            cerceve_b = cerceve.encode() if isinstance(cerceve, str) else cerceve
+            ofset = self._ofset + len(veri)
+            if self._son_indeks is None or ofset - self._son_indeks >= self.indeks_araligi:
+                indeks += INDEKS.pack(ts, ofset)
+                self._son_indeks = ofset
+            veri += paketle(len(cerceve_b), crc32(cerceve_b, crc32(cp_b)), ts, yon, len(cp_b))
+            veri += cp_b
+            veri += cerceve_b
+            adet += 1
+            if self._ofset + len(veri) >= self.segment_boyutu:
+                self._diske_yaz(veri, indeks)
+                self._segment_kapat()
+                self._segment_ac()
+                veri, indeks = bytearray(), bytearray()
+
+        self._diske_yaz(veri, indeks)
+        self._ofset += len(veri)
+        if self.fsync:
+            os.fsync(self._seg_fd)
+            if indeks:
+                os.fsync(self._idx_fd)
+        self.yazilan += adet
+        self.commit += 1
+        self.son_commit_us = (time.perf_counter() - t0) * 1e6
+        return adet
+
+    def _calis(self):
+        while not self._dur.wait(self.commit_araligi):
+            try:
+                self.bosalt()
+            except OSError as e:
+                logging.error("Segment kaydı yazılamadı: %s", e)
+
+    def kapat(self):
+        if self._dur.is_set():
+            return
+        self._dur.set()
+        self._thread.join()
+        self.bosalt()
+        self._segment_kapat()
+        if self.dusurulen:
+            logging.warning("Segment kaydı: %s çerçeve kuyruk dolu olduğu için yazılamadı.", self.dusurulen)
+
+
+class KayitliBaglanti:
+    """ recv/send çağrılarını SegmentLog'a kaydeden websocket vekili. """
+
+    def __init__(self, websocket, log, cp_id):
+        self._ws = websocket
+        self._log = log
+        self._cp_id = cp_id
+        self._acik = True
+        log.ekle(cp_id, BAGLANTI, getattr(websocket, "path", None) or "")
+
+    def _kapandi(self):
+        if self._acik:
+            self._acik = False
+            self._log.ekle(self._cp_id, KOPMA, b"")
+
+    async def recv(self):
+        try:
+            mesaj = await self._ws.recv()
+        except BaseException:
+            self._kapandi()
+            raise
+        self._log.ekle(self._cp_id, GELEN, mesaj)
+        return mesaj
+
+    async def send(self, mesaj):
+        self._log.ekle(self._cp_id, GIDEN, mesaj)
+        await self._ws.send(mesaj)
+
+    async def close(self, *args, **kwargs):
+        self._kapandi()
+        await self._ws.close(*args, **kwargs)
+
+    def __getattr__(self, ad):
+        return getattr(self._ws, ad)
+
+
+def _indeks_ofseti(idx_yolu, baslangic):
+    """ ts <= baslangic olan son indeks girdisinin ofseti (yoksa 0). """
+    try:
+        with open(idx_yolu, "rb") as f:
+            ham = f.read()
+    except FileNotFoundError:
+        return 0
+    girdiler = memoryview(ham[:len(ham) - len(ham) % INDEKS.size]).cast("q")
+    zamanlar = girdiler[0::2]
+    i = bisect.bisect_right(zamanlar, baslangic) - 1
+    return girdiler[2 * i + 1] if i >= 0 else 0
+
+
+def _ilk_ts(seg_yolu):
+    try:
+        with open(seg_yolu[:-4] + ".idx", "rb") as f:
+            ham = f.read(INDEKS.size)
+    except FileNotFoundError:
+        return None
+    return INDEKS.unpack(ham)[0] if len(ham) == INDEKS.size else None
+
+
+def segment_oku(seg_yolu, baslangic=None, bitis=None, cp_id=None, dogrula=False):
+    """
+    Tek segmenti mmap ile tarar ve ``Kayit`` üretir. Yarım (çökmede kesilmiş)
+    son kayıtta durur; ``dogrula`` verilirse CRC uyuşmayan kayıtta da durur.
+    """
+    with open(seg_yolu, "rb") as f:
+        boyut = os.fstat(f.fileno()).st_size
+        if boyut == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    mv = memoryview(mm)
+    hedef = cp_id.encode() if cp_id is not None else None
+    ofset = _indeks_ofseti(seg_yolu[:-4] + ".idx", baslangic) if baslangic is not None else 0
+    baslik_boyu, coz = BASLIK.size, BASLIK.unpack_from
+
+    while ofset + baslik_boyu <= boyut:
+        uzunluk, crc, ts, yon, cp_uzunluk = coz(mv, ofset)
+        cp_bas = ofset + baslik_boyu
+        cerceve_bas = cp_bas + cp_uzunluk
+        son = cerceve_bas + uzunluk
+        if son > boyut:
+            break
+        if dogrula and zlib.crc32(mv[cerceve_bas:son], zlib.crc32(mv[cp_bas:cerceve_bas])) != crc:
+            logging.warning("Segment %s: %s ofsetinde CRC hatası, okuma durduruldu.", seg_yolu, ofset)
+            break
+        ofset = son
+        if baslangic is not None and ts < baslangic:
+            continue
+        if bitis is not None and ts > bitis:
+            break
+        if hedef is not None and mv[cp_bas:cerceve_bas] != hedef:
+            continue
+        yield Kayit(ts, yon, mv[cp_bas:cerceve_bas], mv[cerceve_bas:son])
+
+
+def dizin_oku(dizin, baslangic=None, bitis=None, cp_id=None, dogrula=False):
+    """ Dizindeki segmentleri sırayla okur; başlangıçtan önce biten segmentler atlanır. """
+    yollar = segmentler(dizin)
+    for i, yol in enumerate(yollar):
+        if baslangic is not None and i + 1 < len(yollar):
+            sonraki = _ilk_ts(yollar[i + 1])
+            if sonraki is not None and sonraki <= baslangic:
+                continue
+        yield from segment_oku(yol, baslangic, bitis, cp_id, dogrula)
+
+
+def oku(*dizinler, baslangic=None, bitis=None, cp_id=None, dogrula=False):
+    """ Birden fazla dizini (örn. işçi başına bir dizin) zaman sırasıyla birleştirir. """
+    if len(dizinler) == 1:
+        return dizin_oku(dizinler[0], baslangic, bitis, cp_id, dogrula)
+    return heapq.merge(*(dizin_oku(d, baslangic, bitis, cp_id, dogrula) for d in dizinler),
+                       key=lambda k: k.ts_us)
+
+
+def _zaman(metin):
+    return int(datetime.fromisoformat(metin).timestamp() * 1_000_000) if metin else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCPP segment kaydını okur")
+    parser.add_argument('dizin', nargs='+')
+    parser.add_argument('--cp', help="Yalnızca bu şarj noktası")
+    parser.add_argument('--baslangic', help="ISO-8601 zaman")
+    parser.add_argument('--bitis', help="ISO-8601 zaman")
+    parser.add_argument('--dogrula', action='store_true', help="CRC kontrolü yap")
+    args = parser.parse_args()
+
+    for k in oku(*args.dizin, baslangic=_zaman(args.baslangic), bitis=_zaman(args.bitis),
+                 cp_id=args.cp, dogrula=args.dogrula):
+        zaman = datetime.fromtimestamp(k.ts_us / 1e6).isoformat(timespec='microseconds')
+        print(f"{zaman} {bytes(k.cp_id).decode()} {YONLER[k.yon]} {bytes(k.cerceve).decode()}")
+
+
+if __name__ == '__main__':
+    main()
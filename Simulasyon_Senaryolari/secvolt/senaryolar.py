@@ -0,0 +1,67 @@
+"""
+Senaryo klasörlerindeki client.py / server.py dosyalarını modül olarak yükler.
+
+Klasör adları tire ve Türkçe karakter içerdiği için normal ``import`` ile
+yüklenemez; dosyalar yol üzerinden, her biri benzersiz bir modül adıyla
+yüklenir ve önbellekte tutulur.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+SENARYO_KOKU = Path(__file__).resolve().parent.parent
+
+# Her senaryonun saldırı davranışı: (klasör, istemci sınıfı, saldırı metodu, metot argümanları)
+# Metot None ise saldırı reaktiftir (örn. sunucudan gelen komutu manipüle eder),
+# sadece sınıfın kullanılması yeterlidir.
+SALDIRILAR = {
+    "abdullah": ("Abdullah-Can-Tekin", "SablonChargePoint", "simulate_sql_injection", {}),
+    "abdulmecit": ("Abdulmecit-Öztürk", "SablonChargePoint", "anomaly_monitor", {}),
+    "enes": ("Enes-Kızılca", "AttackerChargePoint", "send_meter_values", {}),
+    "korkutan": ("Hüseyin-Korkutan", "AnomaliChargePoint", "anomali_baslat_yetkisiz_islem",
+                 {"connector_id": 1, "unauthorized_id_tag": "ANOMALY-TAG-999"}),
+    "kevser": ("Kevser-Aslan", "SablonChargePoint", "send_anomalous_meter_values", {}),
+    "mustafa": ("Mustafa-Önler", "MitmSaldiriChargePoint", None, {}),
+    "samet": ("Samet-Altuner", "SablonChargePoint", "send_meter_values_anomalous", {}),
+    "yusuf": ("Yusuf-Arıkan", "SablonChargePoint", "send_meter_values", {}),
+}
+
+_yuklenenler = {}
+
+
+def senaryo_klasorleri():
+    """ client.py veya server.py içeren senaryo klasörlerini alfabetik döner. """
+    return sorted(
+        p.name for p in SENARYO_KOKU.iterdir()
+        if p.is_dir() and ((p / "client.py").exists() or (p / "server.py").exists())
+    )
+
+
+def modul_yukle(klasor, dosya="client"):
+    """ Senaryo klasöründeki client/server dosyasını modül olarak yükler (önbellekli). """
+    anahtar = (klasor, dosya)
+    if anahtar in _yuklenenler:
+        return _yuklenenler[anahtar]
+
+    yol = SENARYO_KOKU / klasor / f"{dosya}.py"
+    ad = "senaryo_" + "".join(c if c.isalnum() else "_" for c in f"{klasor}_{dosya}")
+    spec = importlib.util.spec_from_file_location(ad, yol)
+    modul = importlib.util.module_from_spec(spec)
+    sys.modules[ad] = modul
+    try:
+        spec.loader.exec_module(modul)
+    except BaseException:
+        del sys.modules[ad]
+        raise
+    _yuklenenler[anahtar] = modul
+    return modul
+
+
+def saldiri_yukle(ad):
+    """ Saldırı adına göre (istemci sınıfı, metot adı, metot argümanları) döner. """
+    try:
+        klasor, sinif_adi, metot, kwargs = SALDIRILAR[ad]
+    except KeyError:
+        raise ValueError(f"Bilinmeyen saldırı: {ad} (Seçenekler: {', '.join(SALDIRILAR)})")
+    modul = modul_yukle(klasor, "client")
+    return getattr(modul, sinif_adi), metot, kwargs
@@ -0,0 +1,149 @@
+"""
+Sanal simülasyon saati: senaryo saatleri saniyeler içinde.
+
+İstemciler duvar saatiyle ilerliyordu (``asyncio.sleep(5)``, Samet-Altuner'de
+8-25 sn), zaman damgaları ``datetime.now(timezone.utc)``'den geliyordu; 8
+saatlik bir şarj oturumu 8 saat sürüyordu.
+
+``SanalOlayDongusu`` bir ``SelectorEventLoop``'tur; ``time()`` sanal saati
+döner. Döngü her turda G/Ç'yi beklemeden yoklar; hazır iş ve G/Ç olayı yoksa
+beklemek yerine sanal saati en yakın zamanlayıcıya (``call_later``,
+``asyncio.sleep``, ``wait_for`` zaman aşımı) atlatır. Böylece:
+
+- ``asyncio.sleep`` ve tüm zaman aşımları kod değişmeden sanal zamanda işler;
+  simülasyon CPU'nun izin verdiği hızda koşar,
+- aynı girdiyle (``secvolt.memws`` bağlantıları, tohumlu rastgelelik) olaylar
+  her koşuda aynı sırada ve aynı sanal anlarda gerçekleşir.
+
+Zaman damgaları ``simdi()`` (``datetime``) ve ``zaman()`` (epoch saniye)
+ile alınır: çalışan döngü sanal ise ``baslangic`` + sanal saat, değilse
+duvar saati döner. İstemci ve sunucular ``datetime.now(timezone.utc)``
+yerine ``simdi()`` kullanır; gerçek saatle çalışırken davranış değişmez.
+
+Gerçek soketlerle (ayrı süreçteki sunucu) kullanımda döngü boşta kaldığında
+da saat atlar; cevap beklenirken zaman aşımı hemen dolabilir.
+``gercek_bekleme_s`` atlamadan önce G/Ç için o kadar gerçek süre bekler;
+belirlenimcilik yalnızca süreç içi (memws) bağlantılarda garantidir.
+
+    saat.run(main(), baslangic=datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+Ortam değişkeni ``SECVOLT_SAAT=sanal`` verilirse modül içe aktarıldığında
+olay döngüsü politikası kurulur; senaryo betiklerindeki ``asyncio.run``
+sanal döngüyle çalışır (``SECVOLT_SAAT_BASLANGIC`` ISO-8601 başlangıç,
+``SECVOLT_SAAT_BEKLEME`` gerçek G/Ç bekleme süresi, varsayılan 0.05 sn).
+"""
+import asyncio
+import os
+import selectors
+import time
+from datetime import datetime, timedelta, timezone
+
+VARSAYILAN_BASLANGIC = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class _AtlayanSecici:
+    """ Seçiciyi sarar: beklemek yerine yoklar, boştaysa döngünün sanal saatini ileri alır. """
+
+    def __init__(self, secici, gercek_bekleme_s=0.0):
+        self._secici = secici
+        self.gercek_bekleme_s = gercek_bekleme_s
+        self.dongu = None
+
+    def select(self, timeout=None):
+        olaylar = self._secici.select(0)
+        if olaylar or timeout == 0:
+            return olaylar
+        if timeout is None:
+            # Bekleyen zamanlayıcı yok: ilerletilecek sanal an da yok, yalnız G/Ç (başka thread) beklenebilir
+            return self._secici.select(None)
+        if self.gercek_bekleme_s:
+            olaylar = self._secici.select(min(timeout, self.gercek_bekleme_s))
+            if olaylar:
+                return olaylar
+        self.dongu._atla(timeout)
+        return []
+
+    def __getattr__(self, ad):
+        return getattr(self._secici, ad)
+
+
+class SanalOlayDongusu(asyncio.SelectorEventLoop):
+    """ ``time()`` sanal saattir; boşta kalınan süre beklenmeden atlanır. """
+
+    def __init__(self, baslangic=None, gercek_bekleme_s=0.0):
+        secici = _AtlayanSecici(selectors.DefaultSelector(), gercek_bekleme_s)
+        super().__init__(secici)
+        secici.dongu = self
+        self.baslangic = baslangic or VARSAYILAN_BASLANGIC
+        self._baslangic_ts = self.baslangic.timestamp()
+        self._sanal = 0.0
+        self.atlama = 0
+        self.atlanan_s = 0.0
+
+    def time(self):
+        return self._sanal
+
+    def _atla(self, sure):
+        # Hedef doğrudan en yakın zamanlayıcının anıdır; kayan nokta toplamı ondan az kalmasın
+        hedef = self._scheduled[0].when() if self._scheduled else self._sanal + sure
+        if hedef > self._sanal:
+            self.atlanan_s += hedef - self._sanal
+            self.atlama += 1
+            self._sanal = hedef
+
+    def zaman(self):
+        """ Sanal epoch saniye (``time.time()`` karşılığı). """
+        return self._baslangic_ts + self._sanal
+
+    def simdi(self):
+        """ Sanal UTC ``datetime`` (``datetime.now(timezone.utc)`` karşılığı). """
+        return self.baslangic + timedelta(seconds=self._sanal)
+
+
+class SanalSaatPolitikasi(asyncio.DefaultEventLoopPolicy):
+    """ ``asyncio.run`` / ``new_event_loop`` sanal döngü üretsin. """
+
+    def __init__(self, baslangic=None, gercek_bekleme_s=0.0):
+        super().__init__()
+        self.baslangic = baslangic
+        self.gercek_bekleme_s = gercek_bekleme_s
+
+    def new_event_loop(self):
+        return SanalOlayDongusu(self.baslangic, self.gercek_bekleme_s)
+
+
+def kur(baslangic=None, gercek_bekleme_s=0.0):
+    """ Süreçteki bundan sonraki tüm olay döngülerini sanal saatli yapar. """
+    asyncio.set_event_loop_policy(SanalSaatPolitikasi(baslangic, gercek_bekleme_s))
+
+
+def run(main, baslangic=None, gercek_bekleme_s=0.0, debug=None):
+    """ ``asyncio.run`` gibi, sanal saatli yeni bir döngüde. """
+    with asyncio.Runner(debug=debug, loop_factory=lambda: SanalOlayDongusu(baslangic, gercek_bekleme_s)) as r:
+        return r.run(main)
+
+
+def sanal_dongu():
+    """ Çalışan döngü sanal ise onu, değilse None döner. """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return loop if isinstance(loop, SanalOlayDongusu) else None
+
+
+def simdi():
+    """ Şimdiki UTC zaman: sanal döngüde sanal, aksi halde duvar saati. """
+    loop = sanal_dongu()
+    return loop.simdi() if loop is not None else datetime.now(timezone.utc)
+
+
+def zaman():
+    """ Epoch saniye: sanal döngüde sanal, aksi halde ``time.time()``. """
+    loop = sanal_dongu()
+    return loop.zaman() if loop is not None else time.time()
+
+
+if os.environ.get("SECVOLT_SAAT") == "sanal":
+    _bas = os.environ.get("SECVOLT_SAAT_BASLANGIC")
+    kur(datetime.fromisoformat(_bas) if _bas else None, float(os.environ.get("SECVOLT_SAAT_BEKLEME", "0.05")))
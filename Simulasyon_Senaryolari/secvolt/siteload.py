@@ -0,0 +1,243 @@
+"""
+Site -> trafo -> şarj noktası hiyerarşisinde artımlı yük toplama.
+
+Enes-Kızılca sunucusu site yükünü ``DIGER_ARACLAR_YUKU + bildirilen_tuketim``
+olarak sabitlerle hesaplıyor, bağlı diğer şarj noktalarını hiç görmüyordu;
+tek bir sahte rapor kararı doğrudan belirliyordu (FDI). ``SiteLoadAggregator``
+her düğümde (site, trafo, konnektör, sabit taban yük) güncel yük toplamını
+tutar:
+
+- Bir konnektörün yükü değiştiğinde yalnızca farkı kök yoluna ekler:
+  güncelleme O(derinlik) (site/trafo/konnektör için 3 adım).
+- ``bos_kapasite(dugum)`` düğümden köke kadar yoldaki en dar boşluğu verir
+  (O(derinlik)); site / trafo toplamları hazır tutulduğu için tarama yapılmaz.
+- Durum düz Python listelerinde tutulur (skaler erişimde NumPy'dan hızlı);
+  ``ozet()`` ve ``yeniden_hesapla()`` tüm ağaç için NumPy ile vektörel çalışır.
+
+Makullük denetimi: konnektör için enerji sayacı farkının ima ettiği güç
+``dWh * 3600 / dt`` hesaplanır ve
+
+- ``geri_sayac``: sayaç geriye gitti,
+- ``fiziksel_sinir``: ima edilen güç konnektör gücünü (``max_guc_w``) aştı,
+- ``guc_enerji_tutarsiz``: raporlanan anlık güç (Power.Active.Import) enerji
+  farkından türetilen ortalamadan ``tutarsizlik_payi`` x ``max_guc_w``'den fazla saptı
+
+kurallarıyla karşılaştırılır. Şüpheli ya da henüz ölçülmemiş konnektörün yükü
+kapasite kararlarında konnektör gücü (en kötü durum) olarak sayılır. Şüphe
+yalnızca enerji farkı denetimi geçildiğinde kalkar; tek başına gelen güç
+raporu doğrulanamadığından şüpheli konnektörü en kötü durumda bırakır.
+"""
+import logging
+import math
+
+import numpy as np
+
+from secvolt.tsdb import ENERJI, measurand_adi, zaman_us
+
+SITE, TRAFO, KONNEKTOR, TABAN = 0, 1, 2, 3
+TUR_ADLARI = ("site", "trafo", "konnektor", "taban")
+
+_CARPAN = {"W": 1.0, "kW": 1000.0, "Wh": 1.0, "kWh": 1000.0}
+
+
+def _alarm_logla(anahtar, kural, ayrinti):
+    logging.warning("🚨 YÜK MAKULLÜK İHLALİ %s: %s (%s)", anahtar, kural, ayrinti)
+
+
+class SiteLoadAggregator:
+    """ Hiyerarşik yük ağacı; her düğümde alt ağacın toplam yükü tutulur. """
+
+    def __init__(self, varsayilan_max_guc_w=22000.0, tutarsizlik_payi=0.25, fiziksel_pay=0.10,
+                 alarm_fn=_alarm_logla):
+        self.varsayilan_max_guc_w = varsayilan_max_guc_w
+        self.tutarsizlik_payi = tutarsizlik_payi
+        self.fiziksel_pay = fiziksel_pay
+        self.alarm_fn = alarm_fn
+        self.varsayilan_ust = None
+
+        # Düğüm sütunları
+        self.ad = []
+        self.tur = []
+        self.ust = []
+        self.kapasite = []
+        self.yuk = []         # alt ağaç toplamı (yaprakta kendi yükü)
+        self.cocuklar = []
+        self._indeks = {}
+
+        # Konnektör durumu (düğüm indeksine göre)
+        self.max_guc = {}
+        self.supheli = {}
+        self._son_enerji = {}   # dugum -> (ts_us, Wh)
+        self.guncelleme = 0
+
+    # --- topoloji ---
+    def _dugum(self, anahtar, tur, ust, kapasite, yuk=0.0):
+        if anahtar in self._indeks:
+            raise ValueError(f"Düğüm zaten var: {anahtar}")
+        i = len(self.ad)
+        self._indeks[anahtar] = i
+        self.ad.append(anahtar)
+        self.tur.append(tur)
+        self.ust.append(-1 if ust is None else ust)
+        self.kapasite.append(math.inf if kapasite is None else float(kapasite))
+        self.yuk.append(0.0)
+        self.cocuklar.append([])
+        if ust is not None:
+            self.cocuklar[ust].append(i)
+        if yuk:
+            self.yuk_ayarla(i, yuk)
+        return i
+
+    def site_ekle(self, ad, kapasite_w):
+        return self._dugum(ad, SITE, None, kapasite_w)
+
+    def trafo_ekle(self, ad, site, kapasite_w):
+        return self._dugum(ad, TRAFO, site, kapasite_w)
+
+    def taban_yuk_ekle(self, ad, ust, yuk_w):
+        """ Ölçülmeyen sabit yük (bina, OCPP dışı araçlar); ``yuk_ayarla`` ile değiştirilebilir. """
+        return self._dugum(ad, TABAN, ust, None, yuk_w)
+
+    def konnektor_ekle(self, cp_id, connector_id, ust, max_guc_w=None):
+        max_guc = float(max_guc_w or self.varsayilan_max_guc_w)
+        i = self._dugum((cp_id, connector_id), KONNEKTOR, ust, max_guc)
+        self.max_guc[i] = max_guc
+        # Ölçüm gelene kadar en kötü durum sayılır
+        self.supheli[i] = "olcum_yok"
+        self.yuk_ayarla(i, max_guc)
+        return i
+
+    def indeks(self, anahtar):
+        return self._indeks.get(anahtar)
+
+    def _konnektor(self, cp_id, connector_id):
+        i = self._indeks.get((cp_id, connector_id))
+        if i is None:
+            if self.varsayilan_ust is None:
+                raise KeyError(f"Topolojide olmayan konnektör: {cp_id}/{connector_id}")
+            i = self.konnektor_ekle(cp_id, connector_id, self.varsayilan_ust)
+        return i
+
+    # --- sıcak yol ---
+    def yuk_ayarla(self, dugum, yuk_w):
+        """ Yaprağın yükünü değiştirir; farkı köke kadar taşır (O(derinlik)). """
+        yuk, ust = self.yuk, self.ust
+        fark = yuk_w - yuk[dugum]
+        if fark == 0:
+            return
+        i = dugum
+        while i >= 0:
+            yuk[i] += fark
+            i = ust[i]
+        self.guncelleme += 1
+
+    def bos_kapasite(self, dugum):
+        """ Düğümden köke yoldaki en dar boşluk (W). """
+        yuk, ust, kapasite = self.yuk, self.ust, self.kapasite
+        en_az = math.inf
+        i = dugum
+        while i >= 0:
+            bosluk = kapasite[i] - yuk[i]
+            if bosluk < en_az:
+                en_az = bosluk
+            i = ust[i]
+        return en_az
+
+    def konnektor_yuku(self, cp_id, connector_id, guc_w=None, enerji_wh=None, ts_us=None):
+        """ Konnektör raporunu işler; makul değilse en kötü durumu sayar. Sayılan yükü döner. """
+        i = self._konnektor(cp_id, connector_id)
+        max_guc = self.max_guc[i]
+        ihlal = None
+        turetilen = None
+        if enerji_wh is not None:
+            onceki = self._son_enerji.get(i)
+            if onceki is not None and ts_us is not None and ts_us > onceki[0]:
+                dwh = enerji_wh - onceki[1]
+                turetilen = dwh * 3.6e9 / (ts_us - onceki[0])
+                if dwh < 0:
+                    ihlal = ("geri_sayac", f"{onceki[1]} -> {enerji_wh} Wh")
+                elif turetilen > max_guc * (1 + self.fiziksel_pay):
+                    ihlal = ("fiziksel_sinir", f"{turetilen:.0f} W > {max_guc:.0f} W")
+                elif guc_w is not None and abs(guc_w - turetilen) > self.tutarsizlik_payi * max_guc:
+                    ihlal = ("guc_enerji_tutarsiz", f"anlık {guc_w:.0f} W, sayaçtan {turetilen:.0f} W")
+            if ts_us is not None and (onceki is None or ts_us > onceki[0]):
+                self._son_enerji[i] = (ts_us, enerji_wh)
+
+        if ihlal is not None:
+            if self.supheli.get(i) != ihlal[0] and self.alarm_fn is not None:
+                self.alarm_fn(self.ad[i], *ihlal)
+            self.supheli[i] = ihlal[0]
+            sayilan = max_guc
+        elif turetilen is not None:
+            # Enerji farkıyla çapraz denetim geçti
+            self.supheli.pop(i, None)
+            sayilan = min(max(guc_w if guc_w is not None else turetilen, 0.0), max_guc)
+        elif guc_w is not None and i not in self.supheli:
+            sayilan = min(max(guc_w, 0.0), max_guc)
+        else:
+            # İlk enerji örneği ya da şüpheli konnektörün doğrulanamayan güç raporu
+            sayilan = max_guc if i in self.supheli else self.yuk[i]
+        self.yuk_ayarla(i, sayilan)
+        return sayilan
+
+    def meter_values_ekle(self, cp_id, connector_id, meter_value):
+        """ MeterValues'tan enerji sayacı ve anlık gücü okuyup konnektör yükünü günceller. """
+        for mv in meter_value:
+            guc = enerji = None
+            for sv in mv.get('sampled_value', ()):
+                measurand = measurand_adi(sv)
+                try:
+                    deger = float(sv['value']) * _CARPAN.get(sv.get('unit'), 1.0)
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if measurand == ENERJI:
+                    enerji = deger
+                elif measurand == "Power.Active.Import":
+                    guc = deger
+            if guc is not None or enerji is not None:
+                self.konnektor_yuku(cp_id, connector_id, guc, enerji, zaman_us(mv.get('timestamp')))
+
+    # --- toplu sorgular (vektörel) ---
+    def ozet(self, tur=SITE):
+        """ Verilen türdeki düğümler için (ad, yük, kapasite, doluluk) listesi, doluluğa göre azalan. """
+        tur_dizi = np.asarray(self.tur, dtype=np.int8)
+        idx = np.flatnonzero(tur_dizi == tur)
+        yuk = np.asarray(self.yuk)[idx]
+        kapasite = np.asarray(self.kapasite)[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            doluluk = np.where(np.isfinite(kapasite), yuk / kapasite, 0.0)
+        sira = np.argsort(-doluluk, kind="stable")
+        return [(self.ad[idx[j]], float(yuk[j]), float(kapasite[j]), float(doluluk[j])) for j in sira]
+
+    def asimlar(self):
+        """ Yükü kapasitesini aşan tüm düğümler. """
+        yuk = np.asarray(self.yuk)
+        kapasite = np.asarray(self.kapasite)
+        return [self.ad[i] for i in np.flatnonzero(yuk > kapasite).tolist()]
+
+    def yeniden_hesapla(self):
+        """
+        Toplamları yapraklardan sıfırdan hesaplar (kayan nokta birikimini temizler);
+        en büyük sapmayı döner.
+        """
+        n = len(self.ad)
+        if n == 0:
+            return 0.0
+        ust = np.asarray(self.ust, dtype=np.int64)
+        yaprak = np.array([not c for c in self.cocuklar])
+        toplam = np.where(yaprak, np.asarray(self.yuk), 0.0)
+        tasinan = toplam.copy()
+        aktif = ust.copy()
+        # Her turda yaprak değerleri bir üst seviyeye taşınır (derinlik kadar tur)
+        while True:
+            gecerli = aktif >= 0
+            if not gecerli.any():
+                break
+            toplam += np.bincount(aktif[gecerli], weights=tasinan[gecerli], minlength=n)
+            aktif = np.where(gecerli, ust[np.maximum(aktif, 0)], -1)
+        sapma = float(np.max(np.abs(toplam - np.asarray(self.yuk))))
+        self.yuk[:] = toplam.tolist()
+        return sapma
+
+    def __len__(self):
+        return len(self.ad)
@@ -0,0 +1,264 @@
+"""
+MeterValues için sütunlu, bellek içi zaman serisi deposu.
+
+Handler'lar bugüne kadar yalnızca ilk ``sampled_value``'yu loglayıp atıyordu;
+faturalama ve tespit kuralları geçmişe ihtiyaç duyar. Örnek başına Python
+dict'i tutmak filo ölçeğinde (on binlerce şarj noktası x birkaç ölçüm) belleği
+tüketir, bu yüzden her seri iki NumPy halka tamponundan oluşur:
+
+- ``ts``: int64, Unix epoch mikrosaniye (ölçüm zaman damgası)
+- ``deger``: float64 (varsayılan) ya da float32
+
+Örnek başına bellek: **16 bayt** (int64 + float64) ya da ``deger_tipi=float32``
+ile **12 bayt**. Tampon ``baslangic_kapasitesi``'nden başlayıp ikiye katlanarak
+``kapasite``'ye kadar büyür, sonra en eski örneklerin üzerine yazılır; seri
+başına sabit ek yük ~0,5 KB'tır (Python nesneleri). ``bellek()`` gerçek
+tampon boyutunu döner.
+
+Anahtar ``(cp_id, connector_id, measurand)`` üçlüsüdür; ``phase`` varsa
+measurand adına ``"Voltage/L1"`` biçiminde eklenir. Measurand verilmemişse
+birimden çıkarılır (V -> Voltage, A -> Current.Import, W -> Power.Active.Import),
+o da yoksa OCPP varsayılanı ``Energy.Active.Import.Register`` kullanılır.
+
+Zaman damgaları seri içinde sıralı tutulur; aralık sorguları iki ``searchsorted``
+ile O(log n)'dir. Geç gelen (sırasız) örnek doğru yerine kaydırılarak eklenir;
+maliyeti geç kaldığı örnek sayısı kadardır.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from secvolt import simclock
+
+VARSAYILAN_MEASURAND = "Energy.Active.Import.Register"
+ENERJI = VARSAYILAN_MEASURAND
+
+_BIRIMDEN_MEASURAND = {
+    "V": "Voltage",
+    "A": "Current.Import",
+    "W": "Power.Active.Import",
+    "kW": "Power.Active.Import",
+    "Wh": VARSAYILAN_MEASURAND,
+    "kWh": VARSAYILAN_MEASURAND,
+    "Celsius": "Temperature",
+    "Percent": "SoC",
+}
+
+ORNEK_BASINA_BAYT = {np.dtype(np.float64): 16, np.dtype(np.float32): 12}
+
+
+def zaman_us(timestamp):
+    """ ISO-8601 zaman damgasını epoch mikrosaniyeye çevirir; yoksa şimdiki zaman. """
+    if timestamp:
+        try:
+            return int(datetime.fromisoformat(timestamp).timestamp() * 1_000_000)
+        except (TypeError, ValueError):
+            pass
+    return int(simclock.zaman() * 1_000_000)
+
+
+def measurand_adi(sampled_value):
+    measurand = sampled_value.get('measurand')
+    if measurand is None:
+        measurand = _BIRIMDEN_MEASURAND.get(sampled_value.get('unit'), VARSAYILAN_MEASURAND)
+    phase = sampled_value.get('phase')
+    if phase:
+        return f"{measurand}/{phase}"
+    return measurand
+
+
+class Seri:
+    """ Tek bir (cp, konnektör, measurand) için sıralı halka tampon. """
+
+    __slots__ = ("ts", "deger", "kapasite", "bas", "n", "uzerine_yazilan", "sirasiz")
+
+    def __init__(self, kapasite, baslangic_kapasitesi, deger_tipi):
+        ilk = min(kapasite, baslangic_kapasitesi)
+        self.ts = np.empty(ilk, dtype=np.int64)
+        self.deger = np.empty(ilk, dtype=deger_tipi)
+        self.kapasite = kapasite
+        self.bas = 0
+        self.n = 0
+        self.uzerine_yazilan = 0
+        self.sirasiz = 0
+
+    def __len__(self):
+        return self.n
+
+    def _buyut(self):
+        yeni = min(self.kapasite, len(self.ts) * 2)
+        ts, deger = self.ts, self.deger
+        self.ts = np.empty(yeni, dtype=np.int64)
+        self.deger = np.empty(yeni, dtype=deger.dtype)
+        # Büyüme yalnızca tampon hiç sarmadan dolduğunda olur, yani bas == 0
+        self.ts[:self.n] = ts[:self.n]
+        self.deger[:self.n] = deger[:self.n]
+
+    def _fiziksel(self, i):
+        return (self.bas + i) % len(self.ts)
+
+    def son_ts(self):
+        return int(self.ts[self._fiziksel(self.n - 1)]) if self.n else None
+
+    def ekle(self, ts, deger):
+        boy = len(self.ts)
+        if self.n == boy and boy < self.kapasite:
+            self._buyut()
+            boy = len(self.ts)
+
+        if self.n and ts < self.ts[self._fiziksel(self.n - 1)]:
+            self._sirasiz_ekle(ts, deger)
+            return
+
+        if self.n < boy:
+            i = self._fiziksel(self.n)
+            self.n += 1
+        else:
+            # Dolu: en eskinin üzerine yaz
+            i = self.bas
+            self.bas = (self.bas + 1) % boy
+            self.uzerine_yazilan += 1
+        self.ts[i] = ts
+        self.deger[i] = deger
+
+    def _sirasiz_ekle(self, ts, deger):
+        self.sirasiz += 1
+        dolu = self.n == len(self.ts)
+        if dolu and ts < self.ts[self.bas]:
+            # Tutulan en eski örnekten de eski: yer yok
+            self.uzerine_yazilan += 1
+            return
+        konum = self._ara(ts, "right")
+        boy = len(self.ts)
+        if dolu:
+            # En eskiyi at, araya girecek yeri bir sola kaydır
+            self.uzerine_yazilan += 1
+            kaynak = (self.bas + np.arange(1, konum)) % boy
+            hedef = (self.bas + np.arange(0, konum - 1)) % boy
+            self.ts[hedef] = self.ts[kaynak]
+            self.deger[hedef] = self.deger[kaynak]
+            i = self._fiziksel(konum - 1)
+        else:
+            kaynak = (self.bas + np.arange(konum, self.n)) % boy
+            self.ts[(kaynak + 1) % boy] = self.ts[kaynak]
+            self.deger[(kaynak + 1) % boy] = self.deger[kaynak]
+            self.n += 1
+            i = self._fiziksel(konum)
+        self.ts[i] = ts
+        self.deger[i] = deger
+
+    def _parcalar(self):
+        """ Mantıksal sırayla tamponun en fazla iki bitişik parçası. """
+        son = self.bas + self.n
+        boy = len(self.ts)
+        if son <= boy:
+            return (slice(self.bas, son),)
+        return slice(self.bas, boy), slice(0, son - boy)
+
+    def _ara(self, ts, taraf):
+        """ Mantıksal dizide ``searchsorted`` (O(log n)). """
+        parcalar = self._parcalar()
+        if len(parcalar) == 2:
+            ilk = self.ts[parcalar[0]]
+            # İlk parçadaki her değer ikinci parçadakilerden küçük ya da eşittir
+            if (ts > ilk[-1]) if taraf == "left" else (ts >= ilk[-1]):
+                return len(ilk) + int(np.searchsorted(self.ts[parcalar[1]], ts, taraf))
+        return int(np.searchsorted(self.ts[parcalar[0]], ts, taraf))
+
+    def aralik(self, baslangic=None, bitis=None):
+        """ [baslangic, bitis] aralığındaki (ts, deger) dizilerinin kopyası. """
+        i = 0 if baslangic is None else self._ara(baslangic, "left")
+        j = self.n if bitis is None else self._ara(bitis, "right")
+        if j <= i:
+            return self.ts[:0].copy(), self.deger[:0].copy()
+        idx = (self.bas + np.arange(i, j)) % len(self.ts)
+        return self.ts[idx], self.deger[idx]
+
+    def bellek(self):
+        return self.ts.nbytes + self.deger.nbytes
+
+
+class TimeSeriesStore:
+    """
+    ``(cp_id, connector_id, measurand)`` anahtarlı seri deposu.
+
+    ``METER_DEPOSU.meter_values_ekle(self.id, connector_id, meter_value)``
+    on_meter_values handler'ından çağrılır ve tüm örnekleri kaydeder.
+    """
+
+    def __init__(self, kapasite=8192, baslangic_kapasitesi=64, deger_tipi=np.float64):
+        self.kapasite = kapasite
+        self.baslangic_kapasitesi = baslangic_kapasitesi
+        self.deger_tipi = np.dtype(deger_tipi)
+        self.seriler = {}
+        self.eklenen = 0
+        self.gecersiz = 0
+
+    @property
+    def ornek_basina_bayt(self):
+        return ORNEK_BASINA_BAYT[self.deger_tipi]
+
+    def seri(self, cp_id, connector_id, measurand, olustur=False):
+        anahtar = (cp_id, connector_id, measurand)
+        s = self.seriler.get(anahtar)
+        if s is None and olustur:
+            s = self.seriler[anahtar] = Seri(self.kapasite, self.baslangic_kapasitesi, self.deger_tipi)
+        return s
+
+    def ekle(self, cp_id, connector_id, measurand, ts, deger):
+        self.seri(cp_id, connector_id, measurand, olustur=True).ekle(ts, deger)
+        self.eklenen += 1
+
+    def meter_values_ekle(self, cp_id, connector_id, meter_value):
+        """ Handler'a gelen (snake_case) meter_value listesinin tüm örneklerini ekler. """
+        adet = 0
+        for mv in meter_value:
+            ts = zaman_us(mv.get('timestamp'))
+            for sv in mv.get('sampled_value', ()):
+                try:
+                    deger = float(sv['value'])
+                except (KeyError, TypeError, ValueError):
+                    self.gecersiz += 1
+                    continue
+                self.ekle(cp_id, connector_id, measurand_adi(sv), ts, deger)
+                adet += 1
+        return adet
+
+    def aralik(self, cp_id, connector_id, measurand, baslangic=None, bitis=None):
+        """ (ts_us, deger) NumPy dizileri; seri yoksa boş diziler. """
+        s = self.seri(cp_id, connector_id, measurand)
+        if s is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=self.deger_tipi)
+        return s.aralik(baslangic, bitis)
+
+    def son(self, cp_id, connector_id, measurand):
+        s = self.seri(cp_id, connector_id, measurand)
+        if not s:
+            return None
+        i = s._fiziksel(s.n - 1)
+        return int(s.ts[i]), float(s.deger[i])
+
+    def tuketim(self, cp_id, connector_id, baslangic=None, bitis=None):
+        """ Aralıktaki enerji sayacı farkı (Wh); faturalama için. """
+        _, deger = self.aralik(cp_id, connector_id, ENERJI, baslangic, bitis)
+        if len(deger) < 2:
+            return 0.0
+        return float(deger[-1] - deger[0])
+
+    def anahtarlar(self):
+        return list(self.seriler)
+
+    def bellek(self):
+        """ Tüm tamponların bayt cinsinden boyutu (ayrılmış kapasite dahil). """
+        return sum(s.bellek() for s in self.seriler.values())
+
+    def ozet(self):
+        return {
+            "seri": len(self.seriler),
+            "ornek": sum(len(s) for s in self.seriler.values()),
+            "eklenen": self.eklenen,
+            "gecersiz": self.gecersiz,
+            "uzerine_yazilan": sum(s.uzerine_yazilan for s in self.seriler.values()),
+            "sirasiz": sum(s.sirasiz for s in self.seriler.values()),
+            "bellek_bayt": self.bellek(),
+        }
@@ -0,0 +1,247 @@
+"""
+Çok süreçli CSMS işçi havuzu (worker pool).
+
+Tek asyncio döngüsünde çalışan bir CSMS, bütün şarj noktalarının JSON çözme,
+şema doğrulama ve handler işlerini tek çekirdekte yapar. Bu modül N adet işçi
+süreci başlatır ve 9000 portunu iki yoldan biriyle paylaştırır:
+
+- ``reuseport``: Her işçi kendi soketini SO_REUSEPORT ile aynı porta bağlar,
+  gelen bağlantıları çekirdek (kernel) işçiler arasında dağıtır.
+- ``prefork``: Gözetmen soketi fork'tan önce bir kez açar, işçiler aynı
+  dinleme soketini miras alır (SO_REUSEPORT olmayan sistemler için).
+
+Gözetmen (Supervisor) ölen işçileri yeniden başlatır. Her işçinin sayaçları
+paylaşımlı bellekte kendi satırında tutulur (tek yazar, kilit yok); gözetmen
+bu satırları toplayarak birleşik sayaçları üretir.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+
+from websockets.server import serve
+
+# Paylaşımlı bellekteki her işçi satırının sütunları
+SAYACLAR = ("baglanti_toplam", "baglanti_aktif", "mesaj_gelen", "mesaj_giden", "hata")
+_SUTUN = {ad: i for i, ad in enumerate(SAYACLAR)}
+
+# İşçi içinden erişilen sayaç nesnesi (gözetmen sürecinde None kalır)
+isci_sayaclari = None
+
+
+def reuseport_soketi(host, port, backlog=2048):
+    """ SO_REUSEPORT ile aynı porta birden fazla sürecin bağlanabileceği soket açar. """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def ortak_dinleme_soketi(host, port, backlog=2048):
+    """ Fork öncesi açılan ve tüm işçilerin miras aldığı dinleme soketi. """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+class IsciSayaclari:
+    """ Bir işçinin paylaşımlı sayaç dizisindeki kendi satırı. """
+
+    def __init__(self, dizi, slot):
+        self._dizi = dizi
+        self._taban = slot * len(SAYACLAR)
+
+    def artir(self, ad, n=1):
+        self._dizi[self._taban + _SUTUN[ad]] += n
+
+    def azalt(self, ad, n=1):
+        self._dizi[self._taban + _SUTUN[ad]] -= n
+
+
+class _SayacliBaglanti:
+    """ Websocket'i sarıp gelen/giden mesajları işçi sayaçlarına yazar. """
+
+    def __init__(self, websocket, sayaclar):
+        self._ws = websocket
+        self._sayaclar = sayaclar
+
+    async def recv(self):
+        mesaj = await self._ws.recv()
+        self._sayaclar.artir("mesaj_gelen")
+        return mesaj
+
+    async def send(self, mesaj):
+        await self._ws.send(mesaj)
+        self._sayaclar.artir("mesaj_giden")
+
+    def __getattr__(self, ad):
+        return getattr(self._ws, ad)
+
+
+def _sayacli_handler(handler, sayaclar):
+    async def sarmalayici(websocket, path):
+        sayaclar.artir("baglanti_toplam")
+        sayaclar.artir("baglanti_aktif")
+        try:
+            await handler(_SayacliBaglanti(websocket, sayaclar), path)
+        except Exception:
+            sayaclar.artir("hata")
+            raise
+        finally:
+            sayaclar.azalt("baglanti_aktif")
+    return sarmalayici
+
+
+async def _isci_dongusu(slot, handler, host, port, sock, dizi, serve_kwargs):
+    global isci_sayaclari
+    isci_sayaclari = IsciSayaclari(dizi, slot)
+    if sock is None:
+        sock = reuseport_soketi(host, port)
+
+    loop = asyncio.get_running_loop()
+    durdur = loop.create_future()
+    for sinyal in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sinyal, lambda: durdur.done() or durdur.set_result(None))
+
+    async with serve(_sayacli_handler(handler, isci_sayaclari), sock=sock, **serve_kwargs):
+        logging.info("İşçi-%s hazır (PID: %s)", slot, os.getpid())
+        await durdur
+
+
+def _isci_main(slot, handler, host, port, sock, dizi, serve_kwargs):
+    # Yeniden başlatılan işçi, ölen önceki işçinin açık bağlantılarını devralmaz
+    dizi[slot * len(SAYACLAR) + _SUTUN["baglanti_aktif"]] = 0
+    try:
+        asyncio.run(_isci_dongusu(slot, handler, host, port, sock, dizi, serve_kwargs))
+    except KeyboardInterrupt:
+        pass
+
+
+def _sigterm_kesme(signum, frame):
+    raise KeyboardInterrupt
+
+
+class Supervisor:
+    """
+    İşçi süreçlerini başlatan, izleyen ve sayaçlarını birleştiren gözetmen.
+
+    handler, websockets ``serve`` fonksiyonunun beklediği ``(websocket, path)``
+    imzalı bağlantı fonksiyonudur (örn. csms_server.on_connect). İşçiler fork
+    ile başlatıldığı için handler modül seviyesinde tanımlı olmalıdır.
+    """
+
+    def __init__(self, handler, host='0.0.0.0', port=9000, workers=None, mode='reuseport',
+                 restart_delay=1.0, **serve_kwargs):
+        if mode not in ('reuseport', 'prefork'):
+            raise ValueError(f"Bilinmeyen mod: {mode}")
+        if mode == 'reuseport' and not hasattr(socket, 'SO_REUSEPORT'):
+            logging.warning("SO_REUSEPORT desteklenmiyor, prefork moduna geçiliyor.")
+            mode = 'prefork'
+
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.restart_delay = restart_delay
+        self.serve_kwargs = serve_kwargs
+
+        self._ctx = multiprocessing.get_context('fork')
+        self._dizi = self._ctx.Array('q', self.workers * len(SAYACLAR), lock=False)
+        self._surecler = [None] * self.workers
+        self._yeniden_baslatma = [0] * self.workers
+        self._sock = None
+        self._durduruluyor = False
+
+    def _isci_baslat(self, slot):
+        proc = self._ctx.Process(
+            target=_isci_main,
+            args=(slot, self.handler, self.host, self.port, self._sock, self._dizi, self.serve_kwargs),
+            name=f"csms-isci-{slot}",
+            daemon=True,
+        )
+        proc.start()
+        self._surecler[slot] = proc
+
+    def start(self):
+        """ Tüm işçileri başlatır ve hemen döner. """
+        if self.mode == 'prefork':
+            self._sock = ortak_dinleme_soketi(self.host, self.port)
+        for slot in range(self.workers):
+            self._isci_baslat(slot)
+        logging.info("--- %s işçi başlatıldı (Mod: %s, Port: %s) ---", self.workers, self.mode, self.port)
+
+    def check_workers(self):
+        """ Ölen işçileri yeniden başlatır; yeniden başlatılan işçi sayısını döner. """
+        yeniden = 0
+        for slot, proc in enumerate(self._surecler):
+            if self._durduruluyor or proc is None or proc.is_alive():
+                continue
+            logging.warning("İşçi-%s durdu (Çıkış kodu: %s), yeniden başlatılıyor.", slot, proc.exitcode)
+            proc.join()
+            self._yeniden_baslatma[slot] += 1
+            self._isci_baslat(slot)
+            yeniden += 1
+        return yeniden
+
+    def per_worker(self):
+        """ Her işçinin sayaçlarını ayrı ayrı döner. """
+        n = len(SAYACLAR)
+        return [
+            dict(zip(SAYACLAR, self._dizi[slot * n:(slot + 1) * n]), yeniden_baslatma=self._yeniden_baslatma[slot])
+            for slot in range(self.workers)
+        ]
+
+    def counters(self):
+        """ İşçi sayaçlarını toplayarak tek bir sözlükte birleştirir. """
+        toplam = dict.fromkeys(SAYACLAR, 0)
+        toplam["yeniden_baslatma"] = 0
+        for satir in self.per_worker():
+            for ad, deger in satir.items():
+                toplam[ad] += deger
+        return toplam
+
+    def stop(self, timeout=5.0):
+        """ İşçilere SIGTERM gönderir, kapanmayanları öldürür. """
+        self._durduruluyor = True
+        for proc in self._surecler:
+            if proc is not None and proc.is_alive():
+                proc.terminate()
+        son = time.monotonic() + timeout
+        for proc in self._surecler:
+            if proc is None:
+                continue
+            proc.join(max(0.0, son - time.monotonic()))
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def run(self, report_interval=10.0):
+        """ İşçileri başlatıp Ctrl+C gelene kadar izler (bloklayan ana döngü). """
+        self.start()
+        signal.signal(signal.SIGTERM, _sigterm_kesme)
+        son_rapor = time.monotonic()
+        try:
+            while True:
+                time.sleep(self.restart_delay)
+                self.check_workers()
+                if time.monotonic() - son_rapor >= report_interval:
+                    son_rapor = time.monotonic()
+                    logging.info("BİRLEŞİK SAYAÇLAR: %s", self.counters())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            logging.info("--- İşçi havuzu kapatıldı. Son sayaçlar: %s ---", self.counters())